@@ -0,0 +1,100 @@
+"""
+Micro-benchmark broadcastu: kolikrát za sekundu zvládneme rozeslat drawing_update
+do místnosti o N hráčích.
+
+Porovnává původní cestu (send_json = json.dumps pro každého příjemce) s cestou
+"zakóduj jednou, rozešli stejný buffer" v ConnectionManager.broadcast
+(včetně odeslání writer tasky jednotlivých spojení).
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_broadcast.py
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from outbox import ClientOutbox  # noqa: E402
+from rooms import Player, Room  # noqa: E402
+
+ROOM_SIZES = [2, 5, 10, 20, 50]
+DURATION = 1.0
+
+MESSAGE = {
+    "type": "drawing_update",
+    "data": {"x0": 120.5, "y0": 88.25, "x1": 124.0, "y1": 90.75, "color": "#ff8800", "lineWidth": 5},
+}
+
+
+class FakeWebSocket:
+    """Minimal stand-in recording what would go out on the wire."""
+
+    def __init__(self):
+        self.bytes_sent = 0
+
+    async def send_json(self, data):
+        self.bytes_sent += len(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    async def send_text(self, data):
+        self.bytes_sent += len(data)
+
+    async def send_bytes(self, data):
+        self.bytes_sent += len(data)
+
+
+async def legacy_broadcast(connections, message):
+    async def safe_send(conn):
+        try:
+            await conn.send_json(message)
+        except Exception:
+            pass
+    await asyncio.gather(*[safe_send(c) for c in connections], return_exceptions=True)
+
+
+async def run(room_size: int):
+    manager = main.ConnectionManager()
+    connections = [FakeWebSocket() for _ in range(room_size)]
+    room = Room("BENCH1", "bot0", "Klasika", main.new_stroke_log())
+    manager.rooms["BENCH1"] = room
+    for i, conn in enumerate(connections):
+        outbox = ClientOutbox(conn, f"bot{i}", max_frames=1_000_000)
+        room.add(Player(f"bot{i}", conn, outbox))
+        outbox.start()
+
+    async def queued_broadcast():
+        await manager.broadcast("BENCH1", MESSAGE)
+        # let the per-connection writer tasks drain their queues
+        await asyncio.sleep(0)
+
+    results = {}
+    for name, send in (
+        ("per-connection", lambda: legacy_broadcast(connections, MESSAGE)),
+        ("encode-once", queued_broadcast),
+    ):
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < DURATION:
+            await send()
+            count += 1
+        elapsed = time.perf_counter() - start
+        results[name] = count / elapsed
+    for player in room:
+        player.outbox.stop()
+    return results
+
+
+async def amain():
+    print(f"JSON backend: {main.JSON_BACKEND}")
+    print(f"{'hráčů':>6} | {'broadcast/s (per-conn)':>22} | {'broadcast/s (once)':>18} | {'encodes/s ušetřeno':>18}")
+    for size in ROOM_SIZES:
+        r = await run(size)
+        saved = r["encode-once"] * (size - 1)
+        print(f"{size:>6} | {r['per-connection']:>22.0f} | {r['encode-once']:>18.0f} | {saved:>18.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark komprese odchozích rámců: permessage-deflate (výchozí v uvicornu -
+každý rámec, každé spojení zvlášť, s kontextem mezi rámci) oproti FrameCompressor
+(jen rámce od prahu, jednou na broadcast, viz compression.py).
+
+Simuluje jedno kolo v místnosti s N hráči: tahy kreslíře ~30x za sekundu, dávky
+chatu, pár stavových zpráv, seznam balíčků hostiteli a jedno znovupřipojení
+(game_state_sync + snímek plátna). Měří čas komprese a bajty na drátě celkem
+za všechny příjemce.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_compression.py [--players 16]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate
+from websockets.frames import Frame, Opcode
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compression import FrameCompressor  # noqa: E402
+from strokes import STROKE_BEGIN, STROKE_END, StrokeLog, encode_chunk  # noqa: E402
+
+ROUND_SECONDS = 60
+
+
+def stroke_frame(stroke_id: int, points: int) -> bytes:
+    x, y, flat = random.randint(0, 800), random.randint(0, 600), []
+    for _ in range(points):
+        x += random.randint(-6, 6)
+        y += random.randint(-6, 6)
+        flat += [x, y]
+    return encode_chunk(stroke_id, STROKE_BEGIN | STROKE_END, (0, 0, 0, 5), flat)
+
+
+def round_frames(players: int):
+    """(frame, recipients) of one simulated round, in send order."""
+    names = [f"hráč{i}" for i in range(players)]
+    scores = {name: random.randint(0, 400) for name in names}
+    log = StrokeLog()
+    frames = []
+    for tick in range(ROUND_SECONDS * 30):
+        frame = stroke_frame(tick // 10, random.randint(3, 8))
+        log.append(frame)
+        frames.append((frame, players - 1))
+        if tick % 15 == 0:
+            events = [{"type": "chat_message", "username": random.choice(names), "message": "asi pes?"}]
+            frames.append((json.dumps({"type": "room_batch", "events": events, "scores_delta": {}},
+                                      ensure_ascii=False), players))
+    packages = [f"Balíček {i} - zvířata, sport a věci z domácnosti" for i in range(60)]
+    frames.append((json.dumps({"type": "available_packages", "packages": packages,
+                               "selected_package": packages[0]}, ensure_ascii=False), 1))
+    players_list = [{"username": name, "is_host": i == 0} for i, name in enumerate(names)]
+    frames.append((json.dumps({"type": "game_state_sync", "round": 3, "total_rounds": players,
+                               "artist": names[1], "masked_phrase": "_____ ___ ______ ____ _____",
+                               "scores": scores, "players": players_list, "host": names[0],
+                               "time_left": 40}, ensure_ascii=False), 1))
+    frames.append((log.snapshot(), 1))
+    frames.append((json.dumps({"type": "round_end", "full_phrase": "Žlutý kůň skáče přes plot",
+                               "scores": scores}, ensure_ascii=False), players))
+    return frames
+
+
+def per_message_deflate(frames, players: int):
+    # Každé spojení má vlastní kontext komprese, každý rámec se komprimuje pro každého příjemce
+    connections = [PerMessageDeflate(False, False, 15, 15) for _ in range(players)]
+    wire = 0
+    start = time.perf_counter()
+    for frame, recipients in frames:
+        opcode, data = (Opcode.TEXT, frame.encode("utf-8")) if isinstance(frame, str) else (Opcode.BINARY, frame)
+        for connection in connections[:recipients]:
+            wire += len(connection.encode(Frame(opcode, data)).data)
+    return time.perf_counter() - start, wire
+
+
+def size_aware(frames, compressor: FrameCompressor):
+    wire = 0
+    start = time.perf_counter()
+    for frame, recipients in frames:
+        packed = None
+        if compressor.worth_trying(frame):
+            packed, _ = compressor.compress(frame)
+        if packed is None:
+            packed = frame.encode("utf-8") if isinstance(frame, str) else frame
+        wire += len(packed) * recipients
+    return time.perf_counter() - start, wire
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=16)
+    args = parser.parse_args()
+    random.seed(1)
+
+    frames = round_frames(args.players)
+    raw = sum(len(f.encode("utf-8") if isinstance(f, str) else f) * n for f, n in frames)
+    print(f"{len(frames)} rámců za kolo, {args.players} hráčů, bez komprese {raw / 1024:8.1f} kB")
+    elapsed, wire = per_message_deflate(frames, args.players)
+    print(f"  {'permessage-deflate':<24} {elapsed * 1000:7.1f} ms  {wire / 1024:8.1f} kB")
+    for min_size in (256, 1024, 4096):
+        for level in (1, 6):
+            elapsed, wire = size_aware(frames, FrameCompressor(min_size=min_size, level=level))
+            print(f"  {f'od {min_size} B, úroveň {level}':<24} {elapsed * 1000:7.1f} ms  {wire / 1024:8.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Zátěžový test datové vrstvy: latence WebSocketu během bombardování žebříčků.
+
+Spustí backend jako samostatný proces nad dočasnou databází s historií her,
+v jedné místnosti nechá kreslíře posílat tahy (30 Hz) a měří latenci doručení
+druhému hráči - nejdřív bez zátěže, pak souběžně s vlákny, která v kole volají
+/api/leaderboard/* a /api/games. Pokud dotazy neběží na event loopu, latence
+zůstane v obou fázích zhruba stejná.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_db_load.py [--games 100000] [--seconds 5] [--threads 8]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import websockets  # noqa: E402
+
+from db import Database  # noqa: E402
+from strokes import STROKE_BEGIN, STROKE_END, encode_chunk  # noqa: E402
+
+ENDPOINTS = [
+    "/api/leaderboard/top?limit=50",
+    "/api/leaderboard/aggregate?limit=50",
+    "/api/leaderboard/ranking?limit=50",
+    "/api/games?limit=200",
+    "/api/leaderboard/player/hrac7",
+]
+
+
+def seed(path: Path, games: int):
+    database = Database(path)
+    players = [f"hrac{i}" for i in range(500)]
+    batch = []
+    for i in range(games):
+        scores = {p: random.randint(0, 400) for p in random.sample(players, random.randint(2, 8))}
+        batch.append(("SEED01", time.time() - games + i, scores))
+        if len(batch) == 5000:
+            database.write_sync(batch)
+            batch = []
+    if batch:
+        database.write_sync(batch)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def hammer(base: str, stop: threading.Event, counter: list):
+    while not stop.is_set():
+        for endpoint in ENDPOINTS:
+            with urllib.request.urlopen(base + endpoint) as response:
+                response.read()
+            counter[0] += 1
+
+
+def hammer_process(base: str, threads: int, stop, total):
+    # Vlastní proces, aby HTTP klienti nesoupeřili o GIL s měřicí smyčkou
+    local_stop = threading.Event()
+    counters = [[0] for _ in range(threads)]
+    workers = [threading.Thread(target=hammer, args=(base, local_stop, c), daemon=True) for c in counters]
+    for w in workers:
+        w.start()
+    stop.wait()
+    local_stop.set()
+    for w in workers:
+        w.join()
+    total.value = sum(c[0] for c in counters)
+
+
+async def recv_json(ws, message_type):
+    while True:
+        message = await ws.recv()
+        if isinstance(message, str):
+            data = json.loads(message)
+            if data.get("type") == message_type:
+                return data
+
+
+async def measure(url: str, game_code: str, seconds: float):
+    artist = await websockets.connect(f"{url}/{game_code}/artist")
+    await recv_json(artist, "available_packages")
+    guesser = await websockets.connect(f"{url}/{game_code}/guesser")
+    await recv_json(guesser, "player_joined")
+    await artist.send(json.dumps({"type": "start_game"}))
+    words = (await recv_json(artist, "select_phrase_options"))["words"]
+    await artist.send(json.dumps({"type": "select_phrase", "phrase": [v[0] for v in words.values()]}))
+    await recv_json(guesser, "phrase_selected")
+
+    sent = {}
+    latencies = []
+
+    async def receive():
+        while True:
+            message = await guesser.recv()
+            if isinstance(message, bytes):
+                (stroke_id,) = struct.unpack_from("<H", message, 2)
+                start = sent.pop(stroke_id, None)
+                if start is not None:
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+    receiver = asyncio.create_task(receive())
+    stroke_id = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        stroke_id = (stroke_id + 1) & 0xFFFF
+        points = [random.randint(0, 800) for _ in range(8)]
+        sent[stroke_id] = time.perf_counter()
+        await artist.send(encode_chunk(stroke_id, STROKE_BEGIN | STROKE_END, (0, 0, 0, 4), points))
+        await asyncio.sleep(1 / 30)
+    await asyncio.sleep(0.2)
+    receiver.cancel()
+    await artist.close()
+    await guesser.close()
+    return latencies
+
+
+def report(name: str, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<24} frames={len(latencies):>5}  p50={p50:6.2f} ms  p99={p99:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Seeding {args.games} games...")
+        seed(Path(tmp) / "games.db", args.games)
+
+        port = free_port()
+        env = dict(os.environ, PYTHONPATH=str(BACKEND_DIR))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=tmp, env=env,
+        )
+        try:
+            wait_for_port(port)
+            url = f"ws://127.0.0.1:{port}/ws"
+            report("idle", asyncio.run(measure(url, "BENCH1", args.seconds)))
+
+            stop = multiprocessing.Event()
+            total = multiprocessing.Value("i", 0)
+            load = multiprocessing.Process(target=hammer_process,
+                                           args=(f"http://127.0.0.1:{port}", args.threads, stop, total))
+            load.start()
+            started = time.perf_counter()
+            latencies = asyncio.run(measure(url, "BENCH2", args.seconds))
+            stop.set()
+            load.join()
+            elapsed = time.perf_counter() - started
+            report(f"leaderboards x{args.threads}", latencies)
+            print(f"HTTP requests served: {total.value} ({total.value / elapsed:.0f}/s)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Micro-benchmark zředění tahů pro pomalé klienty (downsample.py): bajty a čas
+CPU na tah při přeposílání každého rámce oproti sloučení úseků po 1/RATE_HZ
+sekundy a zjednodušení (RDP) - čistý Python (strokes.simplify_points po
+tazích) a NumPy (simplify_polylines nad celým bufferem naráz, od NUMPY_MIN_POINTS).
+
+Simuluje kreslíře: plynulé tahy s chvěním ruky, rámec ~30x za sekundu.
+Ověří i to, že obě implementace RDP dávají stejný výsledek.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_downsample.py [--strokes 400] [--rate 6] [--tolerance 1.5]
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import strokes  # noqa: E402
+from downsample import StrokeBuffer  # noqa: E402
+from strokes import STROKE_BEGIN, STROKE_END, encode_chunk, simplify_points, simplify_polylines  # noqa: E402
+
+FRAME_HZ = 30
+
+
+def stroke_frames(strokes: int):
+    """Stroke frames of a simulated artist, each tagged with its send time."""
+    frames = []
+    now = 0.0
+    for stroke_id in range(1, strokes + 1):
+        x, y = random.uniform(100, 700), random.uniform(100, 500)
+        heading = random.uniform(0, 2 * math.pi)
+        turn = random.uniform(-0.08, 0.08)
+        points = []
+        for _ in range(random.randint(40, 300)):
+            heading += turn + random.gauss(0, 0.05)
+            x += 3 * math.cos(heading) + random.gauss(0, 0.4)
+            y += 3 * math.sin(heading) + random.gauss(0, 0.4)
+            points += [round(x), round(y)]
+        offset = 0
+        while offset < len(points):
+            size = 2 * random.randint(4, 8)
+            flags = (STROKE_BEGIN if offset == 0 else 0) | (STROKE_END if offset + size >= len(points) else 0)
+            frames.append((now, encode_chunk(stroke_id, flags, (0, 0, 0, 5), points[offset:offset + size])))
+            offset += size
+            now += 1 / FRAME_HZ
+        now += 0.3  # pauza mezi tahy
+    return frames
+
+
+def batches(frames, rate: float):
+    """Frames grouped by the flush they fall into at `rate` Hz."""
+    out, current, deadline = [], [], None
+    for sent, frame in frames:
+        if deadline is not None and sent >= deadline:
+            out.append(current)
+            current, deadline = [], None
+        if deadline is None:
+            deadline = sent + 1 / rate
+        current.append(frame)
+    if current:
+        out.append(current)
+    return out
+
+
+def run_buffer(groups, tolerance: float):
+    sent = 0
+    start = time.perf_counter()
+    for group in groups:
+        buffer = StrokeBuffer()
+        for frame in group:
+            buffer.add(frame)
+        sent += len(buffer.take(tolerance))
+    return time.perf_counter() - start, sent
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strokes", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=6.0)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args()
+    random.seed(1)
+
+    frames = stroke_frames(args.strokes)
+    groups = batches(frames, args.rate)
+    raw = sum(len(frame) for _, frame in frames)
+    per = 1e6 / args.strokes
+    print(f"{args.strokes} tahů, {len(frames)} rámců ({FRAME_HZ} Hz) -> {len(groups)} rámců ({args.rate:g} Hz), "
+          f"tolerance {args.tolerance} px")
+    print(f"  {'každý rámec':<28} {raw / args.strokes:7.1f} B/tah")
+
+    elapsed, sent = run_buffer(groups, 0)
+    print(f"  {'jen sloučení úseků':<28} {sent / args.strokes:7.1f} B/tah  {elapsed * per:7.1f} µs/tah")
+    elapsed, sent = run_buffer(groups, args.tolerance)
+    print(f"  {'sloučení + RDP':<28} {sent / args.strokes:7.1f} B/tah  {elapsed * per:7.1f} µs/tah")
+    if strokes.np is None:
+        print("  NumPy není nainstalovaný")
+        return
+
+    # Samotné RDP nad dlouhými tahy (např. zhuštění celého kola)
+    polylines = []
+    for group in groups:
+        buffer = StrokeBuffer()
+        for frame in group:
+            buffer.add(frame)
+        polylines.extend(stroke[3] for stroke in buffer._merge())
+    whole = [sum(polylines[i:i + 40], []) for i in range(0, len(polylines), 40)]
+    for name, data in (("úseky flushů", polylines), ("dlouhé tahy", whole)):
+        start = time.perf_counter()
+        expected = [simplify_points(points, args.tolerance) for points in data]
+        python = time.perf_counter() - start
+        start = time.perf_counter()
+        result = simplify_polylines(data, args.tolerance)
+        vectorized = time.perf_counter() - start
+        points = sum(len(p) for p in data) // 2
+        print(f"  RDP {name:<14} {points:7d} bodů: Python {python * 1000:6.1f} ms, NumPy {vectorized * 1000:6.1f} ms"
+              f", stejné: {result == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark restartu serveru: jak dlouho trvá drain_rooms (snímek všech
+rozehraných her na disk) a restore_rooms (obnova po startu) pro tisíce místností.
+
+Drain běží v obsluze SIGTERM dřív, než uvicorn zavře spojení, a restore při
+startu dřív, než server přijme první spojení - obojí blokuje smyčku událostí.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_drain.py [--rooms 5000] [--players 8]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from rooms import PHASE_DRAWING, PHASE_ROUND_OVER, Room  # noqa: E402
+
+
+def fill_rooms(count: int, players: int):
+    package = main.word_store.get(main.word_store.default_name)
+    categories = list(package.categories.values())
+    for i in range(count):
+        room = Room(f"R{i:05d}", "hrac0", package.name, main.new_stroke_log())
+        room.scores = {f"hrac{p}": random.randint(0, 300) for p in range(players)}
+        room.current_round = random.randint(1, players)
+        room.total_rounds = players
+        room.current_artist = f"hrac{room.current_round - 1}"
+        if i % 4:
+            room.selected_phrase = [random.choice(words) for words in categories]
+            room.phrase_matcher = main.PhraseMatcher(room.selected_phrase, package.normalized)
+            room.phrase_matcher.guess(main.normalize_word(room.selected_phrase[0]))
+            main.set_phase(room, PHASE_DRAWING, random.uniform(1, 90), main.end_round)
+        else:
+            main.set_phase(room, PHASE_ROUND_OVER, random.uniform(1, 5), main.start_round)
+        main.manager.rooms[room.game_code] = room
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        main.DRAIN_SETTINGS["SNAPSHOT_DIR"] = tmp
+        fill_rooms(args.rooms, args.players)
+        start = time.perf_counter()
+        main.drain_rooms()
+        drain = time.perf_counter() - start
+        size = sum(path.stat().st_size for path in Path(tmp).glob("rooms-*.json"))
+
+        main.manager.rooms.clear()
+        main.manager.draining = False
+        start = time.perf_counter()
+        restored = main.restore_rooms()
+        restore = time.perf_counter() - start
+    print(f"{args.rooms} místností po {args.players} hráčích: drain {drain * 1000:7.1f} ms, "
+          f"snímek {size / 1024:7.1f} kB, obnova {restored} místností {restore * 1000:7.1f} ms")
+    await main.timer_wheel.close()
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=5000)
+    parser.add_argument("--players", type=int, default=8)
+    args = parser.parse_args()
+    random.seed(1)
+    # Časovače fází potřebují běžící smyčku událostí
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark galerie: cena vykreslení náhledu kola a co by udělala se smyčkou
+událostí, kdyby se kreslilo přímo v ní, oproti poolu procesů (gallery.GalleryRenderer).
+
+Měří:
+  - čas render_thumbnail a velikost WebP/PNG pro různě velké záznamy kola,
+  - nejhorší zpoždění smyčky (tik 10 ms), když konec kola nastane v 20 místnostech naráz.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_gallery.py
+"""
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gallery import GalleryRenderer, render_thumbnail  # noqa: E402
+from strokes import STROKE_BEGIN, STROKE_END, StrokeLog, encode_chunk  # noqa: E402
+
+ROUNDS_AT_ONCE = 20
+TICK = 0.01
+
+
+def round_snapshot(strokes: int, points: int = 60) -> bytes:
+    log = StrokeLog()
+    for stroke_id in range(strokes):
+        x, y = random.uniform(0, 800), random.uniform(0, 600)
+        flat = []
+        for _ in range(points):
+            x = min(800.0, max(0.0, x + random.uniform(-12, 12)))
+            y = min(600.0, max(0.0, y + random.uniform(-12, 12)))
+            flat += [x, y]
+        style = (random.randrange(256), random.randrange(256), random.randrange(256), random.choice((2, 5, 12)))
+        log.append(encode_chunk(stroke_id, STROKE_BEGIN | STROKE_END, style, flat))
+    return log.snapshot()
+
+
+async def worst_lag(work) -> float:
+    """Run `work` while a 10 ms ticker measures how late it wakes up."""
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lag = max(lag, time.perf_counter() - start - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK)
+    await work()
+    done.set()
+    await task
+    return lag
+
+
+async def compare(snapshot: bytes):
+    async def inline():
+        for _ in range(ROUNDS_AT_ONCE):
+            render_thumbnail(snapshot, 320, 240)
+
+    renderer = GalleryRenderer(pool_size=1, max_pending=ROUNDS_AT_ONCE)
+    renderer.start()
+    # Rozjetí procesu poolu se neměří
+    await renderer.collect([renderer.submit(snapshot, 0, "", "")])
+
+    async def pooled():
+        jobs = [renderer.submit(snapshot, i, "", "") for i in range(ROUNDS_AT_ONCE)]
+        await renderer.collect(jobs)
+
+    inline_lag = await worst_lag(inline)
+    pooled_lag = await worst_lag(pooled)
+    renderer.close()
+    print(f"{ROUNDS_AT_ONCE} konců kola naráz: nejhorší zpoždění smyčky "
+          f"inline {inline_lag * 1000:7.1f} ms, pool {pooled_lag * 1000:5.1f} ms")
+
+
+def main():
+    random.seed(1)
+    for strokes in (10, 50, 200):
+        snapshot = round_snapshot(strokes)
+        start = time.perf_counter()
+        webp = render_thumbnail(snapshot, 320, 240, "webp")
+        webp_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        png = render_thumbnail(snapshot, 320, 240, "png")
+        png_ms = (time.perf_counter() - start) * 1000
+        print(f"{strokes:>4} tahů ({len(snapshot) / 1024:6.1f} kB záznamu): "
+              f"WebP {webp_ms:6.1f} ms {len(webp[0]) / 1024:5.1f} kB, PNG {png_ms:6.1f} ms {len(png[0]) / 1024:5.1f} kB")
+    asyncio.run(compare(round_snapshot(50)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark vyhodnocení tipů: kolik tipů za sekundu zvládne check_guess.
+
+Porovnává původní cestu (při každém tipu znovu normalizovat všechna slova fráze
+a rozdělovat maskovanou frázi) s PhraseMatcher, který si normalizovaná slova
+zaindexuje jednou za kolo. Tipy jsou většinou špatné, jako ve skutečné hře.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_guess.py
+"""
+import random
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from rooms import Room  # noqa: E402
+
+DURATION = 1.0
+PHRASES = [
+    ["Žlutý", "kůň", "skáče přes plot"],
+    ["Ospalý", "dědeček", "čte noviny u krbu"],
+    ["Zelená", "žába", "hraje na kytaru"],
+]
+GUESSES = ["kun", "pes", "krb", "noviny", "zaba", "kytara", "Dědeček", "xyz", "skace", "ŽLUTÝ", "ahoj", "plot"]
+
+
+def legacy_normalize(word: str) -> str:
+    nfkd_form = unicodedata.normalize('NFD', word)
+    only_ascii = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
+    return only_ascii.strip().lower()
+
+
+def legacy_state(phrase):
+    masked_parts = []
+    for i, word in enumerate(phrase):
+        if i == len(phrase) - 1:
+            masked_parts.extend(["_" * len(w) for w in word.split()])
+        else:
+            masked_parts.append("_" * len(word))
+    return {
+        "selected_phrase": phrase,
+        "masked_phrase": " ".join(masked_parts),
+        "activity_words": phrase[-1].split(),
+        "revealed_activity_words": [False] * len(phrase[-1].split()),
+    }
+
+
+def legacy_check_guess(game_state, guess_normalized):
+    revealed_phrase_list = game_state["masked_phrase"].split()
+    selected_phrase = game_state["selected_phrase"]
+    for i in range(len(selected_phrase) - 1):
+        word = selected_phrase[i]
+        if legacy_normalize(word) == guess_normalized and revealed_phrase_list[i].startswith("_"):
+            revealed_phrase_list[i] = word
+            game_state["masked_phrase"] = " ".join(revealed_phrase_list)
+            return True, word
+    activity_words = game_state["activity_words"]
+    revealed_activity = game_state["revealed_activity_words"]
+    activity_start_idx = len(selected_phrase) - 1
+    for j, activity_word in enumerate(activity_words):
+        if legacy_normalize(activity_word) == guess_normalized and not revealed_activity[j]:
+            revealed_phrase_list[activity_start_idx + j] = activity_word
+            revealed_activity[j] = True
+            game_state["masked_phrase"] = " ".join(revealed_phrase_list)
+            return True, activity_word
+    return False, ""
+
+
+def matcher_state(phrase):
+    room = Room("BENCH1", "hrac", "Klasika", main.new_stroke_log())
+    room.selected_phrase = phrase
+    room.phrase_matcher = main.PhraseMatcher(phrase)
+    room.masked_phrase = room.phrase_matcher.masked_phrase
+    return room
+
+
+def run(make_state, normalize, check):
+    random.seed(1)
+    guesses = [random.choice(GUESSES) for _ in range(10_000)]
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        state = make_state(PHRASES[count % len(PHRASES)])
+        for guess in guesses[:200]:
+            check(state, normalize(guess))
+        count += 200
+        guesses.append(guesses.pop(0))
+    return count / (time.perf_counter() - start)
+
+
+def bench():
+    legacy = run(legacy_state, legacy_normalize, legacy_check_guess)
+    matcher = run(matcher_state, main.normalize_word, main.check_guess)
+    print(f"{'legacy check_guess':<22} {legacy:>12.0f} tipů/s")
+    print(f"{'PhraseMatcher':<22} {matcher:>12.0f} tipů/s  ({matcher / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark historie her: celá historie jednou odpovědí (query_games +
+JSON) oproti stránkám podle klíče (query_games_ndjson, jak je čte /api/games/stream).
+
+Měří čas a špičku paměti (tracemalloc) pro N her a cenu jedné stránky hluboko
+v historii: keyset (id < kurzor) vs. OFFSET.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_history.py [--games 100000]
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db import Database, query_games, query_games_ndjson  # noqa: E402
+
+PAGE = 500
+
+
+def seed(path: Path, games: int) -> Database:
+    database = Database(path)
+    players = [f"hrac{i}" for i in range(1000)]
+    start = time.time() - games * 60
+    batch = []
+    for i in range(games):
+        batch.append((f"G{i:06d}", start + i * 60, {p: random.randint(0, 500) for p in random.sample(players, 4)}))
+        if len(batch) == 5000:
+            database.write_sync(batch)
+            batch = []
+    if batch:
+        database.write_sync(batch)
+    return database
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = seed(Path(tmp) / "games.db", args.games)
+        conn = database._connect()
+
+        def all_at_once():
+            return len(json.dumps(query_games(conn, args.games)).encode("utf-8"))
+
+        def streamed():
+            size, cursor = 0, None
+            while True:
+                text, cursor, count = query_games_ndjson(conn, PAGE, cursor)
+                size += len(text.encode("utf-8"))
+                if count < PAGE:
+                    return size
+
+        print(f"{args.games} her")
+        for name, fn in (("jedna odpověď", all_at_once), (f"stream po {PAGE}", streamed)):
+            elapsed, peak, size = measure(fn)
+            print(f"  {name:<16} {elapsed:6.2f} s  špička {peak / 2 ** 20:7.1f} MB  odesláno {size / 2 ** 20:6.1f} MB")
+
+        deep = args.games - PAGE * 2
+        for name, sql, arg in (("keyset", "SELECT * FROM games WHERE id < ? ORDER BY id DESC LIMIT ?", PAGE * 2),
+                               ("OFFSET", "SELECT * FROM games ORDER BY id DESC LIMIT ? OFFSET ?", deep)):
+            start = time.perf_counter()
+            for _ in range(20):
+                params = (arg, PAGE) if name == "keyset" else (PAGE, arg)
+                conn.execute(sql, params).fetchall()
+            print(f"  stránka {PAGE} her na konci historie ({name}): {(time.perf_counter() - start) / 20 * 1000:6.2f} ms")
+        conn.close()
+        database._write_conn.close()
+
+
+if __name__ == "__main__":
+    main()
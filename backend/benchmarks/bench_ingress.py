@@ -0,0 +1,68 @@
+"""
+Micro-benchmark vstupní brány zpráv (ingress.Ingress): kolik stojí platná zpráva
+oproti holému json.loads a kolik odmítnutí při zaplavení - vyčerpaný bucket,
+neznámý typ a nevalidní JSON se mají zahodit bez parsování.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_ingress.py
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingress import Ingress, IngressRejected  # noqa: E402
+
+N = 200_000
+UNLIMITED = (1e12, 1e12)
+LIMITS = {kind: UNLIMITED for kind in ("guess", "drawing_data", "select_phrase", "stroke_frame")}
+
+GUESS = json.dumps({"type": "guess", "guess": "Žlutý kůň"})
+DRAWING = json.dumps({"type": "drawing_data", "data": {
+    "x0": 0.1, "y0": 0.2, "x1": 0.3, "y1": 0.4, "color": "#000000", "lineWidth": 5}})
+UNKNOWN = json.dumps({"type": "hack", "payload": "x" * 2000})
+BROKEN = '{"type": "guess", "guess": ' + "[" * 2000
+
+
+def us_per_call(fn, n: int = N) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def gate(limits=LIMITS) -> Ingress:
+    # Porušení se neomezují, aby odmítnutí šlo měřit ve smyčce
+    return Ingress(limits, UNLIMITED, 8 * 1024, 64 * 1024)
+
+
+def main():
+    ingress = gate()
+    for name, text in (("guess", GUESS), ("drawing_data", DRAWING)):
+        bare = us_per_call(lambda: json.loads(text))
+        gated = us_per_call(lambda: ingress.text(text))
+        print(f"{name:<22} json.loads {bare:6.2f} µs   ingress {gated:6.2f} µs")
+
+    print(f"{'neznámý typ (2 kB)':<22} json.loads {us_per_call(lambda: json.loads(UNKNOWN)):6.2f} µs   "
+          f"ingress {us_per_call(lambda: ingress.text(UNKNOWN)):6.2f} µs")
+    print(f"{'rozbitý JSON':<22} ingress {us_per_call(lambda: ingress.text(BROKEN)):6.2f} µs")
+
+    limited = gate(dict(LIMITS, guess=(5, 10)))
+    print(f"{'guess nad limit':<22} ingress {us_per_call(lambda: limited.text(GUESS)):6.2f} µs")
+
+    # Zaplavení s výchozím rozpočtem porušení: kolik zpráv projde, než se spojení zavře
+    flood = Ingress(dict(LIMITS, guess=(5, 10)), (2, 40), 8 * 1024, 64 * 1024)
+    passed = sent = 0
+    try:
+        while True:
+            sent += 1
+            if flood.text(GUESS) is not None:
+                passed += 1
+    except IngressRejected as e:
+        print(f"záplava tipů: prošlo {passed} z {sent}, pak zavřeno ({e.code})")
+
+
+if __name__ == "__main__":
+    main()
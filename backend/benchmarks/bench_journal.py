@@ -0,0 +1,110 @@
+"""
+Micro-benchmark záznamu her (journal.py): cena jednoho záznamu na horké cestě
+(GameJournal.record - jen přidání do bufferu) oproti přímému zápisu do souboru
+na každou událost, a rychlost čtení záznamu po blocích pro /replay.
+
+Simuluje N souběžných her, každá posílá rámce tahů ~30x za sekundu a občas tip.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_journal.py [--games 200] [--seconds 60]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from journal import (EVENT_GUESS, EVENT_STROKES, RECORD, JournalReader, JournalWriter,  # noqa: E402
+                     record_to_ndjson)
+from strokes import STROKE_BEGIN, STROKE_END, encode_chunk  # noqa: E402
+
+
+def events(games: int, seconds: int):
+    """(game, kind, payload) in send order."""
+    out = []
+    for tick in range(seconds * 30):
+        for game in range(games):
+            flat = [random.randint(0, 800) for _ in range(random.randint(6, 16))]
+            out.append((game, EVENT_STROKES, encode_chunk(tick // 10, STROKE_BEGIN | STROKE_END, (0, 0, 0, 5), flat)))
+            if tick % 15 == 0:
+                out.append((game, EVENT_GUESS, b'{"username":"hrac","guess":"asi pes?","correct":false,"word":null}'))
+    return out
+
+
+def direct_writes(directory: Path, stream) -> float:
+    files = {}
+    start = time.perf_counter()
+    for game, kind, payload in stream:
+        f = files.get(game)
+        if f is None:
+            f = files[game] = open(directory / f"direct-{game}", "ab")
+        f.write(RECORD.pack(kind, 0, len(payload)) + payload)
+        f.flush()
+    elapsed = time.perf_counter() - start
+    for f in files.values():
+        f.close()
+    return elapsed
+
+
+async def buffered(directory: Path, stream, games: int):
+    writer = JournalWriter(directory)
+    writer.start()
+    journals = [writer.open(f"G{game:04d}") for game in range(games)]
+    start = time.perf_counter()
+    for game, kind, payload in stream:
+        journals[game].record(kind, payload)
+    hot = time.perf_counter() - start
+    start = time.perf_counter()
+    for game, journal in enumerate(journals):
+        await writer.finish(journal, game)
+    finish = time.perf_counter() - start
+    await writer.close()
+    return hot, finish, writer
+
+
+def replay(path: Path):
+    reader = JournalReader(path)
+    records = 0
+    start = time.perf_counter()
+    while True:
+        block = reader.read_block()
+        if block is None:
+            break
+        for record in block:
+            record_to_ndjson(*record)
+            records += 1
+    reader.close()
+    return records, time.perf_counter() - start
+
+
+async def run(args):
+    stream = events(args.games, args.seconds)
+    size = sum(len(payload) + RECORD.size for _, _, payload in stream)
+    print(f"{len(stream)} událostí, {args.games} her, {size / 1024:8.1f} kB nekomprimovaně")
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed = direct_writes(Path(tmp), stream)
+        print(f"  {'zápis na událost':<24} {elapsed * 1000:8.1f} ms  {elapsed / len(stream) * 1e6:6.2f} µs/událost")
+        hot, finish, writer = await buffered(Path(tmp), stream, args.games)
+        print(f"  {'GameJournal.record':<24} {hot * 1000:8.1f} ms  {hot / len(stream) * 1e6:6.2f} µs/událost"
+              f"  (dopsání a přejmenování {finish * 1000:.1f} ms)")
+        on_disk = sum(writer.path(game).stat().st_size for game in range(args.games))
+        print(f"  na disku {on_disk / 1024:8.1f} kB")
+        records, elapsed = replay(writer.path(0))
+        print(f"  čtení jedné hry: {records} záznamů za {elapsed * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--seconds", type=int, default=60)
+    args = parser.parse_args()
+    random.seed(1)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
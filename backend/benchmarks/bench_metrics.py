@@ -0,0 +1,75 @@
+"""
+Micro-benchmark režie metrik: cena jednoho inc()/observe(), rozeslání rámce
+do místnosti s měřením a bez něj a vykreslení /api/metrics.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_metrics.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from metrics import FANOUT_BUCKETS, Registry  # noqa: E402
+from rooms import Player, Room  # noqa: E402
+from strokes import StrokeLog  # noqa: E402
+
+N = 500_000
+ROOM_SIZES = [2, 8, 32]
+
+
+class NullOutbox:
+    __slots__ = ()
+
+    def push(self, frame, priority=1):
+        return True
+
+
+def ns_per_call(fn, n: int = N) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    registry = Registry()
+    counter = registry.counter("c_total", "c", "type", ("guess", "select_phrase", "start_game"))
+    plain = registry.counter("p_total", "p")
+    histogram = registry.histogram("h_seconds", "h", FANOUT_BUCKETS)
+    baseline = ns_per_call(lambda: None)
+    print(f"prázdné volání          {baseline:7.0f} ns")
+    print(f"Counter.inc()           {ns_per_call(plain.inc) - baseline:7.0f} ns")
+    print(f"Counter.inc(štítek)     {ns_per_call(lambda: counter.inc(value='guess')) - baseline:7.0f} ns")
+    print(f"Counter.inc(neznámý)    {ns_per_call(lambda: counter.inc(value='xyz')) - baseline:7.0f} ns")
+    print(f"Histogram.observe()     {ns_per_call(lambda: histogram.observe(0.0003)) - baseline:7.0f} ns")
+
+    for size in ROOM_SIZES:
+        room = Room("BENCH1", "hrac0", "Klasika", StrokeLog())
+        for i in range(size):
+            room.add(Player(f"hrac{i}", object(), NullOutbox()))
+
+        def plain_broadcast():
+            for player in room.players.values():
+                player.outbox.push(b"frame", 1)
+
+        def measured_broadcast():
+            start = time.perf_counter()
+            for player in room.players.values():
+                player.outbox.push(b"frame", 1)
+            histogram.observe(time.perf_counter() - start)
+
+        bare = ns_per_call(plain_broadcast, N // size)
+        measured = ns_per_call(measured_broadcast, N // size)
+        print(f"broadcast {size:>3} hráčů    {bare:7.0f} ns -> {measured:7.0f} ns s měřením "
+              f"(+{(measured - bare) / bare * 100:.0f} %)")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        registry.render()
+    print(f"render()                {(time.perf_counter() - start) * 1000:7.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Micro-benchmark stavu místnosti: paměť na místnost a cena připojení/odchodu hráče
+v závislosti na velikosti místnosti.
+
+Porovnává původní slovník game_state (seznam hráčů jako slovníků, paralelní seznam
+spojení, lineární hledání) s Room/Player ze rooms.py (slotted třídy, indexy
+username -> Player a websocket -> Player). "výběr fráze" je rozeslání maskované
+fráze všem kromě kreslíře - dřív vnořená smyčka přes spojení a hráče.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_rooms.py
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rooms import Player, Room  # noqa: E402
+from strokes import StrokeLog  # noqa: E402
+
+ROOM_SIZES = [2, 8, 32, 128]
+ROOMS_FOR_MEMORY = 2000
+DURATION = 0.5
+
+
+class FakeSocket:
+    __slots__ = ()
+
+
+# --- původní model ---------------------------------------------------------
+
+def legacy_new_room(host):
+    return {
+        "players": [], "scores": {}, "current_round": 0, "total_rounds": 3,
+        "current_artist": None, "selected_phrase": [], "masked_phrase": "", "phrase_matcher": None,
+        "host": host, "selected_package": "Klasika", "game_started": False,
+        "stroke_log": StrokeLog(), "legacy_stroke_id": 0, "departed_scores": {},
+    }
+
+
+def legacy_join(connections, state, outboxes, username, websocket):
+    if username in [p["username"] for p in state["players"]]:
+        return False
+    outboxes[websocket] = object()
+    connections.append(websocket)
+    state["players"].append({"username": username, "websocket": websocket})
+    state["scores"][username] = 0
+    return True
+
+
+def legacy_leave(connections, state, outboxes, username, websocket):
+    connections[:] = [conn for conn in connections if conn != websocket]
+    outboxes.pop(websocket, None)
+    state["players"] = [p for p in state["players"] if p["username"] != username]
+    state["scores"].pop(username, None)
+
+
+def legacy_lookup(state, username):
+    for player in state["players"]:
+        if player["username"] == username:
+            return player["websocket"]
+    return None
+
+
+def legacy_skip_artist(connections, state, artist):
+    sent = 0
+    for connection in connections:
+        is_artist = False
+        for player in state["players"]:
+            if player["websocket"] == connection and player["username"] == artist:
+                is_artist = True
+                break
+        if not is_artist:
+            sent += 1
+    return sent
+
+
+# --- Room ------------------------------------------------------------------
+
+def room_join(room, username, websocket):
+    if username in room:
+        return False
+    room.add(Player(username, websocket, object()))
+    room.scores[username] = 0
+    return True
+
+
+def room_leave(room, websocket):
+    player = room.remove(websocket)
+    room.scores.pop(player.username, None)
+
+
+def room_skip_artist(room, artist_socket):
+    sent = 0
+    for player in room.players.values():
+        if player.websocket is not artist_socket:
+            sent += 1
+    return sent
+
+
+def rate(fn) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def bench_size(size: int):
+    names = [f"hrac{i}" for i in range(size)]
+    sockets = [FakeSocket() for _ in range(size)]
+
+    # paměť
+    tracemalloc.start()
+    rooms = []
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(ROOMS_FOR_MEMORY):
+        connections, state, outboxes = [], legacy_new_room(names[0]), {}
+        for name, ws in zip(names, sockets):
+            legacy_join(connections, state, outboxes, name, ws)
+        rooms.append((connections, state, outboxes))
+    legacy_mem = (tracemalloc.get_traced_memory()[0] - base) / ROOMS_FOR_MEMORY
+    rooms = []
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(ROOMS_FOR_MEMORY):
+        room = Room("BENCH1", names[0], "Klasika", StrokeLog())
+        for name, ws in zip(names, sockets):
+            room_join(room, name, ws)
+        rooms.append(room)
+    room_mem = (tracemalloc.get_traced_memory()[0] - base) / ROOMS_FOR_MEMORY
+    tracemalloc.stop()
+    rooms = []
+
+    # připojení + odchod posledního hráče do plné místnosti
+    connections, state, outboxes = [], legacy_new_room(names[0]), {}
+    for name, ws in zip(names[:-1], sockets[:-1]):
+        legacy_join(connections, state, outboxes, name, ws)
+    newcomer, newcomer_ws = names[-1], sockets[-1]
+
+    def legacy_churn():
+        legacy_join(connections, state, outboxes, newcomer, newcomer_ws)
+        legacy_leave(connections, state, outboxes, newcomer, newcomer_ws)
+
+    room = Room("BENCH1", names[0], "Klasika", StrokeLog())
+    for name, ws in zip(names[:-1], sockets[:-1]):
+        room_join(room, name, ws)
+
+    def room_churn():
+        room_join(room, newcomer, newcomer_ws)
+        room_leave(room, newcomer_ws)
+
+    legacy_join(connections, state, outboxes, newcomer, newcomer_ws)
+    room_join(room, newcomer, newcomer_ws)
+    artist = names[-1]
+    artist_ws = sockets[-1]
+    results = {
+        "memory": (legacy_mem, room_mem),
+        "join+leave": (rate(legacy_churn), rate(room_churn)),
+        "lookup": (rate(lambda: legacy_lookup(state, artist)), rate(lambda: room.get(artist))),
+        "skip artist": (rate(lambda: legacy_skip_artist(connections, state, artist)),
+                        rate(lambda: room_skip_artist(room, artist_ws))),
+    }
+    return results
+
+
+def main():
+    print(f"{'hráčů':>6} | {'B/místnost dict':>15} | {'B/místnost Room':>15} | "
+          f"{'join+leave/s dict':>17} | {'join+leave/s Room':>17} | "
+          f"{'lookup/s dict':>13} | {'lookup/s Room':>13} | {'výběr fráze/s dict':>18} | {'výběr fráze/s Room':>18}")
+    for size in ROOM_SIZES:
+        r = bench_size(size)
+        print(f"{size:>6} | {r['memory'][0]:>15.0f} | {r['memory'][1]:>15.0f} | "
+              f"{r['join+leave'][0]:>17.0f} | {r['join+leave'][1]:>17.0f} | "
+              f"{r['lookup'][0]:>13.0f} | {r['lookup'][1]:>13.0f} | "
+              f"{r['skip artist'][0]:>18.0f} | {r['skip artist'][1]:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Micro-benchmark diváků (spectators.py): cena rozeslání hráčům podle počtu
+diváků v místnosti a cena jednoho diváckého tiku.
+
+Místnost s 4 hráči kreslí (~30 rámců tahů za sekundu) a chatuje; diváci mají
+zvlášť množinu spojení, hráčům by tedy neměli přidat nic. Pro srovnání
+"naivně" - diváci jako další příjemci každé zprávy, bez tiků.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_spectators.py [--spectators 0 100 500] [--seconds 10]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from rooms import PHASE_DRAWING, Player, Room  # noqa: E402
+from spectators import SpectatorFeed  # noqa: E402
+from strokes import STROKE_BEGIN, STROKE_END, encode_chunk  # noqa: E402
+
+
+class CountingOutbox:
+    """Outbox stand-in: counts what would be written to the socket."""
+
+    depth = 0
+    send_latency = 0.0
+    failed = False
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    def push(self, frame, priority: int = 0) -> bool:
+        self.frames += 1
+        self.bytes += len(frame)
+        return True
+
+
+def room_traffic(seconds: int):
+    """(stroke frame | chat message) in send order."""
+    out = []
+    x = y = 300
+    for tick in range(seconds * 30):
+        flat = []
+        for _ in range(random.randint(3, 8)):
+            x += random.randint(-6, 6)
+            y += random.randint(-6, 6)
+            flat += [x, y]
+        flags = (STROKE_BEGIN if tick % 20 == 0 else 0) | (STROKE_END if tick % 20 == 19 else 0)
+        out.append(encode_chunk(tick // 20, flags, (0, 0, 0, 5), flat))
+        if tick % 10 == 0:
+            out.append({"type": "chat_message", "username": "hrac1", "message": "asi pes?"})
+    return out
+
+
+def make_room(spectators: int, naive: bool) -> Room:
+    room = Room("BENCH1", "hrac0", main.word_store.default_name, main.new_stroke_log())
+    for i in range(4):
+        room.add(Player(f"hrac{i}", object(), CountingOutbox()))
+    room.phase = PHASE_DRAWING
+    room.current_artist = "hrac0"
+    for i in range(spectators):
+        viewer = Player(f"divak{i}", object(), CountingOutbox())
+        if naive:
+            room.add(viewer)  # každý divák jako další hráč
+        else:
+            room.spectators[viewer.websocket] = viewer
+    room.spectator_feed = SpectatorFeed(main.encode_message, main.SPECTATOR_SETTINGS["TOLERANCE"])
+    main.manager.rooms[room.game_code] = room
+    return room
+
+
+async def run_room(traffic, spectators: int, naive: bool):
+    room = make_room(spectators, naive)
+    artist = room.get("hrac0").websocket
+    tick_every = max(1, round(30 / main.SPECTATOR_SETTINGS["TICK_HZ"]))
+    fanout = ticks = 0.0
+    start_all = time.perf_counter()
+    for i, item in enumerate(traffic):
+        start = time.perf_counter()
+        if isinstance(item, bytes):
+            await main.manager.broadcast_strokes(room, item, STROKE_BEGIN, exclude=artist)
+        else:
+            await main.manager.broadcast(room.game_code, item)
+        fanout += time.perf_counter() - start
+        if i % tick_every == 0:
+            # Tik diváků bez časovače, ať se měří jen práce
+            start = time.perf_counter()
+            await main.manager.flush_spectators(room)
+            ticks += time.perf_counter() - start
+    await main.manager.flush_spectators(room)
+    total = time.perf_counter() - start_all
+    players = [p.outbox for p in room.players.values()][:4]
+    viewers = [p.outbox for p in (list(room.players.values())[4:] if naive else room.spectators.values())]
+    del main.manager.rooms[room.game_code]
+    return fanout, ticks, total, players, viewers
+
+
+async def run(args):
+    main.ROOM_TICK_SETTINGS["TICK_HZ"] = 0  # chat jde hned, měříme samotné rozeslání
+    traffic = room_traffic(args.seconds)
+    print(f"{len(traffic)} zpráv za {args.seconds} s, tik diváků {main.SPECTATOR_SETTINGS['TICK_HZ']} Hz")
+    for count in args.spectators:
+        for naive in ((False, True) if count else (False,)):
+            fanout, ticks, total, players, viewers = await run_room(traffic, count, naive)
+            per = fanout / len(traffic) * 1e6
+            label = f"{count} diváků" + (" (jako hráči)" if naive else "")
+            line = f"  {label:<24} rozeslání {per:6.1f} µs/zpráva"
+            if viewers:
+                frames = sum(o.frames for o in viewers) / len(viewers)
+                kb = sum(o.bytes for o in viewers) / len(viewers) / 1024
+                line += f", tiky {ticks * 1000:6.1f} ms, na diváka {frames:5.0f} rámců {kb:6.1f} kB"
+            print(line)
+    await main.timer_wheel.close()
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spectators", type=int, nargs="+", default=[0, 100, 500])
+    parser.add_argument("--seconds", type=int, default=10)
+    args = parser.parse_args()
+    random.seed(1)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark balíčků slov pro velké balíčky.
+
+Pro balíčky s N slovy v každé kategorii měří:
+  - načtení (validace + předpočítání normalizovaných tvarů),
+  - nabídky slov za sekundu: původní random.sample nad seznamy vs. RoomDecks,
+  - kolik slov se v nabídkách jedné místnosti zopakovalo během 30 kol,
+  - paměť balíčků karet jedné místnosti po 30 kolech (líné míchání drží jen prohozené pozice).
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_words.py
+"""
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from words import CATEGORIES, RoomDecks, parse_packages  # noqa: E402
+
+SIZES = [30, 1_000, 10_000, 50_000]
+ROUNDS = 30
+DURATION = 0.5
+
+
+def make_packages(size: int) -> dict:
+    rng = random.Random(size)
+    syllables = ["ka", "ře", "lo", "mí", "vý", "tu", "ša", "no", "bě", "dů", "ží", "pa"]
+
+    def word():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+
+    package = {category: [f"{word()} {word()}" if category == "Činnost" else word() for _ in range(size)]
+               for category in CATEGORIES}
+    return {"Velký": package, "Klasika": package}
+
+
+def legacy_options(word_packages: dict, package_name: str):
+    package = word_packages.get(package_name, list(word_packages.values())[0])
+    return {
+        "Vlastnost": random.sample(package["Vlastnost"], min(3, len(package["Vlastnost"]))),
+        "Subjekt": random.sample(package["Subjekt"], min(3, len(package["Subjekt"]))),
+        "Činnost": random.sample(package["Činnost"], min(3, len(package["Činnost"]))),
+    }
+
+
+def rate(fn) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def repeats(draw) -> int:
+    seen = {category: set() for category in CATEGORIES}
+    repeated = 0
+    for _ in range(ROUNDS):
+        for category, words in draw().items():
+            for w in words:
+                repeated += w in seen[category]
+                seen[category].add(w)
+    return repeated
+
+
+def main():
+    print(f"{'slov/kat.':>9} | {'načtení ms':>10} | {'nabídek/s sample':>16} | {'nabídek/s deck':>14} | "
+          f"{'opakování sample':>16} | {'opakování deck':>14} | {'B/místnost deck':>15}")
+    for size in SIZES:
+        raw = make_packages(size)
+        start = time.perf_counter()
+        packages = parse_packages(raw)
+        load_ms = (time.perf_counter() - start) * 1000
+        package = packages["Velký"]
+
+        decks = RoomDecks(package)
+        sample_rate = rate(lambda: legacy_options(raw, "Velký"))
+        deck_rate = rate(lambda: decks.options(3))
+
+        sample_repeats = repeats(lambda: legacy_options(raw, "Velký"))
+        deck_repeats = repeats(RoomDecks(package).options)
+
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        room_decks = RoomDecks(package)
+        for _ in range(ROUNDS):
+            room_decks.options(3)
+        deck_mem = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+
+        print(f"{size:>9} | {load_ms:>10.1f} | {sample_rate:>16.0f} | {deck_rate:>14.0f} | "
+              f"{sample_repeats:>16} | {deck_repeats:>14} | {deck_mem:>15}")
+
+
+if __name__ == "__main__":
+    main()
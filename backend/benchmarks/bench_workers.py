@@ -0,0 +1,154 @@
+"""
+Zátěžový test víceprocesového provozu: kolik rámců tahů za sekundu server doručí
+při mnoha souběžných místnostech s jedním workerem a s více workery.
+
+Backend se spustí přes `main.py --workers N` nad dočasným adresářem. V každé
+místnosti kreslí jeden hráč (tahy tak rychle, jak mu dovolí limit ingressu,
+INGRESS_SETTINGS["RATE_LIMITS"]["stroke_frame"]) a ostatní je přijímají.
+Klienti běží v několika procesech, aby měření neomezovala jejich vlastní smyčka.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_workers.py [--rooms 40] [--players 4] [--seconds 5] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import websockets  # noqa: E402
+
+from main import INGRESS_SETTINGS  # noqa: E402
+from strokes import STROKE_BEGIN, STROKE_END, encode_chunk  # noqa: E402
+
+# Kousek pod limitem, ať ingress rámce nezahazuje a spojení nezavře (1008)
+STROKE_INTERVAL = 1.1 / INGRESS_SETTINGS["RATE_LIMITS"]["stroke_frame"][0]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def recv_json(ws, message_type):
+    while True:
+        message = await ws.recv()
+        if isinstance(message, str):
+            data = json.loads(message)
+            if data.get("type") == message_type:
+                return data
+
+
+async def run_room(url: str, game_code: str, players: int, seconds: float) -> int:
+    artist = await websockets.connect(f"{url}/{game_code}/artist", max_queue=None)
+    await recv_json(artist, "available_packages")
+    guessers = []
+    for i in range(players - 1):
+        guesser = await websockets.connect(f"{url}/{game_code}/hrac{i}", max_queue=None)
+        await recv_json(guesser, "player_joined")
+        guessers.append(guesser)
+    await artist.send(json.dumps({"type": "start_game"}))
+    words = (await recv_json(artist, "select_phrase_options"))["words"]
+    await artist.send(json.dumps({"type": "select_phrase", "phrase": [v[0] for v in words.values()]}))
+    for guesser in guessers:
+        await recv_json(guesser, "phrase_selected")
+
+    received = 0
+    end = time.perf_counter() + seconds
+
+    async def receive(ws):
+        nonlocal received
+        while True:
+            if isinstance(await ws.recv(), bytes) and time.perf_counter() < end:
+                received += 1
+
+    receivers = [asyncio.create_task(receive(g)) for g in guessers]
+    stroke_id = 0
+    next_send = time.perf_counter()
+    while time.perf_counter() < end:
+        stroke_id = (stroke_id + 1) & 0xFFFF
+        points = [random.randint(0, 800) for _ in range(16)]
+        await artist.send(encode_chunk(stroke_id, STROKE_BEGIN | STROKE_END, (0, 0, 0, 4), points))
+        next_send += STROKE_INTERVAL
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+    await asyncio.sleep(0.5)
+    for task in receivers:
+        task.cancel()
+    for ws in [artist] + guessers:
+        await ws.close()
+    return received
+
+
+def client_process(url: str, codes, players: int, seconds: float, result):
+    async def run():
+        counts = await asyncio.gather(*[run_room(url, code, players, seconds) for code in codes])
+        result.put(sum(counts))
+    asyncio.run(run())
+
+
+def measure(workers: int, rooms: int, players: int, seconds: float, clients: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, str(BACKEND_DIR / "main.py"), "--workers", str(workers),
+             "--host", "127.0.0.1", "--port", str(port)],
+            cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port)
+            time.sleep(1.0)  # workery startují postupně
+            url = f"ws://127.0.0.1:{port}/ws"
+            codes = [f"BW{i:04d}" for i in range(rooms)]
+            result = multiprocessing.Queue()
+            procs = [multiprocessing.Process(target=client_process,
+                                             args=(url, codes[i::clients], players, seconds, result))
+                     for i in range(clients)]
+            for p in procs:
+                p.start()
+            total = sum(result.get() for _ in procs)
+            for p in procs:
+                p.join()
+            return total / seconds
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=4, help="počet klientských procesů")
+    args = parser.parse_args()
+
+    print(f"{args.rooms} rooms x {args.players} players, {args.seconds:.0f} s")
+    for workers in sorted({1, args.workers}):
+        rate = measure(workers, args.rooms, args.players, args.seconds, args.clients)
+        print(f"workers={workers:<3} delivered {rate:10.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+"""
+Zátěžový generátor: N místností x M botů hraje celé hry přes /ws/{game_code}/{username}.
+
+Boti projdou stejný tok jako frontend: hostitel zvolí balíček (select_package)
+a spustí hru (start_game), kreslíř vybere frázi (select_phrase) a posílá
+drawing_data (výchozí 30 Hz), hádající posílají špatné tipy a po chvíli uhodnou
+slova fráze. Po konci hry se místnost připojí znovu a hraje dál, dokud neuplyne
+--seconds.
+
+Měří se:
+  - latence kreslení: odeslání drawing_data -> přijetí drawing_update u hádajícího,
+  - latence tipu: odeslání správného tipu -> word_guessed pro daného hráče,
+  - zprávy za sekundu oběma směry, odehraná kola a hry, chyby,
+  - CPU a RSS serveru (součet přes celý strom procesů, čteno z /proc).
+
+Výsledek jde uložit jako JSON (--json) a porovnat s dřívějším během (--compare);
+při zhoršení nad --tolerance skončí s kódem 1, takže jde použít i v CI.
+
+Spuštění (z adresáře backend):
+    python benchmarks/loadgen.py [--rooms 20] [--players 4] [--seconds 30] [--workers 1]
+                                 [--json vysledek.json] [--compare minule.json]
+    python benchmarks/loadgen.py --url ws://127.0.0.1:8000/ws --server-pid 1234   # běžící server
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import websockets  # noqa: E402
+
+RESULT_VERSION = 1
+# Metrika -> True, pokud je větší hodnota lepší
+COMPARED = {
+    ("draw_latency_ms", "p50"): False,
+    ("draw_latency_ms", "p99"): False,
+    ("guess_latency_ms", "p50"): False,
+    ("guess_latency_ms", "p99"): False,
+    ("throughput", "received_per_s"): True,
+    ("server", "cpu_percent"): False,
+    ("server", "rss_mb_peak"): False,
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+# --- boti ------------------------------------------------------------------
+
+class Stats:
+    """Per client process counters and latency samples (ms)."""
+
+    def __init__(self):
+        self.draw_latency: List[float] = []
+        self.guess_latency: List[float] = []
+        self.sent = 0
+        self.received = 0
+        self.rounds = 0
+        self.games = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class RoomState:
+    """What the bots of one room share in-process: the current phrase, split into words."""
+
+    def __init__(self):
+        self.phrase_words: List[str] = []
+
+
+class Bot:
+    def __init__(self, ws, name: str, index: int, players: int, room: RoomState, stats: Stats, args):
+        self.ws = ws
+        self.name = name
+        self.index = index
+        self.players = players
+        self.room = room
+        self.stats = stats
+        self.args = args
+        self.artist: Optional[str] = None
+        self.tasks: List[asyncio.Task] = []
+        self.guess_sent_at: Optional[float] = None
+        self.guessed = asyncio.Event()
+
+    async def send(self, message: dict):
+        await self.ws.send(json.dumps(message))
+        self.stats.sent += 1
+
+    def stop_tasks(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    async def run(self):
+        try:
+            async for raw in self.ws:
+                self.stats.received += 1
+                if isinstance(raw, bytes):
+                    continue
+                await self.handle(json.loads(raw))
+        finally:
+            self.stop_tasks()
+
+    async def handle(self, message: dict):
+        kind = message.get("type")
+        if kind == "drawing_update":
+            sent_at = message.get("data", {}).get("t")
+            if sent_at is not None and self.name != self.artist:
+                self.stats.draw_latency.append((time.time() - sent_at) * 1000)
+        elif kind == "round_start":
+            self.artist = message["artist"]
+        elif kind == "select_phrase_options":
+            phrase = [words[0] for words in message["words"].values()]
+            self.room.phrase_words = list(dict.fromkeys(" ".join(phrase).split()))
+            await self.send({"type": "select_phrase", "phrase": phrase})
+            self.tasks.append(asyncio.create_task(self.draw()))
+        elif kind == "phrase_selected" and self.name != self.artist:
+            self.tasks.append(asyncio.create_task(self.guess()))
+        elif kind == "room_batch":
+            # Chat a tipy za jeden tik místnosti (ROOM_TICK_SETTINGS)
+            for event in message["events"]:
+                await self.handle(event)
+        elif kind == "word_guessed":
+            if message.get("guesser") == self.name and self.guess_sent_at is not None:
+                self.stats.guess_latency.append((time.time() - self.guess_sent_at) * 1000)
+                self.guess_sent_at = None
+                self.guessed.set()
+        elif kind == "round_end":
+            self.stop_tasks()
+            if self.name == self.artist:
+                self.stats.rounds += 1
+        elif kind == "game_end" and self.index == 0:
+            self.stats.games += 1
+
+    async def draw(self):
+        interval = 1 / self.args.draw_hz
+        x, y = random.uniform(0, 800), random.uniform(0, 600)
+        while True:
+            nx = min(800.0, max(0.0, x + random.uniform(-15, 15)))
+            ny = min(600.0, max(0.0, y + random.uniform(-15, 15)))
+            await self.send({"type": "drawing_data", "data": {
+                "x0": x, "y0": y, "x1": nx, "y1": ny, "color": "#000000", "lineWidth": 4, "t": time.time(),
+            }})
+            x, y = nx, ny
+            await asyncio.sleep(interval)
+
+    async def guess(self):
+        # Hádající i (bez kreslíře) hádá slova i, i + počet hádajících, ...
+        guessers = [i for i in range(self.players) if f"bot{i}" != self.artist]
+        position = guessers.index(self.index)
+        started = time.monotonic()
+        while time.monotonic() - started < self.args.guess_after:
+            await asyncio.sleep(self.args.guess_interval * random.uniform(0.5, 1.5))
+            # Slova z balíčků by mohla náhodou trefit frázi - špatný tip musí být opravdu špatný
+            await self.send({"type": "guess", "guess": f"tip{random.randrange(1000)}"})
+        for word in self.room.phrase_words[position::len(guessers)]:
+            self.guessed.clear()
+            self.guess_sent_at = time.time()
+            await self.send({"type": "guess", "guess": word})
+            try:
+                await asyncio.wait_for(self.guessed.wait(), 10)
+            except asyncio.TimeoutError:
+                self.stats.errors += 1
+                self.guess_sent_at = None
+
+
+async def play_game(url: str, game_code: str, stats: Stats, args):
+    room = RoomState()
+    sockets = []
+    try:
+        for i in range(args.players):
+            ws = await websockets.connect(f"{url}/{game_code}/bot{i}", max_queue=None)
+            sockets.append(ws)
+            # Na potvrzení připojení počkáme, ať je pořadí hráčů (a tedy kreslířů) dané
+            while json.loads(await ws.recv()).get("type") != ("available_packages" if i == 0 else "player_joined"):
+                pass
+        bots = [Bot(ws, f"bot{i}", i, args.players, room, stats, args) for i, ws in enumerate(sockets)]
+        if args.package:
+            await bots[0].send({"type": "select_package", "package": args.package})
+        await bots[0].send({"type": "start_game"})
+        # Hra končí game_end - server pak spojení zavře a run() doběhnou
+        await asyncio.gather(*[bot.run() for bot in bots])
+    finally:
+        for ws in sockets:
+            await ws.close()
+
+
+async def play_room(url: str, game_code: str, deadline: float, stats: Stats, args):
+    generation = 0
+    while time.time() < deadline:
+        # Každá další hra v jiné místnosti - předchozí se na serveru ještě uklízí
+        code = f"{game_code}{generation % 10}"
+        generation += 1
+        try:
+            await asyncio.wait_for(play_game(url, code, stats, args), deadline - time.time())
+        except asyncio.TimeoutError:
+            return
+        except (OSError, websockets.exceptions.WebSocketException, json.JSONDecodeError):
+            stats.errors += 1
+            await asyncio.sleep(1)
+
+
+def client_process(url: str, codes: List[str], deadline: float, args, result):
+    stats = Stats()
+
+    async def run():
+        await asyncio.gather(*[play_room(url, code, deadline, stats, args) for code in codes])
+
+    asyncio.run(run())
+    result.put(stats.as_dict())
+
+
+# --- zdroje serveru (Linux /proc) -------------------------------------------
+
+def process_tree(root: int) -> List[int]:
+    parents: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                parents[int(entry)] = int(fields[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    tree = [root]
+    for pid in tree:
+        tree.extend(child for child, parent in parents.items() if parent == pid)
+    return tree
+
+
+def cpu_and_rss(pids: List[int]):
+    """Total CPU seconds and RSS bytes of the given processes."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    page = os.sysconf("SC_PAGE_SIZE")
+    cpu, rss = 0.0, 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / ticks  # utime + stime
+        rss += int(fields[21]) * page
+    return cpu, rss
+
+
+class ResourceSampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.rss_peak = 0
+        self.rss_last = 0
+        self.cpu_start = self.cpu_end = 0.0
+        self.wall_start = self.wall_end = 0.0
+
+    def run(self):
+        pids = process_tree(self.pid)
+        self.cpu_start, _ = cpu_and_rss(pids)
+        self.wall_start = time.monotonic()
+        while not self.stopped.wait(self.interval):
+            pids = process_tree(self.pid)
+            cpu, rss = cpu_and_rss(pids)
+            self.cpu_end, self.rss_last = cpu, rss
+            self.wall_end = time.monotonic()
+            self.rss_peak = max(self.rss_peak, rss)
+
+    def result(self) -> dict:
+        wall = max(self.wall_end - self.wall_start, 1e-9)
+        return {
+            "cpu_percent": round((self.cpu_end - self.cpu_start) / wall * 100, 1),
+            "rss_mb_peak": round(self.rss_peak / 2 ** 20, 1),
+            "rss_mb_end": round(self.rss_last / 2 ** 20, 1),
+        }
+
+
+# --- výsledky ---------------------------------------------------------------
+
+def percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None}
+    samples = sorted(samples)
+
+    def rank(q):
+        return round(samples[min(len(samples) - 1, int(len(samples) * q))], 2)
+
+    return {"count": len(samples), "p50": rank(0.5), "p90": rank(0.9), "p99": rank(0.99),
+            "max": round(samples[-1], 2)}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load(url: str, args, server_pid: Optional[int]) -> dict:
+    codes = [f"LG{i:03d}" for i in range(args.rooms)]
+    clients = max(1, min(args.clients, args.rooms))
+    sampler = None
+    if server_pid and os.path.isdir("/proc"):
+        sampler = ResourceSampler(server_pid)
+        sampler.start()
+    started = time.time()
+    deadline = started + args.seconds
+    result = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client_process, args=(url, codes[i::clients], deadline, args, result))
+             for i in range(clients)]
+    for p in procs:
+        p.start()
+    parts = [result.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.time() - started
+    if sampler:
+        sampler.stopped.set()
+        sampler.join()
+
+    merged = Stats()
+    for part in parts:
+        for key, value in part.items():
+            setattr(merged, key, getattr(merged, key) + value)
+    return {
+        "version": RESULT_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {"rooms": args.rooms, "players": args.players, "seconds": args.seconds,
+                   "workers": args.workers, "draw_hz": args.draw_hz, "guess_after": args.guess_after,
+                   "clients": clients, "url": args.url},
+        "draw_latency_ms": percentiles(merged.draw_latency),
+        "guess_latency_ms": percentiles(merged.guess_latency),
+        "throughput": {"sent_per_s": round(merged.sent / elapsed, 1),
+                       "received_per_s": round(merged.received / elapsed, 1),
+                       "rounds": merged.rounds, "games": merged.games},
+        "errors": merged.errors,
+        "server": sampler.result() if sampler else None,
+    }
+
+
+def print_summary(result: dict):
+    config = result["config"]
+    print(f"{config['rooms']} rooms x {config['players']} players, {config['seconds']:.0f} s, "
+          f"workers={config['workers']}, commit {result['commit']}")
+    for key, title in (("draw_latency_ms", "draw -> drawing_update"), ("guess_latency_ms", "guess -> word_guessed")):
+        p = result[key]
+        if p["count"]:
+            print(f"  {title:<24} n={p['count']:>7}  p50={p['p50']:8.2f} ms  p99={p['p99']:8.2f} ms  "
+                  f"max={p['max']:8.2f} ms")
+        else:
+            print(f"  {title:<24} no samples")
+    t = result["throughput"]
+    print(f"  messages                 sent {t['sent_per_s']:.0f}/s, received {t['received_per_s']:.0f}/s, "
+          f"rounds {t['rounds']}, games {t['games']}, errors {result['errors']}")
+    if result["server"]:
+        s = result["server"]
+        print(f"  server                   CPU {s['cpu_percent']:.1f} %, RSS peak {s['rss_mb_peak']:.1f} MB")
+
+
+def compare(baseline: dict, result: dict, tolerance: float) -> bool:
+    """Print metric deltas against a baseline run; True if nothing regressed beyond tolerance."""
+    ok = True
+    print(f"\ncompared with {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for (section, key), higher_is_better in COMPARED.items():
+        old = (baseline.get(section) or {}).get(key)
+        new = (result.get(section) or {}).get(key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        ok = ok and not flag
+        print(f"  {section + '.' + key:<28} {old:>10.2f} -> {new:>10.2f}  {change * 100:+7.1f} %  {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kreslir load generator")
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--players", type=int, default=4, help="botů v místnosti (min. 2)")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=1, help="workerů spouštěného serveru")
+    parser.add_argument("--clients", type=int, default=2, help="počet klientských procesů")
+    parser.add_argument("--draw-hz", type=float, default=30.0)
+    parser.add_argument("--guess-interval", type=float, default=1.0, help="s mezi špatnými tipy")
+    parser.add_argument("--guess-after", type=float, default=5.0, help="s od výběru fráze do správných tipů")
+    parser.add_argument("--package", default="", help="balíček slov, který hostitel zvolí")
+    parser.add_argument("--url", default="", help="ws://host:port/ws běžícího serveru (jinak se spustí vlastní)")
+    parser.add_argument("--server-pid", type=int, default=0, help="PID běžícího serveru pro měření CPU/RSS")
+    parser.add_argument("--json", default="", help="uložit výsledek do souboru")
+    parser.add_argument("--compare", default="", help="porovnat s uloženým výsledkem")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="povolené zhoršení (0.10 = 10 %%)")
+    args = parser.parse_args()
+    if args.players < 2:
+        parser.error("--players musí být alespoň 2")
+
+    if args.url:
+        result = run_load(args.url, args, args.server_pid or None)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, str(BACKEND_DIR / "main.py"), "--workers", str(args.workers),
+                 "--host", "127.0.0.1", "--port", str(port)],
+                cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(port)
+                time.sleep(1.0 if args.workers > 1 else 0.2)  # workery startují postupně
+                result = run_load(f"ws://127.0.0.1:{port}/ws", args, server.pid)
+            finally:
+                server.terminate()
+                server.wait()
+
+    print_summary(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if not compare(baseline, result, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
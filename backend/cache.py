@@ -0,0 +1,74 @@
+"""
+Cache hotových JSON odpovědí pro /api/leaderboard/* a /api/games.
+
+Data se mění jen při uložení výsledku hry, proto se cache celá zneplatní
+v save_game_result a jinak drží předkódované tělo odpovědi i s ETagem.
+Opakovaný polling s If-None-Match pak dostane 304 bez dotazu do SQLite.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "expires")
+
+    def __init__(self, body: bytes, etag: str, expires: float):
+        self.body = body
+        self.etag = etag
+        self.expires = expires
+
+
+class ResponseCache:
+    """TTL + LRU cache of encoded responses, invalidated as a whole on writes."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        # Zvyšuje se při každém zneplatnění; výsledek dotazu, který běžel přes
+        # zneplatnění, se do cache neuloží
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes, generation: int) -> CachedResponse:
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        entry = CachedResponse(body, etag, time.monotonic() + self.ttl)
+        if generation == self.generation:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        self.generation += 1
+        self._entries.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Klient může poslat seznam tagů, případně slabé W/ varianty
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
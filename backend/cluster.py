@@ -0,0 +1,835 @@
+"""
+Víceprocesový provoz: místnosti rozdělené mezi workery a pub/sub mezi nimi.
+
+Každá místnost má právě jednoho vlastníka - worker určený konzistentním hashem
+z game_code (HashRing). Jen vlastník drží game_state a pouští herní logiku.
+Klient se ale může připojit na kterýkoli worker (sdílí jeden naslouchací socket);
+pokud místnost nevlastní, worker spojení jen přeposílá (relay):
+
+    klient <-> gateway worker  ==pub/sub==>  vlastník místnosti
+               (ClientOutbox)                (RemoteWebSocket + websocket_endpoint)
+
+Pub/sub je zaměnitelný:
+    LocalPubSub - v rámci procesu (výchozí, jeden worker)
+    RespPubSub  - Redis protokol (PUBLISH/SUBSCRIBE); mluví se skutečným Redisem
+                  i s PubSubBroker, jeho malou lokální náhradou na unix socketu,
+                  kterou si serve_workers spustí sám, pokud Redis nezadáte.
+
+Spuštění brokeru samostatně:
+    python cluster.py broker --unix /tmp/kreslir.sock   (nebo --port 6390)
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from outbox import ClientOutbox, PRIORITY_NORMAL
+
+WORKER_CHANNEL = "kreslir:worker:{}"
+EVENT_CHANNEL = "kreslir:cluster"
+
+Handler = Callable[[bytes], Any]
+
+
+class HashRing:
+    """Consistent hashing of room codes onto worker ids (virtual nodes on a blake2b ring)."""
+
+    def __init__(self, nodes: List[int], replicas: int = 64):
+        points = []
+        for node in nodes:
+            for i in range(replicas):
+                points.append((self._hash(f"{node}#{i}"), node))
+        points.sort()
+        self._keys = [key for key, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        # hash() je v každém procesu jiný, workery se musí shodnout
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def owner(self, key: str) -> int:
+        index = bisect.bisect(self._keys, self._hash(key))
+        return self._nodes[index % len(self._nodes)]
+
+
+# --- pub/sub ---------------------------------------------------------------
+
+class PubSub(ABC):
+    """Fire-and-forget publish, per-channel subscription with a sync handler."""
+
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: Handler):
+        ...
+
+    @abstractmethod
+    def publish(self, channel: str, data: bytes):
+        """Queue a message; never blocks. Messages from one publisher keep their order."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    async def close(self):
+        pass
+
+
+class LocalPubSub(PubSub):
+    """In-process pub/sub - enough for a single worker (and for tests)."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, data: bytes):
+        loop = asyncio.get_running_loop()
+        for handler in self._handlers.get(channel, ()):
+            # call_soon drží pořadí a handler nikdy neběží uvnitř publish
+            loop.call_soon(handler, data)
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(*parts: bytes) -> bytes:
+    out = [b"*%d\r\n" % len(parts)]
+    for part in parts:
+        out.append(b"$%d\r\n" % len(part))
+        out.append(part)
+        out.append(b"\r\n")
+    return b"".join(out)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Read one RESP2 value: simple string, error, integer, bulk string or array."""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body
+    if prefix == b"-":
+        return RespError(body.decode("utf-8", "replace"))
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if prefix == b"*":
+        size = int(body)
+        if size < 0:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise ConnectionError(f"unexpected RESP prefix {prefix!r}")
+
+
+async def open_stream(url: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """redis://host:port nebo unix:///cesta/k/socketu"""
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return await asyncio.open_unix_connection(parsed.path)
+    return await asyncio.open_connection(parsed.hostname or "127.0.0.1", parsed.port or 6379)
+
+
+class RespPubSub(PubSub):
+    """
+    Pub/sub over the Redis protocol. Uses two connections, because a subscribed
+    Redis connection cannot publish. Publish replies are read and discarded.
+
+    A lost connection is re-opened with exponential backoff and every channel is
+    subscribed again. Publishing never blocks: while disconnected, or once the
+    unsent buffer exceeds `buffer_limit` bytes, messages are dropped and counted.
+    """
+
+    def __init__(self, url: str, buffer_limit: int = 8 * 1024 * 1024,
+                 reconnect_delay: float = 0.1, max_reconnect_delay: float = 5.0):
+        self.url = url
+        self.buffer_limit = buffer_limit
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._handlers: Dict[bytes, Handler] = {}
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        self._sub_writer: Optional[asyncio.StreamWriter] = None
+        self._pub_writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    async def start(self):
+        # První spojení selže hned (špatná adresa), další výpadky už řeší _run
+        readers = await self._connect()
+        self._task = asyncio.create_task(self._run(readers))
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamReader]:
+        sub_reader, sub_writer = await open_stream(self.url)
+        try:
+            pub_reader, pub_writer = await open_stream(self.url)
+        except OSError:
+            sub_writer.close()
+            raise
+        if self._handlers:
+            # Po výpadku znovu odebírat vše; čekající subscribe() dostane potvrzení odsud
+            sub_writer.write(encode_command(b"SUBSCRIBE", *self._handlers))
+        self._sub_writer, self._pub_writer = sub_writer, pub_writer
+        return sub_reader, pub_reader
+
+    def _disconnect(self):
+        for writer in (self._sub_writer, self._pub_writer):
+            if writer is not None:
+                writer.close()
+        self._sub_writer = self._pub_writer = None
+
+    async def _run(self, readers: Tuple[asyncio.StreamReader, asyncio.StreamReader]):
+        delay = self.reconnect_delay
+        while True:
+            sub_reader, pub_reader = readers
+            tasks = [asyncio.create_task(self._dispatch(sub_reader)),
+                     asyncio.create_task(self._discard_replies(pub_reader))]
+            try:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._disconnect()
+            print(f"Pub/sub connection to {self.url} lost, reconnecting")
+            while True:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                try:
+                    readers = await self._connect()
+                except OSError:
+                    continue
+                break
+            delay = self.reconnect_delay
+            self.reconnects += 1
+            print(f"Pub/sub reconnected to {self.url}")
+
+    async def subscribe(self, channel: str, handler: Handler):
+        name = channel.encode("utf-8")
+        self._handlers[name] = handler
+        confirmed = asyncio.get_running_loop().create_future()
+        self._pending[name] = confirmed
+        if self._sub_writer is not None:
+            self._sub_writer.write(encode_command(b"SUBSCRIBE", name))
+            await self._sub_writer.drain()
+        # Až po potvrzení je jisté, že nám nic publikovaného neuteče
+        await asyncio.wait_for(confirmed, 10)
+
+    def publish(self, channel: str, data: bytes):
+        writer = self._pub_writer
+        # Bez spojení nebo při zahlceném brokeru zprávu zahodíme - publish nesmí blokovat ani růst do nekonečna
+        if writer is None or writer.transport.get_write_buffer_size() > self.buffer_limit:
+            self.dropped += 1
+            return
+        writer.write(encode_command(b"PUBLISH", channel.encode("utf-8"), data))
+        self.published += 1
+
+    async def _dispatch(self, reader: asyncio.StreamReader):
+        while True:
+            reply = await read_reply(reader)
+            if not isinstance(reply, list) or len(reply) < 3:
+                continue
+            kind, channel, payload = reply[0], reply[1], reply[2]
+            if kind == b"message":
+                handler = self._handlers.get(channel)
+                if handler is not None:
+                    self.received += 1
+                    try:
+                        handler(payload)
+                    except Exception as e:
+                        print(f"Pub/sub handler error on {channel!r}: {e}")
+            elif kind == b"subscribe":
+                future = self._pending.pop(channel, None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+    async def _discard_replies(self, reader: asyncio.StreamReader):
+        while True:
+            reply = await read_reply(reader)
+            if isinstance(reply, RespError):
+                print(f"Pub/sub publish failed: {reply}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connected": self._pub_writer is not None, "published": self.published,
+                "received": self.received, "dropped": self.dropped, "reconnects": self.reconnects}
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._disconnect()
+
+
+def create_pubsub(url: str, **options: Any) -> PubSub:
+    """Pub/sub for `url`; `options` go to RespPubSub (buffer limit, reconnect delays)."""
+    if not url or url == "local":
+        return LocalPubSub()
+    if urlparse(url).scheme in ("redis", "unix"):
+        return RespPubSub(url, **options)
+    raise ValueError(f"Neznámý pub/sub backend: {url}")
+
+
+class PubSubBroker:
+    """
+    Minimal Redis stand-in: PUBLISH, SUBSCRIBE, UNSUBSCRIBE and PING over RESP.
+    A subscriber that lets its buffer grow past `client_buffer_limit` is disconnected,
+    like Redis' client-output-buffer-limit for pubsub clients.
+    """
+
+    def __init__(self, client_buffer_limit: int = 32 * 1024 * 1024):
+        self.client_buffer_limit = client_buffer_limit
+        self._subscribers: Dict[bytes, Set[asyncio.StreamWriter]] = defaultdict(set)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, unix_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 0):
+        if unix_path:
+            self._server = await asyncio.start_unix_server(self._handle, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        channels: Set[bytes] = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    break
+                name = command[0].upper()
+                if name == b"PUBLISH" and len(command) == 3:
+                    self._publish(command[1], command[2], writer)
+                elif name == b"SUBSCRIBE":
+                    for channel in command[1:]:
+                        channels.add(channel)
+                        self._subscribers[channel].add(writer)
+                        writer.write(b"*3\r\n$9\r\nsubscribe\r\n$%d\r\n%s\r\n:%d\r\n"
+                                     % (len(channel), channel, len(channels)))
+                elif name == b"UNSUBSCRIBE":
+                    for channel in command[1:] or list(channels):
+                        channels.discard(channel)
+                        self._subscribers[channel].discard(writer)
+                        writer.write(b"*3\r\n$11\r\nunsubscribe\r\n$%d\r\n%s\r\n:%d\r\n"
+                                     % (len(channel), channel, len(channels)))
+                elif name == b"PING":
+                    writer.write(b"+PONG\r\n")
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            for channel in channels:
+                self._subscribers[channel].discard(writer)
+            writer.close()
+
+    def _publish(self, channel: bytes, data: bytes, publisher: asyncio.StreamWriter):
+        subscribers = self._subscribers.get(channel, ())
+        message = b"*3\r\n$7\r\nmessage\r\n$%d\r\n%s\r\n$%d\r\n" % (len(channel), channel, len(data)) + data + b"\r\n"
+        for writer in list(subscribers):
+            if writer.transport.get_write_buffer_size() > self.client_buffer_limit:
+                writer.close()
+                subscribers.discard(writer)
+                continue
+            writer.write(message)
+        publisher.write(b":%d\r\n" % len(subscribers))
+
+
+# --- relay mezi workery ----------------------------------------------------
+
+# Obálka zprávy na kanálu workera: druh, priorita, odesílající worker, id spojení u gateway
+ENVELOPE = struct.Struct("<BBHI")
+# gateway -> vlastník
+MSG_OPEN = 1        # nové spojení, payload = JSON {game_code, username, incarnation, query}
+MSG_TEXT_IN = 2
+MSG_BYTES_IN = 3
+MSG_DISCONNECT = 4  # klient odešel, payload = u16 kód
+# vlastník -> gateway
+MSG_ACCEPT = 5      # spojení přijato, payload = u32 inkarnace vlastníka
+MSG_CLOSE = 6       # zavřít spojení, payload = u16 kód + důvod
+MSG_TEXT_OUT = 7
+MSG_BYTES_OUT = 8
+# dotaz na všechny workery (např. metriky), id spojení = id dotazu
+MSG_COLLECT = 9         # payload = jméno poskytovatele
+MSG_COLLECT_REPLY = 10  # payload = odpověď poskytovatele
+CLOSE_CODE = struct.Struct("<H")
+INCARNATION = struct.Struct("<I")
+
+
+class RemoteWebSocket:
+    """
+    Owner-side proxy of a client connected to another worker. Implements the part
+    of starlette's WebSocket that websocket_endpoint and ConnectionManager use.
+    """
+
+    def __init__(self, node: "ClusterNode", gateway: int, conn_id: int,
+                 gateway_incarnation: Optional[int] = None, query_params: Optional[Dict[str, str]] = None):
+        self.node = node
+        self.gateway = gateway
+        self.conn_id = conn_id
+        self.gateway_incarnation = gateway_incarnation
+        self.query_params = query_params or {}  # parametry URL klienta u gateway (např. compress)
+        self._incoming: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    def _send(self, kind: int, payload: bytes, priority: int = PRIORITY_NORMAL):
+        self.node.send_to_worker(self.gateway, kind, self.conn_id, payload, priority)
+
+    async def accept(self):
+        self._send(MSG_ACCEPT, INCARNATION.pack(self.node.incarnation))
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None):
+        if not self.closed:
+            self.closed = True
+            self._send(MSG_CLOSE, CLOSE_CODE.pack(code) + (reason or "").encode("utf-8"))
+
+    def send_nowait(self, frame, priority: int = PRIORITY_NORMAL):
+        if self.closed:
+            return
+        if isinstance(frame, bytes):
+            self._send(MSG_BYTES_OUT, frame, priority)
+        else:
+            self._send(MSG_TEXT_OUT, frame.encode("utf-8"), priority)
+
+    async def send_text(self, data: str):
+        self.send_nowait(data)
+
+    async def send_bytes(self, data: bytes):
+        self.send_nowait(data)
+
+    async def send_json(self, data: Any):
+        self.send_nowait(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    async def receive(self) -> dict:
+        return await self._incoming.get()
+
+    def feed(self, message: dict):
+        self._incoming.put_nowait(message)
+
+
+class RemoteOutbox:
+    """
+    ClientOutbox stand-in for a RemoteWebSocket. Frames are forwarded right away
+    with their priority; queueing and dropping happen in the gateway's ClientOutbox,
+    next to the real socket.
+    """
+
+    # Fronta i měření zápisu jsou až u gatewaye - tady klient vypadá vždy jako rychlý
+    depth = 0
+    send_latency = 0.0
+
+    def __init__(self, websocket: RemoteWebSocket, username: str):
+        self.websocket = websocket
+        self.username = username
+        self.closed = False
+        self.stuck = False
+        self.failed = False  # živost hlídá gateway u skutečného socketu
+        self.sent_frames = 0
+        self.sent_bytes = 0
+
+    def start(self):
+        pass
+
+    def push(self, frame, priority: int = PRIORITY_NORMAL) -> bool:
+        if self.closed:
+            return False
+        self.websocket.send_nowait(frame, priority)
+        self.sent_frames += 1
+        self.sent_bytes += len(frame)
+        return True
+
+    async def close(self, code: int = 1000, timeout: float = 2.0):
+        if not self.closed:
+            self.closed = True
+            await self.websocket.close(code=code)
+
+    def stop(self):
+        self.closed = True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "username": self.username,
+            "remote_worker": self.websocket.gateway,
+            "sent_frames": self.sent_frames,
+            "sent_bytes": self.sent_bytes,
+        }
+
+
+class _RelayedConnection:
+    __slots__ = ("websocket", "owner", "outbox", "accepted", "incarnation")
+
+    def __init__(self, websocket, owner: int, outbox: ClientOutbox):
+        self.websocket = websocket
+        self.owner = owner
+        self.outbox = outbox
+        self.incarnation: Optional[int] = None
+        self.accepted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class ClusterNode:
+    """This worker's view of the cluster: room ownership, relaying and cluster-wide events."""
+
+    def __init__(self, worker_id: int, workers: int, pubsub: PubSub,
+                 outbox_settings: Optional[Dict[str, Any]] = None):
+        self.worker_id = worker_id
+        self.workers = workers
+        self.pubsub = pubsub
+        self.ring = HashRing(list(range(workers)))
+        # Odliší restartovaný proces se stejným worker_id od předchozího
+        self.incarnation = int.from_bytes(os.urandom(4), "little")
+        self.outbox_settings = outbox_settings or {}
+        self._room_handler: Optional[Callable] = None
+        self._event_handlers: Dict[str, List[Callable[[], Any]]] = defaultdict(list)
+        self._next_conn_id = 0
+        self._relayed: Dict[int, _RelayedConnection] = {}
+        self._remote: Dict[Tuple[int, int], RemoteWebSocket] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._collectors: Dict[str, Callable[[], bytes]] = {}
+        self._collects: Dict[int, Tuple[List[bytes], asyncio.Future]] = {}
+        self._next_collect_id = 0
+
+    @property
+    def clustered(self) -> bool:
+        return self.workers > 1
+
+    def owns(self, game_code: str) -> bool:
+        return self.workers == 1 or self.ring.owner(game_code) == self.worker_id
+
+    async def start(self, room_handler: Callable):
+        """room_handler(websocket, game_code, username) runs a connection of an owned room."""
+        self._room_handler = room_handler
+        await self.pubsub.start()
+        await self.pubsub.subscribe(WORKER_CHANNEL.format(self.worker_id), self._on_worker_message)
+        await self.pubsub.subscribe(EVENT_CHANNEL, self._on_event)
+        # Restartovaný worker přišel o své místnosti - gateway workery odpojí klienty, ať se připojí znovu
+        self.publish_event("worker_started")
+
+    async def close(self):
+        for relayed in list(self._relayed.values()):
+            relayed.outbox.stop()
+        for task in list(self._tasks):
+            task.cancel()
+        await self.pubsub.close()
+
+    # cluster-wide events
+
+    def on_event(self, name: str, handler: Callable[[], Any]):
+        self._event_handlers[name].append(handler)
+
+    def publish_event(self, name: str):
+        """Tell the other workers about something (e.g. the leaderboard changed)."""
+        if self.clustered:
+            event = {"event": name, "worker": self.worker_id, "incarnation": self.incarnation}
+            self.pubsub.publish(EVENT_CHANNEL, json.dumps(event).encode("utf-8"))
+
+    def _on_event(self, data: bytes):
+        event = json.loads(data)
+        if event.get("worker") == self.worker_id:
+            return
+        if event.get("event") == "worker_started":
+            for relayed in list(self._relayed.values()):
+                if relayed.owner == event["worker"] and relayed.incarnation not in (None, event["incarnation"]):
+                    self._spawn(relayed.outbox.close(code=1012))
+            # Spadlý gateway už DISCONNECT nepošle - jeho klienty v našich místnostech odpojíme sami
+            for websocket in list(self._remote.values()):
+                if websocket.gateway == event["worker"] \
+                        and websocket.gateway_incarnation not in (None, event["incarnation"]):
+                    websocket.feed({"type": "websocket.disconnect", "code": 1006})
+        for handler in self._event_handlers.get(event.get("event"), ()):
+            handler()
+
+    # cluster-wide collection
+
+    def on_collect(self, name: str, provider: Callable[[], bytes]):
+        """provider() answers other workers' collect(name) requests."""
+        self._collectors[name] = provider
+
+    async def collect(self, name: str, timeout: float = 1.0) -> List[bytes]:
+        """Ask every other worker's provider for `name`. Returns the replies that arrived in time."""
+        if not self.clustered:
+            return []
+        self._next_collect_id = (self._next_collect_id + 1) & 0xFFFFFFFF
+        request_id = self._next_collect_id
+        replies: List[bytes] = []
+        done = asyncio.get_running_loop().create_future()
+        self._collects[request_id] = (replies, done)
+        for worker in range(self.workers):
+            if worker != self.worker_id:
+                self.send_to_worker(worker, MSG_COLLECT, request_id, name.encode("utf-8"))
+        try:
+            # Mrtvý nebo restartující worker neodpoví - vrátíme, co přišlo
+            await asyncio.wait_for(done, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._collects[request_id]
+        return replies
+
+    def _on_collect(self, kind: int, sender: int, request_id: int, payload: bytes):
+        if kind == MSG_COLLECT:
+            provider = self._collectors.get(payload.decode("utf-8"))
+            if provider is not None:
+                self.send_to_worker(sender, MSG_COLLECT_REPLY, request_id, provider())
+            return
+        pending = self._collects.get(request_id)
+        if pending is None:
+            return
+        replies, done = pending
+        replies.append(payload)
+        if len(replies) == self.workers - 1 and not done.done():
+            done.set_result(None)
+
+    # relay
+
+    def send_to_worker(self, worker: int, kind: int, conn_id: int, payload: bytes,
+                       priority: int = PRIORITY_NORMAL):
+        self.pubsub.publish(WORKER_CHANNEL.format(worker),
+                            ENVELOPE.pack(kind, priority, self.worker_id, conn_id) + payload)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def relay(self, websocket, game_code: str, username: str):
+        """Gateway side: pump a locally connected client to and from the room's owner."""
+        owner = self.ring.owner(game_code)
+        self._next_conn_id = (self._next_conn_id + 1) & 0xFFFFFFFF
+        conn_id = self._next_conn_id
+        outbox = ClientOutbox(websocket, username, on_stuck=self._on_relay_stuck, **self.outbox_settings)
+        relayed = _RelayedConnection(websocket, owner, outbox)
+        self._relayed[conn_id] = relayed
+        close_code = 1000
+        try:
+            hello = json.dumps({"game_code": game_code, "username": username,
+                                "incarnation": self.incarnation,
+                                "query": dict(websocket.query_params)}).encode("utf-8")
+            # Vlastník se mohl teprve spouštět - OPEN opakujeme, duplicitní vlastník ignoruje
+            deadline = time.monotonic() + 10
+            while not relayed.accepted.done() and time.monotonic() < deadline:
+                self.send_to_worker(owner, MSG_OPEN, conn_id, hello)
+                try:
+                    await asyncio.wait_for(asyncio.shield(relayed.accepted), 1.0)
+                except asyncio.TimeoutError:
+                    pass
+            if not relayed.accepted.done():
+                await websocket.close(code=1013, reason="Server hry je dočasně nedostupný.")
+                return
+            verdict = relayed.accepted.result()
+            if verdict is not None:
+                # Vlastník spojení odmítl ještě před accept - zavřeme ho stejně jako lokálně
+                code, reason = verdict
+                await websocket.close(code=code, reason=reason)
+                return
+            await websocket.accept()
+            outbox.start()
+            while True:
+                data = await websocket.receive()
+                if data["type"] == "websocket.disconnect":
+                    close_code = data.get("code", 1000)
+                    break
+                if data.get("bytes") is not None:
+                    self.send_to_worker(owner, MSG_BYTES_IN, conn_id, data["bytes"])
+                elif data.get("text") is not None:
+                    self.send_to_worker(owner, MSG_TEXT_IN, conn_id, data["text"].encode("utf-8"))
+        except Exception as e:
+            print(f"Relay error: {e!r}")
+        finally:
+            self._relayed.pop(conn_id, None)
+            outbox.stop()
+            self.send_to_worker(owner, MSG_DISCONNECT, conn_id, CLOSE_CODE.pack(close_code))
+
+    def _on_relay_stuck(self, outbox: ClientOutbox):
+        async def close_stuck():
+            try:
+                await asyncio.wait_for(outbox.websocket.close(code=1013, reason="Klient nestíhá přijímat zprávy."), 5)
+            except Exception:
+                pass
+        self._spawn(close_stuck())
+
+    def _on_worker_message(self, data: bytes):
+        kind, priority, sender, conn_id = ENVELOPE.unpack_from(data)
+        payload = data[ENVELOPE.size:]
+        if kind <= MSG_DISCONNECT:
+            self._on_from_gateway(kind, sender, conn_id, payload)
+        elif kind >= MSG_COLLECT:
+            self._on_collect(kind, sender, conn_id, payload)
+        else:
+            self._on_from_owner(kind, priority, conn_id, payload)
+
+    def _on_from_gateway(self, kind: int, gateway: int, conn_id: int, payload: bytes):
+        key = (gateway, conn_id)
+        if kind == MSG_OPEN:
+            if key in self._remote:
+                return  # opakovaný OPEN
+            hello = json.loads(payload)
+            websocket = RemoteWebSocket(self, gateway, conn_id, hello.get("incarnation"), hello.get("query"))
+            self._remote[key] = websocket
+            task = self._spawn(self._room_handler(websocket, hello["game_code"], hello["username"]))
+            task.add_done_callback(lambda _: self._remote.pop(key, None))
+            return
+        websocket = self._remote.get(key)
+        if websocket is None:
+            return
+        if kind == MSG_TEXT_IN:
+            websocket.feed({"type": "websocket.receive", "text": payload.decode("utf-8")})
+        elif kind == MSG_BYTES_IN:
+            websocket.feed({"type": "websocket.receive", "bytes": payload})
+        elif kind == MSG_DISCONNECT:
+            (code,) = CLOSE_CODE.unpack_from(payload)
+            websocket.feed({"type": "websocket.disconnect", "code": code})
+
+    def _on_from_owner(self, kind: int, priority: int, conn_id: int, payload: bytes):
+        relayed = self._relayed.get(conn_id)
+        if relayed is None:
+            return
+        if kind == MSG_ACCEPT:
+            if not relayed.accepted.done():
+                (relayed.incarnation,) = INCARNATION.unpack_from(payload)
+                relayed.accepted.set_result(None)
+        elif kind == MSG_TEXT_OUT:
+            relayed.outbox.push(payload.decode("utf-8"), priority)
+        elif kind == MSG_BYTES_OUT:
+            relayed.outbox.push(payload, priority)
+        elif kind == MSG_CLOSE:
+            (code,) = CLOSE_CODE.unpack_from(payload)
+            if not relayed.accepted.done():
+                relayed.accepted.set_result((code, payload[CLOSE_CODE.size:].decode("utf-8")))
+            else:
+                self._spawn(relayed.outbox.close(code=code))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers,
+            "relayed_connections": len(self._relayed),
+            "remote_connections": len(self._remote),
+            "pubsub": self.pubsub.stats(),
+        }
+
+
+# --- spouštění více workerů ------------------------------------------------
+
+def serve_workers(app: str, host: str, port: int, workers: int, pubsub_url: str = "",
+                  app_dir: str = ".", uvicorn_args: Optional[List[str]] = None):
+    """
+    Start `workers` uvicorn processes sharing one listening socket. Without a pub/sub
+    URL a PubSubBroker is started on a private unix socket. Dead workers are restarted
+    under the same worker id, so room ownership stays stable.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(2048)
+    listener.set_inheritable(True)
+    fd = listener.fileno()
+
+    processes: List[Optional[subprocess.Popen]] = [None] * workers
+    broker = None
+    tmpdir = None
+    if workers > 1 and not pubsub_url:
+        tmpdir = tempfile.mkdtemp(prefix="kreslir-")
+        path = os.path.join(tmpdir, "pubsub.sock")
+        broker = subprocess.Popen([sys.executable, os.path.abspath(__file__), "broker", "--unix", path])
+        deadline = time.monotonic() + 10
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        pubsub_url = "unix://" + path
+
+    def spawn(worker_id: int) -> subprocess.Popen:
+        env = dict(os.environ, KRESLIR_WORKER_ID=str(worker_id), KRESLIR_WORKERS=str(workers),
+                   KRESLIR_PUBSUB_URL=pubsub_url)
+        return subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--fd", str(fd), "--app-dir", app_dir,
+                                 *(uvicorn_args or [])],
+                                env=env, pass_fds=[fd])
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Kreslir: {workers} worker(s) on {host}:{port}, pub/sub {pubsub_url or 'local'}")
+    try:
+        for worker_id in range(workers):
+            processes[worker_id] = spawn(worker_id)
+        while not stopping:
+            for worker_id, process in enumerate(processes):
+                if process.poll() is not None and not stopping:
+                    print(f"Worker {worker_id} exited with {process.returncode}, restarting")
+                    processes[worker_id] = spawn(worker_id)
+            time.sleep(0.5)
+    finally:
+        for process in processes + [broker]:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for process in processes + [broker]:
+            if process is not None:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        listener.close()
+        if tmpdir:
+            try:
+                os.unlink(os.path.join(tmpdir, "pubsub.sock"))
+                os.rmdir(tmpdir)
+            except OSError:
+                pass
+
+
+def _run_broker(argv: List[str]):
+    import argparse
+    parser = argparse.ArgumentParser(prog="cluster.py broker")
+    parser.add_argument("--unix", help="cesta k unix socketu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args(argv)
+
+    async def run():
+        broker = PubSubBroker()
+        await broker.start(unix_path=args.unix, host=args.host, port=args.port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+        await broker.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["broker"]:
+        _run_broker(sys.argv[2:])
+    else:
+        print(__doc__)
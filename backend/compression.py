@@ -0,0 +1,77 @@
+"""
+Komprese velkých odchozích rámců.
+
+Většina rámců má pár desítek bajtů a komprese by je jen zdražila, proto je
+permessage-deflate (komprese každého rámce zvlášť pro každé spojení) vypnutý.
+Místo toho se komprimuje jen rámec od COMPRESSION_SETTINGS["MIN_SIZE"] výš
+(package_list, game_state_sync se skóre, snímek plátna po znovupřipojení...)
+a jen jednou na broadcast - všichni příjemci v místnosti dostanou tytéž bajty.
+
+Kompresi si vyžádá klient parametrem ?compress=deflate v URL WebSocketu (frontend
+jen tam, kde prohlížeč má DecompressionStream). Komprimovaný rámec je binární:
+
+    u8  COMPRESSED_FRAME
+    u8  druh původního rámce (KIND_TEXT - JSON zpráva, KIND_BINARY - rámec tahů)
+    ... zlib stream (RFC 1950) původního rámce
+
+První bajt se neplete s rámcem tahů (ten začíná verzí protokolu, viz strokes.py).
+Klientská strana je ve frontend/src/components/frameCompression.ts.
+"""
+import time
+import zlib
+from typing import Any, Optional, Tuple, Union
+
+from metrics import COMPRESSED_FRAMES, COMPRESSION_SAVED_BYTES, COMPRESSION_SECONDS
+
+COMPRESSED_FRAME = 0x5A
+KIND_TEXT = 0
+KIND_BINARY = 1
+
+_TEXT_HEADER = bytes((COMPRESSED_FRAME, KIND_TEXT))
+_BINARY_HEADER = bytes((COMPRESSED_FRAME, KIND_BINARY))
+
+
+def wants_compression(websocket: Any) -> bool:
+    """Whether the client asked for compressed frames (?compress=deflate)."""
+    query_params = getattr(websocket, "query_params", None)
+    return query_params is not None and query_params.get("compress") == "deflate"
+
+
+def decompress_frame(data: bytes) -> Union[str, bytes]:
+    """Inverse of FrameCompressor.compress (used by tools; clients do this in the browser)."""
+    payload = zlib.decompress(data[2:])
+    return payload.decode("utf-8") if data[1] == KIND_TEXT else payload
+
+
+class FrameCompressor:
+    """Compresses frames above a size threshold, once per frame, for every recipient that wants it."""
+
+    def __init__(self, min_size: int = 1024, level: int = 6, min_saving: float = 0.2):
+        self.min_size = min_size
+        self.level = level
+        self.min_saving = min_saving
+
+    def worth_trying(self, frame: Union[str, bytes]) -> bool:
+        # Délka textu ve znacích je nejvýš jeho délka v UTF-8, malý rámec se tak pozná bez kódování
+        return self.min_size > 0 and len(frame) >= self.min_size
+
+    def compress(self, frame: Union[str, bytes]) -> Tuple[Optional[bytes], int]:
+        """
+        Return (compressed frame, original size in bytes). The compressed frame is None
+        when it would not save at least `min_saving` of the original.
+        """
+        start = time.perf_counter()
+        if isinstance(frame, str):
+            raw, header = frame.encode("utf-8"), _TEXT_HEADER
+        else:
+            raw, header = frame, _BINARY_HEADER
+        packed = header + zlib.compress(raw, self.level)
+        COMPRESSION_SECONDS.inc(time.perf_counter() - start)
+        if len(packed) > len(raw) * (1 - self.min_saving):
+            COMPRESSED_FRAMES.inc(value="incompressible")
+            return None, len(raw)
+        COMPRESSED_FRAMES.inc(value="compressed")
+        return packed, len(raw)
+
+    def record_sent(self, compressed: bytes, original_size: int, recipients: int = 1):
+        COMPRESSION_SAVED_BYTES.inc((original_size - len(compressed)) * recipients)
@@ -0,0 +1,499 @@
+"""
+Datová vrstva nad SQLite (historie her a žebříčky).
+
+- WAL režim, takže čtení neblokuje zápis a naopak
+- malý pool čtecích spojení (jedno na vlákno read executoru)
+- jediný writer task, který výsledky her zapisuje dávkově (group commit):
+  co se nahromadí, zatímco běží předchozí transakce, jde do jedné další
+
+Nic z toho neběží na event loopu, který obsluhuje WebSockety.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Verze schématu v PRAGMA user_version - podle ní se spouští jednorázové migrace
+SCHEMA_VERSION = 2
+
+GameResult = Tuple[str, float, dict]  # game_code, timestamp, scores
+
+
+def _coerce_score(value: Any) -> int:
+    try:
+        return int(value)
+    except Exception:
+        try:
+            return int(float(value))
+        except Exception:
+            return 0
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+
+def _player_result_rows(game_id: int, ts: float, winner: Optional[str], scores: dict) -> List[tuple]:
+    return [
+        (game_id, player, _coerce_score(score), 1 if player == winner else 0, ts)
+        for player, score in scores.items()
+    ]
+
+
+def init_schema(conn: sqlite3.Connection):
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS games (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        game_code TEXT,
+        timestamp REAL,
+        winner TEXT,
+        winner_score INTEGER,
+        scores_json TEXT
+    )
+    """)
+    # Normalizované výsledky - jeden řádek na hráče a hru, aby se nemusel parsovat scores_json
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS player_results (
+        game_id INTEGER NOT NULL REFERENCES games(id),
+        player TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        is_winner INTEGER NOT NULL,
+        ts REAL
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_player_results_player ON player_results (player, ts)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_player_results_ts ON player_results (ts)")
+    # Historie her hráče stránkovaná podle id hry (keyset) - viz _select_games
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_player_results_player_game ON player_results (player, game_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_games_timestamp ON games (timestamp)")
+    # Průběžně udržovaný souhrn na hráče - žebříčky z něj čtou jen prvních `limit` řádků
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS player_stats (
+        player TEXT PRIMARY KEY,
+        total_score INTEGER NOT NULL,
+        games_played INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        highest_score INTEGER NOT NULL,
+        average_score REAL NOT NULL,
+        last_seen REAL
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_player_stats_total ON player_stats (total_score DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_player_stats_ranking ON player_stats (wins DESC, average_score DESC, total_score DESC)")
+    # Galerie - náhled kresby každého kola (viz gallery.py); obrázky se nemění, dají se cachovat natrvalo
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS drawings (
+        game_id INTEGER NOT NULL REFERENCES games(id),
+        round INTEGER NOT NULL,
+        artist TEXT,
+        phrase TEXT,
+        media_type TEXT NOT NULL,
+        width INTEGER NOT NULL,
+        height INTEGER NOT NULL,
+        image BLOB NOT NULL,
+        PRIMARY KEY (game_id, round)
+    )
+    """)
+    conn.commit()
+
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        backfill_player_results(conn)
+    if version < 2:
+        rebuild_player_stats(conn)
+    cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def backfill_player_results(conn: sqlite3.Connection):
+    """One-time migration: fill player_results from scores_json of existing games."""
+    cur = conn.cursor()
+    cur.execute("DELETE FROM player_results")
+    rows = []
+    for game_id, ts, winner, scores_json in cur.execute("SELECT id, timestamp, winner, scores_json FROM games").fetchall():
+        try:
+            scores = json.loads(scores_json) if scores_json else {}
+        except Exception:
+            continue
+        rows.extend(_player_result_rows(game_id, ts, winner, scores))
+    cur.executemany("INSERT INTO player_results (game_id, player, score, is_winner, ts) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    print(f"Migrated {len(rows)} player results from games table.")
+
+
+def rebuild_player_stats(conn: sqlite3.Connection):
+    """Recompute player_stats from the full player_results history."""
+    with conn:
+        conn.execute("DELETE FROM player_stats")
+        conn.execute("""
+            INSERT INTO player_stats (player, total_score, games_played, wins, highest_score, average_score, last_seen)
+            SELECT player, SUM(score), COUNT(*), SUM(is_winner), MAX(score), ROUND(AVG(score), 2), MAX(ts)
+            FROM player_results GROUP BY player
+        """)
+
+
+_UPSERT_PLAYER_STATS = """
+    INSERT INTO player_stats (player, total_score, games_played, wins, highest_score, average_score, last_seen)
+    VALUES (?, ?, 1, ?, ?, ?, ?)
+    ON CONFLICT(player) DO UPDATE SET
+        total_score = total_score + excluded.total_score,
+        games_played = games_played + 1,
+        wins = wins + excluded.wins,
+        highest_score = MAX(highest_score, excluded.highest_score),
+        average_score = ROUND(CAST(total_score + excluded.total_score AS REAL) / (games_played + 1), 2),
+        last_seen = MAX(COALESCE(last_seen, 0), excluded.last_seen)
+"""
+
+
+def write_game_results(conn: sqlite3.Connection, results: List[GameResult]) -> List[int]:
+    """Persist a batch of finished games in a single transaction; returns their ids."""
+    game_ids = []
+    with conn:
+        cur = conn.cursor()
+        for game_code, ts, scores in results:
+            # Determine winner
+            if not scores:
+                winner = None
+                winner_score = 0
+            else:
+                winner, winner_score = max(scores.items(), key=lambda kv: kv[1])
+            cur.execute(
+                "INSERT INTO games (game_code, timestamp, winner, winner_score, scores_json) VALUES (?, ?, ?, ?, ?)",
+                (game_code, ts, winner, int(winner_score) if winner is not None else 0, json.dumps(scores, ensure_ascii=False)),
+            )
+            game_ids.append(cur.lastrowid)
+            rows = _player_result_rows(cur.lastrowid, ts, winner, scores)
+            cur.executemany(
+                "INSERT INTO player_results (game_id, player, score, is_winner, ts) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            # Souhrn se aktualizuje ve stejné transakci jako výsledky hry
+            cur.executemany(_UPSERT_PLAYER_STATS, [
+                (player, score, is_winner, score, float(score), ts)
+                for _game_id, player, score, is_winner, ts in rows
+            ])
+    return game_ids
+
+
+def write_drawings(conn: sqlite3.Connection, game_id: int, drawings: List[tuple]):
+    """Store a game's round thumbnails: (round, artist, phrase, media_type, width, height, image)."""
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO drawings (game_id, round, artist, phrase, media_type, width, height, image) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(game_id, *drawing) for drawing in drawings],
+        )
+
+
+# --- Dotazy pro API (běží ve vláknech read poolu) ---
+
+def query_top_games(conn: sqlite3.Connection, limit: int) -> List[Dict[str, Any]]:
+    cur = conn.execute(
+        "SELECT game_code, timestamp, winner, winner_score FROM games WHERE winner IS NOT NULL ORDER BY winner_score DESC LIMIT ?",
+        (limit,),
+    )
+    return [
+        {'game_code': game_code, 'timestamp': _iso(ts), 'winner': winner, 'winner_score': winner_score}
+        for game_code, ts, winner, winner_score in cur.fetchall()
+    ]
+
+
+_GAME_COLUMNS = "g.id, g.game_code, g.timestamp, g.winner, g.winner_score, g.scores_json"
+
+
+def _select_games(conn: sqlite3.Connection, limit: int, before: Optional[int] = None,
+                  player: Optional[str] = None, since: Optional[float] = None,
+                  until: Optional[float] = None) -> sqlite3.Cursor:
+    """Newest first, keyset-paginated: the next page starts below the last id seen (`before`)."""
+    where: List[str] = []
+    params: List[Any] = []
+    if player:
+        # Index (player, game_id) vrátí hry hráče rovnou seřazené podle id
+        source = "player_results pr JOIN games g ON g.id = pr.game_id"
+        key = "pr.game_id"
+        where.append("pr.player = ?")
+        params.append(player)
+    else:
+        source = "games g"
+        key = "g.id"
+    if before is not None:
+        where.append(f"{key} < ?")
+        params.append(before)
+    if since is not None:
+        where.append("g.timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("g.timestamp < ?")
+        params.append(until)
+    condition = f"WHERE {' AND '.join(where)}" if where else ""
+    params.append(limit)
+    return conn.execute(f"SELECT {_GAME_COLUMNS} FROM {source} {condition} ORDER BY {key} DESC LIMIT ?", params)
+
+
+def query_games(conn: sqlite3.Connection, limit: int, before: Optional[int] = None,
+                player: Optional[str] = None, since: Optional[float] = None,
+                until: Optional[float] = None) -> List[Dict[str, Any]]:
+    result = []
+    for id_, game_code, ts, winner, winner_score, scores_json in _select_games(
+            conn, limit, before, player, since, until):
+        try:
+            scores = json.loads(scores_json) if scores_json else {}
+        except Exception:
+            scores = {}
+        result.append({
+            'id': id_,
+            'game_code': game_code,
+            'timestamp': _iso(ts),
+            'winner': winner,
+            'winner_score': winner_score,
+            'scores': scores,
+        })
+    return result
+
+
+def query_games_ndjson(conn: sqlite3.Connection, limit: int, before: Optional[int] = None,
+                       player: Optional[str] = None, since: Optional[float] = None,
+                       until: Optional[float] = None) -> Tuple[str, Optional[int], int]:
+    """One page of games as NDJSON lines; returns (text, last id, row count)."""
+    lines = []
+    last_id = None
+    for id_, game_code, ts, winner, winner_score, scores_json in _select_games(
+            conn, limit, before, player, since, until):
+        # scores_json zapsal json.dumps - vložíme ho beze změny, bez parsování a nového kódování
+        if not scores_json or not scores_json.startswith("{"):
+            scores_json = "{}"
+        lines.append(
+            f'{{"id":{id_},"game_code":{json.dumps(game_code, ensure_ascii=False)},'
+            f'"timestamp":{json.dumps(_iso(ts))},"winner":{json.dumps(winner, ensure_ascii=False)},'
+            f'"winner_score":{json.dumps(winner_score)},"scores":{scores_json}}}\n'
+        )
+        last_id = id_
+    return "".join(lines), last_id, len(lines)
+
+
+def query_aggregate(conn: sqlite3.Connection, limit: int) -> List[Dict[str, Any]]:
+    cur = conn.execute("""
+        SELECT player, total_score, games_played, wins, highest_score, last_seen
+        FROM player_stats ORDER BY total_score DESC LIMIT ?
+    """, (limit,))
+    out = []
+    for player, total_score, games_played, wins, highest_score, last_seen in cur.fetchall():
+        avg = total_score / games_played if games_played else 0
+        out.append({
+            "player": player,
+            "total_score": total_score,
+            "games_played": games_played,
+            "wins": wins,
+            "highest_score": highest_score,
+            "average_score": round(avg, 2),
+            "last_seen": _iso(last_seen),
+        })
+    return out
+
+
+def query_ranking(conn: sqlite3.Connection, limit: int) -> List[Dict[str, Any]]:
+    cur = conn.execute("""
+        SELECT player, wins, total_score, games_played, last_seen
+        FROM player_stats ORDER BY wins DESC, average_score DESC, total_score DESC LIMIT ?
+    """, (limit,))
+    out = []
+    for player, wins, total_score, games_played, last_seen in cur.fetchall():
+        avg = total_score / games_played if games_played else 0
+        out.append({
+            "player": player,
+            "wins": wins,
+            "total_score": total_score,
+            "games_played": games_played,
+            "average_score": round(avg, 2),
+            "last_seen": _iso(last_seen),
+        })
+    return out
+
+
+def query_player(conn: sqlite3.Connection, username: str, recent_limit: int) -> Dict[str, Any]:
+    games_played, total_score, wins, highest_score = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(score), 0), COALESCE(SUM(is_winner), 0), COALESCE(MAX(score), 0) "
+        "FROM player_results WHERE player = ?",
+        (username,),
+    ).fetchone()
+
+    cur = conn.execute("""
+        SELECT pr.game_id, g.game_code, pr.ts, pr.score, g.winner, pr.is_winner
+        FROM player_results pr JOIN games g ON g.id = pr.game_id
+        WHERE pr.player = ? ORDER BY pr.ts DESC LIMIT ?
+    """, (username, recent_limit))
+    recent_games = [
+        {
+            'id': id_,
+            'game_code': game_code,
+            'timestamp': _iso(ts),
+            'score': score,
+            'winner': winner,
+            'is_winner': bool(is_winner),
+        }
+        for id_, game_code, ts, score, winner, is_winner in cur.fetchall()
+    ]
+
+    avg = total_score / games_played if games_played else 0
+    return {
+        'player': username,
+        'total_score': total_score,
+        'games_played': games_played,
+        'wins': wins,
+        'highest_score': highest_score,
+        'average_score': round(avg, 2),
+        'recent_games': recent_games,
+    }
+
+
+def query_drawings(conn: sqlite3.Connection, game_id: int, after_round: int, limit: int) -> Dict[str, Any]:
+    # Stránkování podle klíče (round > after) - bez OFFSET, přímo z primárního klíče
+    cur = conn.execute(
+        "SELECT round, artist, phrase, media_type, width, height FROM drawings "
+        "WHERE game_id = ? AND round > ? ORDER BY round LIMIT ?",
+        (game_id, after_round, limit + 1),
+    )
+    rows = cur.fetchall()
+    drawings = [
+        {
+            'round': round_,
+            'artist': artist,
+            'phrase': phrase,
+            'media_type': media_type,
+            'width': width,
+            'height': height,
+            'url': f"/api/games/{game_id}/drawings/{round_}",
+        }
+        for round_, artist, phrase, media_type, width, height in rows[:limit]
+    ]
+    next_after = drawings[-1]['round'] if len(rows) > limit else None
+    return {'game_id': game_id, 'drawings': drawings, 'next_after': next_after}
+
+
+def query_drawing_image(conn: sqlite3.Connection, game_id: int, round_: int) -> Optional[Tuple[str, bytes]]:
+    return conn.execute(
+        "SELECT media_type, image FROM drawings WHERE game_id = ? AND round = ?", (game_id, round_),
+    ).fetchone()
+
+
+class Database:
+    """SQLite access layer: WAL, pooled readers and one batching writer task."""
+
+    def __init__(self, path: Path, read_pool_size: int = 4, write_batch_max: int = 64):
+        self.path = path
+        self.read_pool_size = read_pool_size
+        self.write_batch_max = write_batch_max
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self.batches_written = 0
+        self.results_written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def open(self):
+        """Open the writer connection and run schema migrations (synchronous)."""
+        if self._write_conn is None:
+            self._write_conn = self._connect()
+            init_schema(self._write_conn)
+
+    def rebuild_player_stats(self):
+        self.open()
+        rebuild_player_stats(self._write_conn)
+
+    def write_sync(self, results: List[GameResult]):
+        """Write results directly on the caller's thread (CLI, tools, seeding)."""
+        self.open()
+        write_game_results(self._write_conn, results)
+
+    async def start(self):
+        self.open()
+        self._read_executor = ThreadPoolExecutor(max_workers=self.read_pool_size, thread_name_prefix="db-read")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+
+    async def close(self):
+        if self._writer_task is not None:
+            await self._queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+        for executor in (self._read_executor, self._write_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._read_executor = self._write_executor = None
+        if self._write_conn is not None:
+            self._write_conn.close()
+            self._write_conn = None
+
+    def _read_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _run_read(self, fn: Callable, args: tuple):
+        return fn(self._read_conn(), *args)
+
+    async def read(self, fn: Callable, *args):
+        """Run fn(conn, *args) on a pooled read connection, off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, self._run_read, fn, args)
+
+    async def save_game_result(self, game_code: str, scores: dict) -> int:
+        """Queue a finished game for the writer task; returns the game id once it is committed."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((game_code, time.time(), dict(scores)), future))
+        return await future
+
+    async def save_drawings(self, game_id: int, drawings: List[tuple]):
+        """Store round thumbnails on the writer thread (serialized with game results)."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._write_executor, write_drawings, self._write_conn, game_id, drawings)
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Group commit: přibereme vše, co se nahromadilo během předchozího zápisu
+            while len(batch) < self.write_batch_max:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                game_ids = await loop.run_in_executor(self._write_executor, write_game_results,
+                                                      self._write_conn, [result for result, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches_written += 1
+            self.results_written += len(batch)
+            for (_, future), game_id in zip(batch, game_ids):
+                if not future.done():
+                    future.set_result(game_id)
@@ -0,0 +1,87 @@
+"""
+Zředění tahů pro klienty na slabém připojení.
+
+Běžně server přeposílá každý rámec tahů kreslíře všem (~30x za sekundu).
+Klient, jehož fronta odchozích rámců roste nebo jehož zápisy do socketu trvají
+dlouho (ClientOutbox.depth a send_latency), se přepne do pomalého režimu:
+rámce tahů se pro něj místo přeposílání odkládají do společného bufferu
+místnosti (StrokeBuffer) a několikrát za sekundu se odešlou jako jeden rámec.
+Úseky jednoho tahu se v něm sloučí a zjednoduší (Ramer-Douglas-Peucker), takže
+výsledné plátno se od originálu liší nejvýš o toleranci v pixelech.
+
+Zjednodušuje se jednou za místnost a flush, ne pro každého příjemce zvlášť,
+přes strokes.simplify_polylines nad všemi tahy bufferu naráz (s NumPy
+vektorově, běžný flush s desítkami bodů v čistém Pythonu).
+"""
+from typing import Dict, List, Optional
+
+from metrics import DOWNSAMPLE_POINTS
+from strokes import MAX_CHUNK_POINTS, STROKE_BEGIN, STROKE_END, decode_frame, encode_chunk, simplify_polylines
+
+class StrokeBuffer:
+    """Stroke frames held back for a room's constrained viewers, merged per stroke when taken."""
+
+    __slots__ = ("_frames",)
+
+    def __init__(self):
+        # Rámce se dekódují až při take() - přidání na horké cestě je jen append
+        self._frames: List[bytes] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._frames)
+
+    def add(self, frame: bytes):
+        """Append a (validated) stroke frame."""
+        self._frames.append(frame)
+
+    def _merge(self) -> List[list]:
+        strokes: List[list] = []  # [id tahu, příznaky, styl, body]
+        open_strokes: Dict[int, list] = {}
+        for frame in self._frames:
+            for stroke_id, flags, style, points in decode_frame(frame):
+                stroke = open_strokes.get(stroke_id)
+                if stroke is None or flags & STROKE_BEGIN or len(stroke[3]) >= 2 * MAX_CHUNK_POINTS:
+                    # Nový tah nese styl, pokračování tahu z minulého flushe (nebo přerostlého úseku) ne
+                    stroke = [stroke_id, flags & STROKE_BEGIN, style if flags & STROKE_BEGIN else None, []]
+                    strokes.append(stroke)
+                    open_strokes[stroke_id] = stroke
+                stroke[3].extend(points)
+                if flags & STROKE_END:
+                    stroke[1] |= STROKE_END
+                    del open_strokes[stroke_id]
+        return strokes
+
+    def take(self, tolerance: float) -> Optional[bytes]:
+        """Everything held back as one frame of simplified chunks; empties the buffer."""
+        if not self._frames:
+            return None
+        strokes = self._merge()
+        self._frames = []
+        polylines = [stroke[3] for stroke in strokes]
+        simplified = simplify_polylines(polylines, tolerance) if tolerance > 0 else polylines
+        frame = b"".join(encode_chunk(stroke_id, flags, style, points)
+                         for (stroke_id, flags, style, _), points in zip(strokes, simplified))
+        total = sum(len(points) for points in polylines) // 2
+        kept = sum(len(points) for points in simplified) // 2
+        DOWNSAMPLE_POINTS.inc(kept, "kept")
+        DOWNSAMPLE_POINTS.inc(total - kept, "removed")
+        return frame
+
+
+class StrokeDownsampler:
+    """Decides which clients get strokes at the reduced rate; hysteresis avoids flapping."""
+
+    def __init__(self, rate_hz: float = 6.0, tolerance: float = 1.5, queue_high: int = 32,
+                 queue_low: int = 8, latency_high: float = 0.1, latency_low: float = 0.02):
+        self.interval = 1 / rate_hz
+        self.tolerance = tolerance
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.latency_high = latency_high
+        self.latency_low = latency_low
+
+    def constrained(self, outbox, was: bool) -> bool:
+        """Whether the client behind `outbox` should get downsampled strokes (`was` = current state)."""
+        if was:
+            return outbox.depth > self.queue_low or outbox.send_latency > self.latency_low
+        return outbox.depth >= self.queue_high or outbox.send_latency >= self.latency_high
@@ -0,0 +1,151 @@
+"""
+Galerie kreseb: náhled každého dokončeného kola se vykreslí mimo smyčku událostí.
+
+end_round předá snímek tahů kola (StrokeLog.snapshot) do poolu procesů, který
+ho vykreslí stejně jako klient (strokeProtocol.ts) a zakóduje do WebP, případně
+PNG. Hra v té době běží dál. Hotové náhledy čekají u místnosti, dokud se hra
+neuloží - teprve pak existuje id hry, pod kterým se zapíšou do tabulky drawings.
+Nedohraná hra se neukládá, takže se zahodí i její kresby.
+
+Fronta úloh je omezená: když pool nestíhá, náhled kola se vynechá (galerie je
+doplněk, hra na ní nezávisí). Bez Pillow je galerie vypnutá.
+"""
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+from metrics import GALLERY_JOBS
+from strokes import STROKE_BEGIN, STROKE_END, decode_frame
+
+try:
+    from PIL import Image, ImageDraw, features
+except ImportError:  # pragma: no cover - Pillow je volitelný
+    Image = None
+
+BACKGROUND = (255, 255, 255)
+SUPERSAMPLE = 2  # kreslí se ve větším rozlišení a zmenší se - vyhlazené hrany
+
+
+class Drawing(NamedTuple):
+    round: int
+    artist: str
+    phrase: str
+    media_type: str
+    width: int
+    height: int
+    image: bytes
+
+
+def render_thumbnail(snapshot: bytes, max_width: int, max_height: int,
+                     image_format: str = "webp", quality: int = 75) -> Tuple[bytes, str, int, int]:
+    """Rasterize a stroke snapshot into an encoded image. Runs in the renderer pool."""
+    chunks = decode_frame(snapshot)
+    # Plátno klienta nemá pevnou velikost - vezmeme rozsah, který kreslíř použil
+    extent_x = extent_y = 1
+    for _stroke_id, _flags, _style, points in chunks:
+        if points:
+            extent_x = max(extent_x, max(points[0::2]))
+            extent_y = max(extent_y, max(points[1::2]))
+    scale = min(max_width / extent_x, max_height / extent_y, 1.0)
+    width, height = max(1, round(extent_x * scale)), max(1, round(extent_y * scale))
+    factor = scale * SUPERSAMPLE
+
+    image = Image.new("RGB", (width * SUPERSAMPLE, height * SUPERSAMPLE), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    # Stejně jako StrokeRenderer: úsek navazuje na poslední bod svého tahu
+    strokes = {}
+    for stroke_id, flags, style, points in chunks:
+        if len(points) < 2:
+            continue
+        if flags & STROKE_BEGIN and style is not None:
+            r, g, b, line_width = style
+            state = strokes[stroke_id] = [(r, g, b), max(1, round(line_width * factor)), points[0], points[1]]
+        else:
+            state = strokes.get(stroke_id)
+            if state is None:
+                continue  # začátek tahu se nezachoval, nemáme styl
+        color, line_width, x, y = state
+        xy = [(x * factor, y * factor)]
+        xy.extend((points[i] * factor, points[i + 1] * factor) for i in range(0, len(points), 2))
+        if len(xy) > 1:
+            draw.line(xy, fill=color, width=line_width, joint="curve")
+        radius = line_width / 2
+        for px, py in (xy[0], xy[-1]):
+            # Kulaté konce čar (lineCap = 'round')
+            draw.ellipse((px - radius, py - radius, px + radius, py + radius), fill=color)
+        state[2], state[3] = points[-2], points[-1]
+        if flags & STROKE_END:
+            strokes.pop(stroke_id, None)
+
+    image = image.resize((width, height), Image.LANCZOS)
+    out = io.BytesIO()
+    if image_format == "webp" and features.check("webp"):
+        image.save(out, "WEBP", quality=quality, method=4)
+        media_type = "image/webp"
+    else:
+        image.save(out, "PNG", optimize=True)
+        media_type = "image/png"
+    return out.getvalue(), media_type, width, height
+
+
+class GalleryRenderer:
+    """Bounded process pool that renders round thumbnails off the event loop."""
+
+    def __init__(self, pool_size: int = 1, max_pending: int = 32, max_width: int = 320,
+                 max_height: int = 240, image_format: str = "webp", quality: int = 75):
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self.max_width = max_width
+        self.max_height = max_height
+        self.image_format = image_format
+        self.quality = quality
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and self.pool_size > 0
+
+    def start(self):
+        if self.enabled and self._executor is None:
+            # spawn, ne fork: proces serveru má běžící vlákna (DB pool), fork by mohl zdědit zamčené zámky
+            self._executor = ProcessPoolExecutor(max_workers=self.pool_size,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, snapshot: bytes, round_number: int, artist: str, phrase: str) -> Optional[asyncio.Future]:
+        """Queue a round for rendering; None when the gallery is off or the queue is full."""
+        if self._executor is None:
+            return None
+        if self.pending >= self.max_pending:
+            GALLERY_JOBS.inc(value="dropped")
+            return None
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._executor, render_thumbnail, snapshot,
+                                   self.max_width, self.max_height, self.image_format, self.quality)
+        return asyncio.ensure_future(self._finish(job, round_number, artist, phrase))
+
+    async def _finish(self, job, round_number: int, artist: str, phrase: str) -> Optional[Drawing]:
+        try:
+            image, media_type, width, height = await job
+        except Exception as e:
+            GALLERY_JOBS.inc(value="failed")
+            print(f"Gallery render failed: {e!r}")
+            return None
+        finally:
+            self.pending -= 1
+        GALLERY_JOBS.inc(value="rendered")
+        return Drawing(round_number, artist, phrase, media_type, width, height, image)
+
+    async def collect(self, jobs: List[asyncio.Future]) -> List[Drawing]:
+        """Wait for a game's render jobs; failed ones are left out."""
+        if not jobs:
+            return []
+        return [drawing for drawing in await asyncio.gather(*jobs) if drawing is not None]
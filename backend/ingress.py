@@ -0,0 +1,172 @@
+"""
+Vstupní brána zpráv od klienta: limit velikosti rámce, token bucket na spojení
+a typ zprávy a levná kontrola tvaru dřív, než se zpráva pustí k obsluze.
+
+Pořadí je zvolené tak, aby odmítnutí bylo co nejlevnější: délka rámce, pak typ
+vytažený regulárním výrazem (neznámý typ nebo vyčerpaný bucket se zahodí bez
+json.loads), teprve potom parsování a kontrola polí; u binárního rámce tahů
+jen průchod hlavičkami úseků, body se nedekódují. Každé odmítnutí čerpá
+z bucketu porušení; kdo ho vyčerpá, je odpojen (1008), příliš velký rámec
+končí rovnou 1009.
+"""
+import json
+import math
+import re
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from metrics import INGRESS_REJECTED
+from strokes import STROKE_RESET, is_stroke_frame, scan_stroke_frame
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover - orjson je volitelný
+    _loads = json.loads
+
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TOO_BIG = 1009
+
+# Klient posílá typ jako první klíč, takže hledání skončí hned na začátku rámce.
+# Vnořený "type" uvnitř dat odhalí až kontrola po parsování (typ se musí shodovat).
+_TYPE_RE = re.compile(r'"type"\s*:\s*"([A-Za-z_]{1,32})"')
+
+MAX_GUESS_LENGTH = 200
+MAX_PHRASE_WORDS = 8
+MAX_WORD_LENGTH = 64
+MAX_PACKAGE_NAME = 100
+SEGMENT_COORDINATES = ("x0", "y0", "x1", "y1")
+
+
+class IngressRejected(Exception):
+    """The connection broke the ingress rules and has to be closed with `code`."""
+
+    def __init__(self, code: int, reason: str):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `burst` saved up; take() is O(1) and allocation-free."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        tokens = self.tokens + (now - self.updated) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        self.updated = now
+        if tokens < 1.0:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1.0
+        return True
+
+
+def _valid_select_package(message: dict) -> bool:
+    package = message.get("package")
+    return isinstance(package, str) and len(package) <= MAX_PACKAGE_NAME
+
+
+def _valid_select_phrase(message: dict) -> bool:
+    phrase = message.get("phrase")
+    return (isinstance(phrase, list) and 0 < len(phrase) <= MAX_PHRASE_WORDS
+            and all(isinstance(word, str) and len(word) <= MAX_WORD_LENGTH for word in phrase))
+
+
+def _finite_number(value: Any) -> bool:
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _valid_drawing_data(message: dict) -> bool:
+    # Souřadnice jdou do i16 úseku záznamu kola - "nan", "1e400" ani řetězce neprojdou
+    data = message.get("data")
+    return isinstance(data, dict) and all(_finite_number(data.get(key)) for key in SEGMENT_COORDINATES)
+
+
+def _valid_guess(message: dict) -> bool:
+    guess = message.get("guess")
+    return isinstance(guess, str) and 0 < len(guess) <= MAX_GUESS_LENGTH
+
+
+def _no_payload(message: dict) -> bool:
+    return True
+
+
+VALIDATORS: Dict[str, Callable[[dict], bool]] = {
+    "select_package": _valid_select_package,
+    "start_game": _no_payload,
+    "select_phrase": _valid_select_phrase,
+    "drawing_data": _valid_drawing_data,
+    "clear_canvas": _no_payload,
+    "guess": _valid_guess,
+}
+
+
+class Ingress:
+    """Per-connection gate in front of the message handlers."""
+
+    __slots__ = ("max_text", "max_binary", "buckets", "violations", "clock")
+
+    def __init__(self, limits: Mapping[str, Tuple[float, float]], violations: Tuple[float, float],
+                 max_text: int, max_binary: int, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        now = clock()
+        self.max_text = max_text
+        self.max_binary = max_binary
+        # Bucket jen pro typy, které mají limit; ostatní typy brána nepustí
+        self.buckets = {kind: TokenBucket(rate, burst, now) for kind, (rate, burst) in limits.items()}
+        self.violations = TokenBucket(*violations, now)
+
+    def _reject(self, reason: str, now: float) -> None:
+        INGRESS_REJECTED.inc(value=reason)
+        if not self.violations.take(now):
+            raise IngressRejected(CLOSE_POLICY_VIOLATION, "Příliš mnoho neplatných zpráv.")
+        return None
+
+    def text(self, text: str) -> Optional[Dict[str, Any]]:
+        """Parsed message if it may be dispatched, None if it is dropped."""
+        if len(text) > self.max_text:
+            INGRESS_REJECTED.inc(value="size")
+            raise IngressRejected(CLOSE_TOO_BIG, "Zpráva je příliš velká.")
+        now = self.clock()
+        match = _TYPE_RE.search(text)
+        if match is None:
+            return self._reject("malformed", now)
+        kind = match.group(1)
+        bucket = self.buckets.get(kind)
+        validator = VALIDATORS.get(kind)
+        if bucket is None or validator is None:
+            return self._reject("unknown", now)
+        if not bucket.take(now):
+            return self._reject("rate", now)
+        try:
+            message = _loads(text)
+        except ValueError:
+            return self._reject("malformed", now)
+        if not isinstance(message, dict) or message.get("type") != kind or not validator(message):
+            return self._reject("malformed", now)
+        return message
+
+    def binary(self, frame: bytes) -> Optional[int]:
+        """OR-ed chunk flags of a binary stroke frame that may be processed, None if it is dropped."""
+        if len(frame) > self.max_binary:
+            INGRESS_REJECTED.inc(value="size")
+            raise IngressRejected(CLOSE_TOO_BIG, "Zpráva je příliš velká.")
+        now = self.clock()
+        bucket = self.buckets.get("stroke_frame")
+        if bucket is None or not bucket.take(now):
+            return self._reject("rate", now)
+        flags = scan_stroke_frame(frame) if is_stroke_frame(frame) else None
+        # STROKE_RESET posílá jen server ve snímku plátna - od kreslíře by divákům smazal plátno uprostřed kola
+        if flags is None or flags & STROKE_RESET:
+            return self._reject("malformed", now)
+        return flags
@@ -0,0 +1,238 @@
+"""
+Záznam průběhu hry (journal) pro pozdější přehrání.
+
+Každá rozehraná hra má vlastní soubor, do kterého se jen přidává. Během hry
+se jmenuje <kód>-<čas založení>.part, po uložení výsledku do databáze se
+přejmenuje na <id hry>.journal. Nedohraná hra se smaže.
+
+Soubor je posloupnost komprimovaných bloků:
+
+    u32 délka bloku
+    ... zlib stream záznamů (RECORD + data)
+
+Záznam: u8 druh (EVENT_*), u32 ms od začátku hry (monotónní čas), u32 délka dat,
+pak data - JSON pro události, rámec tahů v binárním protokolu v2 (strokes.py)
+pro EVENT_STROKES.
+
+Zápis jen přidá bajty do bufferu hry v paměti. Na disk buffery zapisuje
+JournalWriter na pozadí (jeden blok na hru a flush) přes vlastní vlákno, takže
+smyčka událostí na disk nikdy nečeká. Když disk nestíhá a buffer hry přeroste
+max_buffer, další záznamy se zahazují. Čtení (JournalReader) jde po blocích,
+celý soubor se do paměti nenačítá.
+"""
+import asyncio
+import base64
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+from metrics import JOURNAL_BYTES, JOURNAL_DROPPED
+
+EVENT_GAME_START = 1
+EVENT_ROUND_START = 2
+EVENT_PHRASE = 3
+EVENT_STROKES = 4
+EVENT_CLEAR = 5
+EVENT_GUESS = 6
+EVENT_SCORE = 7
+EVENT_ROUND_END = 8
+EVENT_GAME_END = 9
+
+EVENT_NAMES = {
+    EVENT_GAME_START: "game_start",
+    EVENT_ROUND_START: "round_start",
+    EVENT_PHRASE: "phrase_selected",
+    EVENT_STROKES: "strokes",
+    EVENT_CLEAR: "clear_canvas",
+    EVENT_GUESS: "guess",
+    EVENT_SCORE: "score",
+    EVENT_ROUND_END: "round_end",
+    EVENT_GAME_END: "game_end",
+}
+
+RECORD = struct.Struct("<BII")
+BLOCK = struct.Struct("<I")
+
+PART_SUFFIX = ".part"
+FINAL_SUFFIX = ".journal"
+
+
+class GameJournal:
+    """In-memory tail of one game's journal; the writer moves it to disk."""
+
+    __slots__ = ("writer", "name", "started", "buffer", "closed")
+
+    def __init__(self, writer: "JournalWriter", name: str, elapsed: float = 0.0):
+        self.writer = writer
+        self.name = name
+        self.started = time.monotonic() - elapsed
+        self.buffer = bytearray()
+        self.closed = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def record(self, kind: int, payload: bytes):
+        """Append one event; never blocks."""
+        if self.closed:
+            return
+        buffer = self.buffer
+        if len(buffer) >= self.writer.max_buffer:
+            JOURNAL_DROPPED.inc()
+            return
+        if not buffer:
+            self.writer._dirty.add(self)
+        buffer += RECORD.pack(kind, int((time.monotonic() - self.started) * 1000), len(payload))
+        buffer += payload
+        if len(buffer) >= self.writer.flush_bytes:
+            self.writer._wakeup.set()
+
+
+def _append_blocks(directory: Path, blocks: List[Tuple[str, bytes]], level: int) -> int:
+    written = 0
+    for name, data in blocks:
+        block = zlib.compress(data, level)
+        with open(directory / (name + PART_SUFFIX), "ab") as f:
+            f.write(BLOCK.pack(len(block)))
+            f.write(block)
+        written += BLOCK.size + len(block)
+    return written
+
+
+def _unlink(path: Path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class JournalWriter:
+    """Buffers journals of running games and appends them to disk in the background."""
+
+    def __init__(self, directory: Path, flush_interval: float = 1.0, flush_bytes: int = 64 * 1024,
+                 max_buffer: int = 4 * 1024 * 1024, level: int = 6):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.max_buffer = max_buffer
+        self.level = level
+        self._dirty: Set[GameJournal] = set()
+        self._wakeup = asyncio.Event()
+        # Jedno vlákno = zápisy, přejmenování a mazání jednoho souboru proběhnou v pořadí, v jakém přišly
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._executor is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+            self._task = asyncio.create_task(self._run())
+
+    def open(self, game_code: str) -> GameJournal:
+        return GameJournal(self, f"{game_code}-{time.time_ns() // 1_000_000}")
+
+    def resume(self, name: str, elapsed: float) -> GameJournal:
+        """Continue a journal of a game restored after restart (main.restore_rooms)."""
+        return GameJournal(self, name, elapsed)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Journal flush failed: {e!r}")
+
+    async def flush(self):
+        """Append every pending buffer to its file as one compressed block."""
+        if not self._dirty or self._executor is None:
+            return
+        blocks = []
+        for journal in self._dirty:
+            if journal.buffer:
+                blocks.append((journal.name, bytes(journal.buffer)))
+                journal.buffer.clear()
+        self._dirty.clear()
+        loop = asyncio.get_running_loop()
+        written = await loop.run_in_executor(self._executor, _append_blocks, self.directory, blocks, self.level)
+        JOURNAL_BYTES.inc(written)
+
+    async def finish(self, journal: GameJournal, game_id: int):
+        """Close a saved game's journal and publish it under the game id."""
+        journal.closed = True
+        await self.flush()
+        if self._executor is None:
+            return
+        part = self.directory / (journal.name + PART_SUFFIX)
+        final = self.directory / f"{game_id}{FINAL_SUFFIX}"
+        await asyncio.get_running_loop().run_in_executor(self._executor, os.replace, part, final)
+
+    def discard(self, journal: GameJournal):
+        """Drop the journal of a game that will never be saved."""
+        if journal.closed:
+            return
+        journal.closed = True
+        journal.buffer.clear()
+        self._dirty.discard(journal)
+        if self._executor is not None:
+            self._executor.submit(_unlink, self.directory / (journal.name + PART_SUFFIX))
+
+    def path(self, game_id: int) -> Path:
+        return self.directory / f"{game_id}{FINAL_SUFFIX}"
+
+    async def close(self):
+        """Write what is buffered (running games continue after a restart) and stop."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._executor is not None:
+            await self.flush()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class JournalReader:
+    """Reads a journal one block at a time; use from a worker thread."""
+
+    def __init__(self, path: Path):
+        self._file = open(path, "rb")
+
+    def read_block(self) -> Optional[List[Tuple[int, int, bytes]]]:
+        """Next block as [(kind, ms, payload)], None at the end (or at a torn last block)."""
+        header = self._file.read(BLOCK.size)
+        if len(header) < BLOCK.size:
+            return None
+        (size,) = BLOCK.unpack(header)
+        block = self._file.read(size)
+        if len(block) < size:
+            return None
+        data = zlib.decompress(block)
+        records = []
+        offset = 0
+        while offset + RECORD.size <= len(data):
+            kind, ms, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            records.append((kind, ms, data[offset:offset + length]))
+            offset += length
+        return records
+
+    def close(self):
+        self._file.close()
+
+
+def record_to_ndjson(kind: int, ms: int, payload: bytes) -> str:
+    """One replay line; JSON payloads are spliced in as stored, strokes go as base64."""
+    if kind == EVENT_STROKES:
+        data = '"' + base64.b64encode(payload).decode("ascii") + '"'
+    else:
+        data = payload.decode("utf-8")
+    return f'{{"t":{ms},"event":"{EVENT_NAMES.get(kind, "unknown")}","data":{data}}}\n'
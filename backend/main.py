@@ -1,22 +1,74 @@
 import json
-import random
+import os
 import asyncio
+import signal
+import threading
 import time
-import unicodedata
-from typing import Dict, List, Any, Optional, Tuple
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Any, Mapping, Optional, Tuple
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, APIRouter
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, APIRouter, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import sqlite3
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
+from itertools import chain
+
+import strokes
+from strokes import STROKE_BEGIN, STROKE_END, StrokeLog, segment_to_chunk
+from outbox import ClientOutbox, PRIORITY_CRITICAL, PRIORITY_DROPPABLE, PRIORITY_NORMAL
+from db import (Database, query_aggregate, query_drawing_image, query_drawings, query_games, query_games_ndjson,
+                query_player, query_ranking, query_top_games)
+from cache import ResponseCache, etag_matches
+from cluster import ClusterNode, RemoteOutbox, RemoteWebSocket, create_pubsub
+from rooms import (PHASE_CHOOSING, PHASE_DRAWING, PHASE_GAME_OVER, PHASE_LOBBY, PHASE_ROUND_OVER,
+                   Player, Room)
+from scheduler import TimerWheel
+from snapshot import read_snapshots, remove_snapshot, write_snapshot
+import gallery
+from gallery import GalleryRenderer
+from journal import (EVENT_CLEAR, EVENT_GAME_END, EVENT_GAME_START, EVENT_GUESS, EVENT_PHRASE, EVENT_ROUND_END,
+                     EVENT_ROUND_START, EVENT_SCORE, EVENT_STROKES, JournalReader, JournalWriter, record_to_ndjson)
+from words import RoomDecks, WordStore, normalize_word
+from compression import FrameCompressor, wants_compression
+from downsample import StrokeDownsampler
+from spectators import SpectatorFeed
+from ingress import Ingress, IngressRejected
+from metrics import (REGISTRY, BROADCAST_SECONDS, INBOUND_MESSAGES, LOOP_DELAY_SECONDS, LOOP_LAG,
+                     QUERY_SECONDS, REAPED, REJECTED_CONNECTIONS, RESPONSE_CACHE, monitor_loop_lag)
+
+# Volitelný rychlejší JSON backend - orjson, pokud je nainstalovaný, jinak stdlib.
+try:
+    import orjson
+
+    def encode_message(message: dict) -> str:
+        """Serialize an outgoing message once; the result is sent as a text frame."""
+        return orjson.dumps(message).decode("utf-8")
+
+    JSON_BACKEND = "orjson"
+except ImportError:
+    orjson = None
+
+    def encode_message(message: dict) -> str:
+        """Serialize an outgoing message once; the result is sent as a text frame."""
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    JSON_BACKEND = "json"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background services before serving requests and stop them on shutdown."""
+    # on_startup/on_shutdown jsou dole - potřebují vše, co se definuje mezi tím
+    await on_startup()
+    yield
+    await on_shutdown()
 
 app = FastAPI(
     title="Kreslir Backend",
     description="Backend pro kreslicí hru",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 apirouter = APIRouter(prefix="/api")
 wsrouter = APIRouter(prefix="/ws")
@@ -29,108 +81,110 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-try:
-    with open("word_packages.json", "r", encoding="utf-8") as f:
-        WORD_PACKAGES = json.load(f)
-except FileNotFoundError:
-    print("Error: word_packages.json not found! Using fallback words.")
-    WORD_PACKAGES = {
-        "Klasika": {
-            "Vlastnost": [
-                "Vzteklý", "Elegantní", "Líný", "Šťastný", "Smutný", "Zoufale veselý",
-                "Rychlý", "Pomalý", "Zvědavý", "Zamračený", "Rozmarný", "Statečný",
-                "Plachý", "Neohrožený", "Zamotaný", "Hrdinský", "Nešikovný", "Šikovný",
-                "Tajemný", "Rozjařený", "Nesmělý", "Zvukotěsný", "Nadšený", "Apatií zmítaný"
-            ],
-            "Subjekt": [
-                "Klaun", "Velryba", "Astronaut", "Robot", "Kočka", "Pes", "Žirafa",
-                "Slon", "Drak", "Princezna", "Rytíř", "Kuchař", "Malíř", "Srdce", "Strom",
-                "Auto", "Vlak", "Motocykl", "Hrad", "Dinosaurus", "Kaktus", "Lednička",
-                "Kosmonaut", "Noviny"
-            ],
-            "Činnost": [
-                "peče dort", "hraje golf", "tančí", "spí", "jí banán", "skáče přes vířivku",
-                "houpá se na laně", "maluje obraz", "hází frisbee", "zpívá serenádu",
-                "šíří konfety", "překonává překážky", "jí zmrzlinu", "řídí kůň", "učí se plavat",
-                "kouzlí s kartami", "fotografuje západ slunce", "pěstuje květiny",
-                "hledá poklad", "čte knihu", "stříhá trávu", "louská ořechy", "sledování filmů"
-            ]
-        },
-        "Zvířata": {
-            "Vlastnost": [
-                "Hbitý", "Hladový", "Hrdý", "Plačtivý", "Zvukový", "Skákavý", "Noční",
-                "Denní", "Plachý", "Domácí", "Divoký", "Myslící", "Chytrý", "Zpěvný",
-                "Barevný", "Ochranný", "Přátelský", "Opojný", "Veselý", "Lenivý"
-            ],
-            "Subjekt": [
-                "Lev", "Tygřík", "Velryba", "Delfín", "Koala", "Panda", "Kočka", "Pes",
-                "Veverka", "Pštros", "Žirafa", "Slon", "Krokodýl", "Hroch", "Krab",
-                "Motýl", "Pták", "Netopýr", "Ježek", "Králík", "Kůň", "Ovce", "Kráva", "Svišť"
-            ],
-            "Činnost": [
-                "hledá oříšky", "plave v oceánu", "skáče přes stromy", "je na louce",
-                "zpívá písničku", "dělá kotrmelce", "nosí klobouk", "běhá maraton",
-                "střídavě spí", "loví ryby", "žvýká trávu", "hází balónem", "hraje na housle",
-                "překonává stezku", "maluje stopami", "čte mapu", "dělá salto", "rozcvičuje se",
-                "skrývá se v keři", "tancuje v dešti"
-            ]
-        },
-        "Sporty": {
-            "Vlastnost": [
-                "Agilní", "Soutěživý", "Odolný", "Silný", "Šikovný", "Rychlý", "Výbušný",
-                "Vytrvalý", "Precizní", "Kreativní", "Strategický", "Obratný", "Soustředěný",
-                "Riskující", "Technický", "Elegantní", "Explozivní", "Zkušený", "Neústupný", "Přesný"
-            ],
-            "Subjekt": [
-                "Fotbalista", "Basketbalista", "Tenista", "Plavec", "Hráč hokeje", "Běžec",
-                "Cyklista", "Gymnast", "Skokan", "Boxer", "Judista", "Lyžař", "Snowboardista",
-                "Skateboardista", "Surfař", "Brankář", "Rychlobruslař", "Golfista", "Stolní tenista", "Raketář"
-            ],
-            "Činnost": [
-                "kopá penalty", "střílí trojky", "podává servisy", "plave motýlek", "brání gól",
-                "běží sprint", "šlape do pedálů", "provádí salto", "boxuje soupeře", "háže disk",
-                "skáče přes laťku", "odpalovací swing", "střílí gól", "vykopává roh", "trénuje tik",
-                "přeskakuje překážky", "jízdí na kole", "jíždí na vlnách", "provádí trik", "trénuje střelbu"
-            ]
-        },
-        "Jídlo a Pití": {
-            "Vlastnost": [
-                "Sladký", "Slaný", "Kořeněný", "Křupavý", "Měkký", "Krémový", "Hořký",
-                "Svěží", "Voňavý", "Pikantní", "Žvýkací", "Šťavnatý", "Teplý", "Studený",
-                "Nakládaný", "Grilovaný", "Pečený", "Různorodý", "Exotický", "Domácí"
-            ],
-            "Subjekt": [
-                "Pizza", "Hamburger", "Sushi", "Taco", "Palačinka", "Zmrzlina", "Knedlík",
-                "Salát", "Polévka", "Steak", "Grilované kuře", "Špagety", "Sendvič", "Těstoviny",
-                "Sýr", "Muffin", "Bageta", "Kafe", "Čaj", "Smoothie", "Sýr", "Pirožek", "Rohlík", "Čokoláda"
-            ],
-            "Činnost": [
-                "peče dort", "míchá koktejl", "smaží hranolky", "krájí zeleninu", "dusí rýži",
-                "griluje maso", "míchá salát", "loupá ovoce", "zalévá kávu", "šlehává smetanu",
-                "obsluhuje zákazníky", "balí sendviče", "podává dezert", "ochutnává polévku",
-                "taví sýr", "mixuje smoothie", "peče chleba", "nakládá zeleninu", "servíruje sushi", "zmrzuje zmrzlinu"
-            ]
-        },
-        "Filmy a Postavy": {
-            "Vlastnost": [
-                "Heroický", "Zlomyslný", "Komický", "Tajuplný", "Romantický", "Melancholický",
-                "Šílený", "Rozverný", "Elegantní", "Mystický", "Neohrožený", "Zaváhající",
-                "Vznešený", "Ironický", "Sarkastický", "Inspirativní", "Smutný", "Nekonvenční", "Chytrý", "Zoufalý"
-            ],
-            "Subjekt": [
-                "Superhrdina", "Padouch", "Detektiv", "Piráti", "Princezna", "Vědec", "Robot",
-                "Cizinec", "Vlkodlak", "Čaroděj", "Krotitel draků", "Šerif", "Kosmonaut", "Cestovatel",
-                "Kaskadér", "Režisér", "Herec", "Barman", "Novinář", "Knihovník", "Kouzelník", "Zloděj", "Špión", "Námořník"
-            ],
-            "Činnost": [
-                "zachraňuje svět", "plánuje loupež", "vyšetřuje vraždu", "plachtí po oceánu",
-                "bojuje s padouchem", "tančí na střeše", "řídí vesmírnou loď", "skrývá tajemství",
-                "vymýšlí vynález", "dobývá hrad", "hledá stříbrný meč", "vypíjí elixír", "píše scénář",
-                "hledá lásku", "pronásleduje stopu", "provádí kaskadérské kousky", "podvádí v karetním klubu",
-                "zpívá duet", "utíká před policií", "naviguje bouři"
-            ]
-        }
+# Balíčky slov - viz words.py. Cesta jde přepsat proměnnou prostředí, výchozí je vedle main.py.
+WORD_PACKAGES_PATH = Path(os.environ.get("KRESLIR_WORD_PACKAGES", Path(__file__).resolve().parent / "word_packages.json"))
+
+# Použije se, jen když soubor s balíčky chybí
+FALLBACK_WORD_PACKAGES = {
+    "Klasika": {
+        "Vlastnost": [
+            "Vzteklý", "Elegantní", "Líný", "Šťastný", "Smutný", "Zoufale veselý",
+            "Rychlý", "Pomalý", "Zvědavý", "Zamračený", "Rozmarný", "Statečný",
+            "Plachý", "Neohrožený", "Zamotaný", "Hrdinský", "Nešikovný", "Šikovný",
+            "Tajemný", "Rozjařený", "Nesmělý", "Zvukotěsný", "Nadšený", "Apatií zmítaný"
+        ],
+        "Subjekt": [
+            "Klaun", "Velryba", "Astronaut", "Robot", "Kočka", "Pes", "Žirafa",
+            "Slon", "Drak", "Princezna", "Rytíř", "Kuchař", "Malíř", "Srdce", "Strom",
+            "Auto", "Vlak", "Motocykl", "Hrad", "Dinosaurus", "Kaktus", "Lednička",
+            "Kosmonaut", "Noviny"
+        ],
+        "Činnost": [
+            "peče dort", "hraje golf", "tančí", "spí", "jí banán", "skáče přes vířivku",
+            "houpá se na laně", "maluje obraz", "hází frisbee", "zpívá serenádu",
+            "šíří konfety", "překonává překážky", "jí zmrzlinu", "řídí kůň", "učí se plavat",
+            "kouzlí s kartami", "fotografuje západ slunce", "pěstuje květiny",
+            "hledá poklad", "čte knihu", "stříhá trávu", "louská ořechy", "sledování filmů"
+        ]
+    },
+    "Zvířata": {
+        "Vlastnost": [
+            "Hbitý", "Hladový", "Hrdý", "Plačtivý", "Zvukový", "Skákavý", "Noční",
+            "Denní", "Plachý", "Domácí", "Divoký", "Myslící", "Chytrý", "Zpěvný",
+            "Barevný", "Ochranný", "Přátelský", "Opojný", "Veselý", "Lenivý"
+        ],
+        "Subjekt": [
+            "Lev", "Tygřík", "Velryba", "Delfín", "Koala", "Panda", "Kočka", "Pes",
+            "Veverka", "Pštros", "Žirafa", "Slon", "Krokodýl", "Hroch", "Krab",
+            "Motýl", "Pták", "Netopýr", "Ježek", "Králík", "Kůň", "Ovce", "Kráva", "Svišť"
+        ],
+        "Činnost": [
+            "hledá oříšky", "plave v oceánu", "skáče přes stromy", "je na louce",
+            "zpívá písničku", "dělá kotrmelce", "nosí klobouk", "běhá maraton",
+            "střídavě spí", "loví ryby", "žvýká trávu", "hází balónem", "hraje na housle",
+            "překonává stezku", "maluje stopami", "čte mapu", "dělá salto", "rozcvičuje se",
+            "skrývá se v keři", "tancuje v dešti"
+        ]
+    },
+    "Sporty": {
+        "Vlastnost": [
+            "Agilní", "Soutěživý", "Odolný", "Silný", "Šikovný", "Rychlý", "Výbušný",
+            "Vytrvalý", "Precizní", "Kreativní", "Strategický", "Obratný", "Soustředěný",
+            "Riskující", "Technický", "Elegantní", "Explozivní", "Zkušený", "Neústupný", "Přesný"
+        ],
+        "Subjekt": [
+            "Fotbalista", "Basketbalista", "Tenista", "Plavec", "Hráč hokeje", "Běžec",
+            "Cyklista", "Gymnast", "Skokan", "Boxer", "Judista", "Lyžař", "Snowboardista",
+            "Skateboardista", "Surfař", "Brankář", "Rychlobruslař", "Golfista", "Stolní tenista", "Raketář"
+        ],
+        "Činnost": [
+            "kopá penalty", "střílí trojky", "podává servisy", "plave motýlek", "brání gól",
+            "běží sprint", "šlape do pedálů", "provádí salto", "boxuje soupeře", "háže disk",
+            "skáče přes laťku", "odpalovací swing", "střílí gól", "vykopává roh", "trénuje tik",
+            "přeskakuje překážky", "jízdí na kole", "jíždí na vlnách", "provádí trik", "trénuje střelbu"
+        ]
+    },
+    "Jídlo a Pití": {
+        "Vlastnost": [
+            "Sladký", "Slaný", "Kořeněný", "Křupavý", "Měkký", "Krémový", "Hořký",
+            "Svěží", "Voňavý", "Pikantní", "Žvýkací", "Šťavnatý", "Teplý", "Studený",
+            "Nakládaný", "Grilovaný", "Pečený", "Různorodý", "Exotický", "Domácí"
+        ],
+        "Subjekt": [
+            "Pizza", "Hamburger", "Sushi", "Taco", "Palačinka", "Zmrzlina", "Knedlík",
+            "Salát", "Polévka", "Steak", "Grilované kuře", "Špagety", "Sendvič", "Těstoviny",
+            "Sýr", "Muffin", "Bageta", "Kafe", "Čaj", "Smoothie", "Sýr", "Pirožek", "Rohlík", "Čokoláda"
+        ],
+        "Činnost": [
+            "peče dort", "míchá koktejl", "smaží hranolky", "krájí zeleninu", "dusí rýži",
+            "griluje maso", "míchá salát", "loupá ovoce", "zalévá kávu", "šlehává smetanu",
+            "obsluhuje zákazníky", "balí sendviče", "podává dezert", "ochutnává polévku",
+            "taví sýr", "mixuje smoothie", "peče chleba", "nakládá zeleninu", "servíruje sushi", "zmrzuje zmrzlinu"
+        ]
+    },
+    "Filmy a Postavy": {
+        "Vlastnost": [
+            "Heroický", "Zlomyslný", "Komický", "Tajuplný", "Romantický", "Melancholický",
+            "Šílený", "Rozverný", "Elegantní", "Mystický", "Neohrožený", "Zaváhající",
+            "Vznešený", "Ironický", "Sarkastický", "Inspirativní", "Smutný", "Nekonvenční", "Chytrý", "Zoufalý"
+        ],
+        "Subjekt": [
+            "Superhrdina", "Padouch", "Detektiv", "Piráti", "Princezna", "Vědec", "Robot",
+            "Cizinec", "Vlkodlak", "Čaroděj", "Krotitel draků", "Šerif", "Kosmonaut", "Cestovatel",
+            "Kaskadér", "Režisér", "Herec", "Barman", "Novinář", "Knihovník", "Kouzelník", "Zloděj", "Špión", "Námořník"
+        ],
+        "Činnost": [
+            "zachraňuje svět", "plánuje loupež", "vyšetřuje vraždu", "plachtí po oceánu",
+            "bojuje s padouchem", "tančí na střeše", "řídí vesmírnou loď", "skrývá tajemství",
+            "vymýšlí vynález", "dobývá hrad", "hledá stříbrný meč", "vypíjí elixír", "píše scénář",
+            "hledá lásku", "pronásleduje stopu", "provádí kaskadérské kousky", "podvádí v karetním klubu",
+            "zpívá duet", "utíká před policií", "naviguje bouři"
+        ]
     }
+}
+
+word_store = WordStore(WORD_PACKAGES_PATH, fallback=FALLBACK_WORD_PACKAGES)
+word_store.load()
 
 GAME_SETTINGS = {
     "ROUND_DURATION": 90,
@@ -138,70 +192,250 @@ GAME_SETTINGS = {
     "POINTS_ARTIST_PER_GUESS": 5,
     "TOTAL_ROUNDS_PER_PLAYER": 1, # Each player gets to be the artist once
     "POST_ROUND_DELAY": 5,
+    "ARTIST_GONE_DELAY": 1,  # s - kreslíř odešel před výběrem fráze, kolo se přeskočí
+    "GAME_END_CLOSE_DELAY": 2,  # s - po game_end se spojení zavřou a místnost zanikne
+}
+
+CONNECTION_SETTINGS = {
+    "SEND_QUEUE_MAX_FRAMES": 256,    # soft limit fronty odchozích rámců na spojení
+    "SEND_QUEUE_STUCK_TIMEOUT": 10,  # s - jak dlouho smí být fronta plná, než klienta odpojíme
+    "PING_INTERVAL": 20.0,           # s - WebSocket ping (uvicorn); bez pongu se spojení zavře
+    "PING_TIMEOUT": 20.0,            # s - jak dlouho čekat na pong
+    "MAX_ROOMS": 2000,               # místností na proces, další se odmítnou
+    "MAX_PLAYERS_PER_ROOM": 16,
+    "ROOM_IDLE_TIMEOUT": 30 * 60,    # s - místnost bez jediné zprávy od hráčů se zavře
+    "REAPER_INTERVAL": 30,           # s - jak často hledat mrtvá spojení a opuštěné místnosti
+}
+
+# Víceprocesový provoz (viz cluster.py) - proměnné prostředí nastavuje `python main.py --workers N`
+CLUSTER_SETTINGS = {
+    "WORKER_ID": int(os.environ.get("KRESLIR_WORKER_ID", "0")),
+    "WORKERS": int(os.environ.get("KRESLIR_WORKERS", "1")),
+    "PUBSUB_URL": os.environ.get("KRESLIR_PUBSUB_URL", ""),  # prázdné = v rámci procesu
+    "PUBSUB_BUFFER_LIMIT": 8 * 1024 * 1024,  # neodeslané publish nad tento limit se zahazují (a počítají)
+    "PUBSUB_RECONNECT_DELAY": 0.1,           # první pokus o nové spojení, pak dvojnásobek až do maxima
+    "PUBSUB_MAX_RECONNECT_DELAY": 5.0,
+}
+
+# Záznam tahů kola pro obnovu plátna po znovupřipojení
+STROKE_LOG_SETTINGS = {
+    "MAX_BYTES": 512 * 1024,          # tvrdý limit paměti záznamu na místnost
+    "COMPACT_THRESHOLD": 16 * 1024,   # nezhuštěný konec záznamu větší než tohle se zhustí (po malých dávkách)
+    "SIMPLIFY_TOLERANCE": 1.0,        # px - tolerance zjednodušení tahů
+}
+
+# Dávkování chatu a tipů: místo zprávy na každý tip jeden rámec room_batch za tik,
+# skóre v něm jako rozdíly. Body i pořadí tipů se počítají při příjmu, odkládá se jen rozeslání.
+ROOM_TICK_SETTINGS = {
+    "TICK_HZ": 20,  # tiků za sekundu; 0 = každý tip se rozešle hned jako dřív (celé skóre)
+}
+
+# Časovače fází místností - jeden task pro všechny místnosti, viz scheduler.py
+SCHEDULER_SETTINGS = {
+    "RESOLUTION": 0.05,  # s - přesnost časovačů
+}
+
+WORD_STORE_SETTINGS = {
+    "RELOAD_INTERVAL": 5.0,  # s - jak často kontrolovat změnu souborů s balíčky slov
+}
+
+# Galerie kreseb z dohraných kol, viz gallery.py (vyžaduje Pillow, jinak je vypnutá)
+GALLERY_SETTINGS = {
+    "POOL_SIZE": 1,          # procesů vykreslujících náhledy; 0 = galerie vypnutá
+    "MAX_PENDING": 32,       # rozpracovaných náhledů na proces serveru, další kola se vynechají
+    "MAX_WIDTH": 320,        # px - náhled se vejde do MAX_WIDTH x MAX_HEIGHT
+    "MAX_HEIGHT": 240,
+    "FORMAT": "webp",        # webp, nebo png (i když Pillow WebP neumí)
+    "QUALITY": 75,
+    "CACHE_MAX_AGE": 365 * 24 * 3600,  # s - uložený náhled se už nemění
+}
+
+# Historie her (/api/games) - stránkování podle id poslední hry, ne OFFSET
+HISTORY_SETTINGS = {
+    "MAX_PAGE": 200,     # her na stránku JSON odpovědi, víc jen přes /api/games/stream
+    "STREAM_PAGE": 500,  # her na jedno čtení z databáze při streamování NDJSON
+    "MAX_LEADERBOARD": 100,  # řádků žebříčku (a posledních her hráče) na jednu odpověď
 }
 
+# Vstupní brána zpráv od klienta, viz ingress.py
+INGRESS_SETTINGS = {
+    "MAX_TEXT_FRAME": 8 * 1024,     # znaků - větší JSON zpráva spojení ukončí (1009)
+    "MAX_BINARY_FRAME": 64 * 1024,  # bajtů - dávka tahů
+    # typ zprávy: (zpráv za sekundu, nárazově nejvýš); klient posílá tahy ~30x za sekundu
+    "RATE_LIMITS": {
+        "stroke_frame": (60, 120),
+        "drawing_data": (60, 120),
+        "guess": (5, 10),
+        "select_phrase": (2, 5),
+        "select_package": (2, 5),
+        "start_game": (1, 3),
+        "clear_canvas": (2, 5),
+    },
+    "VIOLATIONS": (2, 40),  # zahozené zprávy za sekundu / nárazově, pak se spojení zavře (1008)
+}
+
+# Záznam průběhu her pro přehrání (/api/games/{id}/replay), viz journal.py
+JOURNAL_SETTINGS = {
+    "ENABLED": True,
+    "DIR": os.environ.get("KRESLIR_JOURNAL_DIR", "journal"),
+    "FLUSH_INTERVAL": 1.0,            # s - jak často se buffery her zapisují na disk
+    "FLUSH_BYTES": 64 * 1024,         # buffer hry větší než tohle se zapíše hned
+    "MAX_BUFFER": 4 * 1024 * 1024,    # bajtů na hru, když disk nestíhá - pak se záznamy zahazují
+    "LEVEL": 6,                       # zlib 1-9
+    "REPLAY_MAX_SPEED": 64.0,         # nejvyšší zrychlení přehrávání (speed=0 = bez čekání)
+}
+
+# Restart bez ztráty rozehraných her, viz snapshot.py
+DRAIN_SETTINGS = {
+    "SNAPSHOT_DIR": os.environ.get("KRESLIR_SNAPSHOT_DIR", "snapshots"),
+    "SNAPSHOT_MAX_AGE": 5 * 60,  # s - starší snímek se po startu neobnoví
+    "REJOIN_GRACE": 2 * 60,      # s - obnovená místnost čeká na první návrat hráče, pak zanikne
+}
+
+# Komprese velkých rámců, viz compression.py - klient si ji vyžádá parametrem ?compress=deflate
+COMPRESSION_SETTINGS = {
+    "MIN_SIZE": 1024,     # bajtů - menší rámce se posílají bez komprese; 0 = komprese vypnutá
+    "LEVEL": 6,           # zlib 1-9
+    "MIN_SAVING": 0.2,    # komprimovaný rámec se pošle, jen když ušetří aspoň 20 %
+    "PER_MESSAGE_DEFLATE": False,  # permessage-deflate (uvicorn) pro všechny rámce všech klientů
+}
+
+# Zředěné tahy pro klienty na slabém připojení, viz downsample.py
+DOWNSAMPLE_SETTINGS = {
+    "ENABLED": True,
+    "RATE_HZ": 6,            # kolikrát za sekundu dostane pomalý klient tahy
+    "TOLERANCE": 1.5,        # px - jak daleko smí zjednodušený tah uhnout od originálu
+    "QUEUE_HIGH": 32,        # rámců ve frontě - od této hloubky je klient pomalý
+    "QUEUE_LOW": 8,          # ... a rychlým je zase až pod touto
+    "LATENCY_HIGH": 0.1,     # s - průměrná doba zápisu do socketu, od které je klient pomalý
+    "LATENCY_LOW": 0.02,
+}
+
+# Diváci (?role=spectator) - jen sledují, dostávají zředěné rámce po ticích, viz spectators.py
+SPECTATOR_SETTINGS = {
+    "ENABLED": True,
+    "MAX_PER_ROOM": 500,
+    "TICK_HZ": 4,          # kolikrát za sekundu dostanou diváci nové rámce
+    "TOLERANCE": 2.0,      # px - zjednodušení tahů pro diváky
+}
+
+METRICS_SETTINGS = {
+    "LOOP_LAG_INTERVAL": 0.5,  # s - jak často měřit zpoždění smyčky událostí
+    "COLLECT_TIMEOUT": 1.0,    # s - jak dlouho /api/metrics čeká na ostatní workery
+}
+
+
+def new_stroke_log() -> StrokeLog:
+    return StrokeLog(
+        max_bytes=STROKE_LOG_SETTINGS["MAX_BYTES"],
+        compact_threshold=STROKE_LOG_SETTINGS["COMPACT_THRESHOLD"],
+        tolerance=STROKE_LOG_SETTINGS["SIMPLIFY_TOLERANCE"],
+    )
+
+# Zprávy, které se při zahlcení klienta nikdy nezahazují, a průběžné, které se zahodit smí
+CRITICAL_MESSAGE_TYPES = {"round_end", "game_end", "word_guessed"}
+DROPPABLE_MESSAGE_TYPES = {"drawing_update"}
+
+
+def message_priority(message: dict) -> int:
+    message_type = message.get("type")
+    if message_type in CRITICAL_MESSAGE_TYPES:
+        return PRIORITY_CRITICAL
+    if message_type in DROPPABLE_MESSAGE_TYPES:
+        return PRIORITY_DROPPABLE
+    return PRIORITY_NORMAL
+
+
+def stroke_frame_priority(flags: int) -> int:
+    # Začátek a konec tahu nesou styl a poslední body, ty zahazovat nechceme
+    return PRIORITY_NORMAL if flags & (STROKE_BEGIN | STROKE_END) else PRIORITY_DROPPABLE
+
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-        self.game_states: Dict[str, Dict[str, Any]] = {}
-
-    def get_player_websocket(self, game_code: str, username: str) -> Optional[WebSocket]:
-        """Helper to find a player's websocket."""
-        game_state = self.game_states.get(game_code)
-        if game_state:
-            for player in game_state["players"]:
-                if player["username"] == username:
-                    return player["websocket"]
-        return None
+        self.rooms: Dict[str, Room] = {}
+        self.draining = False  # server končí, místnosti jsou uložené - nikoho dalšího nepřijímáme
 
-    async def connect(self, websocket: WebSocket, game_code: str, username: str):
+    def get_player(self, game_code: str, username: Optional[str]) -> Optional[Player]:
+        room = self.rooms.get(game_code)
+        return room.get(username) if room else None
+
+    async def _reject_invalid(self, websocket: WebSocket, game_code: str, username: str) -> bool:
+        """Close the connection (before accept) when the game code or username is invalid."""
         # Validate game code format (6 alphanumeric characters)
         if not game_code or len(game_code) != 6 or not game_code.isalnum():
             await websocket.close(code=1008, reason="Neplatný kód hry. Kód musí obsahovat 6 alfanumerických znaků.")
-            return
+            return True
         
         # Validate username
         if not username or len(username.strip()) == 0:
             await websocket.close(code=1008, reason="Uživatelské jméno nesmí být prázdné.")
-            return
+            return True
         
         if len(username) > 20:
             await websocket.close(code=1008, reason="Uživatelské jméno je příliš dlouhé (max. 20 znaků).")
-            return
+            return True
+        return False
 
-        await websocket.accept()
-        is_new_game = game_code not in self.active_connections
+    def _open_outbox(self, websocket: WebSocket, username: str):
+        if isinstance(websocket, RemoteWebSocket):
+            # Klient je připojen k jinému workeru, fronta s prioritami je až tam
+            outbox = RemoteOutbox(websocket, username)
+        else:
+            outbox = ClientOutbox(
+                websocket, username,
+                max_frames=CONNECTION_SETTINGS["SEND_QUEUE_MAX_FRAMES"],
+                stuck_timeout=CONNECTION_SETTINGS["SEND_QUEUE_STUCK_TIMEOUT"],
+                on_stuck=self._on_outbox_stuck,
+            )
+        outbox.start()
+        return outbox
+
+    async def connect(self, websocket: WebSocket, game_code: str, username: str) -> bool:
+        """Accept and register a player. Returns False when the connection was refused."""
+        if await self._reject_invalid(websocket, game_code, username):
+            return False
 
-        if is_new_game:
+        await websocket.accept()
+        if self.draining:
+            # 1012 = restart serveru, klient se za chvíli připojí znovu
+            await websocket.close(code=1012, reason="Server se restartuje.")
+            return False
+        room = self.rooms.get(game_code)
+        # Limity odmítneme dřív, než pro hráče nebo místnost cokoli alokujeme
+        if room is None and len(self.rooms) >= CONNECTION_SETTINGS["MAX_ROOMS"]:
+            REJECTED_CONNECTIONS.inc(value="room_limit")
+            await websocket.close(code=1013, reason="Server je plný, zkuste to prosím později.")
+            return False
+        if room is not None and len(room) >= CONNECTION_SETTINGS["MAX_PLAYERS_PER_ROOM"]:
+            REJECTED_CONNECTIONS.inc(value="room_full")
+            await websocket.close(code=1008, reason="Hra je plná.")
+            return False
+        if room is None:
             # Creating a new game - this is allowed
-            self.active_connections[game_code] = []
-            default_package = list(WORD_PACKAGES.keys())[0]
-            self.game_states[game_code] = {
-                "players": [], "scores": {}, "current_round": 0, "total_rounds": 3,
-                "current_artist": None, "selected_phrase": [], "masked_phrase": "",
-                "host": username, "selected_package": default_package, "game_started": False
-            }
-        else:
-            # Joining existing game - check if game exists
-            if game_code not in self.game_states:
-                await websocket.close(code=1008, reason="Hra s tímto kódem neexistuje.")
-                return
+            room = Room(game_code, host=username, selected_package=word_store.default_name,
+                        stroke_log=new_stroke_log())
+            self.rooms[game_code] = room
 
-        game_state = self.game_states[game_code]
-        if game_state["game_started"]:
+        rejoining = room.game_started and username in room.departed_scores
+        if room.game_started and not rejoining:
             await websocket.close(code=1008, reason="Hra již probíhá.")
-            return
+            return False
         
         # Check if username is already taken in this game
-        existing_usernames = [p["username"] for p in game_state["players"]]
-        if username in existing_usernames:
+        if username in room:
             await websocket.close(code=1008, reason="Uživatelské jméno je již obsazeno v této hře.")
-            return
-
-        self.active_connections[game_code].append(websocket)
-        game_state["players"].append({"username": username, "websocket": websocket})
-        game_state["scores"][username] = 0
+            return False
+
+        outbox = self._open_outbox(websocket, username)
+        # Nový hráč dostane celé skóre, rozdíly z čekající dávky patří jen dosavadním hráčům
+        await self.flush_events(room)
+        player = Player(username, websocket, outbox, compress=wants_compression(websocket))
+        room.add(player)
+        room.last_activity = time.monotonic()
+        room.scores[username] = room.departed_scores.pop(username, 0)
+        if room.paused_remaining is not None:
+            resume_room(room)
 
         # Pošleme osobní zprávu nově připojenému websocketu s aktuálním stavem hráčů,
         # aby klient nezmeškal první aktualizaci, pokud broadcast dorazí dříve než
@@ -209,350 +443,686 @@ class ConnectionManager:
         await self.send_personal_message({
             "type": "player_joined",
             "username": username,
-            "players": [{"username": p["username"]} for p in game_state["players"]],
-            "host": game_state["host"]
-        }, websocket)
+            "players": room.player_list(),
+            "host": room.host
+        }, player)
 
         # Následně broadcastujeme ke všem (včetně nově připojeného), aby ostatní klienti
         # dostali informaci o novém hráči.
         await self.broadcast(game_code, {
             "type": "player_joined", "username": username,
-            "players": [{"username": p["username"]} for p in game_state["players"]],
-            "host": game_state["host"]
+            "players": room.player_list(),
+            "host": room.host
         })
 
-        if game_state["host"] == username:
+        if room.host == username:
+            await self.send_personal_message({
+                "type": "available_packages", "packages": list(word_store.names),
+                "selected_package": room.selected_package
+            }, player)
+
+        if rejoining:
+            await self.send_game_sync(room, player)
+        return True
+
+    async def connect_spectator(self, websocket: WebSocket, game_code: str, username: str) -> bool:
+        """Accept a read-only viewer of an existing room. Returns False when the connection was refused."""
+        if await self._reject_invalid(websocket, game_code, username):
+            return False
+        await websocket.accept()
+        if self.draining:
+            await websocket.close(code=1012, reason="Server se restartuje.")
+            return False
+        room = self.rooms.get(game_code)
+        if room is None or not SPECTATOR_SETTINGS["ENABLED"]:
+            await websocket.close(code=1008, reason="Hra neexistuje.")
+            return False
+        if len(room.spectators) >= SPECTATOR_SETTINGS["MAX_PER_ROOM"]:
+            REJECTED_CONNECTIONS.inc(value="spectators_full")
+            await websocket.close(code=1008, reason="Hru už sleduje příliš mnoho diváků.")
+            return False
+        outbox = self._open_outbox(websocket, username)
+        if room.spectator_feed is None:
+            room.spectator_feed = SpectatorFeed(encode_message, SPECTATOR_SETTINGS["TOLERANCE"])
+        # Rozpracovaný tik patří dosavadním divákům - nový dostane aktuální stav včetně celého plátna
+        await self.flush_events(room)
+        await self.flush_spectators(room)
+        spectator = Player(username, websocket, outbox, compress=wants_compression(websocket))
+        room.spectators[websocket] = spectator
+        if room.game_started:
+            await self.send_game_sync(room, spectator, spectator=True)
+        else:
             await self.send_personal_message({
-                "type": "available_packages", "packages": list(WORD_PACKAGES.keys()),
-                "selected_package": game_state["selected_package"]
-            }, websocket)
+                "type": "lobby_state", "players": room.player_list(), "host": room.host,
+                "selected_package": room.selected_package,
+            }, spectator)
+        return True
+
+    def disconnect_spectator(self, websocket: WebSocket, game_code: str):
+        room = self.rooms.get(game_code)
+        spectator = room.spectators.pop(websocket, None) if room is not None else None
+        if spectator is not None:
+            spectator.outbox.stop()
 
     async def disconnect(self, websocket: WebSocket, game_code: str, username: str):
-        if game_code not in self.game_states:
+        room = self.rooms.get(game_code)
+        if room is None:
             return
 
-        game_state = self.game_states[game_code]
-        original_host = game_state["host"]
-
-        self.active_connections[game_code] = [conn for conn in self.active_connections[game_code] if conn != websocket]
-        game_state["players"] = [p for p in game_state["players"] if p["username"] != username]
-        if username in game_state["scores"]:
-            del game_state["scores"][username]
-
-        if not game_state["players"]:
-            del self.active_connections[game_code]
-            del self.game_states[game_code]
+        player = room.remove(websocket)
+        if player is None:
+            return
+        if player.outbox:
+            player.outbox.stop()
+        if username in room.scores:
+            score = room.scores.pop(username)
+            if room.game_started:
+                room.departed_scores[username] = score
+
+        if not room.players:
+            drop_room(room)
             return
 
+        if room.phase == PHASE_CHOOSING and room.current_artist == username:
+            # Kreslíř odešel dřív, než vybral frázi - kolo přeskočíme
+            set_phase(room, PHASE_ROUND_OVER, GAME_SETTINGS["ARTIST_GONE_DELAY"], start_round)
+
         # If the host disconnected, assign a new one.
         # Also handles the case where the new host might be the only one left.
-        if original_host == username and game_state["players"]:
-            new_host = game_state["players"][0]["username"]
-            game_state["host"] = new_host
+        if room.host == username:
+            new_host = room.player_at(0)
+            room.host = new_host.username
             
-            await self.broadcast(game_code, {"type": "new_host", "host": new_host})
+            await self.broadcast(game_code, {"type": "new_host", "host": new_host.username})
             # Send package list to the new host
-            new_host_ws = self.get_player_websocket(game_code, new_host)
-            if new_host_ws:
-                await self.send_personal_message({
-                    "type": "available_packages", "packages": list(WORD_PACKAGES.keys()),
-                    "selected_package": game_state["selected_package"]
-                }, new_host_ws)
+            await self.send_personal_message({
+                "type": "available_packages", "packages": list(word_store.names),
+                "selected_package": room.selected_package
+            }, new_host)
 
         await self.broadcast(game_code, {
             "type": "player_left", "username": username,
-            "players": [{"username": p["username"]} for p in game_state["players"]]
+            "players": room.player_list()
         })
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
-
-    async def broadcast(self, game_code: str, message: dict):
-        if game_code in self.active_connections:
-            # Send concurrently to all connections and ignore failures per connection
-            coros = []
-            for connection in list(self.active_connections[game_code]):
-                async def safe_send(conn):
-                    try:
-                        await conn.send_json(message)
-                    except Exception:
-                        # On failure, attempt to remove dead connection
-                        try:
-                            self.active_connections[game_code].remove(conn)
-                        except Exception:
-                            pass
-                coros.append(safe_send(connection))
-            # fire-and-forget but await to let asyncio schedule sends without blocking the main loop
-            await asyncio.gather(*coros, return_exceptions=True)
+    async def send_game_sync(self, room: Room, player: Player, spectator: bool = False):
+        """Bring a (re)connecting client up to date: game state plus the round's canvas in one frame."""
+        time_left = 0
+        if room.round_start_time:
+            time_left = max(0, int(GAME_SETTINGS["ROUND_DURATION"] - (time.time() - room.round_start_time)))
+        message = {
+            "type": "game_state_sync",
+            "round": room.current_round,
+            "total_rounds": room.total_rounds,
+            "artist": room.current_artist,
+            "masked_phrase": room.masked_phrase,
+            "scores": room.scores,
+            "players": room.player_list(),
+            "host": room.host,
+            "time_left": time_left,
+        }
+        if not spectator and player.username == room.current_artist and room.selected_phrase:
+            message["full_phrase"] = " ".join(room.selected_phrase)
+        await self.send_personal_message(message, player)
+        snapshot = room.stroke_log.snapshot()
+        if snapshot:
+            await self.send_frame(snapshot, player)
+
+    async def send_personal_message(self, message: dict, player: Player):
+        await self.send_frame(encode_message(message), player, message_priority(message))
+
+    async def send_frame(self, frame, player: Player, priority: int = PRIORITY_NORMAL):
+        """Queue an already encoded frame (str -> text frame, bytes -> binary frame)."""
+        if player.compress and frame_compressor.worth_trying(frame):
+            packed, original_size = frame_compressor.compress(frame)
+            if packed is not None:
+                frame_compressor.record_sent(packed, original_size)
+                frame = packed
+        player.outbox.push(frame, priority)
+
+    async def room_event(self, room: Room, event: dict, score_deltas: Optional[Mapping[str, int]] = None):
+        """Broadcast a chat/guess event with the room's next tick, or right away when ticks are off."""
+        tick_hz = ROOM_TICK_SETTINGS["TICK_HZ"]
+        if not tick_hz:
+            if score_deltas:
+                event = dict(event, scores=room.scores)
+            await self.broadcast(room.game_code, event)
+            return
+        room.pending_events.append(event)
+        if score_deltas:
+            pending = room.pending_scores
+            for name, delta in score_deltas.items():
+                pending[name] = pending.get(name, 0) + delta
+        if room.flush_timer is None:
+            room.flush_timer = timer_wheel.schedule(1 / tick_hz, self.flush_events, room)
+
+    async def flush_events(self, room: Room):
+        """Send the room's pending events as one room_batch frame."""
+        if room.flush_timer:
+            room.flush_timer.cancel()
+            room.flush_timer = None
+        if not room.pending_events:
+            return
+        batch = {"type": "room_batch", "events": room.pending_events, "scores_delta": room.pending_scores}
+        # Rozdíly skóre se sčítají, ztracená dávka by klientovi skóre rozházela
+        priority = PRIORITY_CRITICAL if room.pending_scores else PRIORITY_NORMAL
+        if room.spectators:
+            room.spectator_feed.add_events(room.pending_events, room.pending_scores)
+            self.schedule_spectators(room)
+        room.pending_events, room.pending_scores = [], {}
+        if self.rooms.get(room.game_code) is room:
+            await self.broadcast_frame(room.game_code, encode_message(batch), priority=priority)
+
+    async def broadcast(self, game_code: str, message: dict, exclude: Optional[WebSocket] = None):
+        room = self.rooms.get(game_code)
+        if room is not None and room.pending_events:
+            # Čekající dávka musí dorazit dřív než cokoli dalšího (např. round_end po posledním tipu)
+            await self.flush_events(room)
+        if room is not None and room.slow_strokes:
+            # Odložené tahy pomalých klientů patří před canvas_cleared, round_end apod.
+            await self.flush_strokes(room)
+        # Message is encoded once and the same buffer is pushed to every socket
+        frame = encode_message(message)
+        await self.broadcast_frame(game_code, frame, exclude=exclude, priority=message_priority(message))
+        if room is not None and room.spectators and message["type"] not in DROPPABLE_MESSAGE_TYPES:
+            # Divákům stejné bajty s příštím tikem; průběžné tahy dostanou sloučené
+            room.spectator_feed.add_message(frame)
+            self.schedule_spectators(room)
+
+    async def broadcast_frame(self, game_code: str, frame, exclude: Optional[WebSocket] = None,
+                              priority: int = PRIORITY_NORMAL):
+        room = self.rooms.get(game_code)
+        if room is None:
+            return
+        self._fanout(room.players.values(), frame, exclude, priority)
+
+    def _fanout(self, players: Iterable[Player], frame, exclude: Optional[WebSocket] = None,
+                priority: int = PRIORITY_NORMAL):
+        start = time.perf_counter()
+        # Velký rámec se komprimuje nanejvýš jednou, až pro prvního příjemce, který o to stojí
+        compressible = frame_compressor.worth_trying(frame)
+        packed = None
+        original_size = compressed_recipients = 0
+        # Only enqueue - each connection's writer task does the actual send,
+        # so a slow client never stalls the sender's receive loop
+        for player in players:
+            if player.websocket is exclude:
+                continue
+            if compressible and player.compress:
+                if original_size == 0:
+                    packed, original_size = frame_compressor.compress(frame)
+                if packed is not None:
+                    player.outbox.push(packed, priority)
+                    compressed_recipients += 1
+                    continue
+            player.outbox.push(frame, priority)
+        if compressed_recipients:
+            frame_compressor.record_sent(packed, original_size, compressed_recipients)
+        BROADCAST_SECONDS.observe(time.perf_counter() - start)
+
+    async def broadcast_strokes(self, room: Room, frame: bytes, flags: int, exclude: Optional[WebSocket] = None):
+        """Forward the artist's stroke frame; clients on a weak link get strokes merged and simplified at a lower rate."""
+        priority = stroke_frame_priority(flags)
+        if room.spectators:
+            room.spectator_feed.add_strokes(frame)
+            self.schedule_spectators(room)
+        if not DOWNSAMPLE_SETTINGS["ENABLED"]:
+            self._fanout(room.players.values(), frame, exclude, priority)
+            return
+        players = room.players.values()
+
+        def wanted(player: Player) -> bool:
+            # Kreslíř vlastní tahy nedostává, pomalý být nemůže
+            return player.websocket is not exclude and stroke_downsampler.constrained(player.outbox,
+                                                                                      player.constrained)
+
+        if any(wanted(player) is not player.constrained for player in players):
+            # Kdo mění rychlost, musí nejdřív dostat tahy odložené podle dosavadního stavu
+            await self.flush_strokes(room)
+            for player in players:
+                player.constrained = wanted(player)
+        if not any(player.constrained for player in players):
+            self._fanout(players, frame, exclude, priority)
+            return
+        self._fanout([player for player in players if not player.constrained], frame, exclude, priority)
+        room.slow_strokes.add(frame)
+        if room.slow_timer is None:
+            room.slow_timer = timer_wheel.schedule(stroke_downsampler.interval, self.flush_strokes, room)
+
+    async def flush_strokes(self, room: Room):
+        """Send the strokes held back for constrained clients as one simplified frame."""
+        if room.slow_timer:
+            room.slow_timer.cancel()
+            room.slow_timer = None
+        frame = room.slow_strokes.take(stroke_downsampler.tolerance)
+        if frame is not None and self.rooms.get(room.game_code) is room:
+            # Zředěný rámec nese celé tahy - nezahazovat, jinak by na plátně chyběly
+            self._fanout([player for player in room.players.values() if player.constrained], frame)
+
+    def schedule_spectators(self, room: Room):
+        if room.spectator_timer is None:
+            room.spectator_timer = timer_wheel.schedule(1 / SPECTATOR_SETTINGS["TICK_HZ"], self.flush_spectators, room)
+
+    async def flush_spectators(self, room: Room):
+        """Send the spectator tier: frames encoded once for all spectators of the room."""
+        if room.spectator_timer:
+            room.spectator_timer.cancel()
+            room.spectator_timer = None
+        if not room.spectator_feed:
+            return
+        frames = room.spectator_feed.take()
+        if self.rooms.get(room.game_code) is not room:
+            return
+        spectators = list(room.spectators.values())
+        for frame in frames:
+            self._fanout(spectators, frame)
+
+    def _on_outbox_stuck(self, outbox: ClientOutbox):
+        # Klient dlouhodobě nestíhá číst - zavřeme spojení, o zbytek se postará disconnect
+        async def close_stuck():
+            try:
+                await asyncio.wait_for(outbox.websocket.close(code=1013, reason="Klient nestíhá přijímat zprávy."), 5)
+            except Exception:
+                pass
+        asyncio.create_task(close_stuck())
+
+    def queue_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Per-connection send queue metrics grouped by game."""
+        return {
+            game_code: [player.outbox.stats() for player in room]
+            for game_code, room in self.rooms.items()
+        }
+stroke_downsampler = StrokeDownsampler(
+    rate_hz=DOWNSAMPLE_SETTINGS["RATE_HZ"], tolerance=DOWNSAMPLE_SETTINGS["TOLERANCE"],
+    queue_high=DOWNSAMPLE_SETTINGS["QUEUE_HIGH"], queue_low=DOWNSAMPLE_SETTINGS["QUEUE_LOW"],
+    latency_high=DOWNSAMPLE_SETTINGS["LATENCY_HIGH"], latency_low=DOWNSAMPLE_SETTINGS["LATENCY_LOW"],
+)
+frame_compressor = FrameCompressor(
+    min_size=COMPRESSION_SETTINGS["MIN_SIZE"], level=COMPRESSION_SETTINGS["LEVEL"],
+    min_saving=COMPRESSION_SETTINGS["MIN_SAVING"],
+)
 manager = ConnectionManager()
 
-# Initialize SQLite DB for leaderboard/history
+cluster = ClusterNode(
+    CLUSTER_SETTINGS["WORKER_ID"], CLUSTER_SETTINGS["WORKERS"],
+    create_pubsub(CLUSTER_SETTINGS["PUBSUB_URL"],
+                  buffer_limit=CLUSTER_SETTINGS["PUBSUB_BUFFER_LIMIT"],
+                  reconnect_delay=CLUSTER_SETTINGS["PUBSUB_RECONNECT_DELAY"],
+                  max_reconnect_delay=CLUSTER_SETTINGS["PUBSUB_MAX_RECONNECT_DELAY"]),
+    outbox_settings={
+        "max_frames": CONNECTION_SETTINGS["SEND_QUEUE_MAX_FRAMES"],
+        "stuck_timeout": CONNECTION_SETTINGS["SEND_QUEUE_STUCK_TIMEOUT"],
+    },
+)
+
+# SQLite DB for leaderboard/history - see db.py
 DB_PATH = Path("games.db")
-_conn: sqlite3.Connection = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-def init_db():
-    cur = _conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS games (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        game_code TEXT,
-        timestamp REAL,
-        winner TEXT,
-        winner_score INTEGER,
-        scores_json TEXT
-    )
-    """)
-    _conn.commit()
+db = Database(DB_PATH)
+
+
+response_cache = ResponseCache(max_entries=256, ttl=60.0)
+
 
+def invalidate_response_cache():
+    response_cache.invalidate()
+    # Žebříčky servírují všechny workery, cache se musí zahodit všude
+    cluster.publish_event("invalidate_cache")
 
-def _save_game_result_sync(game_code: str, scores: dict) -> None:
-    # Determine winner
-    if not scores:
-        winner = None
-        winner_score = 0
+
+async def save_game_result(game_code: str, scores: dict) -> int:
+    game_id = await db.save_game_result(game_code, scores)
+    invalidate_response_cache()
+    return game_id
+
+
+gallery_renderer = GalleryRenderer(
+    pool_size=GALLERY_SETTINGS["POOL_SIZE"], max_pending=GALLERY_SETTINGS["MAX_PENDING"],
+    max_width=GALLERY_SETTINGS["MAX_WIDTH"], max_height=GALLERY_SETTINGS["MAX_HEIGHT"],
+    image_format=GALLERY_SETTINGS["FORMAT"], quality=GALLERY_SETTINGS["QUALITY"],
+)
+gallery_tasks = set()
+
+journal_writer = JournalWriter(
+    Path(JOURNAL_SETTINGS["DIR"]), flush_interval=JOURNAL_SETTINGS["FLUSH_INTERVAL"],
+    flush_bytes=JOURNAL_SETTINGS["FLUSH_BYTES"], max_buffer=JOURNAL_SETTINGS["MAX_BUFFER"],
+    level=JOURNAL_SETTINGS["LEVEL"],
+)
+journal_tasks = set()
+
+
+def journal_event(room: Room, kind: int, event: Mapping[str, Any]):
+    if room.journal is not None:
+        room.journal.record(kind, encode_message(event).encode("utf-8"))
+
+
+async def store_drawings(game_id: int, jobs: List[asyncio.Future]):
+    """Wait for a saved game's round thumbnails and store them in the gallery."""
+    drawings = await gallery_renderer.collect(jobs)
+    if drawings:
+        await db.save_drawings(game_id, drawings)
+        invalidate_response_cache()
+
+
+async def cached_query(request: Request, fn, *args) -> Response:
+    """Serve a read-only query from the response cache, honouring If-None-Match."""
+    key = (fn.__name__,) + args
+    entry = response_cache.get(key)
+    if entry is None:
+        RESPONSE_CACHE.inc(value="miss")
+        generation = response_cache.generation
+        start = time.perf_counter()
+        data = await db.read(fn, *args)
+        QUERY_SECONDS.observe(time.perf_counter() - start, fn.__name__)
+        entry = response_cache.put(key, encode_message(data).encode("utf-8"), generation)
     else:
-        winner, winner_score = max(scores.items(), key=lambda kv: kv[1])
-    cur = _conn.cursor()
-    cur.execute(
-        "INSERT INTO games (game_code, timestamp, winner, winner_score, scores_json) VALUES (?, ?, ?, ?, ?)",
-        (game_code, time.time(), winner, int(winner_score) if winner is not None else 0, json.dumps(scores, ensure_ascii=False)),
-    )
-    _conn.commit()
+        RESPONSE_CACHE.inc(value="hit")
+    # no-cache = prohlížeč smí odpověď držet, ale před použitím ji revaliduje ETagem
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+def clamp_limit(limit: int, maximum: int) -> int:
+    # Ořezat dřív, než se z limitu stane klíč cache - jinak by každé číslo zabralo vlastní záznam
+    return max(1, min(limit, maximum))
 
-async def save_game_result(game_code: str, scores: dict):
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, _save_game_result_sync, game_code, scores)
 
 @apirouter.get('/leaderboard/top')
-async def get_top_leaderboard(limit: int = 10):
-    cur = _conn.cursor()
-    cur.execute("SELECT game_code, timestamp, winner, winner_score FROM games WHERE winner IS NOT NULL ORDER BY winner_score DESC LIMIT ?", (limit,))
-    rows = cur.fetchall()
-    result = []
-    for game_code, ts, winner, winner_score in rows:
-        result.append({
-            'game_code': game_code,
-            'timestamp': datetime.fromtimestamp(ts).isoformat(),
-            'winner': winner,
-            'winner_score': winner_score,
-        })
-    return JSONResponse(result)
+async def get_top_leaderboard(request: Request, limit: int = 10):
+    return await cached_query(request, query_top_games, clamp_limit(limit, HISTORY_SETTINGS["MAX_LEADERBOARD"]))
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
 
 @apirouter.get('/games')
-async def get_games(limit: int = 50):
-    cur = _conn.cursor()
-    cur.execute("SELECT id, game_code, timestamp, winner, winner_score, scores_json FROM games ORDER BY id DESC LIMIT ?", (limit,))
-    rows = cur.fetchall()
-    result = []
-    for id_, game_code, ts, winner, winner_score, scores_json in rows:
+async def get_games(request: Request, limit: int = 50, before: Optional[int] = None, player: Optional[str] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Game history, newest first. Next page: before=<id of the last game received>."""
+    limit = clamp_limit(limit, HISTORY_SETTINGS["MAX_PAGE"])
+    return await cached_query(request, query_games, limit, before, player or None, _epoch(since), _epoch(until))
+
+
+@apirouter.get('/games/stream')
+async def stream_games(limit: Optional[int] = None, before: Optional[int] = None, player: Optional[str] = None,
+                       since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Whole (filtered) game history as NDJSON, read and sent page by page."""
+    filters = (player or None, _epoch(since), _epoch(until))
+
+    async def pages():
+        cursor, remaining = before, limit
+        while remaining is None or remaining > 0:
+            page_size = HISTORY_SETTINGS["STREAM_PAGE"] if remaining is None \
+                else min(remaining, HISTORY_SETTINGS["STREAM_PAGE"])
+            start = time.perf_counter()
+            # Každá stránka je samostatné krátké čtení - žádná transakce nezůstane otevřená po dobu přenosu
+            text, cursor, count = await db.read(query_games_ndjson, page_size, cursor, *filters)
+            QUERY_SECONDS.observe(time.perf_counter() - start, "query_games_ndjson")
+            if text:
+                yield text.encode("utf-8")
+            if count < page_size:
+                break
+            if remaining is not None:
+                remaining -= count
+
+    return StreamingResponse(pages(), media_type="application/x-ndjson")
+
+
+@apirouter.get('/games/{game_id}/replay')
+async def replay_game(game_id: int, speed: float = 0.0):
+    """
+    Stream a finished game's journal as NDJSON, one event per line ({"t": ms, "event": ..., "data": ...}).
+    speed > 0 paces the events in game time (2 = twice as fast), 0 sends them as fast as they are read.
+    """
+    path = journal_writer.path(game_id)
+    if not path.is_file():
+        return JSONResponse({"detail": "Záznam hry nenalezen."}, status_code=404)
+    speed = min(max(speed, 0.0), JOURNAL_SETTINGS["REPLAY_MAX_SPEED"])
+    loop = asyncio.get_running_loop()
+
+    async def events():
+        # Soubor se čte po blocích mimo smyčku událostí, v paměti je vždy jen jeden
+        reader = await loop.run_in_executor(None, JournalReader, path)
         try:
-            scores = json.loads(scores_json) if scores_json else {}
-        except Exception:
-            scores = {}
-        result.append({
-            'id': id_,
-            'game_code': game_code,
-            'timestamp': datetime.fromtimestamp(ts).isoformat(),
-            'winner': winner,
-            'winner_score': winner_score,
-            'scores': scores,
-        })
-    return JSONResponse(result)
+            origin = None
+            while True:
+                records = await loop.run_in_executor(None, reader.read_block)
+                if records is None:
+                    break
+                lines = []
+                for kind, ms, payload in records:
+                    if speed:
+                        due = ms / 1000 / speed
+                        if origin is None:
+                            origin = loop.time() - due
+                        delay = origin + due - loop.time()
+                        if delay > 0:
+                            if lines:
+                                yield "".join(lines).encode("utf-8")
+                                lines = []
+                            await asyncio.sleep(delay)
+                    lines.append(record_to_ndjson(kind, ms, payload))
+                if lines:
+                    yield "".join(lines).encode("utf-8")
+        finally:
+            await loop.run_in_executor(None, reader.close)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@apirouter.get('/games/{game_id}/drawings')
+async def get_game_drawings(request: Request, game_id: int, after: int = 0, limit: int = 20):
+    """Round thumbnails of a finished game, `limit` per page; pass next_after as `after` for the next page."""
+    return await cached_query(request, query_drawings, game_id, after, clamp_limit(limit, 100))
+
+
+@apirouter.get('/games/{game_id}/drawings/{round_number}')
+async def get_drawing_image(request: Request, game_id: int, round_number: int):
+    # Náhled se po uložení nemění - prohlížeč i proxy ho smí držet natrvalo
+    etag = f'"d{game_id}-{round_number}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={GALLERY_SETTINGS['CACHE_MAX_AGE']}, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    row = await db.read(query_drawing_image, game_id, round_number)
+    if row is None:
+        return JSONResponse({"detail": "Kresba nenalezena."}, status_code=404)
+    media_type, image = row
+    return Response(image, media_type=media_type, headers=headers)
 
 
 @apirouter.get('/leaderboard/aggregate')
-async def get_aggregated_leaderboard(limit: int = 50):
+async def get_aggregated_leaderboard(request: Request, limit: int = 50):
     """Return aggregated leaderboard across all games: total score, games played, wins, highest score, average score."""
-    cur = _conn.cursor()
-    cur.execute("SELECT timestamp, winner, scores_json FROM games")
-    rows = cur.fetchall()
-
-    stats: Dict[str, Dict[str, Any]] = {}
-    for ts, winner, scores_json in rows:
-        try:
-            scores = json.loads(scores_json) if scores_json else {}
-        except Exception:
-            continue
-        for player, sc in scores.items():
-            try:
-                sc_int = int(sc)
-            except Exception:
-                try:
-                    sc_int = int(float(sc))
-                except Exception:
-                    sc_int = 0
-            ent = stats.setdefault(player, {"total_score": 0, "games_played": 0, "wins": 0, "highest_score": 0, "last_seen": 0})
-            ent["total_score"] += sc_int
-            ent["games_played"] += 1
-            if sc_int > ent["highest_score"]:
-                ent["highest_score"] = sc_int
-            if ts and ts > ent["last_seen"]:
-                ent["last_seen"] = ts
-        if winner:
-            stats.setdefault(winner, {"total_score": 0, "games_played": 0, "wins": 0, "highest_score": 0, "last_seen": 0})["wins"] += 1
-
-    # Prepare list with computed averages and formatted timestamps
-    out = []
-    for player, ent in stats.items():
-        avg = ent["total_score"] / ent["games_played"] if ent["games_played"] else 0
-        out.append({
-            "player": player,
-            "total_score": ent["total_score"],
-            "games_played": ent["games_played"],
-            "wins": ent["wins"],
-            "highest_score": ent["highest_score"],
-            "average_score": round(avg, 2),
-            "last_seen": datetime.fromtimestamp(ent["last_seen"]).isoformat() if ent["last_seen"] else None,
-        })
-
-    out.sort(key=lambda x: x["total_score"], reverse=True)
-    return JSONResponse(out[:limit])
+    return await cached_query(request, query_aggregate, clamp_limit(limit, HISTORY_SETTINGS["MAX_LEADERBOARD"]))
 
 
 @apirouter.get('/leaderboard/player/{username}')
-async def get_player_stats(username: str, recent_limit: int = 10):
+async def get_player_stats(request: Request, username: str, recent_limit: int = 10):
     """Return aggregated stats for a specific player and recent game history entries where they participated."""
-    cur = _conn.cursor()
-    cur.execute("SELECT id, game_code, timestamp, winner, winner_score, scores_json FROM games ORDER BY id DESC")
-    rows = cur.fetchall()
+    return await cached_query(request, query_player, username,
+                              clamp_limit(recent_limit, HISTORY_SETTINGS["MAX_LEADERBOARD"]))
 
-    total_score = 0
-    games_played = 0
-    wins = 0
-    highest_score = 0
-    recent_games = []
+def get_words_for_round(room: Room) -> Dict[str, List[str]]:
+    package = word_store.get(room.selected_package)
+    # Nový balíček (jiná volba nebo přenačtený soubor) = nově zamíchané karty
+    if room.word_decks is None or room.word_decks.package is not package:
+        room.word_decks = RoomDecks(package)
+    return room.word_decks.options(3)
+
+# --- obsluha zpráv od klienta --------------------------------------------------
+# Zprávy sem dojdou až přes ingress.Ingress: typ je známý a pole mají správný tvar.
+
+async def on_select_package(room: Room, username: str, websocket: WebSocket, message: dict):
+    if room.host != username:
+        return
+    package_name = message["package"]
+    if package_name in word_store:
+        room.selected_package = package_name
+        await manager.broadcast(room.game_code, {"type": "package_selected", "package": package_name})
+
+
+async def on_start_game(room: Room, username: str, websocket: WebSocket, message: dict):
+    if room.host != username or room.phase != PHASE_LOBBY:
+        return
+    room.total_rounds = len(room) * GAME_SETTINGS["TOTAL_ROUNDS_PER_PLAYER"]
+    if JOURNAL_SETTINGS["ENABLED"]:
+        room.journal = journal_writer.open(room.game_code)
+        journal_event(room, EVENT_GAME_START, {"players": list(room.players), "total_rounds": room.total_rounds,
+                                               "package": room.selected_package})
+    await start_round(room.game_code)
+
+
+async def on_select_phrase(room: Room, username: str, websocket: WebSocket, message: dict):
+    if room.current_artist != username or room.phase != PHASE_CHOOSING:
+        return
+    game_code = room.game_code
+    selected_phrase = message["phrase"]
+    room.selected_phrase = selected_phrase
+    # Index normalizovaných slov se postaví jednou za kolo, tipy pak jen hledají ve slovníku
+    room.phrase_matcher = PhraseMatcher(selected_phrase, word_store.get(room.selected_package).normalized)
+    room.masked_phrase = room.phrase_matcher.masked_phrase
+    journal_event(room, EVENT_PHRASE, {"artist": username, "phrase": selected_phrase})
+    # Send full phrase to artist
+    artist = room.get(username)
+    if artist:
+        await manager.send_personal_message({
+            "type": "phrase_selected",
+            "masked_phrase": room.masked_phrase,
+            "full_phrase": " ".join(selected_phrase)
+        }, artist)
+    # Broadcast masked phrase to all other players (excluding artist)
+    await manager.broadcast(game_code, {"type": "phrase_selected", "masked_phrase": room.masked_phrase},
+                            exclude=websocket)
+    set_phase(room, PHASE_DRAWING, GAME_SETTINGS["ROUND_DURATION"], end_round)
+    room.round_start_time = time.time()
+
+
+async def on_drawing_data(room: Room, username: str, websocket: WebSocket, message: dict):
+    if room.current_artist != username:
+        return
+    await manager.broadcast(room.game_code, {"type": "drawing_update", "data": message["data"]})
+    # Starý formát si do záznamu kola uložíme jako v2 úsek
+    room.legacy_stroke_id = (room.legacy_stroke_id + 1) & 0xFFFF
+    chunk = segment_to_chunk(message["data"], room.legacy_stroke_id)
+    if chunk:
+        room.stroke_log.append(chunk)
+        if room.spectators:
+            room.spectator_feed.add_strokes(chunk)
+            manager.schedule_spectators(room)
+        if room.journal is not None:
+            room.journal.record(EVENT_STROKES, chunk)
+
+
+async def on_clear_canvas(room: Room, username: str, websocket: WebSocket, message: dict):
+    if room.current_artist != username:
+        return
+    room.stroke_log.clear()
+    journal_event(room, EVENT_CLEAR, {})
+    await manager.broadcast(room.game_code, {"type": "canvas_cleared"})
+
+
+async def on_guess(room: Room, username: str, websocket: WebSocket, message: dict):
+    if room.current_artist != username:
+        await handle_guess(room.game_code, username, message["guess"])
+
+
+MESSAGE_HANDLERS = {
+    "select_package": on_select_package,
+    "start_game": on_start_game,
+    "select_phrase": on_select_phrase,
+    "drawing_data": on_drawing_data,
+    "clear_canvas": on_clear_canvas,
+    "guess": on_guess,
+}
+
+
+def ws_max_size() -> int:
+    """Frame limit for uvicorn: oversized frames are refused before they are even buffered whole."""
+    # Textový limit je ve znacích, UTF-8 má až 4 bajty na znak
+    return max(INGRESS_SETTINGS["MAX_BINARY_FRAME"], 4 * INGRESS_SETTINGS["MAX_TEXT_FRAME"])
+
+
+def new_ingress() -> Ingress:
+    return Ingress(INGRESS_SETTINGS["RATE_LIMITS"], INGRESS_SETTINGS["VIOLATIONS"],
+                   INGRESS_SETTINGS["MAX_TEXT_FRAME"], INGRESS_SETTINGS["MAX_BINARY_FRAME"])
 
-    for id_, game_code, ts, winner, winner_score, scores_json in rows:
-        try:
-            scores = json.loads(scores_json) if scores_json else {}
-        except Exception:
-            scores = {}
-        if username in scores:
-            try:
-                sc = int(scores[username])
-            except Exception:
-                try:
-                    sc = int(float(scores[username]))
-                except Exception:
-                    sc = 0
-            total_score += sc
-            games_played += 1
-            if sc > highest_score:
-                highest_score = sc
-            is_winner = (winner == username)
-            if is_winner:
-                wins += 1
-            if len(recent_games) < recent_limit:
-                recent_games.append({
-                    'id': id_,
-                    'game_code': game_code,
-                    'timestamp': datetime.fromtimestamp(ts).isoformat(),
-                    'score': sc,
-                    'winner': winner,
-                    'is_winner': is_winner,
-                })
-
-    avg = total_score / games_played if games_played else 0
-    result = {
-        'player': username,
-        'total_score': total_score,
-        'games_played': games_played,
-        'wins': wins,
-        'highest_score': highest_score,
-        'average_score': round(avg, 2),
-        'recent_games': recent_games,
-    }
-    return JSONResponse(result)
-
-def get_words_for_round(package_name: str):
-    package = WORD_PACKAGES.get(package_name, list(WORD_PACKAGES.values())[0])
-    return {
-        "Vlastnost": random.sample(package["Vlastnost"], min(3, len(package["Vlastnost"]))),
-        "Subjekt": random.sample(package["Subjekt"], min(3, len(package["Subjekt"]))),
-        "Činnost": random.sample(package["Činnost"], min(3, len(package["Činnost"]))),
-    }
 
 @wsrouter.websocket("/{game_code}/{username}")
 async def websocket_endpoint(websocket: WebSocket, game_code: str, username: str):
-    await manager.connect(websocket, game_code, username)
+    if not cluster.owns(game_code):
+        # Místnost vlastní jiný worker - spojení k němu jen přeposíláme
+        await cluster.relay(websocket, game_code, username)
+        return
+    if websocket.query_params.get("role") == "spectator":
+        await spectate(websocket, game_code, username)
+        return
+    if not await manager.connect(websocket, game_code, username):
+        return
+    ingress = new_ingress()
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            game_state = manager.game_states.get(game_code)
-            if not game_state: break
-
-            if message["type"] == "select_package" and game_state["host"] == username:
-                package_name = message.get("package")
-                if package_name in WORD_PACKAGES:
-                    game_state["selected_package"] = package_name
-                    await manager.broadcast(game_code, {"type": "package_selected", "package": package_name})
-
-            elif message["type"] == "start_game" and game_state["host"] == username:
-                game_state["game_started"] = True
-                game_state["total_rounds"] = len(game_state["players"]) * GAME_SETTINGS["TOTAL_ROUNDS_PER_PLAYER"]
-                await start_round(game_code)
-
-            elif message["type"] == "select_phrase" and game_state["current_artist"] == username:
-                selected_phrase = message["phrase"]
-                game_state["selected_phrase"] = selected_phrase
-                # Create masked phrase - split "Činnost" (last element) into words for partial matching
-                masked_parts = []
-                for i, word in enumerate(selected_phrase):
-                    if i == len(selected_phrase) - 1:  # Last element (Činnost)
-                        # Split activity into words and mask each word separately
-                        activity_words = word.split()
-                        masked_parts.extend(["_" * len(w) for w in activity_words])
-                    else:
-                        masked_parts.append("_" * len(word))
-                game_state["masked_phrase"] = " ".join(masked_parts)
-                # Store activity words separately for matching
-                game_state["activity_words"] = selected_phrase[-1].split() if len(selected_phrase) > 0 else []
-                game_state["revealed_activity_words"] = [False] * len(game_state["activity_words"])
-                full_phrase = " ".join(selected_phrase)
-                # Send full phrase to artist
-                artist_ws = manager.get_player_websocket(game_code, username)
-                if artist_ws:
-                    await manager.send_personal_message({
-                        "type": "phrase_selected",
-                        "masked_phrase": game_state["masked_phrase"],
-                        "full_phrase": full_phrase
-                    }, artist_ws)
-                # Broadcast masked phrase to all other players (excluding artist)
-                if game_code in manager.active_connections:
-                    for connection in manager.active_connections[game_code]:
-                        # Skip the artist's connection
-                        is_artist = False
-                        for player in game_state["players"]:
-                            if player["websocket"] == connection and player["username"] == username:
-                                is_artist = True
-                                break
-                        if not is_artist:
-                            await connection.send_json({"type": "phrase_selected", "masked_phrase": game_state["masked_phrase"]})
-                game_state["round_timer"] = asyncio.create_task(round_timer(game_code, GAME_SETTINGS["ROUND_DURATION"]))
-                game_state["round_start_time"] = time.time()
-
-            elif message["type"] == "drawing_data" and game_state["current_artist"] == username:
-                await manager.broadcast(game_code, {"type": "drawing_update", "data": message["data"]})
-
-            elif message["type"] == "clear_canvas" and game_state["current_artist"] == username:
-                await manager.broadcast(game_code, {"type": "canvas_cleared"})
-
-            elif message["type"] == "guess" and game_state["current_artist"] != username:
-                await handle_guess(game_code, username, message["guess"])
+            data = await websocket.receive()
+            if data["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(data.get("code", 1000))
+            room = manager.rooms.get(game_code)
+            if not room: break
+
+            if data.get("bytes") is not None:
+                # Binární rámec = dávka tahů (protokol v2), přeposíláme ji bez dekódování
+                frame = data["bytes"]
+                flags = ingress.binary(frame)
+                if flags is None:
+                    continue
+                room.last_activity = time.monotonic()
+                INBOUND_MESSAGES.inc(value="stroke_frame")
+                if room.current_artist == username:
+                    await manager.broadcast_strokes(room, frame, flags, exclude=websocket)
+                    room.stroke_log.append(frame)
+                    if room.journal is not None:
+                        room.journal.record(EVENT_STROKES, frame)
+                continue
+            message = ingress.text(data.get("text") or "")
+            if message is None:
+                continue
+            room.last_activity = time.monotonic()
+            INBOUND_MESSAGES.inc(value=message["type"])
+            await MESSAGE_HANDLERS[message["type"]](room, username, websocket, message)
 
     except WebSocketDisconnect:
         await manager.disconnect(websocket, game_code, username)
+    except IngressRejected as e:
+        await manager.disconnect(websocket, game_code, username)
+        try:
+            await websocket.close(code=e.code, reason=e.reason)
+        except Exception:
+            pass
     except Exception as e:
         print(f"WebSocket error: {e}")
         await manager.disconnect(websocket, game_code, username)
 
-def normalize_word(word: str) -> str:
-    """
-    Normalize word for comparison - lowercase, strip, remove extra spaces and diacritics.
-    """
-    nfkd_form = unicodedata.normalize('NFD', word)
-    only_ascii = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
-    return only_ascii.strip().lower()
+async def spectate(websocket: WebSocket, game_code: str, username: str):
+    """Receive loop of a spectator: nothing they send is dispatched, it only has to pass the ingress limits."""
+    if not await manager.connect_spectator(websocket, game_code, username):
+        return
+    ingress = new_ingress()
+    try:
+        while True:
+            data = await websocket.receive()
+            if data["type"] == "websocket.disconnect":
+                break
+            if data.get("bytes") is not None:
+                ingress.binary(data["bytes"])
+            else:
+                ingress.text(data.get("text") or "")
+    except IngressRejected as e:
+        try:
+            await websocket.close(code=e.code, reason=e.reason)
+        except Exception:
+            pass
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        manager.disconnect_spectator(websocket, game_code)
 
 def calculate_tiered_speed_bonus(elapsed_time: float) -> int:
     """
@@ -567,226 +1137,515 @@ def calculate_tiered_speed_bonus(elapsed_time: float) -> int:
     else:
         return 5   # Bronzový bonus
 
-def check_guess(game_state: Dict[str, Any], guess_normalized: str) -> Tuple[bool, str]:
+class PhraseMatcher:
+    """
+    Precompiled matcher for one round's phrase.
+
+    Vlastnost and Subjekt are one slot each, Činnost is split into one slot per word.
+    Normalized tokens map to their slot indices, so a guess is a single dict lookup,
+    and the masked phrase is re-rendered only when a slot gets revealed.
+    """
+    __slots__ = ("slots", "revealed", "index", "remaining", "masked_phrase")
+
+    def __init__(self, phrase: List[str], normalized: Optional[Mapping[str, str]] = None,
+                 revealed: Optional[List[bool]] = None):
+        slots = list(phrase[:-1]) + phrase[-1].split()
+        self.slots = slots
+        # Odhalená slova kola obnoveného ze snímku (drain_rooms)
+        self.revealed = list(revealed) if revealed and len(revealed) == len(slots) else [False] * len(slots)
+        self.remaining = self.revealed.count(False)
+        self.index: Dict[str, List[int]] = {}
+        # Slova z balíčku mají normalizovaný tvar předpočítaný ve WordStore
+        normalized = normalized or {}
+        for i, word in enumerate(slots):
+            key = normalized.get(word)
+            if key is None:
+                key = normalize_word(word)
+            self.index.setdefault(key, []).append(i)
+        self.masked_phrase = self._render()
+
+    def _render(self) -> str:
+        return " ".join(word if revealed else "_" * len(word) for word, revealed in zip(self.slots, self.revealed))
+
+    def guess(self, guess_normalized: str) -> Optional[str]:
+        """Reveal the first hidden slot matching the guess; returns the revealed word."""
+        for i in self.index.get(guess_normalized, ()):
+            if not self.revealed[i]:
+                self.revealed[i] = True
+                self.remaining -= 1
+                self.masked_phrase = self._render()
+                return self.slots[i]
+        return None
+
+    @property
+    def all_revealed(self) -> bool:
+        return self.remaining == 0
+
+
+def check_guess(room: Room, guess_normalized: str) -> Tuple[bool, str]:
     """
     Checks if a guess is correct against the current phrase.
     Returns a tuple: (is_correct, revealed_word).
     """
-    revealed_phrase_list = game_state["masked_phrase"].split()
-    selected_phrase = game_state["selected_phrase"]
-
-    # Check Vlastnost and Subjekt (indices 0 and 1)
-    for i in range(len(selected_phrase) - 1):
-        word = selected_phrase[i]
-        if normalize_word(word) == guess_normalized and revealed_phrase_list[i].startswith("_"):
-            revealed_phrase_list[i] = word
-            game_state["masked_phrase"] = " ".join(revealed_phrase_list)
-            return True, word
-
-    # Check Činnost (last part of the phrase)
-    activity_words = game_state.get("activity_words", [])
-    revealed_activity = game_state.get("revealed_activity_words", [])
-    activity_start_idx = len(selected_phrase) - 1
-
-    if not activity_words: # Fallback if not initialized
-        last_word = selected_phrase[-1] if selected_phrase else ""
-        activity_words = last_word.split()
-        game_state["activity_words"] = activity_words
-        revealed_activity = [False] * len(activity_words)
-        game_state["revealed_activity_words"] = revealed_activity
-
-    for j, activity_word in enumerate(activity_words):
-        if normalize_word(activity_word) == guess_normalized and not revealed_activity[j]:
-            activity_word_idx = activity_start_idx + j
-            if activity_word_idx < len(revealed_phrase_list):
-                revealed_phrase_list[activity_word_idx] = activity_word
-                revealed_activity[j] = True
-                game_state["revealed_activity_words"] = revealed_activity
-                game_state["masked_phrase"] = " ".join(revealed_phrase_list)
-                return True, activity_word
-
-    return False, ""
+    matcher: Optional[PhraseMatcher] = room.phrase_matcher
+    if matcher is None:
+        return False, ""
+    revealed_word = matcher.guess(guess_normalized)
+    if revealed_word is None:
+        return False, ""
+    room.masked_phrase = matcher.masked_phrase
+    return True, revealed_word
 
 
 async def handle_guess(game_code: str, username: str, guess: str):
-    game_state = manager.game_states.get(game_code)
-    if not game_state or not game_state["selected_phrase"]: return
+    room = manager.rooms.get(game_code)
+    if not room or not room.selected_phrase: return
 
     guess_normalized = normalize_word(guess)
     if not guess_normalized:  # Empty guess
         return
 
-    correct_guess, revealed_word = check_guess(game_state, guess_normalized)
+    # Po konci kola (pauza před dalším) už tipy neboduji, jdou jen do chatu
+    correct_guess, revealed_word = check_guess(room, guess_normalized) if room.phase == PHASE_DRAWING else (False, "")
+    journal_event(room, EVENT_GUESS, {"username": username, "guess": guess, "correct": correct_guess,
+                                     "word": revealed_word or None})
 
     if correct_guess:
         # Calculate points with speed bonus
-        round_start_time = game_state.get("round_start_time", time.time())
+        round_start_time = room.round_start_time or time.time()
         elapsed_time = time.time() - round_start_time
         speed_bonus = calculate_tiered_speed_bonus(elapsed_time)
         base_points = GAME_SETTINGS["POINTS_BASE_GUESS"]
         points_earned = base_points + speed_bonus
         
-        game_state["scores"][username] = game_state["scores"].get(username, 0) + points_earned
+        room.scores[username] = room.scores.get(username, 0) + points_earned
+        score_deltas = {username: points_earned}
         
         # Artist gets points for each correctly guessed word (base 5 points)
-        artist = game_state["current_artist"]
+        artist = room.current_artist
         artist_points = GAME_SETTINGS["POINTS_ARTIST_PER_GUESS"]
-        if artist in game_state["scores"]:
-            game_state["scores"][artist] += artist_points
+        if artist in room.scores:
+            room.scores[artist] += artist_points
+            score_deltas[artist] = artist_points
+        journal_event(room, EVENT_SCORE, score_deltas)
 
-        await manager.broadcast(game_code, {
+        await manager.room_event(room, {
             "type": "word_guessed",
             "guesser": username,
             "word": revealed_word,
-            "revealed_phrase": game_state["masked_phrase"],
-            "scores": game_state["scores"],
+            "revealed_phrase": room.masked_phrase,
             "points_earned": points_earned,
             "speed_bonus": speed_bonus,
             "artist_points": artist_points if artist else 0
-        })
-        if "_" not in game_state["masked_phrase"]:
-            if game_state.get("round_timer"): game_state["round_timer"].cancel()
+        }, score_deltas)
+        if room.phrase_matcher.all_revealed:
             await end_round(game_code)
     else:
-        await manager.broadcast(game_code, {"type": "chat_message", "username": username, "message": guess})
+        await manager.room_event(room, {"type": "chat_message", "username": username, "message": guess})
+
+timer_wheel = TimerWheel(resolution=SCHEDULER_SETTINGS["RESOLUTION"])
 
-async def round_timer(game_code: str, duration: int):
-    try:
-        await asyncio.sleep(duration)
-        if game_code in manager.game_states:
-            await end_round(game_code)
-    except asyncio.CancelledError:
-        # Timer was cancelled, which is expected when round ends early
-        pass
+
+def set_phase(room: Room, phase: str, delay: Optional[float] = None, transition=None):
+    """Move the room to `phase`; `transition(game_code)` runs after `delay` unless the phase changes first.
+
+    An illegal transition raises rooms.PhaseError and leaves the room and its timer untouched.
+    """
+    room.change_phase(phase)
+    if room.phase_timer:
+        room.phase_timer.cancel()
+        room.phase_timer = None
+    if delay is not None:
+        room.phase_timer = timer_wheel.schedule(delay, fire_phase_timer, room, phase, transition)
+
+
+def fire_phase_timer(room: Room, phase: str, transition):
+    room.phase_timer = None
+    # Místnost mezitím zanikla (nebo vznikla znovu pod stejným kódem) či přešla jinam - časovač je přežitý
+    if manager.rooms.get(room.game_code) is not room or room.phase != phase:
+        return None
+    if manager.draining:
+        return None  # stav hry je uložený ve snímku, po restartu se v něm pokračuje
+    return transition(room.game_code)
 
 
 async def start_round(game_code: str):
-    game_state = manager.game_states.get(game_code)
-    if not game_state or not game_state["players"]: return
+    room = manager.rooms.get(game_code)
+    if not room or not room.players: return
 
-    game_state["current_round"] += 1
-    if game_state["current_round"] > game_state["total_rounds"]:
+    room.current_round += 1
+    if room.current_round > room.total_rounds:
         await end_game(game_code)
         return
+    set_phase(room, PHASE_CHOOSING)
 
-    game_state["selected_phrase"], game_state["masked_phrase"] = [], ""
-    game_state["round_start_time"] = None  # Reset round start time
-    game_state["activity_words"] = []
-    game_state["revealed_activity_words"] = []
+    room.selected_phrase, room.masked_phrase = [], ""
+    room.round_start_time = None  # Reset round start time
+    room.phrase_matcher = None
+    room.stroke_log.clear()
 
-    artist_index = (game_state["current_round"] - 1) % len(game_state["players"])
-    game_state["current_artist"] = game_state["players"][artist_index]["username"]
+    artist = room.player_at((room.current_round - 1) % len(room))
+    room.current_artist = artist.username
+    journal_event(room, EVENT_ROUND_START, {"round": room.current_round, "artist": room.current_artist})
 
     await manager.broadcast(game_code, {
-        "type": "round_start", "round": game_state["current_round"],
-        "total_rounds": game_state["total_rounds"],
-        "artist": game_state["current_artist"],
+        "type": "round_start", "round": room.current_round,
+        "total_rounds": room.total_rounds,
+        "artist": room.current_artist,
         "duration": GAME_SETTINGS["ROUND_DURATION"]
     })
 
-    words = get_words_for_round(game_state["selected_package"])
-    artist_ws = manager.get_player_websocket(game_code, game_state["current_artist"])
-    if artist_ws:
-        await manager.send_personal_message({"type": "select_phrase_options", "words": words}, artist_ws)
+    words = get_words_for_round(room)
+    if room.get(artist.username) is artist:
+        await manager.send_personal_message({"type": "select_phrase_options", "words": words}, artist)
     else:
         # If artist disconnected, skip to next round after a short delay
-        await asyncio.sleep(1)
-        await start_round(game_code)
+        set_phase(room, PHASE_ROUND_OVER, GAME_SETTINGS["ARTIST_GONE_DELAY"], start_round)
 
 
 async def end_round(game_code: str):
-    game_state = manager.game_states.get(game_code)
-    if not game_state: return
-
-    full_phrase = " ".join(game_state["selected_phrase"])
-    await manager.broadcast(game_code, {"type": "round_end", "full_phrase": full_phrase, "scores": game_state["scores"]})
-
-    if game_state.get("round_timer"): game_state["round_timer"].cancel()
-
-    await asyncio.sleep(GAME_SETTINGS["POST_ROUND_DELAY"])
-    await start_round(game_code)
+    room = manager.rooms.get(game_code)
+    # Kolo končí buď posledním uhodnutým slovem, nebo časovačem - podruhé už nic nedělat
+    if not room or room.phase != PHASE_DRAWING: return
+
+    set_phase(room, PHASE_ROUND_OVER, GAME_SETTINGS["POST_ROUND_DELAY"], start_round)
+    full_phrase = " ".join(room.selected_phrase)
+    snapshot = room.stroke_log.snapshot()
+    if snapshot:
+        # Vykreslení běží v poolu procesů, hra mezitím pokračuje dalším kolem
+        job = gallery_renderer.submit(snapshot, room.current_round, room.current_artist or "", full_phrase)
+        if job is not None:
+            room.drawing_jobs.append(job)
+    journal_event(room, EVENT_ROUND_END, {"round": room.current_round, "phrase": full_phrase, "scores": room.scores})
+    await manager.broadcast(game_code, {"type": "round_end", "full_phrase": full_phrase, "scores": room.scores})
 
 async def end_game(game_code: str):
-    game_state = manager.game_states.get(game_code)
-    if not game_state: return
+    room = manager.rooms.get(game_code)
+    if not room or room.phase == PHASE_GAME_OVER: return
 
+    set_phase(room, PHASE_GAME_OVER)
+    journal_event(room, EVENT_GAME_END, {"scores": room.scores})
+    # Záznam už patří jen hře - místnost ho při zavření nesmaže
+    journal, room.journal = room.journal, None
     # Persist results before broadcasting
     try:
-        await save_game_result(game_code, game_state.get("scores", {}))
+        game_id = await save_game_result(game_code, room.scores)
     except Exception as e:
         print(f"Warning: failed to persist game result: {e}")
+        if journal is not None:
+            journal_writer.discard(journal)
+    else:
+        if journal is not None:
+            task = asyncio.create_task(journal_writer.finish(journal, game_id))
+            journal_tasks.add(task)
+            task.add_done_callback(journal_tasks.discard)
+        if room.drawing_jobs:
+            task = asyncio.create_task(store_drawings(game_id, room.drawing_jobs))
+            gallery_tasks.add(task)
+            task.add_done_callback(gallery_tasks.discard)
+            room.drawing_jobs = []
+
+    await manager.broadcast(game_code, {"type": "game_end", "final_scores": room.scores})
+    set_phase(room, PHASE_GAME_OVER, GAME_SETTINGS["GAME_END_CLOSE_DELAY"], close_room)
+
+async def close_room(game_code: str, code: int = 1000):
+    room = manager.rooms.get(game_code)
+    if not room: return
+    await manager.flush_spectators(room)
+    # Outboxes flush whatever is still queued (game_end included) before closing
+    await asyncio.gather(*[player.outbox.close(code=code) for player in room],
+                         *[spectator.outbox.close(code=code) for spectator in room.spectators.values()],
+                         return_exceptions=True)
+    if manager.rooms.get(game_code) is room:
+        drop_room(room)
+
+
+def drop_room(room: Room):
+    """Forget a room: stop its phase timer and delete the journal of a game that was not saved."""
+    if manager.draining:
+        # Místnost je v uloženém snímku - po restartu ji i její záznam (.part) převezme restore_rooms
+        return
+    if room.phase_timer:
+        room.phase_timer.cancel()
+        room.phase_timer = None
+    if room.slow_timer:
+        room.slow_timer.cancel()
+        room.slow_timer = None
+    if room.spectator_timer:
+        room.spectator_timer.cancel()
+        room.spectator_timer = None
+    if room.spectators:
+        # Hráči odešli, není co sledovat
+        task = asyncio.create_task(close_spectators(list(room.spectators.values())))
+        spectator_tasks.add(task)
+        task.add_done_callback(spectator_tasks.discard)
+    if room.journal is not None:
+        journal_writer.discard(room.journal)
+        room.journal = None
+    del manager.rooms[room.game_code]
+
+spectator_tasks = set()
+
+
+async def close_spectators(spectators: List[Player], code: int = 1000):
+    await asyncio.gather(*[spectator.outbox.close(code=code) for spectator in spectators], return_exceptions=True)
+
+# Časované přechody fází, které se po obnovení místnosti znovu naplánují
+PHASE_TRANSITIONS = {PHASE_DRAWING: end_round, PHASE_ROUND_OVER: start_round}
+
+
+def resume_room(room: Room):
+    """Start the clock of a restored room again - the first player is back."""
+    remaining, room.paused_remaining = room.paused_remaining, None
+    if room.phase == PHASE_DRAWING:
+        room.round_start_time = time.time() - (GAME_SETTINGS["ROUND_DURATION"] - remaining)
+    set_phase(room, room.phase, remaining, PHASE_TRANSITIONS[room.phase])
+
+
+def drain_rooms():
+    """Stop the clocks, refuse new connections and snapshot running games to disk."""
+    if manager.draining:
+        return
+    manager.draining = True
+    start = time.perf_counter()
+    snapshots = []
+    for room in manager.rooms.values():
+        timer = room.phase_timer
+        if room.paused_remaining is not None:
+            remaining = room.paused_remaining  # obnovená místnost, do které se ještě nikdo nevrátil
+        else:
+            remaining = timer.remaining() if timer else 0.0
+        if timer:
+            timer.cancel()
+            room.phase_timer = None
+        if room.phase in (PHASE_CHOOSING, PHASE_DRAWING, PHASE_ROUND_OVER):
+            # Lobby se po restartu založí znovu, dohraná hra je uložená v databázi
+            snapshots.append(room.snapshot(remaining))
+    path = write_snapshot(Path(DRAIN_SETTINGS["SNAPSHOT_DIR"]), CLUSTER_SETTINGS["WORKER_ID"], snapshots)
+    print(f"Drain: {len(snapshots)} rooms saved to {path} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def restore_rooms() -> int:
+    """Recreate rooms this worker owns from the snapshots of the last shutdown."""
+    directory = Path(DRAIN_SETTINGS["SNAPSHOT_DIR"])
+    restored = 0
+    for data in read_snapshots(directory, DRAIN_SETTINGS["SNAPSHOT_MAX_AGE"]):
+        game_code = data["game_code"]
+        if game_code in manager.rooms or not cluster.owns(game_code):
+            continue
+        room = Room.from_snapshot(data, new_stroke_log())
+        if data.get("journal"):
+            room.journal = journal_writer.resume(*data["journal"])
+        if room.phase == PHASE_CHOOSING:
+            # Nabídka frází kreslíři se neuložila - kolo se po návratu rozdá znovu
+            room.current_round -= 1
+            room.phase, room.paused_remaining = PHASE_ROUND_OVER, GAME_SETTINGS["ARTIST_GONE_DELAY"]
+        elif room.phase == PHASE_DRAWING:
+            room.phrase_matcher = PhraseMatcher(room.selected_phrase,
+                                                word_store.get(room.selected_package).normalized,
+                                                data["revealed"])
+            room.masked_phrase = room.phrase_matcher.masked_phrase
+        manager.rooms[game_code] = room
+        restored += 1
+    remove_snapshot(directory, CLUSTER_SETTINGS["WORKER_ID"])
+    return restored
+
+
+def install_drain_handler():
+    """Snapshot rooms on SIGTERM/SIGINT, before uvicorn closes the sockets and players leave their rooms."""
+    if threading.current_thread() is not threading.main_thread():
+        return  # signály jdou jen v hlavním vlákně (server spuštěný v testu)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            # Uvicorn začne vypínat až při další kontrole příznaku (0.1 s), drain doběhne dřív
+            loop.call_soon_threadsafe(drain_rooms)
+            previous(signum, frame)
 
-    await manager.broadcast(game_code, {"type": "game_end", "final_scores": game_state["scores"]})
+        signal.signal(sig, handler)
 
-    await asyncio.sleep(2)
-    if game_code in manager.active_connections:
-        for conn in manager.active_connections[game_code]:
+
+async def reap_rooms():
+    """Periodic cleanup: players whose socket died unnoticed, and rooms nobody uses any more."""
+    timer_wheel.schedule(CONNECTION_SETTINGS["REAPER_INTERVAL"], reap_rooms)
+    idle_before = time.monotonic() - CONNECTION_SETTINGS["ROOM_IDLE_TIMEOUT"]
+    rejoin_before = time.monotonic() - DRAIN_SETTINGS["REJOIN_GRACE"]
+    for game_code, room in list(manager.rooms.items()):
+        for player in [p for p in room if p.outbox.failed]:
+            # Zápis selhal, ale receive() na polootevřeném spojení nevrátí - uklidíme za příjmovou smyčku
+            REAPED.inc(value="dead_connection")
+            await manager.disconnect(player.websocket, game_code, player.username)
             try:
-                await conn.close(code=1000)
+                await asyncio.wait_for(player.websocket.close(code=1001), 5)
             except Exception:
                 pass
-        try:
-            del manager.active_connections[game_code]
-        except Exception:
-            pass
-        try:
-            del manager.game_states[game_code]
-        except Exception:
-            pass
+        for spectator in [s for s in room.spectators.values() if s.outbox.failed]:
+            REAPED.inc(value="dead_connection")
+            manager.disconnect_spectator(spectator.websocket, game_code)
+        if manager.rooms.get(game_code) is not room:
+            continue
+        if not room.players:
+            if room.paused_remaining is not None and room.last_activity >= rejoin_before:
+                continue  # obnovená místnost ještě čeká na hráče
+            REAPED.inc(value="empty")
+            drop_room(room)
+        elif room.last_activity < idle_before:
+            REAPED.inc(value="idle")
+            await close_room(game_code, code=1001)
+
+async def watch_word_packages():
+    """Reload word packages when their files change; hosts get the new package list."""
+    while True:
+        await asyncio.sleep(WORD_STORE_SETTINGS["RELOAD_INTERVAL"])
+        names = word_store.names
+        # Velký balíček se načítá stovky ms - mimo smyčku událostí, hry běží dál
+        reloaded = await asyncio.get_running_loop().run_in_executor(None, word_store.reload_if_changed)
+        if reloaded and word_store.names != names:
+            for room in manager.rooms.values():
+                host = room.get(room.host)
+                if host:
+                    await manager.send_personal_message({
+                        "type": "available_packages", "packages": list(word_store.names),
+                        "selected_package": room.selected_package
+                    }, host)
+
+def report_optional_fallbacks():
+    """Log once which optional libraries (requirements-optional.txt) are missing and what falls back."""
+    if orjson is None:
+        print("Optional: orjson not installed - messages are encoded with the json module")
+    if gallery.Image is None and GALLERY_SETTINGS["POOL_SIZE"] > 0:
+        print("Optional: Pillow not installed - the drawing gallery is disabled")
+    if strokes.np is None:
+        print("Optional: NumPy not installed - strokes are simplified in pure Python")
+
+word_watcher: Optional[asyncio.Task] = None
+loop_lag_monitor: Optional[asyncio.Task] = None
+
+async def on_startup():
+    global word_watcher, loop_lag_monitor
+    report_optional_fallbacks()
+    await db.start()
+    word_watcher = asyncio.create_task(watch_word_packages())
+    loop_lag_monitor = asyncio.create_task(
+        monitor_loop_lag(LOOP_LAG, LOOP_DELAY_SECONDS, METRICS_SETTINGS["LOOP_LAG_INTERVAL"]))
+    cluster.on_event("invalidate_cache", response_cache.invalidate)
+    cluster.on_collect("metrics", lambda: REGISTRY.export(metric_labels()))
+    timer_wheel.schedule(CONNECTION_SETTINGS["REAPER_INTERVAL"], reap_rooms)
+    gallery_renderer.start()
+    if JOURNAL_SETTINGS["ENABLED"]:
+        journal_writer.start()
+    restored = restore_rooms()
+    if restored:
+        print(f"Restored {restored} rooms from snapshot")
+    install_drain_handler()
+    await cluster.start(room_handler=websocket_endpoint)
+
+async def on_shutdown():
+    for task in (word_watcher, loop_lag_monitor):
+        if task:
+            task.cancel()
+    await timer_wheel.close()
+    # Rozpracované náhledy dohraných her se ještě uloží, nové se už nezačnou
+    if gallery_tasks:
+        await asyncio.wait(gallery_tasks, timeout=5)
+    gallery_renderer.close()
+    # Záznamy rozehraných her zůstanou na disku, po restartu se do nich pokračuje
+    if journal_tasks:
+        await asyncio.wait(journal_tasks, timeout=5)
+    await journal_writer.close()
+    await cluster.close()
+    await db.close()
+
+@apirouter.get("/stats/connections")
+async def get_connection_stats():
+    """Per-connection send queue depth, drops and throughput."""
+    return JSONResponse(manager.queue_stats())
+
+@apirouter.get("/stats/cluster")
+async def get_cluster_stats():
+    """This worker's id, owned rooms and relayed connections."""
+    stats = cluster.stats()
+    stats["rooms"] = len(manager.rooms)
+    return JSONResponse(stats)
+
+def count_connections() -> int:
+    # Klientská spojení držená tímto procesem: hráči připojení přímo + přeposílaná k jiným workerům
+    local = sum(1 for room in manager.rooms.values()
+                for player in chain(room.players.values(), room.spectators.values())
+                if not isinstance(player.websocket, RemoteWebSocket))
+    return local + cluster.stats()["relayed_connections"]
+
+REGISTRY.gauge("kreslir_rooms", "Rooms owned by this worker.", lambda: len(manager.rooms))
+REGISTRY.gauge("kreslir_players", "Players in rooms owned by this worker.",
+               lambda: sum(len(room) for room in manager.rooms.values()))
+REGISTRY.gauge("kreslir_spectators", "Spectators in rooms owned by this worker.",
+               lambda: sum(len(room.spectators) for room in manager.rooms.values()))
+REGISTRY.gauge("kreslir_connections", "Client websockets held open by this worker.", count_connections)
+REGISTRY.gauge("kreslir_gallery_pending", "Round thumbnails queued or rendering in the gallery pool.",
+               lambda: gallery_renderer.pending)
+REGISTRY.gauge("kreslir_phase_timers", "Pending room timers (phase changes and batch ticks).", lambda: len(timer_wheel))
+
+def metric_labels():
+    return [("worker", str(cluster.worker_id))] if cluster.clustered else []
+
+@apirouter.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics; with several workers the other workers' samples are merged in."""
+    remote = await cluster.collect("metrics", timeout=METRICS_SETTINGS["COLLECT_TIMEOUT"])
+    return PlainTextResponse(REGISTRY.render(metric_labels(), remote),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @apirouter.get("/")
 async def get_root():
     return {"message": "Vítejte v backendu Koncept Kreslíři!"}
 @apirouter.get('/leaderboard/ranking')
-async def get_leaderboard_ranking(limit: int = 50):
+async def get_leaderboard_ranking(request: Request, limit: int = 50):
     """Return leaderboard ranked primarily by wins, then average score, then total score."""
-    cur = _conn.cursor()
-    cur.execute("SELECT timestamp, winner, scores_json FROM games")
-    rows = cur.fetchall()
-
-    stats: Dict[str, Dict[str, Any]] = {}
-    for ts, winner, scores_json in rows:
-        try:
-            scores = json.loads(scores_json) if scores_json else {}
-        except Exception:
-            continue
-        for player, sc in scores.items():
-            try:
-                sc_int = int(sc)
-            except Exception:
-                try:
-                    sc_int = int(float(sc))
-                except Exception:
-                    sc_int = 0
-            ent = stats.setdefault(player, {"total_score": 0, "games_played": 0, "wins": 0, "scores_list": [], "last_seen": 0})
-            ent["total_score"] += sc_int
-            ent["games_played"] += 1
-            ent["scores_list"].append(sc_int)
-            if ts and ts > ent["last_seen"]:
-                ent["last_seen"] = ts
-        if winner:
-            stats.setdefault(winner, {"total_score": 0, "games_played": 0, "wins": 0, "scores_list": [], "last_seen": 0})["wins"] += 1
-
-    out = []
-    for player, ent in stats.items():
-        avg = sum(ent["scores_list"]) / len(ent["scores_list"]) if ent["scores_list"] else 0
-        out.append({
-            "player": player,
-            "wins": ent.get("wins", 0),
-            "total_score": ent.get("total_score", 0),
-            "games_played": ent.get("games_played", 0),
-            "average_score": round(avg, 2),
-            "last_seen": datetime.fromtimestamp(ent["last_seen"]).isoformat() if ent["last_seen"] else None,
-        })
-
-    # sort by wins desc, then average_score desc, then total_score desc
-    out.sort(key=lambda x: (x["wins"], x["average_score"], x["total_score"]), reverse=True)
-    return JSONResponse(out[:limit])
+    return await cached_query(request, query_ranking, clamp_limit(limit, HISTORY_SETTINGS["MAX_LEADERBOARD"]))
 
 app.include_router(apirouter)
 app.include_router(wsrouter)
 
 if __name__ == "__main__":
-    init_db()
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    import argparse
+    import sys
+    if sys.argv[1:] == ["rebuild-stats"]:
+        # python main.py rebuild-stats - přepočítá souhrn žebříčku z celé historie
+        db.rebuild_player_stats()
+        print("player_stats rebuilt.")
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description="Kreslir backend")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="počet procesů; místnosti se mezi ně rozdělí podle kódu hry")
+    parser.add_argument("--pubsub", default="",
+                        help="redis://host:port nebo unix:///cesta - bez něj si workery spustí vlastní broker")
+    parser.add_argument("--reload", action="store_true", help="vývojový režim, jen s jedním workerem")
+    args = parser.parse_args()
+    if args.workers > 1:
+        from cluster import serve_workers
+        # Migrace schématu proběhne jednou tady, ne souběžně ve všech workerech
+        db.open()
+        serve_workers("main:app", args.host, args.port, args.workers, args.pubsub,
+                      app_dir=str(Path(__file__).resolve().parent),
+                      uvicorn_args=["--ws-ping-interval", str(CONNECTION_SETTINGS["PING_INTERVAL"]),
+                                    "--ws-ping-timeout", str(CONNECTION_SETTINGS["PING_TIMEOUT"]),
+                                    "--ws-max-size", str(ws_max_size()),
+                                    "--ws-per-message-deflate", str(COMPRESSION_SETTINGS["PER_MESSAGE_DEFLATE"])])
+    else:
+        import uvicorn
+        # Ping/pong na úrovni protokolu - polootevřená spojení se tak zavřou i bez zprávy od klienta;
+        # příliš velké rámce odmítne už uvicorn; velké odchozí rámce komprimuje frame_compressor
+        ws_options = {"ws_ping_interval": CONNECTION_SETTINGS["PING_INTERVAL"],
+                      "ws_ping_timeout": CONNECTION_SETTINGS["PING_TIMEOUT"],
+                      "ws_max_size": ws_max_size(),
+                      "ws_per_message_deflate": COMPRESSION_SETTINGS["PER_MESSAGE_DEFLATE"]}
+        if args.reload:
+            uvicorn.run("main:app", host=args.host, port=args.port, reload=True, **ws_options)
+        else:
+            uvicorn.run(app, host=args.host, port=args.port, **ws_options)
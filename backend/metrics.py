@@ -0,0 +1,246 @@
+"""
+Metriky serveru ve formátu Prometheus (text exposition 0.0.4).
+
+Měření musí jít nechat zapnuté v provozu, proto je vše předalokované:
+čítač je číslo ve slovníku podle hodnoty štítku, histogram má pevné hranice
+košů a pozorování je jen bisect + dvě sčítání. Neznámé hodnoty štítku (např.
+typ zprávy, který si klient vymyslel) padají do "other", aby počet časových
+řad zůstal omezený.
+
+Každý proces (worker) má vlastní registr; /api/metrics ve víceprocesovém
+provozu posbírá vzorky ostatních workerů přes cluster a označí je štítkem worker.
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+OTHER = "other"
+
+# s - od mikrosekund (rozeslání do malé místnosti) po desítky ms
+FANOUT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+# s - dotazy SQLite (čtení v poolu vláken)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# s - zpoždění smyčky událostí
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    inner = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + inner + "}" if inner else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label: Optional[str] = None,
+                 values: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        # Hodnoty štítku jsou dané předem (+ "other"), nic se za běhu nealokuje
+        self.label_values: Tuple[Optional[str], ...] = tuple(values) + (OTHER,) if label else (None,)
+
+    def _key(self, value: Optional[str]) -> Optional[str]:
+        return value if value in self._series else OTHER
+
+    def _label_pairs(self, value: Optional[str], const: Sequence[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        pairs = list(const)
+        if self.label:
+            pairs.append((self.label, value))
+        return pairs
+
+    @abstractmethod
+    def samples(self, const: Sequence[Tuple[str, str]] = ()) -> List[str]:
+        """Exposition lines of this metric, with `const` labels added to every sample."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label: Optional[str] = None,
+                 values: Sequence[str] = ()):
+        super().__init__(name, documentation, label, values)
+        self._series: Dict[Optional[str], float] = dict.fromkeys(self.label_values, 0)
+
+    def inc(self, amount: float = 1, value: Optional[str] = None):
+        series = self._series
+        if value not in series:
+            value = OTHER
+        series[value] += amount
+
+    def get(self, value: Optional[str] = None) -> float:
+        return self._series[self._key(value)]
+
+    def samples(self, const: Sequence[Tuple[str, str]] = ()) -> List[str]:
+        return [f"{self.name}{_labels(self._label_pairs(value, const))} {_number(count)}"
+                for value, count in self._series.items()]
+
+
+class Gauge(_Metric):
+    """A value set by the code, or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation)
+        self.fn = fn
+        self.value: float = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self, const: Sequence[Tuple[str, str]] = ()) -> List[str]:
+        value = self.fn() if self.fn is not None else self.value
+        return [f"{self.name}{_labels(const)} {_number(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 label: Optional[str] = None, values: Sequence[str] = ()):
+        super().__init__(name, documentation, label, values)
+        self.buckets = tuple(sorted(buckets))
+        # Na hodnotu štítku: [počty v koších..., počet nad poslední hranicí], součet
+        self._series: Dict[Optional[str], List] = {
+            value: [[0] * (len(self.buckets) + 1), 0.0] for value in self.label_values
+        }
+
+    def observe(self, amount: float, value: Optional[str] = None):
+        series = self._series.get(value)
+        if series is None:
+            series = self._series[OTHER]
+        series[0][bisect_left(self.buckets, amount)] += 1
+        series[1] += amount
+
+    def count(self, value: Optional[str] = None) -> int:
+        return sum(self._series[self._key(value)][0])
+
+    def samples(self, const: Sequence[Tuple[str, str]] = ()) -> List[str]:
+        lines = []
+        for value, (counts, total) in self._series.items():
+            pairs = self._label_pairs(value, const)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', _number(float(bound)))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, label: Optional[str] = None,
+                values: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label, values))
+
+    def gauge(self, name: str, documentation: str, fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, fn))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float],
+                  label: Optional[str] = None, values: Sequence[str] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets, label, values))
+
+    def export(self, const: Sequence[Tuple[str, str]] = ()) -> bytes:
+        """This process's samples per metric, for merging into another worker's render()."""
+        return json.dumps({m.name: m.samples(const) for m in self.metrics}).encode("utf-8")
+
+    def render(self, const: Sequence[Tuple[str, str]] = (), remote: Iterable[bytes] = ()) -> str:
+        """Prometheus text format; `remote` are export() payloads of other workers."""
+        others = [json.loads(payload) for payload in remote]
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(const))
+            for other in others:
+                lines.extend(other.get(metric.name, ()))
+        return "\n".join(lines) + "\n"
+
+
+async def monitor_loop_lag(gauge: Gauge, histogram: Histogram, interval: float = 0.5):
+    """Measure how late the event loop wakes a sleeping task - time spent blocked by other work."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        gauge.set(lag)
+        histogram.observe(lag)
+
+
+# --- metriky serveru ---------------------------------------------------------
+
+REGISTRY = Registry()
+
+INBOUND_MESSAGE_TYPES = ("select_package", "start_game", "select_phrase", "drawing_data",
+                         "clear_canvas", "guess", "stroke_frame")
+
+INBOUND_MESSAGES = REGISTRY.counter(
+    "kreslir_inbound_messages_total", "WebSocket messages received from clients, by type.",
+    "type", INBOUND_MESSAGE_TYPES)
+BROADCAST_SECONDS = REGISTRY.histogram(
+    "kreslir_broadcast_fanout_seconds", "Time to enqueue one frame for every player of a room.",
+    FANOUT_BUCKETS)
+SENT_BYTES = REGISTRY.counter(
+    "kreslir_sent_bytes_total", "Bytes written to client websockets, by frame kind.",
+    "frame", ("text", "binary"))
+DROPPED_FRAMES = REGISTRY.counter(
+    "kreslir_dropped_frames_total", "Outgoing frames dropped because a client could not keep up.")
+QUERY_SECONDS = REGISTRY.histogram(
+    "kreslir_db_query_seconds", "SQLite query latency of the leaderboard/history endpoints (cache misses).",
+    QUERY_BUCKETS, "query",
+    ("query_top_games", "query_games", "query_games_ndjson", "query_aggregate", "query_player",
+     "query_ranking", "query_drawings"))
+RESPONSE_CACHE = REGISTRY.counter(
+    "kreslir_response_cache_total", "Leaderboard/history response cache lookups.",
+    "result", ("hit", "miss"))
+REJECTED_CONNECTIONS = REGISTRY.counter(
+    "kreslir_rejected_connections_total", "Connections refused by a per-process or per-room cap.",
+    "reason", ("room_limit", "room_full", "spectators_full"))
+REAPED = REGISTRY.counter(
+    "kreslir_reaped_total", "Players and rooms removed by the idle reaper.",
+    "reason", ("dead_connection", "empty", "idle"))
+INGRESS_REJECTED = REGISTRY.counter(
+    "kreslir_ingress_rejected_total", "Client frames dropped by the ingress gate before dispatch.",
+    "reason", ("size", "malformed", "unknown", "rate"))
+GALLERY_JOBS = REGISTRY.counter(
+    "kreslir_gallery_jobs_total", "Round thumbnail render jobs, by outcome.",
+    "result", ("rendered", "dropped", "failed"))
+COMPRESSED_FRAMES = REGISTRY.counter(
+    "kreslir_compressed_frames_total", "Outgoing frames above the compression threshold, by outcome.",
+    "result", ("compressed", "incompressible"))
+COMPRESSION_SAVED_BYTES = REGISTRY.counter(
+    "kreslir_compression_saved_bytes_total", "Bytes not sent thanks to frame compression, over all recipients.")
+COMPRESSION_SECONDS = REGISTRY.counter(
+    "kreslir_compression_seconds_total", "Time spent compressing outgoing frames.")
+DOWNSAMPLE_POINTS = REGISTRY.counter(
+    "kreslir_downsample_points_total", "Stroke points merged for constrained clients, kept or removed by simplification.",
+    "result", ("kept", "removed"))
+JOURNAL_BYTES = REGISTRY.counter(
+    "kreslir_journal_written_bytes_total", "Compressed game journal bytes appended to disk.")
+JOURNAL_DROPPED = REGISTRY.counter(
+    "kreslir_journal_dropped_total", "Journal records dropped because a game's buffer was full.")
+LOOP_LAG = REGISTRY.gauge(
+    "kreslir_event_loop_lag_seconds", "Most recent event loop lag measurement.")
+LOOP_DELAY_SECONDS = REGISTRY.histogram(
+    "kreslir_event_loop_delay_seconds", "Distribution of event loop lag measurements.", LAG_BUCKETS)
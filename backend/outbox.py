@@ -0,0 +1,179 @@
+"""
+Odchozí fronta jednoho WebSocket spojení.
+
+Každé spojení má vlastní writer task a omezenou frontu už zakódovaných rámců.
+Broadcast tak jen vloží rámec do front a nečeká na pomalé klienty - jeden
+zaseklý mobil nezdrží příjmovou smyčku kreslíře ani zbytek místnosti.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+from fastapi import WebSocket
+
+from metrics import DROPPED_FRAMES, SENT_BYTES
+
+Frame = Union[str, bytes]
+
+# Priorita rámce určuje, co se smí zahodit, když se fronta zaplní
+PRIORITY_DROPPABLE = 0  # průběžné drawing_update - lze zahodit
+PRIORITY_NORMAL = 1
+PRIORITY_CRITICAL = 2  # round_end, game_end, word_guessed - nikdy nezahazujeme
+
+_CLOSE = object()
+
+
+class ClientOutbox:
+    """Bounded outbound queue with a dedicated writer task for one websocket."""
+
+    def __init__(self, websocket: WebSocket, username: str, max_frames: int = 256,
+                 stuck_timeout: float = 10.0,
+                 on_stuck: Optional[Callable[["ClientOutbox"], Any]] = None):
+        self.websocket = websocket
+        self.username = username
+        self.max_frames = max_frames
+        # Nezahoditelné rámce smí frontu přeplnit, ale jen do této meze
+        self.hard_limit = max_frames * 2
+        self.stuck_timeout = stuck_timeout
+        self.on_stuck = on_stuck
+
+        self._queue: Deque[Tuple[Any, int]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.stuck = False
+        self.failed = False  # zápis do socketu selhal - spojení je mrtvé
+        self._close_code = 1000
+        self.full_since: Optional[float] = None
+
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self.dropped_frames = 0
+        self.max_depth = 0
+        # s - klouzavý průměr doby zápisu rámce do socketu; na slabé lince čeká zápis na odeslání
+        self.send_latency = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    def push(self, frame: Frame, priority: int = PRIORITY_NORMAL) -> bool:
+        """Queue a frame without blocking. Returns False if the frame was not queued."""
+        if self.closed:
+            return False
+        queue = self._queue
+        if len(queue) >= self.max_frames:
+            now = time.monotonic()
+            if self.full_since is None:
+                self.full_since = now
+            elif now - self.full_since > self.stuck_timeout:
+                self._mark_stuck()
+                return False
+            if priority == PRIORITY_DROPPABLE:
+                self.dropped_frames += 1
+                DROPPED_FRAMES.inc()
+                return False
+            if not self._evict_droppable() and len(queue) >= self.hard_limit:
+                # Ani po zahození průběžných rámců se nic nevejde - klient nestíhá, odpojíme ho
+                self._mark_stuck()
+                return False
+        queue.append((frame, priority))
+        if len(queue) > self.max_depth:
+            self.max_depth = len(queue)
+        self._wakeup.set()
+        return True
+
+    def _evict_droppable(self) -> bool:
+        # Zahodíme nejstarší průběžný rámec, aby se vešel důležitější
+        for i, (_, priority) in enumerate(self._queue):
+            if priority == PRIORITY_DROPPABLE:
+                del self._queue[i]
+                self.dropped_frames += 1
+                DROPPED_FRAMES.inc()
+                return True
+        return False
+
+    def _mark_stuck(self):
+        if self.stuck:
+            return
+        self.stuck = True
+        self.closed = True
+        self._queue.clear()
+        if self._task:
+            self._task.cancel()
+        if self.on_stuck:
+            self.on_stuck(self)
+
+    async def _writer(self):
+        queue = self._queue
+        websocket = self.websocket
+        try:
+            while True:
+                while not queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                frame, _ = queue.popleft()
+                if len(queue) < self.max_frames:
+                    self.full_since = None
+                if frame is _CLOSE:
+                    await websocket.close(code=self._close_code)
+                    return
+                start = time.monotonic()
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                    SENT_BYTES.inc(len(frame), "binary")
+                else:
+                    await websocket.send_text(frame)
+                    # isascii() je O(1), kódovat znovu musíme jen texty s diakritikou
+                    SENT_BYTES.inc(len(frame) if frame.isascii() else len(frame.encode("utf-8")), "text")
+                self.send_latency += (time.monotonic() - start - self.send_latency) * 0.2
+                self.sent_frames += 1
+                self.sent_bytes += len(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Spojení je mrtvé; o odpojení se postará příjmová smyčka, nebo reaper,
+            # pokud na polootevřeném spojení receive() nikdy nevrátí
+            self.closed = True
+            self.failed = True
+            queue.clear()
+
+    async def close(self, code: int = 1000, timeout: float = 2.0):
+        """Flush queued frames (up to timeout) and close the websocket."""
+        if self.closed:
+            return
+        self._close_code = code
+        self._queue.append((_CLOSE, PRIORITY_CRITICAL))
+        self._wakeup.set()
+        self.closed = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except Exception:
+            self._task.cancel()
+
+    def stop(self):
+        """Stop the writer immediately, discarding anything still queued."""
+        self.closed = True
+        self._queue.clear()
+        if self._task:
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "username": self.username,
+            "queue_depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "sent_frames": self.sent_frames,
+            "sent_bytes": self.sent_bytes,
+            "dropped_frames": self.dropped_frames,
+            "send_latency": round(self.send_latency, 4),
+            "stuck": self.stuck,
+            "failed": self.failed,
+        }
@@ -0,0 +1,174 @@
+"""
+Stav místnosti a jejích hráčů.
+
+Room drží hráče ve slovníku username -> Player (v pořadí připojení, na tom
+závisí střídání kreslířů i volba nového hostitele) a k tomu index
+websocket -> Player. Vyhledání hráče, kontrola obsazeného jména i odchod
+hráče jsou tak O(1) a nic se při nich nepřestavuje.
+"""
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from downsample import StrokeBuffer
+from strokes import StrokeLog
+
+# Fáze místnosti. Přechody dělá main.py, časované přechody plánuje scheduler.TimerWheel
+# (Room.phase_timer) - časovač platí jen pro fázi, ve které byl naplánován.
+PHASE_LOBBY = "lobby"            # čeká se na start_game
+PHASE_CHOOSING = "choosing"      # kreslíř vybírá frázi
+PHASE_DRAWING = "drawing"        # běží kolo, po ROUND_DURATION end_round
+PHASE_ROUND_OVER = "round_over"  # pauza před dalším kolem, pak start_round
+PHASE_GAME_OVER = "game_over"    # game_end odeslán, za chvíli se místnost zavře
+
+# Povolené přechody; jiný Room.change_phase odmítne. Stejná fáze jen znovu naplánuje časovač
+# (obnova místnosti po restartu, zavření po konci hry).
+PHASE_CHANGES = {
+    PHASE_LOBBY: {PHASE_CHOOSING, PHASE_GAME_OVER},  # hra bez kol (TOTAL_ROUNDS_PER_PLAYER = 0)
+    PHASE_CHOOSING: {PHASE_DRAWING, PHASE_ROUND_OVER},
+    PHASE_DRAWING: {PHASE_ROUND_OVER},
+    PHASE_ROUND_OVER: {PHASE_CHOOSING, PHASE_GAME_OVER},
+    PHASE_GAME_OVER: set(),
+}
+
+
+class PhaseError(ValueError):
+    """A phase change the room state machine does not allow."""
+
+
+class Player:
+    __slots__ = ("username", "websocket", "outbox", "compress", "constrained")
+
+    def __init__(self, username: str, websocket: Any, outbox: Any = None, compress: bool = False):
+        self.username = username
+        self.websocket = websocket
+        self.outbox = outbox
+        self.compress = compress  # klient přijímá komprimované rámce (compression.py)
+        self.constrained = False  # slabé připojení - tahy dostává zředěné (downsample.py)
+
+
+class Room:
+    """One game: players with O(1) lookups, scores and the current round."""
+
+    __slots__ = (
+        "game_code", "players", "sockets", "host", "selected_package", "phase", "phase_timer",
+        "scores", "departed_scores", "current_round", "total_rounds", "current_artist",
+        "selected_phrase", "masked_phrase", "phrase_matcher", "round_start_time",
+        "stroke_log", "legacy_stroke_id", "word_decks", "last_activity",
+        "pending_events", "pending_scores", "flush_timer", "drawing_jobs", "paused_remaining",
+        "journal", "slow_strokes", "slow_timer", "spectators", "spectator_feed", "spectator_timer",
+    )
+
+    def __init__(self, game_code: str, host: str, selected_package: str, stroke_log: StrokeLog):
+        self.game_code = game_code
+        self.players: Dict[str, Player] = {}
+        self.sockets: Dict[Any, Player] = {}
+        self.host = host
+        self.selected_package = selected_package
+        self.phase = PHASE_LOBBY
+        self.phase_timer = None  # scheduler.Timer aktuální fáze
+        self.scores: Dict[str, int] = {}
+        # Skóre hráčů, kteří vypadli z rozehrané hry - při návratu jim ho vrátíme
+        self.departed_scores: Dict[str, int] = {}
+        self.current_round = 0
+        self.total_rounds = 3
+        self.current_artist: Optional[str] = None
+        self.selected_phrase: List[str] = []
+        self.masked_phrase = ""
+        self.phrase_matcher = None
+        self.round_start_time: Optional[float] = None
+        self.stroke_log = stroke_log
+        self.legacy_stroke_id = 0
+        self.word_decks = None  # words.RoomDecks, rozdá se při prvním kole
+        self.last_activity = time.monotonic()  # poslední zpráva od hráče - podle ní reaper pozná opuštěnou místnost
+        # Chat a tipy čekající na další tik (room_batch) a součet změn skóre za ten tik
+        self.pending_events: List[dict] = []
+        self.pending_scores: Dict[str, int] = {}
+        self.flush_timer = None
+        # Rozpracované náhledy kreseb kol (gallery.py) - uloží se, až bude hra mít id
+        self.drawing_jobs: List[Any] = []
+        # Místnost obnovená po restartu stojí, dokud se nevrátí první hráč - pak časovač fáze
+        # dostane zbytek času, který měl při uložení (s)
+        self.paused_remaining: Optional[float] = None
+        self.journal = None  # journal.GameJournal rozehrané hry
+        # Tahy odložené pro hráče se slabým připojením a časovač jejich odeslání
+        self.slow_strokes = StrokeBuffer()
+        self.slow_timer = None
+        # Diváci (spectators.py) - websocket -> Player, mimo hráče a skóre
+        self.spectators: Dict[Any, Player] = {}
+        self.spectator_feed = None  # SpectatorFeed, založí se s prvním divákem
+        self.spectator_timer = None
+
+    def change_phase(self, phase: str):
+        """Enter `phase`; raises PhaseError (and keeps the current phase) for an illegal transition."""
+        if phase != self.phase and phase not in PHASE_CHANGES[self.phase]:
+            raise PhaseError(f"{self.game_code}: {self.phase} -> {phase}")
+        self.phase = phase
+
+    @property
+    def game_started(self) -> bool:
+        return self.phase != PHASE_LOBBY
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self.players
+
+    def __iter__(self) -> Iterator[Player]:
+        return iter(self.players.values())
+
+    def get(self, username: Optional[str]) -> Optional[Player]:
+        return self.players.get(username)
+
+    def by_socket(self, websocket: Any) -> Optional[Player]:
+        return self.sockets.get(websocket)
+
+    def add(self, player: Player):
+        self.players[player.username] = player
+        self.sockets[player.websocket] = player
+
+    def remove(self, websocket: Any) -> Optional[Player]:
+        player = self.sockets.pop(websocket, None)
+        if player is not None:
+            del self.players[player.username]
+        return player
+
+    def player_at(self, index: int) -> Player:
+        """Player by join order (used to rotate the artist)."""
+        return list(self.players.values())[index]
+
+    def player_list(self) -> List[Dict[str, str]]:
+        return [{"username": username} for username in self.players]
+
+    def snapshot(self, remaining: Optional[float]) -> Dict[str, Any]:
+        """Plain-data state of a running game; `remaining` is the phase timer's time left."""
+        matcher = self.phrase_matcher
+        return {
+            "game_code": self.game_code,
+            "host": self.host,
+            "selected_package": self.selected_package,
+            "phase": self.phase,
+            "remaining": remaining,
+            # Po restartu nikdo připojený není - všichni se vracejí jako odpadlí hráči
+            "scores": {**self.departed_scores, **self.scores},
+            "current_round": self.current_round,
+            "total_rounds": self.total_rounds,
+            "current_artist": self.current_artist,
+            "phrase": self.selected_phrase,
+            "revealed": matcher.revealed if matcher else None,
+            # Záznam hry (journal.py) pokračuje po restartu ve stejném souboru
+            "journal": [self.journal.name, self.journal.elapsed] if self.journal else None,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, Any], stroke_log: StrokeLog) -> "Room":
+        """Rebuild a room from Room.snapshot() with no players connected; the caller restores the phrase matcher."""
+        room = cls(data["game_code"], data["host"], data["selected_package"], stroke_log)
+        room.phase = data["phase"]
+        room.paused_remaining = data["remaining"]
+        room.departed_scores = dict(data["scores"])
+        room.current_round = data["current_round"]
+        room.total_rounds = data["total_rounds"]
+        room.current_artist = data["current_artist"]
+        room.selected_phrase = data["phrase"]
+        return room
@@ -0,0 +1,175 @@
+"""
+Časovače fází místností: hierarchické časové kolo obsluhované jedním taskem.
+
+Místo tasku, který u každé místnosti spí až do konce kola (a dalších, které
+spí mezi koly), se časovač jen zapíše do přihrádky kola. Jediný task tiká
+s rozlišením RESOLUTION a odpálí, co v přihrádce leží. Zrušení je O(1)
+(smazání z přihrádky), takže tip, který kolo ukončí dřív, nic nezávodí
+s běžícím časovačem.
+
+Úroveň 0 má SLOTS přihrádek po jednom tiku, každá další úroveň SLOTS-krát
+delší přihrádky; když se nižší kolo otočí, přihrádka vyšší úrovně se rozsype
+o úroveň níž. Pro 50 ms a 64 přihrádek pokrývají čtyři úrovně ~9 dní;
+vzdálenější časovače se na nejvyšší úrovni jen přeloží.
+"""
+import asyncio
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class Timer:
+    """Handle of a scheduled callback; cancel() is O(1) and safe to call twice."""
+
+    __slots__ = ("expires", "callback", "args", "slot", "wheel")
+
+    def __init__(self, wheel: "TimerWheel", expires: int, callback: Callable, args: tuple):
+        self.wheel = wheel
+        self.expires = expires  # tik, ve kterém se má odpálit
+        self.callback = callback
+        self.args = args
+        self.slot: Optional[Dict["Timer", None]] = None
+
+    @property
+    def active(self) -> bool:
+        return self.slot is not None
+
+    def remaining(self) -> float:
+        """Seconds until the timer fires (0 when it is due or no longer active)."""
+        if self.slot is None:
+            return 0.0
+        return max(0.0, self.expires * self.wheel.resolution - self.wheel.clock())
+
+    def cancel(self):
+        if self.slot is not None:
+            del self.slot[self]
+            self.slot = None
+            self.wheel._count -= 1
+
+
+class TimerWheel:
+    """Hierarchical timing wheel driven by a single asyncio task."""
+
+    def __init__(self, resolution: float = 0.05, slots: int = 64, levels: int = 4,
+                 clock: Callable[[], float] = time.monotonic):
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self._spans = [slots ** level for level in range(levels)]
+        # Přihrádka = dict (zachová pořadí vložení, mazání O(1))
+        self._wheels: List[List[Dict[Timer, None]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._tick = self._now_tick()
+        self._count = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._spawned: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _now_tick(self) -> int:
+        return int(self.clock() / self.resolution)
+
+    def schedule(self, delay: float, callback: Callable, *args: Any) -> Timer:
+        """Call callback(*args) after `delay` seconds (rounded up to the resolution).
+
+        A callback may return a coroutine; it then runs as its own task, so a slow
+        transition (e.g. saving results) never holds up the other timers.
+        """
+        if self._count == 0:
+            # Prázdné kolo nemusí dohánět tiky, které prospalo - nic by se neodpálilo
+            self._tick = max(self._tick, self._now_tick())
+        expires = max(self._tick + 1, math.ceil((self.clock() + delay) / self.resolution))
+        timer = Timer(self, expires, callback, args)
+        self._place(timer)
+        self._count += 1
+        self._ensure_running()
+        return timer
+
+    def _place(self, timer: Timer):
+        delta = timer.expires - self._tick
+        level = 0
+        while level < self.levels - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        span = self._spans[level]
+        slot = self._wheels[level][(timer.expires // span) % self.slots]
+        slot[timer] = None
+        timer.slot = slot
+
+    def _advance(self):
+        """Move one tick forward: cascade higher levels that wrapped, then fire level 0."""
+        self._tick += 1
+        tick = self._tick
+        for level in range(self.levels - 1, 0, -1):
+            span = self._spans[level]
+            if tick % span:
+                continue
+            index = (tick // span) % self.slots
+            slot = self._wheels[level][index]
+            if slot:
+                self._wheels[level][index] = {}
+                for timer in slot:
+                    self._place(timer)
+        index = tick % self.slots
+        slot = self._wheels[0][index]
+        if slot:
+            self._wheels[0][index] = {}
+            # Kopie - callback smí zrušit jiný časovač ze stejné přihrádky
+            for timer in list(slot):
+                if timer.slot is not slot:
+                    continue
+                timer.slot = None
+                self._count -= 1
+                self._fire(timer)
+
+    def _fire(self, timer: Timer):
+        try:
+            result = timer.callback(*timer.args)
+        except Exception as e:
+            print(f"Timer callback failed: {e!r}")
+            return
+        if asyncio.iscoroutine(result):
+            task = asyncio.create_task(result)
+            self._spawned.add(task)
+            task.add_done_callback(self._on_spawned_done)
+
+    def _on_spawned_done(self, task: asyncio.Task):
+        self._spawned.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Timer callback failed: {task.exception()!r}")
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            if self._count == 0:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Zpožděná smyčka doběhne zmeškané tiky najednou
+            target = self._now_tick()
+            while self._tick < target and self._count:
+                self._advance()
+            if self._count == 0:
+                self._tick = max(self._tick, target)
+                continue
+            await asyncio.sleep(max(0.0, (self._tick + 1) * self.resolution - self.clock()))
+
+    async def close(self):
+        for wheel in self._wheels:
+            for slot in wheel:
+                for timer in slot:
+                    timer.slot = None
+                slot.clear()
+        self._count = 0
+        for task in [self._task, *self._spawned]:
+            if task is not None:
+                task.cancel()
+        self._task = None
+        self._spawned.clear()
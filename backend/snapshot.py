@@ -0,0 +1,68 @@
+"""
+Snímek rozehraných her na disk pro restart serveru (nasazení nové verze).
+
+Při ukončení (SIGTERM/SIGINT) main.drain_rooms zastaví časovače, přestane
+přijímat spojení a každý worker zapíše své místnosti (Room.snapshot) do
+vlastního souboru rooms-<worker>.json. Po startu si každý worker přečte
+čerstvé snímky všech workerů a obnoví místnosti, které mu patří - počet
+workerů se mezi během může změnit. Vlastní snímek pak smaže, aby ho pozdější
+pád a restart neobnovil podruhé; cizí snímky doběhnou na stáří (max_age).
+
+Snímek je jeden JSON zapsaný naráz a přejmenovaný na místo (os.replace),
+takže přerušený zápis nikdy nenechá napůl zapsaný soubor.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson je volitelný
+    orjson = None
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path(directory: Path, worker_id: int) -> Path:
+    return Path(directory) / f"rooms-{worker_id}.json"
+
+
+def write_snapshot(directory: Path, worker_id: int, rooms: List[Dict[str, Any]]) -> Path:
+    """Atomically write this worker's room snapshot."""
+    data = {"version": SNAPSHOT_VERSION, "worker": worker_id, "written_at": time.time(), "rooms": rooms}
+    body = orjson.dumps(data) if orjson else json.dumps(data, separators=(",", ":")).encode("utf-8")
+    path = snapshot_path(directory, worker_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def read_snapshots(directory: Path, max_age: float) -> List[Dict[str, Any]]:
+    """Rooms from every worker's snapshot written in the last `max_age` seconds."""
+    rooms: List[Dict[str, Any]] = []
+    now = time.time()
+    for path in sorted(Path(directory).glob("rooms-*.json")):
+        try:
+            body = path.read_bytes()
+            data = orjson.loads(body) if orjson else json.loads(body)
+        except (OSError, ValueError) as e:
+            print(f"Warning: unreadable room snapshot {path}: {e!r}")
+            continue
+        if data.get("version") != SNAPSHOT_VERSION or now - data.get("written_at", 0) > max_age:
+            continue
+        rooms.extend(data["rooms"])
+    return rooms
+
+
+def remove_snapshot(directory: Path, worker_id: int):
+    try:
+        snapshot_path(directory, worker_id).unlink()
+    except FileNotFoundError:
+        pass
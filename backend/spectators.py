@@ -0,0 +1,80 @@
+"""
+Diváci - read-only klienti místnosti (?role=spectator), např. stream s pár
+hráči a stovkami diváků.
+
+Divák není hráč: nemá skóre, nikdy nekreslí, smí se připojit i do běžící hry
+a jeho zprávy se zahazují. Diváci mají vlastní množinu spojení Room.spectators,
+takže rozesílání hráčům jimi neprochází a nic je nestojí.
+
+Co se rozešle hráčům, se pro diváky jen odloží do SpectatorFeed místnosti
+(jedno přidání do seznamu bez ohledu na počet diváků) - zprávy už zakódované
+pro hráče, tahy do downsample.StrokeBuffer. SPECTATOR_SETTINGS["TICK_HZ"]-krát
+za sekundu se z nich poskládá dávka událostí (room_batch) a sloučené,
+zjednodušené tahy a stejné bajty (případně jednou zkomprimované) dostanou
+všichni diváci. Pořadí tahů a událostí (např. tahy před canvas_cleared) zůstává
+zachované.
+"""
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+from downsample import StrokeBuffer
+
+
+class SpectatorFeed:
+    """A room's spectator tier: everything since the last tick, in order."""
+
+    __slots__ = ("encode", "tolerance", "strokes", "events", "scores", "parts")
+
+    def __init__(self, encode: Callable[[dict], str], tolerance: float = 2.0):
+        self.encode = encode
+        self.tolerance = tolerance
+        self.strokes = StrokeBuffer()
+        self.events: List[str] = []  # zakódované zprávy
+        self.scores: Dict[str, int] = {}
+        # Hotové rámce: tahy (bytes) nebo room_batch (str)
+        self.parts: List[Union[bytes, str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.parts or self.events or self.strokes)
+
+    def add_strokes(self, frame: bytes):
+        if self.events:
+            self._seal_events()
+        self.strokes.add(frame)
+
+    def add_message(self, encoded: str):
+        """A message as encoded for the players - it carries the room state of this moment."""
+        if self.strokes:
+            self._seal_strokes()
+        elif self.scores:
+            # Rozdíly skóre klient připočte až po událostech dávky - zpráva s celým skóre musí přijít po nich
+            self._seal_events()
+        self.events.append(encoded)
+
+    def add_events(self, events: Iterable[dict], scores_delta: Optional[Mapping[str, int]] = None):
+        """Chat/guess events of a room tick (ConnectionManager.flush_events)."""
+        if self.strokes:
+            self._seal_strokes()
+        encode = self.encode
+        self.events.extend(encode(event) for event in events)
+        if scores_delta:
+            scores = self.scores
+            for name, delta in scores_delta.items():
+                scores[name] = scores.get(name, 0) + delta
+
+    def _seal_strokes(self):
+        self.parts.append(self.strokes.take(self.tolerance))
+
+    def _seal_events(self):
+        # Zprávy jsou už zakódované, dávka se z nich jen slepí
+        self.parts.append('{"type":"room_batch","events":[' + ",".join(self.events) +
+                          '],"scores_delta":' + self.encode(self.scores) + "}")
+        self.events, self.scores = [], {}
+
+    def take(self) -> List[Union[bytes, str]]:
+        """Frames for the next tick; empties the feed."""
+        if self.events:
+            self._seal_events()
+        elif self.strokes:
+            self._seal_strokes()
+        parts, self.parts = self.parts, []
+        return parts
@@ -0,0 +1,386 @@
+"""
+Binární protokol tahů (verze 2) - serverová strana.
+
+Rámec obsahuje jeden nebo více úseků tahu za sebou (little-endian):
+
+    u8  verze (STROKE_PROTOCOL_VERSION)
+    u8  příznaky (STROKE_BEGIN - nový tah, nese styl; STROKE_END - konec tahu)
+    u16 id tahu
+    [jen s STROKE_BEGIN] u8 r, u8 g, u8 b, u8 tloušťka čáry
+    u16 počet bodů N
+    i16 * 2N souřadnic - první bod absolutně, další jako delta od předchozího
+
+Server živé rámce jen kontroluje (projde hlavičky, body nedekóduje) a přeposílá je dál.
+Plně je dekóduje jen StrokeLog při zhušťování záznamu kola.
+Klientská strana je ve frontend/src/components/strokeProtocol.ts.
+"""
+import struct
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy je volitelný
+    np = None
+
+STROKE_PROTOCOL_VERSION = 2
+STROKE_BEGIN = 0x01
+STROKE_END = 0x02
+STROKE_RESET = 0x04  # snímek plátna - klient před vykreslením plátno vyčistí
+
+CHUNK_HEADER = struct.Struct("<BBH")
+STYLE = struct.Struct("<BBBB")
+POINT_COUNT = struct.Struct("<H")
+POINT_SIZE = 4  # i16 x, i16 y
+# Nejvýš bodů v úseku, který skládá server (počet bodů je u16); delší tah jde do navazujících úseků
+MAX_CHUNK_POINTS = 16384
+# Zhušťování záznamu kola zjednodušuje dlouhé tahy po oknech této délky (body)
+SIMPLIFY_WINDOW = 64
+# Pod tímto počtem bodů je čistý Python rychlejší než vektorové RDP (benchmarks/bench_downsample.py)
+NUMPY_MIN_POINTS = 1024
+
+
+def is_stroke_frame(data: bytes) -> bool:
+    """Cheap check whether a binary frame claims to be a v2 stroke frame."""
+    return len(data) >= CHUNK_HEADER.size + POINT_COUNT.size and data[0] == STROKE_PROTOCOL_VERSION
+
+
+def scan_stroke_frame(data: bytes) -> Optional[int]:
+    """
+    Walk chunk headers of a stroke frame without decoding the points.
+    Returns OR-ed flags of all chunks, or None when the frame is malformed.
+    """
+    offset = 0
+    size = len(data)
+    flags_all = 0
+    while offset < size:
+        if offset + CHUNK_HEADER.size > size:
+            return None
+        version, flags, _stroke_id = CHUNK_HEADER.unpack_from(data, offset)
+        if version != STROKE_PROTOCOL_VERSION:
+            return None
+        offset += CHUNK_HEADER.size
+        if flags & STROKE_BEGIN:
+            offset += STYLE.size
+        if offset + POINT_COUNT.size > size:
+            return None
+        (count,) = POINT_COUNT.unpack_from(data, offset)
+        offset += POINT_COUNT.size + count * POINT_SIZE
+        if offset > size:
+            return None
+        flags_all |= flags
+    return flags_all if size else None
+
+
+Style = Tuple[int, int, int, int]  # r, g, b, line width
+Chunk = Tuple[int, int, Optional[Style], List[int]]  # stroke id, flags, style, absolute x/y points
+
+
+def parse_color(color: str) -> Tuple[int, int, int]:
+    value = color[1:] if color.startswith("#") else color
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    try:
+        rgb = int(value[:6], 16)
+    except ValueError:
+        return 0, 0, 0
+    return (rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF
+
+
+def _clamp_i16(value: int) -> int:
+    return -32768 if value < -32768 else 32767 if value > 32767 else value
+
+
+def encode_chunk(stroke_id: int, flags: int, style: Optional[Style], points: Sequence[int]) -> bytes:
+    """Encode one stroke chunk; points are absolute coordinates [x0, y0, x1, y1, ...]."""
+    count = len(points) // 2
+    if style is None:
+        flags &= ~STROKE_BEGIN
+    parts = [CHUNK_HEADER.pack(STROKE_PROTOCOL_VERSION, flags, stroke_id & 0xFFFF)]
+    if flags & STROKE_BEGIN:
+        r, g, b, width = style
+        parts.append(STYLE.pack(r, g, b, max(1, min(255, int(width)))))
+    parts.append(POINT_COUNT.pack(count))
+    coords = [int(round(value)) for value in points[:2 * count]]
+    # První bod absolutně, další jako delta od předchozího (x od x, y od y)
+    deltas = [_clamp_i16(value) for value in coords[:2]]
+    deltas += [-32768 if d < -32768 else 32767 if d > 32767 else d
+               for d in (value - previous for value, previous in zip(coords[2:], coords))]
+    parts.append(struct.pack(f"<{2 * count}h", *deltas))
+    return b"".join(parts)
+
+
+def decode_frame(data: bytes) -> List[Chunk]:
+    """Decode all chunks of a (valid) stroke frame into absolute points."""
+    chunks: List[Chunk] = []
+    offset = 0
+    size = len(data)
+    while offset + CHUNK_HEADER.size <= size:
+        _version, flags, stroke_id = CHUNK_HEADER.unpack_from(data, offset)
+        offset += CHUNK_HEADER.size
+        style = None
+        if flags & STROKE_BEGIN:
+            style = STYLE.unpack_from(data, offset)
+            offset += STYLE.size
+        (count,) = POINT_COUNT.unpack_from(data, offset)
+        offset += POINT_COUNT.size
+        raw = struct.unpack_from(f"<{2 * count}h", data, offset)
+        offset += count * POINT_SIZE
+        points = list(raw)
+        for i in range(2, len(points), 2):
+            points[i] += points[i - 2]
+            points[i + 1] += points[i - 1]
+        chunks.append((stroke_id, flags, style, points))
+    return chunks
+
+
+def simplify_points(points: Sequence[int], tolerance: float) -> List[int]:
+    """Ramer-Douglas-Peucker over a flat [x0, y0, x1, y1, ...] list; endpoints are kept."""
+    count = len(points) // 2
+    if count < 3:
+        return list(points)
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = points[2 * first], points[2 * first + 1]
+        x2, y2 = points[2 * last], points[2 * last + 1]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+        max_dist, index = -1.0, first
+        for i in range(first + 1, last):
+            px, py = points[2 * i], points[2 * i + 1]
+            if length_sq == 0:
+                dist = (px - x1) ** 2 + (py - y1) ** 2
+            else:
+                cross = dx * (py - y1) - dy * (px - x1)
+                dist = cross * cross / length_sq
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if max_dist > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    out: List[int] = []
+    for i, kept in enumerate(keep):
+        if kept:
+            out.append(points[2 * i])
+            out.append(points[2 * i + 1])
+    return out
+
+
+def simplify_polylines(polylines: Sequence[Sequence[int]], tolerance: float) -> List[List[int]]:
+    """
+    Ramer-Douglas-Peucker over many flat [x0, y0, x1, y1, ...] polylines at once.
+
+    Same result as simplify_points on each polyline. Instead of recursing, every
+    round splits all still open segments of all polylines with a few array ops,
+    so the number of rounds is the recursion depth, not the number of segments.
+    """
+    total = sum(len(points) for points in polylines) // 2
+    if np is None or total < NUMPY_MIN_POINTS:
+        return [simplify_points(points, tolerance) for points in polylines]
+    lengths = np.fromiter((len(points) // 2 for points in polylines), dtype=np.intp, count=len(polylines))
+    coords = np.fromiter(chain.from_iterable(polylines), dtype=np.int64, count=2 * total).reshape(-1, 2)
+    xy = coords.astype(np.float64)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    present = lengths > 0
+    keep = np.zeros(total, dtype=bool)
+    keep[starts[present]] = True
+    keep[ends[present] - 1] = True
+    open_points = ~keep
+    index = np.arange(total)
+    tolerance_sq = tolerance * tolerance
+
+    while open_points.any():
+        # Úsečka každého bodu vede mezi nejbližším ponechaným bodem před ním a za ním
+        first = np.maximum.accumulate(np.where(keep, index, 0))
+        last = np.minimum.accumulate(np.where(keep, index, total)[::-1])[::-1]
+        candidates = np.flatnonzero(open_points)
+        a, b = first[candidates], last[candidates]
+        x1, y1 = xy[a, 0], xy[a, 1]
+        dx, dy = xy[b, 0] - x1, xy[b, 1] - y1
+        px, py = xy[candidates, 0] - x1, xy[candidates, 1] - y1
+        length_sq = dx * dx + dy * dy
+        cross = dx * py - dy * px
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dist = np.where(length_sq > 0, cross * cross / length_sq, px * px + py * py)
+
+        # Body jedné úsečky jdou za sebou - maximum po skupinách přes reduceat
+        group_starts = np.flatnonzero(np.r_[True, a[1:] != a[:-1]])
+        group_max = np.maximum.reduceat(dist, group_starts)
+        group_sizes = np.diff(np.r_[group_starts, len(candidates)])
+        point_max = np.repeat(group_max, group_sizes)
+        splits = (dist == point_max) & (dist > tolerance_sq)
+        # Jako rekurzivní verze: při shodě vyhrává první bod úsečky
+        _, first_hits = np.unique(a[splits], return_index=True)
+        new = candidates[splits][first_hits]
+        keep[new] = True
+        open_points[new] = False
+        open_points[candidates[np.repeat(group_max <= tolerance_sq, group_sizes)]] = False
+
+    return [coords[start:end][keep[start:end]].ravel().tolist() for start, end in zip(starts, ends)]
+
+
+def _windows(points: List[int]) -> List[List[int]]:
+    """Split a polyline into windows of SIMPLIFY_WINDOW points sharing their end points."""
+    step = 2 * (SIMPLIFY_WINDOW - 1)
+    if len(points) <= step + 2:
+        return [points]
+    return [points[start:start + step + 2] for start in range(0, len(points) - 2, step)]
+
+
+class StrokeLog:
+    """
+    Append-only záznam tahů aktuálního kola, uložený přímo jako v2 úseky.
+
+    Jakmile nezhuštěný konec záznamu přeroste compact_threshold, zhustí se:
+    jeho úseky se sloučí po tazích a body zjednoduší. Už zhuštěná část se znovu
+    nezpracovává, takže jedno zhuštění stojí nejvýš compact_threshold (+ jeden
+    rámec) bez ohledu na délku kola. Pokud po zhuštění nezůstane rezerva pod
+    max_bytes, zahodí se nejstarší úseky - i z tahu, který ještě neskončil;
+    zbytek takového tahu začne novým úsekem se stylem. Záznam tak nikdy
+    nepřeroste max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024, compact_threshold: int = 16 * 1024,
+                 tolerance: float = 1.0):
+        self.max_bytes = max_bytes
+        self.compact_threshold = compact_threshold
+        self.tolerance = tolerance
+        self._chunks: List[bytes] = []   # zhuštěná část, po jednom úseku
+        self._pending: List[bytes] = []  # rámce od posledního zhuštění
+        self._pending_size = 0
+        # Tahy, které ve zhuštěné části ještě neskončily -> styl (pro jejich pokračování)
+        self._open: Dict[int, Style] = {}
+        self.size = 0
+        self.compactions = 0
+        self.dropped_strokes = 0
+        self._snapshot: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self._chunks) + len(self._pending)
+
+    def append(self, frame: bytes):
+        self._pending.append(frame)
+        self._pending_size += len(frame)
+        self.size += len(frame)
+        self._snapshot = None
+        if self._pending_size > self.compact_threshold or self.size > self.max_bytes:
+            self.compact()
+
+    def clear(self):
+        self._chunks = []
+        self._pending = []
+        self._pending_size = 0
+        self._open = {}
+        self.size = 0
+        self._snapshot = None
+
+    def snapshot(self) -> Optional[bytes]:
+        """Whole round as one frame; the first chunk carries STROKE_RESET."""
+        if not self._chunks and not self._pending:
+            return None
+        if self._snapshot is None:
+            data = bytearray(b"".join(self._chunks) + b"".join(self._pending))
+            data[1] |= STROKE_RESET
+            self._snapshot = bytes(data)
+        return self._snapshot
+
+    def compact(self):
+        """Merge the chunks added since the last compaction per stroke, simplify them and enforce the memory cap."""
+        strokes: Dict[int, List] = {}
+        order: List[List] = []
+        for frame in self._pending:
+            for stroke_id, flags, style, points in decode_frame(frame):
+                stroke = strokes.get(stroke_id)
+                if stroke is None or flags & STROKE_BEGIN:
+                    # [id, styl (jen začátek tahu), body, uzavřený]
+                    stroke = [stroke_id, style if flags & STROKE_BEGIN else None, [], False]
+                    strokes[stroke_id] = stroke
+                    order.append(stroke)
+                stroke[2].extend(points)
+                if flags & STROKE_END:
+                    stroke[3] = True
+                    strokes.pop(stroke_id, None)
+
+        merged = []
+        for stroke_id, style, points, ended in order:
+            begins = style is not None
+            if not begins:
+                style = self._open.get(stroke_id)
+                if style is None:
+                    continue  # začátek tahu se nezachoval, nemá styl
+            merged.append((stroke_id, style, begins, ended, _windows(points)))
+        # Všechna okna naráz - s NumPy jedno vektorové RDP, délka okna drží i nejhorší případ (cik-cak) lineární
+        simplified = iter(simplify_polylines([window for *_, windows in merged for window in windows], self.tolerance))
+
+        step = 2 * MAX_CHUNK_POINTS
+        for stroke_id, style, begins, ended, windows in merged:
+            points = next(simplified)
+            for _ in range(len(windows) - 1):
+                points.extend(next(simplified)[2:])  # sousední okna sdílí krajní bod
+            # Počet bodů úseku je u16 - dlouhý tah se rozdělí na navazující úseky, styl nese jen první
+            for start in range(0, max(len(points), 1), step):
+                first = begins and start == 0
+                flags = (STROKE_BEGIN if first else 0) | (STROKE_END if ended and start + step >= len(points) else 0)
+                self._chunks.append(encode_chunk(stroke_id, flags, style if first else None,
+                                                 points[start:start + step]))
+            if ended:
+                self._open.pop(stroke_id, None)
+            else:
+                self._open[stroke_id] = style
+
+        self._pending = []
+        self._pending_size = 0
+        self.size = sum(len(c) for c in self._chunks)
+        # Po zhuštění necháme čtvrtinu limitu jako rezervu, ať se nezhušťuje při každém tahu
+        self._trim(self.max_bytes * 3 // 4)
+        self._snapshot = None
+        self.compactions += 1
+
+    def _trim(self, target: int):
+        """Drop the oldest chunks until the log fits `target`; a stroke cut this way restarts with its style."""
+        chunks = self._chunks
+        size = self.size
+        drop = 0
+        while size > target and drop < len(chunks) - 1:
+            size -= len(chunks[drop])
+            drop += 1
+        if not drop:
+            return
+        styles: Dict[int, Style] = {}
+        for chunk in chunks[:drop]:
+            _version, flags, stroke_id = CHUNK_HEADER.unpack_from(chunk)
+            if flags & STROKE_BEGIN:
+                styles[stroke_id] = STYLE.unpack_from(chunk, CHUNK_HEADER.size)
+                self.dropped_strokes += 1
+        kept = chunks[drop:]
+        for i, chunk in enumerate(kept):
+            if not styles:
+                break
+            _version, flags, stroke_id = CHUNK_HEADER.unpack_from(chunk)
+            style = styles.pop(stroke_id, None)
+            if style is not None and not flags & STROKE_BEGIN:
+                # Zbytek useknutého tahu - první zachovaný úsek dostane styl
+                (_, _, _, points), = decode_frame(chunk)
+                kept[i] = encode_chunk(stroke_id, flags | STROKE_BEGIN, style, points)
+                size += len(kept[i]) - len(chunk)
+                self.dropped_strokes -= 1
+        self._chunks = kept
+        self.size = size
+
+
+def segment_to_chunk(segment: dict, stroke_id: int) -> Optional[bytes]:
+    """Convert a legacy JSON drawing_data segment into a closed v2 chunk (for the stroke log)."""
+    try:
+        points = [float(segment["x0"]), float(segment["y0"]), float(segment["x1"]), float(segment["y1"])]
+        r, g, b = parse_color(str(segment.get("color", "#000000")))
+        width = int(float(segment.get("lineWidth", 1)))
+        # NaN/nekonečno v souřadnicích selže až při zaokrouhlení v encode_chunk
+        return encode_chunk(stroke_id, STROKE_BEGIN | STROKE_END, (r, g, b, width), points)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
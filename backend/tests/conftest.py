@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Testy importují moduly backendu stejně jako benchmarks/ (spuštění z adresáře backend)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import main
+from outbox import PRIORITY_CRITICAL
+from rooms import Player, Room
+
+GAME_CODE = "BCAST1"
+
+
+class RecordingOutbox:
+    def __init__(self):
+        self.frames = []
+
+    def push(self, frame, priority):
+        self.frames.append((frame, priority))
+        return True
+
+
+def room_with_players(names) -> Room:
+    room = Room(GAME_CODE, names[0], "Klasika", main.new_stroke_log())
+    for name in names:
+        room.add(Player(name, object(), RecordingOutbox()))
+    return room
+
+
+def test_broadcast_encodes_once_and_shares_the_frame(monkeypatch):
+    room = room_with_players(["alice", "bob", "carl", "dana"])
+    monkeypatch.setattr(main.manager, "rooms", {GAME_CODE: room})
+    encoded = []
+    encode = main.encode_message
+
+    def counting_encode(message):
+        encoded.append(message)
+        return encode(message)
+
+    monkeypatch.setattr(main, "encode_message", counting_encode)
+    message = {"type": "round_end", "full_phrase": "Žlutý kůň", "scores": {"alice": 10}}
+    asyncio.run(main.manager.broadcast(GAME_CODE, message, exclude=room.get("alice").websocket))
+
+    assert len(encoded) == 1
+    frames = [player.outbox.frames for player in room]
+    assert frames[0] == []  # odesílatel vyloučený
+    # Všichni ostatní dostanou tentýž objekt (ne jen stejný obsah)
+    sent = [received[0][0] for received in frames[1:]]
+    assert all(frame is sent[0] for frame in sent)
+    assert all(received[0][1] == PRIORITY_CRITICAL for received in frames[1:])
+    assert json.loads(sent[0]) == message
+
+
+def test_encode_message_is_compact_and_keeps_unicode():
+    frame = main.encode_message({"type": "chat_message", "message": "Příliš žluťoučký kůň"})
+    assert isinstance(frame, str)
+    assert " " not in frame.replace("Příliš žluťoučký kůň", "")
+    assert "Příliš žluťoučký kůň" in frame
+
+
+def test_missing_optional_libraries_are_reported(monkeypatch, capsys):
+    monkeypatch.setattr(main, "orjson", None)
+    main.report_optional_fallbacks()
+    assert "orjson not installed" in capsys.readouterr().out
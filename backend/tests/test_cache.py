@@ -0,0 +1,92 @@
+import asyncio
+
+from starlette.requests import Request
+
+import db
+import main
+from cache import ResponseCache, etag_matches
+
+
+def request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def with_database(tmp_path, monkeypatch, scenario):
+    database = db.Database(tmp_path / "games.db")
+    database.write_sync([("HRA001", 1.0, {"alice": 30, "bob": 10})])
+    monkeypatch.setattr(main, "db", database)
+    monkeypatch.setattr(main, "response_cache", ResponseCache())
+    reads = []
+    read = database.read
+
+    async def counting_read(fn, *args):
+        reads.append(fn.__name__)
+        return await read(fn, *args)
+
+    monkeypatch.setattr(database, "read", counting_read)
+
+    async def run():
+        await database.start()
+        try:
+            return await scenario(reads)
+        finally:
+            await database.close()
+
+    return asyncio.run(run())
+
+
+def test_revalidation_with_etag_returns_304_without_a_query(tmp_path, monkeypatch):
+    async def scenario(reads):
+        first = await main.get_aggregated_leaderboard(request(), limit=10)
+        etag = first.headers["etag"]
+        again = await main.get_aggregated_leaderboard(request(etag), limit=10)
+        weak = await main.get_aggregated_leaderboard(request(f'"jiny", W/{etag}'), limit=10)
+        queries = len(reads)
+        # Uložená hra cache zahodí - stejný ETag už neplatí
+        main.response_cache.invalidate()
+        changed = await main.get_aggregated_leaderboard(request(etag), limit=10)
+        return first, again, weak, queries, changed, reads
+
+    first, again, weak, queries, changed, reads = with_database(tmp_path, monkeypatch, scenario)
+    assert first.status_code == 200 and first.headers["cache-control"] == "no-cache"
+    assert again.status_code == 304 and again.body == b""
+    assert weak.status_code == 304
+    assert queries == 1
+    # Data se nezměnila, takže nové tělo má stejný ETag - ale dotaz proběhl znovu
+    assert changed.status_code == 304 and len(reads) == 2
+
+
+def test_limit_is_clamped_before_it_becomes_a_cache_key(tmp_path, monkeypatch):
+    async def scenario(reads):
+        for limit in (500, 10 ** 9, 101):
+            await main.get_aggregated_leaderboard(request(), limit=limit)
+            await main.get_leaderboard_ranking(request(), limit=limit)
+            await main.get_top_leaderboard(request(), limit=limit)
+            await main.get_player_stats(request(), "alice", recent_limit=limit)
+        await main.get_top_leaderboard(request(), limit=-5)
+        return reads
+
+    reads = with_database(tmp_path, monkeypatch, scenario)
+    # Tři různé limity nad maximem = jeden záznam na endpoint, záporný limit je 1
+    assert sorted(reads) == ["query_aggregate", "query_player", "query_ranking", "query_top_games", "query_top_games"]
+    keys = set(main.response_cache._entries)
+    assert ("query_aggregate", main.HISTORY_SETTINGS["MAX_LEADERBOARD"]) in keys
+    assert ("query_top_games", 1) in keys
+
+
+def test_result_of_a_query_overtaken_by_invalidation_is_not_cached():
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.invalidate()
+    entry = cache.put(("query_games", 50), b"[]", generation)
+    assert entry.etag.startswith('"') and cache.get(("query_games", 50)) is None
+    cache.put(("query_games", 50), b"[]", cache.generation)
+    assert cache.get(("query_games", 50)).body == b"[]"
+
+
+def test_etag_matching():
+    assert etag_matches("*", '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
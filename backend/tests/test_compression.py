@@ -0,0 +1,71 @@
+import asyncio
+import json
+import os
+
+import main
+from compression import COMPRESSED_FRAME, FrameCompressor, decompress_frame, wants_compression
+from rooms import Player, Room
+from strokes import STROKE_BEGIN, encode_chunk
+
+
+def test_compressed_frames_round_trip():
+    compressor = FrameCompressor(min_size=100)
+    text = json.dumps({"type": "game_state_sync", "players": [{"username": f"hráč{i}"} for i in range(50)]},
+                      ensure_ascii=False)
+    strokes = encode_chunk(1, STROKE_BEGIN, (0, 0, 0, 2), [i % 7 for i in range(2000)])
+    for frame in (text, strokes):
+        packed, original_size = compressor.compress(frame)
+        assert packed[0] == COMPRESSED_FRAME and len(packed) < original_size
+        assert decompress_frame(packed) == frame
+    assert original_size == len(strokes)
+
+
+def test_small_or_incompressible_frames_stay_as_they_are():
+    compressor = FrameCompressor(min_size=100)
+    assert not compressor.worth_trying("x" * 99)
+    assert compressor.worth_trying("x" * 100)
+    assert not FrameCompressor(min_size=0).worth_trying("x" * 10000)
+    packed, original_size = compressor.compress(os.urandom(4096))
+    assert packed is None and original_size == 4096
+
+
+def test_compression_is_requested_by_query_parameter():
+    class WebSocket:
+        def __init__(self, query):
+            self.query_params = query
+
+    assert wants_compression(WebSocket({"compress": "deflate"}))
+    assert not wants_compression(WebSocket({}))
+    assert not wants_compression(object())
+
+
+class RecordingOutbox:
+    def __init__(self):
+        self.frames = []
+
+    def push(self, frame, priority):
+        self.frames.append(frame)
+        return True
+
+
+def test_broadcast_compresses_once_for_all_clients_that_want_it(monkeypatch):
+    room = Room("KOMPR1", "alice", "Klasika", main.new_stroke_log())
+    for name, compress in (("alice", True), ("bob", True), ("carl", False)):
+        room.add(Player(name, object(), RecordingOutbox(), compress=compress))
+    monkeypatch.setattr(main.manager, "rooms", {room.game_code: room})
+    calls = []
+    compress = main.frame_compressor.compress
+
+    def counting_compress(frame):
+        calls.append(frame)
+        return compress(frame)
+
+    monkeypatch.setattr(main.frame_compressor, "compress", counting_compress)
+    message = {"type": "available_packages", "packages": [f"Balíček {i}" for i in range(200)]}
+    asyncio.run(main.manager.broadcast(room.game_code, message))
+
+    alice, bob, carl = (player.outbox.frames[0] for player in room)
+    assert len(calls) == 1
+    assert alice is bob and isinstance(alice, bytes)
+    assert json.loads(decompress_frame(alice)) == message
+    assert json.loads(carl) == message
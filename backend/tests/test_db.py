@@ -0,0 +1,186 @@
+import asyncio
+import json
+import sqlite3
+
+import db
+import main
+
+
+def connect(tmp_path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(tmp_path / "games.db"))
+    db.init_schema(conn)
+    return conn
+
+
+# --- player_results ---
+
+def test_game_results_are_normalized_per_player(tmp_path):
+    conn = connect(tmp_path)
+    (game_id,) = db.write_game_results(conn, [("HRA001", 1000.0, {"alice": 30, "bob": 12, "carl": 0})])
+    rows = conn.execute("SELECT player, score, is_winner, ts FROM player_results WHERE game_id = ? ORDER BY player",
+                        (game_id,)).fetchall()
+    # Jeden řádek na hráče, vítěz je označený
+    assert rows == [("alice", 30, 1, 1000.0), ("bob", 12, 0, 1000.0), ("carl", 0, 0, 1000.0)]
+
+    player = db.query_player(conn, "bob", 10)
+    assert (player["games_played"], player["total_score"], player["wins"]) == (1, 12, 0)
+    assert player["recent_games"][0]["game_code"] == "HRA001"
+
+
+def test_old_database_is_backfilled_from_scores_json(tmp_path):
+    # Databáze z doby před player_results: jen tabulka games, user_version 0
+    conn = sqlite3.connect(str(tmp_path / "games.db"))
+    conn.execute("CREATE TABLE games (id INTEGER PRIMARY KEY AUTOINCREMENT, game_code TEXT, timestamp REAL, "
+                 "winner TEXT, winner_score INTEGER, scores_json TEXT)")
+    conn.executemany("INSERT INTO games (game_code, timestamp, winner, winner_score, scores_json) VALUES (?, ?, ?, ?, ?)", [
+        ("STARA1", 10.0, "alice", 50, json.dumps({"alice": 50, "bob": 20})),
+        ("STARA2", 20.0, "bob", 40, json.dumps({"bob": "40", "carl": "nic"})),
+        ("ROZBITA", 30.0, None, 0, "{nejde"),
+    ])
+    conn.commit()
+
+    db.init_schema(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM player_results").fetchone()[0] == 4
+    # Skóre ze starého JSONu se převedou na čísla
+    assert db.query_player(conn, "bob", 10)["total_score"] == 60
+    assert db.query_player(conn, "carl", 10)["total_score"] == 0
+    # Druhé otevření už nemigruje znovu
+    db.init_schema(conn)
+    assert conn.execute("SELECT COUNT(*) FROM player_results").fetchone()[0] == 4
+
+
+# --- player_stats ---
+
+def stats_rows(conn):
+    return conn.execute("SELECT player, total_score, games_played, wins, highest_score, average_score, last_seen "
+                        "FROM player_stats ORDER BY player").fetchall()
+
+
+def test_incremental_player_stats_match_a_full_rebuild(tmp_path):
+    conn = connect(tmp_path)
+    games = [
+        ("HRA001", 100.0, {"alice": 30, "bob": 10}),
+        ("HRA002", 200.0, {"bob": 45, "carl": 5}),
+        ("HRA003", 150.0, {"alice": 7, "bob": 7, "carl": 20}),
+        ("HRA004", 300.0, {}),
+    ]
+    db.write_game_results(conn, games[:2])
+    db.write_game_results(conn, games[2:])
+    incremental = stats_rows(conn)
+
+    db.rebuild_player_stats(conn)
+    assert stats_rows(conn) == incremental
+    assert incremental[1] == ("bob", 62, 3, 1, 45, 20.67, 200.0)
+
+
+def test_leaderboards_read_player_stats_in_order(tmp_path):
+    conn = connect(tmp_path)
+    db.write_game_results(conn, [
+        ("HRA001", 1.0, {"alice": 100, "bob": 10}),
+        ("HRA002", 2.0, {"bob": 50, "carl": 40}),
+        ("HRA003", 3.0, {"bob": 30, "carl": 5}),
+    ])
+    assert [row["player"] for row in db.query_aggregate(conn, 10)] == ["alice", "bob", "carl"]
+    # Nejvíc výher, pak průměr
+    assert [row["player"] for row in db.query_ranking(conn, 10)] == ["bob", "alice", "carl"]
+    assert db.query_aggregate(conn, 1) == [{
+        "player": "alice", "total_score": 100, "games_played": 1, "wins": 1, "highest_score": 100,
+        "average_score": 100.0, "last_seen": db._iso(1.0),
+    }]
+
+
+# --- Database (WAL, čtecí pool, dávkový zápis) ---
+
+def test_concurrent_saves_are_group_committed(tmp_path):
+    async def scenario():
+        database = db.Database(tmp_path / "games.db", write_batch_max=16)
+        await database.start()
+        ids = await asyncio.gather(*[database.save_game_result(f"HRA{i:03d}", {"alice": i, "bob": 1})
+                                     for i in range(40)])
+        games = await database.read(db.query_games, 100)
+        mode = await database.read(lambda conn: conn.execute("PRAGMA journal_mode").fetchone()[0])
+        batches = database.batches_written
+        await database.close()
+        return ids, games, mode, batches
+
+    ids, games, mode, batches = asyncio.run(scenario())
+    assert len(set(ids)) == 40
+    # Každé volání dostane id své hry
+    assert {game["id"]: game["game_code"] for game in games} == {game_id: f"HRA{i:03d}" for i, game_id in enumerate(ids)}
+    assert mode == "wal"
+    assert 3 <= batches < 40
+
+
+def test_close_writes_queued_results(tmp_path):
+    async def scenario():
+        database = db.Database(tmp_path / "games.db")
+        await database.start()
+        pending = [asyncio.ensure_future(database.save_game_result(f"HRA{i}", {"alice": i})) for i in range(5)]
+        await asyncio.sleep(0)
+        await database.close()
+        return await asyncio.gather(*pending)
+
+    assert len(asyncio.run(scenario())) == 5
+    conn = sqlite3.connect(str(tmp_path / "games.db"))
+    assert conn.execute("SELECT COUNT(*) FROM games").fetchone()[0] == 5
+
+
+# --- stránkování historie (keyset) ---
+
+def seeded(tmp_path) -> sqlite3.Connection:
+    conn = connect(tmp_path)
+    db.write_game_results(conn, [(f"HRA{i:03d}", float(i), {"alice": i, "bob" if i % 2 else "carl": 1})
+                                 for i in range(1, 26)])
+    return conn
+
+
+def test_keyset_pages_cover_history_without_gaps_or_repeats(tmp_path):
+    conn = seeded(tmp_path)
+    seen, before = [], None
+    while True:
+        page = db.query_games(conn, 7, before)
+        if not page:
+            break
+        seen += [game["id"] for game in page]
+        before = page[-1]["id"]  # kurzor = id posledního řádku
+    assert seen == list(range(25, 0, -1))
+
+    # Nová hra mezi stránkami neposune další stránku (na rozdíl od OFFSET)
+    first = db.query_games(conn, 5)
+    db.write_game_results(conn, [("NOVA01", 99.0, {"alice": 1})])
+    assert db.query_games(conn, 5, first[-1]["id"])[0]["id"] == first[-1]["id"] - 1
+
+
+def test_history_filters_and_ndjson_page(tmp_path):
+    conn = seeded(tmp_path)
+    bob = db.query_games(conn, 100, player="bob")
+    assert [game["id"] for game in bob] == list(range(25, 0, -2))
+    assert [game["id"] for game in db.query_games(conn, 100, 20, "bob", 10.0, 18.0)] == [17, 15, 13, 11]
+
+    text, last_id, count = db.query_games_ndjson(conn, 3, None, "bob")
+    lines = [json.loads(line) for line in text.splitlines()]
+    # NDJSON řádek má stejný tvar jako položka JSON stránky
+    assert lines == bob[:3] and (last_id, count) == (21, 3)
+    assert db.query_games_ndjson(conn, 3, 1) == ("", None, 0)
+
+
+def test_stream_endpoint_reads_page_by_page(tmp_path, monkeypatch):
+    database = db.Database(tmp_path / "stream.db")
+    database.write_sync([(f"HRA{i:03d}", float(i), {"alice": i}) for i in range(1, 12)])
+    monkeypatch.setattr(main, "db", database)
+    monkeypatch.setitem(main.HISTORY_SETTINGS, "STREAM_PAGE", 4)
+
+    async def scenario(**query):
+        await database.start()
+        try:
+            response = await main.stream_games(**query)
+            return [chunk async for chunk in response.body_iterator]
+        finally:
+            await database.close()
+
+    chunks = asyncio.run(scenario())
+    assert len(chunks) == 3  # 4 + 4 + 3 hry
+    assert [json.loads(line)["id"] for line in b"".join(chunks).splitlines()] == list(range(11, 0, -1))
+    chunks = asyncio.run(scenario(limit=6, before=10))
+    assert [json.loads(line)["id"] for line in b"".join(chunks).splitlines()] == list(range(9, 3, -1))
@@ -0,0 +1,112 @@
+import asyncio
+import math
+import random
+from types import SimpleNamespace
+
+import main
+import strokes
+from downsample import StrokeBuffer, StrokeDownsampler
+from rooms import Player, Room
+from scheduler import TimerWheel
+from strokes import STROKE_BEGIN, STROKE_END, decode_frame, encode_chunk, simplify_points, simplify_polylines
+
+STYLE = (10, 20, 30, 4)
+
+
+def test_constrained_state_has_hysteresis():
+    downsampler = StrokeDownsampler(queue_high=32, queue_low=8, latency_high=0.1, latency_low=0.02)
+    state = False
+    for depth, latency, expected in [
+        (20, 0.0, False),    # pod horní mezí
+        (32, 0.0, True),     # fronta přetekla
+        (20, 0.0, True),     # mezi mezemi zůstává pomalý
+        (8, 0.05, True),     # fronta se vyprázdnila, ale zápisy jsou pomalé
+        (8, 0.02, False),    # obojí pod dolní mezí
+        (0, 0.05, False),    # mezi mezemi zůstává rychlý
+        (0, 0.1, True),
+    ]:
+        state = downsampler.constrained(SimpleNamespace(depth=depth, send_latency=latency), state)
+        assert state is expected, (depth, latency)
+
+
+def test_buffer_merges_frames_per_stroke():
+    buffer = StrokeBuffer()
+    buffer.add(encode_chunk(1, STROKE_BEGIN, STYLE, [0, 0, 1, 1]) + encode_chunk(2, STROKE_BEGIN, STYLE, [50, 50]))
+    buffer.add(encode_chunk(1, STROKE_END, None, [2, 2, 3, 3]))
+    buffer.add(encode_chunk(2, 0, None, [51, 52]))
+    assert decode_frame(buffer.take(0)) == [
+        (1, STROKE_BEGIN | STROKE_END, STYLE, [0, 0, 1, 1, 2, 2, 3, 3]),
+        (2, STROKE_BEGIN, STYLE, [50, 50, 51, 52]),
+    ]
+    assert not buffer and buffer.take(0) is None
+    # Pokračování tahu v dalším flushi styl nenese
+    buffer.add(encode_chunk(2, STROKE_END, None, [53, 54]))
+    assert decode_frame(buffer.take(0)) == [(2, STROKE_END, None, [53, 54])]
+
+
+def deviation(x, y, polyline):
+    best = math.inf
+    for x1, y1, x2, y2 in zip(polyline[0::2], polyline[1::2], polyline[2::2], polyline[3::2]):
+        dx, dy = x2 - x1, y2 - y1
+        t = 0 if dx == dy == 0 else max(0, min(1, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+        best = min(best, math.hypot(x - x1 - t * dx, y - y1 - t * dy))
+    return best
+
+
+def test_simplified_strokes_stay_within_tolerance(monkeypatch):
+    random.seed(4)
+    points, x, y, heading = [], 100.0, 100.0, 0.0
+    for _ in range(400):
+        heading += random.gauss(0, 0.1)
+        x, y = x + 3 * math.cos(heading), y + 3 * math.sin(heading)
+        points += [round(x), round(y)]
+    simplified = simplify_points(points, 1.5)
+    assert len(simplified) < len(points) / 2
+    assert simplified[:2] == points[:2] and simplified[-2:] == points[-2:]
+    assert max(deviation(points[i], points[i + 1], simplified) for i in range(0, len(points), 2)) <= 1.5 + 1e-9
+    if strokes.np is not None:
+        # Vektorová cesta dává totéž co čistý Python
+        monkeypatch.setattr(strokes, "NUMPY_MIN_POINTS", 0)
+        assert simplify_polylines([points, points[:20]], 1.5) == [simplified, simplify_points(points[:20], 1.5)]
+
+
+class SlowOutbox:
+    def __init__(self, depth=0):
+        self.depth = depth
+        self.send_latency = 0.0
+        self.frames = []
+
+    def push(self, frame, priority):
+        self.frames.append(frame)
+        return True
+
+
+def test_only_constrained_viewers_get_merged_strokes(monkeypatch):
+    room = Room("POMALY", "alice", "Klasika", main.new_stroke_log())
+    for name, depth in (("alice", 0), ("bob", 0), ("carl", 100)):
+        room.add(Player(name, object(), SlowOutbox(depth)))
+    monkeypatch.setattr(main.manager, "rooms", {room.game_code: room})
+    monkeypatch.setitem(main.DOWNSAMPLE_SETTINGS, "ENABLED", True)
+    frames = [encode_chunk(1, STROKE_BEGIN, STYLE, [0, 0, 10, 0]), encode_chunk(1, STROKE_END, None, [20, 0, 30, 0])]
+
+    async def scenario():
+        monkeypatch.setattr(main, "timer_wheel", TimerWheel())
+        for frame in frames:
+            await main.manager.broadcast_strokes(room, frame, strokes.scan_stroke_frame(frame),
+                                                 exclude=room.get("alice").websocket)
+        await main.manager.flush_strokes(room)
+        await main.timer_wheel.close()
+
+    asyncio.run(scenario())
+    assert room.get("alice").outbox.frames == []
+    assert room.get("bob").outbox.frames == frames
+    assert room.get("carl").constrained
+    # Jeden rámec, rovná čára zjednodušená na krajní body
+    assert [decode_frame(frame) for frame in room.get("carl").outbox.frames] == [
+        [(1, STROKE_BEGIN | STROKE_END, STYLE, [0, 0, 30, 0])]]
+
+
+def test_missing_numpy_is_reported(monkeypatch, capsys):
+    monkeypatch.setattr(strokes, "np", None)
+    main.report_optional_fallbacks()
+    assert "NumPy not installed" in capsys.readouterr().out
@@ -0,0 +1,88 @@
+"""
+Drain a restart: rozehraná hra pokračuje po restartu ve stejném záznamu.
+
+Spuštění (z adresáře backend):
+    python -m pytest tests
+"""
+import asyncio
+import json
+
+import main
+from journal import EVENT_GAME_START, EVENT_GUESS, EVENT_ROUND_END, EVENT_ROUND_START, PART_SUFFIX
+from outbox import ClientOutbox
+from rooms import PHASE_ROUND_OVER, Player, Room
+
+GAME_CODE = "DRN123"
+
+
+class FakeWebSocket:
+    async def send_text(self, data):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def running_room() -> Room:
+    room = Room(GAME_CODE, "alice", "Klasika", main.new_stroke_log())
+    for username in ("alice", "bob"):
+        websocket = FakeWebSocket()
+        room.add(Player(username, websocket, ClientOutbox(websocket, username)))
+        room.scores[username] = 0
+    room.phase = PHASE_ROUND_OVER
+    room.current_round = 1
+    room.current_artist = "alice"
+    room.journal = main.journal_writer.open(GAME_CODE)
+    return room
+
+
+async def replay_lines(game_id: int) -> list:
+    response = await main.replay_game(game_id)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+
+def test_drained_game_keeps_journal_across_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(main.journal_writer, "directory", tmp_path / "journal")
+    monkeypatch.setitem(main.DRAIN_SETTINGS, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(main.manager, "rooms", {})
+    monkeypatch.setattr(main.manager, "draining", False)
+
+    async def scenario():
+        main.journal_writer.start()
+        room = running_room()
+        main.manager.rooms[GAME_CODE] = room
+        main.journal_event(room, EVENT_GAME_START, {"players": ["alice", "bob"], "total_rounds": 3})
+        main.journal_event(room, EVENT_GUESS, {"username": "bob", "guess": "před restartem", "correct": False,
+                                               "word": None})
+        journal_name = room.journal.name
+
+        # SIGTERM: snímek místností, pak uvicorn zavře spojení a hráči odejdou
+        main.drain_rooms()
+        for player in list(room):
+            await main.manager.disconnect(player.websocket, GAME_CODE, player.username)
+        await main.journal_writer.close()
+        assert [path.name for path in (tmp_path / "journal").iterdir()] == [journal_name + PART_SUFFIX]
+
+        # Nový proces
+        main.manager.rooms = {}
+        main.manager.draining = False
+        main.journal_writer.start()
+        assert main.restore_rooms() == 1
+        restored = main.manager.rooms[GAME_CODE]
+        assert restored.journal.name == journal_name
+        main.journal_event(restored, EVENT_ROUND_START, {"round": 2, "artist": "bob"})
+        main.journal_event(restored, EVENT_ROUND_END, {"round": 2, "phrase": "po restartu", "scores": {}})
+        await main.journal_writer.finish(restored.journal, 1)
+        lines = await replay_lines(1)
+        await main.journal_writer.close()
+        return lines
+
+    lines = asyncio.run(scenario())
+    assert [line["event"] for line in lines] == ["game_start", "guess", "round_start", "round_end"]
+    assert lines[1]["data"]["guess"] == "před restartem"
+    # Čas záznamu pokračuje, nezačíná po restartu od nuly
+    assert [line["t"] for line in lines] == sorted(line["t"] for line in lines)
@@ -0,0 +1,74 @@
+import asyncio
+import io
+import sqlite3
+
+import pytest
+
+import db
+import main
+from gallery import GalleryRenderer, render_thumbnail
+from metrics import GALLERY_JOBS
+from strokes import STROKE_BEGIN, STROKE_END, encode_chunk
+
+RED = (255, 0, 0, 8)
+
+
+def red_line_snapshot() -> bytes:
+    # Vodorovná čára přes plátno 800x600 - rozdělená do dvou úseků jednoho tahu
+    return (encode_chunk(1, STROKE_BEGIN, RED, [0, 300, 400, 300])
+            + encode_chunk(1, STROKE_END, None, [800, 300, 800, 600]))
+
+
+def test_thumbnail_is_scaled_into_the_box_and_drawn():
+    Image = pytest.importorskip("PIL.Image")
+    data, media_type, width, height = render_thumbnail(red_line_snapshot(), 320, 240, image_format="png")
+    assert media_type == "image/png"
+    assert (width, height) == (320, 240)
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    assert image.size == (320, 240)
+    r, g, b = image.getpixel((160, 120))
+    assert r > 200 and g < 80 and b < 80
+    assert image.getpixel((160, 20)) == (255, 255, 255)
+
+
+def test_full_render_queue_skips_the_round():
+    renderer = GalleryRenderer(pool_size=0)
+    assert not renderer.enabled
+    assert renderer.submit(b"", 1, "alice", "kůň") is None  # galerie vypnutá
+    pytest.importorskip("PIL")
+
+    async def scenario():
+        renderer = GalleryRenderer(pool_size=1, max_pending=1)
+        renderer.start()
+        dropped = GALLERY_JOBS.get("dropped")
+        try:
+            first = renderer.submit(red_line_snapshot(), 1, "alice", "kůň")
+            second = renderer.submit(red_line_snapshot(), 2, "bob", "pes")
+            drawings = await renderer.collect([first])
+        finally:
+            renderer.close()
+        return second, GALLERY_JOBS.get("dropped") - dropped, drawings, renderer.pending
+
+    second, dropped, drawings, pending = asyncio.run(scenario())
+    assert second is None and dropped == 1
+    assert [(drawing.round, drawing.artist) for drawing in drawings] == [(1, "alice")]
+    assert pending == 0
+
+
+def test_drawings_are_paged_by_round(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "games.db"))
+    db.init_schema(conn)
+    (game_id,) = db.write_game_results(conn, [("HRA001", 1.0, {"alice": 10})])
+    db.write_drawings(conn, game_id, [(r, "alice", f"fráze {r}", "image/png", 4, 3, b"png%d" % r) for r in (1, 2, 3)])
+
+    page = db.query_drawings(conn, game_id, 0, 2)
+    assert [drawing["round"] for drawing in page["drawings"]] == [1, 2] and page["next_after"] == 2
+    page = db.query_drawings(conn, game_id, page["next_after"], 2)
+    assert [drawing["round"] for drawing in page["drawings"]] == [3] and page["next_after"] is None
+    assert db.query_drawing_image(conn, game_id, 3) == ("image/png", b"png3")
+
+
+def test_missing_pillow_is_reported(monkeypatch, capsys):
+    monkeypatch.setattr(main.gallery, "Image", None)
+    main.report_optional_fallbacks()
+    assert "drawing gallery is disabled" in capsys.readouterr().out
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from ingress import Ingress
+from strokes import STROKE_BEGIN, STROKE_END, STROKE_RESET, encode_chunk, segment_to_chunk
+
+
+def new_ingress() -> Ingress:
+    return Ingress({"drawing_data": (60, 120), "stroke_frame": (60, 120)}, (100, 100),
+                   max_text=8192, max_binary=65536)
+
+
+def drawing_data(**data) -> str:
+    return json.dumps({"type": "drawing_data", "data": {"x0": 1, "y0": 2, "x1": 3.5, "y1": 4, **data}})
+
+
+def test_drawing_data_with_finite_coordinates_passes():
+    assert new_ingress().text(drawing_data())["data"]["x1"] == 3.5
+
+
+@pytest.mark.parametrize("value", ["nan", "1e400", "10", None, True, float("nan"), float("inf")])
+def test_drawing_data_with_non_finite_coordinate_is_dropped(value):
+    assert new_ingress().text(drawing_data(y0=value)) is None
+
+
+@pytest.mark.parametrize("segment", [
+    {"x0": "nan", "y0": 0, "x1": 0, "y1": 0},
+    {"x0": "1e400", "y0": 0, "x1": 0, "y1": 0},
+    {"x0": 0, "y0": 0, "x1": 0, "y1": 0, "lineWidth": "1e400"},
+    {"x0": 0, "y0": 0, "x1": 0, "y1": 0, "lineWidth": "nan"},
+])
+def test_segment_to_chunk_drops_unencodable_segment(segment):
+    assert segment_to_chunk(segment, 1) is None
+
+
+def test_stroke_frame_passes_with_its_flags():
+    frame = encode_chunk(1, STROKE_BEGIN, (0, 0, 0, 2), [1, 2, 3, 4]) + encode_chunk(1, 0, None, [5, 6])
+    assert new_ingress().binary(frame) == STROKE_BEGIN
+    assert new_ingress().binary(encode_chunk(1, 0, None, [5, 6])) == 0
+
+
+@pytest.mark.parametrize("frame", [
+    # Snímek plátna smí poslat jen server
+    encode_chunk(1, STROKE_BEGIN | STROKE_RESET, (0, 0, 0, 2), [1, 2]),
+    encode_chunk(1, STROKE_BEGIN, (0, 0, 0, 2), [1, 2]) + encode_chunk(2, STROKE_RESET | STROKE_END, None, [3, 4]),
+    encode_chunk(1, STROKE_BEGIN, (0, 0, 0, 2), [1, 2])[:-1],
+    b"\x01\x00\x00\x00\x00\x00",
+])
+def test_invalid_stroke_frame_is_dropped(frame):
+    assert new_ingress().binary(frame) is None
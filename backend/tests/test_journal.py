@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import json
+
+from journal import (EVENT_GUESS, EVENT_ROUND_START, EVENT_STROKES, PART_SUFFIX, JournalReader, JournalWriter,
+                     record_to_ndjson)
+from metrics import JOURNAL_DROPPED
+from strokes import STROKE_BEGIN, encode_chunk
+
+
+def read_all(path) -> list:
+    reader = JournalReader(path)
+    records = []
+    while True:
+        block = reader.read_block()
+        if block is None:
+            break
+        records += block
+    reader.close()
+    return records
+
+
+def test_journal_is_written_in_blocks_and_read_back_in_order(tmp_path):
+    strokes = encode_chunk(1, STROKE_BEGIN, (0, 0, 0, 2), [1, 2, 3, 4])
+
+    async def scenario():
+        writer = JournalWriter(tmp_path, flush_interval=60)
+        writer.start()
+        journal = writer.open("HRA001")
+        journal.record(EVENT_ROUND_START, b'{"round":1}')
+        await writer.flush()
+        journal.record(EVENT_STROKES, strokes)
+        journal.record(EVENT_GUESS, '{"guess":"kůň"}'.encode("utf-8"))
+        await writer.finish(journal, 42)
+        journal.record(EVENT_GUESS, b'{"guess":"po konci"}')  # uzavřený záznam už nic nepřijme
+        await writer.close()
+        return writer.path(42)
+
+    path = asyncio.run(scenario())
+    assert not list(tmp_path.glob("*" + PART_SUFFIX))
+    records = read_all(path)
+    assert [(kind, payload) for kind, _, payload in records] == [
+        (EVENT_ROUND_START, b'{"round":1}'), (EVENT_STROKES, strokes), (EVENT_GUESS, '{"guess":"kůň"}'.encode())]
+    assert [ms for _, ms, _ in records] == sorted(ms for _, ms, _ in records)
+
+    lines = [json.loads(record_to_ndjson(*record)) for record in records]
+    assert [line["event"] for line in lines] == ["round_start", "strokes", "guess"]
+    assert base64.b64decode(lines[1]["data"]) == strokes
+    assert lines[2]["data"] == {"guess": "kůň"}
+
+
+def test_torn_last_block_is_ignored(tmp_path):
+    async def scenario():
+        writer = JournalWriter(tmp_path)
+        writer.start()
+        journal = writer.open("HRA001")
+        for i in range(2):
+            journal.record(EVENT_GUESS, b'{"i":%d}' % i)
+            await writer.flush()
+        await writer.close()
+        return tmp_path / (journal.name + PART_SUFFIX)
+
+    path = asyncio.run(scenario())
+    path.write_bytes(path.read_bytes()[:-3])  # pád uprostřed zápisu
+    assert [payload for _, _, payload in read_all(path)] == [b'{"i":0}']
+
+
+def test_full_buffer_drops_and_discard_deletes_the_file(tmp_path):
+    async def scenario():
+        writer = JournalWriter(tmp_path, max_buffer=64)
+        writer.start()
+        journal = writer.open("HRA001")
+        dropped = JOURNAL_DROPPED.get()
+        for _ in range(10):
+            journal.record(EVENT_GUESS, b"x" * 20)
+        dropped = JOURNAL_DROPPED.get() - dropped
+        await writer.flush()
+        written = list(tmp_path.glob("*" + PART_SUFFIX))
+        writer.discard(journal)
+        await writer.close()
+        return dropped, written
+
+    dropped, written = asyncio.run(scenario())
+    assert dropped == 7  # 3 záznamy po 29 B naplní 64 B buffer
+    assert len(written) == 1 and not written[0].exists()
@@ -0,0 +1,41 @@
+import pytest
+
+from metrics import OTHER, Counter, Gauge, Histogram, Registry, _Metric
+
+
+def test_metric_without_samples_fails_on_creation():
+    class Incomplete(_Metric):
+        kind = "counter"
+
+    with pytest.raises(TypeError):
+        Incomplete("kreslir_test_total", "Test.")
+
+
+def test_counter_folds_unknown_label_values_into_other():
+    counter = Counter("kreslir_test_total", "Test.", "type", ("guess",))
+    counter.inc(value="guess")
+    counter.inc(2, value="made_up")
+    assert counter.get("guess") == 1
+    assert counter.get(OTHER) == 2
+    assert 'kreslir_test_total{type="other"} 2' in counter.samples()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("kreslir_test_seconds", "Test.", (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    lines = histogram.samples()
+    assert 'kreslir_test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'kreslir_test_seconds_bucket{le="1.0"} 2' in lines
+    assert 'kreslir_test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "kreslir_test_seconds_count 3" in lines
+
+
+def test_render_merges_other_workers():
+    registry = Registry()
+    registry.register(Gauge("kreslir_test_rooms", "Test.", lambda: 3))
+    other = Registry()
+    other.register(Gauge("kreslir_test_rooms", "Test.", lambda: 5))
+    text = registry.render([("worker", "0")], [other.export([("worker", "1")])])
+    assert 'kreslir_test_rooms{worker="0"} 3' in text
+    assert 'kreslir_test_rooms{worker="1"} 5' in text
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from outbox import PRIORITY_CRITICAL, PRIORITY_DROPPABLE, PRIORITY_NORMAL, ClientOutbox
+
+
+class FakeWebSocket:
+    def __init__(self, fail: bool = False):
+        self.sent = []
+        self.close_code = None
+        self.fail = fail
+
+    async def send_text(self, data):
+        if self.fail:
+            raise ConnectionError("spojení spadlo")
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+
+
+def queued(outbox: ClientOutbox) -> list:
+    return [frame for frame, _ in outbox._queue]
+
+
+def test_full_queue_evicts_oldest_droppable_frame():
+    # Writer neběží - fronta se jen plní
+    outbox = ClientOutbox(FakeWebSocket(), "bob", max_frames=4)
+    for frame in ("tah1", "tah2"):
+        assert outbox.push(frame, PRIORITY_DROPPABLE)
+    assert outbox.push("chat1", PRIORITY_NORMAL)
+    assert outbox.push("tah3", PRIORITY_DROPPABLE)
+
+    # Plná fronta: průběžný rámec se zahodí, důležitější vytlačí nejstarší průběžný
+    assert not outbox.push("tah4", PRIORITY_DROPPABLE)
+    assert outbox.push("round_end", PRIORITY_CRITICAL)
+    assert queued(outbox) == ["tah2", "chat1", "tah3", "round_end"]
+    assert outbox.dropped_frames == 2
+    assert not outbox.stuck
+
+
+def test_queue_without_droppable_frames_overflows_to_hard_limit_then_sticks():
+    stuck = []
+    outbox = ClientOutbox(FakeWebSocket(), "bob", max_frames=4, on_stuck=stuck.append)
+    for i in range(outbox.hard_limit):
+        assert outbox.push(f"chat{i}", PRIORITY_NORMAL)
+    assert outbox.depth == outbox.hard_limit
+
+    assert not outbox.push("navic", PRIORITY_CRITICAL)
+    assert stuck == [outbox]
+    assert outbox.stuck and outbox.closed and outbox.depth == 0
+    assert not outbox.push("po zavreni", PRIORITY_CRITICAL)
+
+
+def test_queue_full_longer_than_stuck_timeout_marks_client_stuck():
+    stuck = []
+    outbox = ClientOutbox(FakeWebSocket(), "bob", max_frames=2, stuck_timeout=0.0, on_stuck=stuck.append)
+    outbox.push("a")
+    outbox.push("b")
+    assert outbox.push("tah", PRIORITY_DROPPABLE) is False  # fronta se právě zaplnila
+    assert not outbox.stuck
+    time.sleep(0.01)
+    assert outbox.push("c") is False
+    assert stuck == [outbox]
+
+
+def test_writer_sends_in_order_and_close_flushes_the_queue():
+    async def scenario():
+        websocket = FakeWebSocket()
+        outbox = ClientOutbox(websocket, "bob")
+        outbox.start()
+        for frame in ("první", b"\x02tah", "třetí"):
+            outbox.push(frame)
+        await outbox.close(code=1001)
+        return websocket, outbox
+
+    websocket, outbox = asyncio.run(scenario())
+    assert websocket.sent == ["první", b"\x02tah", "třetí"]
+    assert websocket.close_code == 1001
+    assert outbox.stats()["sent_frames"] == 3
+
+
+def test_failed_send_marks_the_outbox_dead():
+    async def scenario():
+        outbox = ClientOutbox(FakeWebSocket(fail=True), "bob")
+        outbox.start()
+        outbox.push("zpráva")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return outbox
+
+    outbox = asyncio.run(scenario())
+    assert outbox.failed and outbox.closed
+    assert not outbox.push("další")
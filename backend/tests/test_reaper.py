@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import main
+from metrics import REAPED, REJECTED_CONNECTIONS
+from rooms import Room
+from scheduler import TimerWheel
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        self.closed = (code, reason)
+
+
+def isolated_manager(monkeypatch):
+    monkeypatch.setattr(main.manager, "rooms", {})
+    monkeypatch.setattr(main.manager, "draining", False)
+    monkeypatch.setattr(main, "timer_wheel", TimerWheel())
+
+
+async def connect(game_code: str, username: str) -> FakeWebSocket:
+    websocket = FakeWebSocket()
+    await main.manager.connect(websocket, game_code, username)
+    return websocket
+
+
+def test_room_and_player_caps_refuse_before_allocating(monkeypatch):
+    isolated_manager(monkeypatch)
+    monkeypatch.setitem(main.CONNECTION_SETTINGS, "MAX_ROOMS", 1)
+    monkeypatch.setitem(main.CONNECTION_SETTINGS, "MAX_PLAYERS_PER_ROOM", 2)
+    room_limit = REJECTED_CONNECTIONS.get("room_limit")
+    room_full = REJECTED_CONNECTIONS.get("room_full")
+
+    async def scenario():
+        sockets = [await connect("ROOM01", name) for name in ("alice", "bob", "carl")]
+        other = await connect("ROOM02", "dana")
+        await main.close_room("ROOM01")
+        return sockets, other
+
+    (alice, bob, carl), other = asyncio.run(scenario())
+    assert alice.closed == bob.closed == (1000, None)  # zavřela je až close_room
+    assert carl.closed[0] == 1008
+    assert other.closed[0] == 1013
+    assert list(main.manager.rooms) == []
+    assert REJECTED_CONNECTIONS.get("room_limit") == room_limit + 1
+    assert REJECTED_CONNECTIONS.get("room_full") == room_full + 1
+
+
+def test_reaper_removes_dead_players_and_idle_rooms(monkeypatch):
+    isolated_manager(monkeypatch)
+    dead = REAPED.get("dead_connection")
+    idle = REAPED.get("idle")
+
+    async def scenario():
+        await connect("DEAD01", "alice")
+        dead_socket = await connect("DEAD01", "bob")
+        await connect("IDLE01", "carl")
+        # Zápis bobovi selhal, ale příjmová smyčka o tom neví
+        main.manager.rooms["DEAD01"].get("bob").outbox.failed = True
+        main.manager.rooms["IDLE01"].last_activity = time.monotonic() - main.CONNECTION_SETTINGS["ROOM_IDLE_TIMEOUT"] - 1
+        await main.reap_rooms()
+        rooms = {code: list(room.players) for code, room in main.manager.rooms.items()}
+        await main.close_room("DEAD01")
+        await main.timer_wheel.close()
+        return rooms, dead_socket
+
+    rooms, dead_socket = asyncio.run(scenario())
+    assert rooms == {"DEAD01": ["alice"]}
+    assert dead_socket.closed[0] == 1001
+    assert REAPED.get("dead_connection") == dead + 1
+    assert REAPED.get("idle") == idle + 1
+
+
+def test_restored_room_waits_for_players_only_within_the_grace_period(monkeypatch):
+    isolated_manager(monkeypatch)
+
+    async def scenario():
+        for game_code, age in (("NOVA01", 0), ("STARA1", main.DRAIN_SETTINGS["REJOIN_GRACE"] + 1)):
+            room = Room(game_code, "alice", "Klasika", main.new_stroke_log())
+            room.paused_remaining = 30.0
+            room.last_activity = time.monotonic() - age
+            main.manager.rooms[game_code] = room
+        await main.reap_rooms()
+        await main.timer_wheel.close()
+        return list(main.manager.rooms)
+
+    assert asyncio.run(scenario()) == ["NOVA01"]
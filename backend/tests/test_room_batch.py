@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import main
+from outbox import PRIORITY_CRITICAL
+from rooms import Player, Room
+from scheduler import TimerWheel
+
+GAME_CODE = "BATCH1"
+
+
+class RecordingOutbox:
+    def __init__(self):
+        self.frames = []
+
+    def push(self, frame, priority):
+        self.frames.append((json.loads(frame), priority))
+        return True
+
+
+def room_in_manager(monkeypatch) -> Room:
+    room = Room(GAME_CODE, "alice", "Klasika", main.new_stroke_log())
+    for name in ("alice", "bob", "carl"):
+        room.add(Player(name, object(), RecordingOutbox()))
+        room.scores[name] = 0
+    monkeypatch.setattr(main.manager, "rooms", {GAME_CODE: room})
+    monkeypatch.setattr(main, "timer_wheel", TimerWheel())
+    return room
+
+
+async def guess(room: Room, username: str, points: int):
+    room.scores[username] += points
+    room.scores["alice"] += 5
+    await main.manager.room_event(room, {"type": "word_guessed", "guesser": username},
+                                  {username: points, "alice": 5})
+
+
+def test_events_of_one_tick_go_out_as_one_batch(monkeypatch):
+    room = room_in_manager(monkeypatch)
+    before = dict(room.scores)
+
+    async def scenario():
+        await guess(room, "bob", 60)
+        await main.manager.room_event(room, {"type": "chat_message", "username": "carl", "message": "ahoj"})
+        await guess(room, "carl", 45)
+        await guess(room, "bob", 30)
+        assert room.flush_timer is not None and room.get("bob").outbox.frames == []
+        await main.manager.flush_events(room)
+        await main.timer_wheel.close()
+
+    asyncio.run(scenario())
+    for player in room:
+        assert len(player.outbox.frames) == 1
+    batch, priority = room.get("bob").outbox.frames[0]
+    assert batch["type"] == "room_batch" and priority == PRIORITY_CRITICAL
+    assert [event.get("guesser", event.get("username")) for event in batch["events"]] == ["bob", "carl", "carl", "bob"]
+    # Součet rozdílů přičtený k předchozímu skóre dá aktuální skóre
+    assert batch["scores_delta"] == {"bob": 90, "alice": 15, "carl": 45}
+    assert {name: before[name] + batch["scores_delta"].get(name, 0) for name in before} == room.scores
+    assert room.pending_events == [] and room.pending_scores == {} and room.flush_timer is None
+
+
+def test_broadcast_sends_the_pending_batch_first(monkeypatch):
+    room = room_in_manager(monkeypatch)
+
+    async def scenario():
+        await guess(room, "bob", 60)
+        await main.manager.broadcast(GAME_CODE, {"type": "round_end", "scores": room.scores})
+        await main.timer_wheel.close()
+
+    asyncio.run(scenario())
+    assert [frame["type"] for frame, _ in room.get("carl").outbox.frames] == ["room_batch", "round_end"]
+
+
+def test_without_ticks_each_event_carries_full_scores(monkeypatch):
+    room = room_in_manager(monkeypatch)
+    monkeypatch.setitem(main.ROOM_TICK_SETTINGS, "TICK_HZ", 0)
+
+    async def scenario():
+        await guess(room, "bob", 60)
+        await guess(room, "carl", 45)
+
+    asyncio.run(scenario())
+    frames = [frame for frame, _ in room.get("bob").outbox.frames]
+    assert [frame["type"] for frame in frames] == ["word_guessed", "word_guessed"]
+    assert frames[-1]["scores"] == {"alice": 10, "bob": 60, "carl": 45}
@@ -0,0 +1,36 @@
+import pytest
+
+import main
+from rooms import PHASE_LOBBY, Player, Room
+
+
+def new_room() -> Room:
+    return Room("ROOM01", "alice", "Klasika", main.new_stroke_log())
+
+
+def test_players_are_found_by_name_and_socket():
+    room = new_room()
+    sockets = {name: object() for name in ("alice", "bob", "carl")}
+    for name, websocket in sockets.items():
+        room.add(Player(name, websocket))
+
+    assert len(room) == 3 and "bob" in room
+    assert room.by_socket(sockets["bob"]) is room.get("bob")
+    assert [player.username for player in room] == ["alice", "bob", "carl"]
+    assert room.player_at(2).username == "carl"
+    assert room.player_list() == [{"username": "alice"}, {"username": "bob"}, {"username": "carl"}]
+
+    # Oba indexy se mění spolu
+    assert room.remove(sockets["bob"]).username == "bob"
+    assert room.remove(sockets["bob"]) is None
+    assert "bob" not in room and room.by_socket(sockets["bob"]) is None
+    assert room.player_at(1).username == "carl"
+
+
+def test_room_and_player_reject_unknown_attributes():
+    room = new_room()
+    assert room.phase == PHASE_LOBBY and not room.game_started
+    with pytest.raises(AttributeError):
+        room.round_timer = None  # překlep / starý klíč z dob game_state slovníku
+    with pytest.raises(AttributeError):
+        Player("alice", object()).score = 0
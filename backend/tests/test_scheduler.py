@@ -0,0 +1,162 @@
+"""
+Časové kolo (scheduler.py) a přechody fází místnosti.
+
+Kolo běží s falešnými hodinami, tiky se posouvají ručně stejně jako v
+TimerWheel._run - výsledek nezávisí na vytížení stroje.
+
+Spuštění (z adresáře backend):
+    python -m pytest tests
+"""
+import asyncio
+import random
+
+import pytest
+
+import main
+from rooms import (PHASE_CHOOSING, PHASE_DRAWING, PHASE_GAME_OVER, PHASE_LOBBY, PHASE_ROUND_OVER,
+                   PhaseError, Room)
+from scheduler import TimerWheel
+
+RESOLUTION = 0.05
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_until(wheel: TimerWheel, clock: FakeClock, until: float):
+    # Hodiny skáčou po tikách (s rezervou proti zaokrouhlení), čas odpálení je tedy čas tiku
+    while clock.now < until:
+        clock.now = (wheel._now_tick() + 1 + 1e-6) * wheel.resolution
+        target = wheel._now_tick()
+        while wheel._tick < target:
+            wheel._advance()
+
+
+def test_timers_never_fire_early_and_at_most_one_tick_late():
+    async def scenario():
+        clock = FakeClock()
+        wheel = TimerWheel(RESOLUTION, slots=8, levels=3, clock=clock)
+        random.seed(3)
+        fired = []
+        for _ in range(2000):
+            # Rozptyl přes všechny úrovně kola, včetně kaskád mezi nimi
+            delay = random.uniform(0, 40)
+            wheel.schedule(delay, lambda due: fired.append((due, clock.now)), clock.now + delay)
+        run_until(wheel, clock, clock.now + 41)
+        await wheel.close()
+        return fired
+
+    fired = asyncio.run(scenario())
+    assert len(fired) == 2000
+    for due, at in fired:
+        assert due <= at + 1e-9
+        assert at - due <= RESOLUTION + 1e-6
+
+
+def test_cancel_then_reschedule_fires_only_the_new_timer():
+    async def scenario():
+        clock = FakeClock()
+        wheel = TimerWheel(RESOLUTION, clock=clock)
+        fired = []
+        first = wheel.schedule(1.0, fired.append, "první")
+        first.cancel()
+        first.cancel()  # podruhé nic nedělá
+        second = wheel.schedule(1.0, fired.append, "druhý")
+        assert not first.active and second.active and len(wheel) == 1
+        run_until(wheel, clock, clock.now + 2)
+        await wheel.close()
+        return fired, second
+
+    fired, second = asyncio.run(scenario())
+    assert fired == ["druhý"]
+    assert not second.active
+
+
+def test_callback_can_cancel_a_timer_from_the_same_slot():
+    async def scenario():
+        clock = FakeClock()
+        wheel = TimerWheel(RESOLUTION, clock=clock)
+        fired = []
+        victim = None
+
+        def first():
+            fired.append("první")
+            victim.cancel()
+
+        wheel.schedule(0.5, first)
+        victim = wheel.schedule(0.5, fired.append, "zrušený")
+        run_until(wheel, clock, clock.now + 1)
+        await wheel.close()
+        return fired, len(wheel)
+
+    assert asyncio.run(scenario()) == (["první"], 0)
+
+
+def test_ten_thousand_timers_share_one_task():
+    async def scenario():
+        clock = FakeClock()
+        wheel = TimerWheel(RESOLUTION, clock=clock)
+        fired = []
+        for room in range(10_000):
+            wheel.schedule(60 + room % 100, fired.append, room)
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        pending = len(wheel)
+        run_until(wheel, clock, clock.now + 200)
+        await wheel.close()
+        return tasks, pending, fired, wheel
+
+    tasks, pending, fired, wheel = asyncio.run(scenario())
+    assert len(tasks) == 1
+    assert pending == 10_000
+    assert sorted(fired) == list(range(10_000))
+    assert len(wheel) == 0
+
+
+def test_phase_changes_follow_the_state_machine():
+    room = Room("FAZE01", "alice", "Klasika", main.new_stroke_log())
+    for phase in (PHASE_CHOOSING, PHASE_DRAWING, PHASE_ROUND_OVER, PHASE_CHOOSING, PHASE_ROUND_OVER,
+                  PHASE_GAME_OVER, PHASE_GAME_OVER):
+        room.change_phase(phase)
+        assert room.phase == phase
+
+    room = Room("FAZE02", "alice", "Klasika", main.new_stroke_log())
+    with pytest.raises(PhaseError):
+        room.change_phase(PHASE_DRAWING)  # kreslit se nedá bez výběru fráze
+    assert room.phase == PHASE_LOBBY
+    room.phase = PHASE_GAME_OVER
+    with pytest.raises(PhaseError):
+        room.change_phase(PHASE_CHOOSING)  # po konci hry se už nehraje
+
+
+def test_illegal_set_phase_keeps_the_running_timer(monkeypatch):
+    clock = FakeClock()
+    wheel = TimerWheel(RESOLUTION, clock=clock)
+    monkeypatch.setattr(main, "timer_wheel", wheel)
+    monkeypatch.setattr(main.manager, "rooms", {})
+    monkeypatch.setattr(main.manager, "draining", False)
+    transitions = []
+
+    async def scenario():
+        room = Room("FAZE03", "alice", "Klasika", main.new_stroke_log())
+        main.manager.rooms[room.game_code] = room
+        room.phase = PHASE_CHOOSING
+        main.set_phase(room, PHASE_DRAWING, 1.0, transitions.append)
+        timer = room.phase_timer
+        with pytest.raises(PhaseError):
+            main.set_phase(room, PHASE_LOBBY)
+        assert room.phase == PHASE_DRAWING and room.phase_timer is timer and timer.active
+        run_until(wheel, clock, clock.now + 2)
+        # Časovač přežité fáze se neodpálí
+        main.set_phase(room, PHASE_ROUND_OVER, 1.0, transitions.append)
+        stale = wheel.schedule(0.5, main.fire_phase_timer, room, PHASE_DRAWING, transitions.append)
+        run_until(wheel, clock, clock.now + 0.6)
+        assert not stale.active
+        await wheel.close()
+
+    asyncio.run(scenario())
+    assert transitions == ["FAZE03"]
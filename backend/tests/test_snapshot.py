@@ -0,0 +1,78 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import main
+from rooms import PHASE_CHOOSING, PHASE_DRAWING, PHASE_LOBBY, PHASE_ROUND_OVER, Room
+from scheduler import TimerWheel
+from snapshot import read_snapshots, remove_snapshot, snapshot_path, write_snapshot
+
+
+def test_snapshots_of_all_workers_are_read_unless_stale_or_broken(tmp_path, capsys):
+    write_snapshot(tmp_path, 0, [{"game_code": "HRA000"}])
+    write_snapshot(tmp_path, 1, [{"game_code": "HRA001"}, {"game_code": "HRA002"}])
+    stale = snapshot_path(tmp_path, 2)
+    stale.write_text(json.dumps({"version": 1, "written_at": time.time() - 3600, "rooms": [{"game_code": "STARA"}]}))
+    snapshot_path(tmp_path, 3).write_text("{nedopsano")
+
+    assert [room["game_code"] for room in read_snapshots(tmp_path, 300)] == ["HRA000", "HRA001", "HRA002"]
+    assert "unreadable room snapshot" in capsys.readouterr().out
+    assert not list(tmp_path.glob("*.tmp"))
+
+    remove_snapshot(tmp_path, 1)
+    remove_snapshot(tmp_path, 1)  # podruhé nevadí
+    assert [room["game_code"] for room in read_snapshots(tmp_path, 300)] == ["HRA000"]
+
+
+def running_room(game_code: str, phase: str) -> Room:
+    room = Room(game_code, "alice", main.word_store.default_name, main.new_stroke_log())
+    room.phase = phase
+    room.current_round, room.total_rounds, room.current_artist = 2, 4, "alice"
+    room.scores = {"alice": 40, "bob": 25}
+    return room
+
+
+def test_drained_rooms_are_restored_paused(tmp_path, monkeypatch):
+    monkeypatch.setitem(main.DRAIN_SETTINGS, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(main.manager, "rooms", {})
+    monkeypatch.setattr(main.manager, "draining", False)
+
+    async def scenario():
+        monkeypatch.setattr(main, "timer_wheel", TimerWheel())
+        drawing = running_room("KRESLI", PHASE_DRAWING)
+        drawing.selected_phrase = ["Rychlý", "kůň", "skáče přes plot"]
+        drawing.phrase_matcher = main.PhraseMatcher(drawing.selected_phrase)
+        drawing.phrase_matcher.guess("kun")
+        main.set_phase(drawing, PHASE_DRAWING, 40, main.end_round)
+        choosing = running_room("VYBIRA", PHASE_CHOOSING)
+        lobby = running_room("LOBBY1", PHASE_LOBBY)
+        for room in (drawing, choosing, lobby):
+            main.manager.rooms[room.game_code] = room
+
+        main.drain_rooms()
+        assert drawing.phase_timer is None  # hodiny stojí
+        await main.timer_wheel.close()
+
+        # Nový proces
+        main.manager.rooms, main.manager.draining = {}, False
+        assert main.restore_rooms() == 2
+        assert not list(tmp_path.glob("rooms-*.json"))
+        restored = main.manager.rooms["KRESLI"]
+        main.resume_room(restored)
+        timer_left = restored.phase_timer.remaining()
+        await main.timer_wheel.close()
+        return main.manager.rooms, timer_left
+
+    rooms, timer_left = asyncio.run(scenario())
+    assert sorted(rooms) == ["KRESLI", "VYBIRA"]
+    drawing = rooms["KRESLI"]
+    assert drawing.phase == PHASE_DRAWING and not drawing.players
+    assert drawing.departed_scores == {"alice": 40, "bob": 25}  # hráči se vracejí ke svému skóre
+    assert drawing.masked_phrase == "______ kůň _____ ____ ____"
+    assert timer_left == pytest.approx(40, abs=0.2)
+    # Nabídka frází se neuložila - kolo se rozdá znovu
+    choosing = rooms["VYBIRA"]
+    assert (choosing.phase, choosing.current_round) == (PHASE_ROUND_OVER, 1)
+    assert choosing.paused_remaining == main.GAME_SETTINGS["ARTIST_GONE_DELAY"]
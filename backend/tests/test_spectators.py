@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import main
+from rooms import Player, Room
+from scheduler import TimerWheel
+from spectators import SpectatorFeed
+from strokes import STROKE_BEGIN, STROKE_END, decode_frame, encode_chunk
+
+STYLE = (0, 0, 0, 2)
+
+
+def test_feed_keeps_strokes_and_events_in_order():
+    feed = SpectatorFeed(main.encode_message, tolerance=0)
+    assert not feed and feed.take() == []
+    feed.add_strokes(encode_chunk(1, STROKE_BEGIN, STYLE, [0, 0, 5, 5]))
+    feed.add_strokes(encode_chunk(1, STROKE_END, None, [9, 9]))
+    feed.add_events([{"type": "chat", "text": "ahoj"}], {"bob": 10})
+    feed.add_events([{"type": "correct_guess", "username": "carl"}], {"bob": 5, "carl": 3})
+    feed.add_message(main.encode_message({"type": "canvas_cleared"}))
+    feed.add_strokes(encode_chunk(2, STROKE_BEGIN, STYLE, [1, 1]))
+
+    strokes, events, cleared, more_strokes = feed.take()
+    assert decode_frame(strokes) == [(1, STROKE_BEGIN | STROKE_END, STYLE, [0, 0, 5, 5, 9, 9])]
+    # Události jednoho okna v jedné dávce, rozdíly skóre sečtené
+    assert json.loads(events) == {"type": "room_batch", "scores_delta": {"bob": 15, "carl": 3}, "events": [
+        {"type": "chat", "text": "ahoj"}, {"type": "correct_guess", "username": "carl"}]}
+    assert json.loads(cleared)["events"] == [{"type": "canvas_cleared"}]
+    assert decode_frame(more_strokes) == [(2, STROKE_BEGIN, STYLE, [1, 1])]
+    assert not feed
+
+
+class RecordingOutbox:
+    def __init__(self):
+        self.frames = []
+
+    def push(self, frame, priority):
+        self.frames.append(frame)
+        return True
+
+
+def test_spectators_share_one_delayed_copy(monkeypatch):
+    room = Room("DIVACI", "alice", "Klasika", main.new_stroke_log())
+    room.add(Player("alice", object(), RecordingOutbox()))
+    room.add(Player("bob", object(), RecordingOutbox()))
+    for name in ("divak1", "divak2"):
+        websocket = object()
+        room.spectators[websocket] = Player(name, websocket, RecordingOutbox())
+    room.spectator_feed = SpectatorFeed(main.encode_message, tolerance=0)
+    monkeypatch.setattr(main.manager, "rooms", {room.game_code: room})
+    monkeypatch.setitem(main.DOWNSAMPLE_SETTINGS, "ENABLED", False)
+    frame = encode_chunk(1, STROKE_BEGIN | STROKE_END, STYLE, [0, 0, 3, 4])
+
+    async def scenario():
+        monkeypatch.setattr(main, "timer_wheel", TimerWheel())
+        await main.manager.broadcast_strokes(room, frame, STROKE_BEGIN | STROKE_END, exclude=room.get("alice").websocket)
+        await main.manager.broadcast(room.game_code, {"type": "canvas_cleared"})
+        assert room.spectator_timer is not None
+        assert all(not spectator.outbox.frames for spectator in room.spectators.values())  # až s tikem
+        await main.manager.flush_spectators(room)
+        await main.timer_wheel.close()
+
+    asyncio.run(scenario())
+    assert [type(f) for f in room.get("bob").outbox.frames] == [bytes, str]
+    first, second = (spectator.outbox.frames for spectator in room.spectators.values())
+    assert all(a is b for a, b in zip(first, second)) and len(first) == 2
+    assert decode_frame(first[0]) == decode_frame(frame)
+    assert json.loads(first[1])["events"] == [{"type": "canvas_cleared"}]
+    assert room.spectator_timer is None
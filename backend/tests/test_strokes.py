@@ -0,0 +1,113 @@
+import random
+
+import strokes
+from strokes import STROKE_BEGIN, STROKE_END, StrokeLog, decode_frame, encode_chunk
+
+STYLE = (10, 20, 30, 4)
+
+
+def zigzag(first: int, count: int) -> list:
+    points = []
+    for i in range(first, first + count):
+        points += [i % 30000, (i % 2) * 50]
+    return points
+
+
+def test_compact_splits_stroke_over_u16_point_count(monkeypatch):
+    # Jde o dělení úseků, ne o RDP - body se nezjednodušují
+    monkeypatch.setattr(strokes, "simplify_polylines", lambda polylines, tolerance: [list(p) for p in polylines])
+    log = StrokeLog(max_bytes=8 * 1024 * 1024, compact_threshold=8 * 1024 * 1024, tolerance=1.0)
+    total = 0
+    for i in range(5):
+        flags = (STROKE_BEGIN if i == 0 else 0) | (STROKE_END if i == 4 else 0)
+        log.append(encode_chunk(7, flags, STYLE if i == 0 else None, zigzag(total, 15000)))
+        total += 15000
+    log.compact()
+
+    chunks = decode_frame(log.snapshot())
+    assert len(chunks) > 1
+    assert all(len(points) // 2 <= 0xFFFF for _, _, _, points in chunks)
+    assert sum(len(points) for _, _, _, points in chunks) // 2 == total
+    assert [stroke_id for stroke_id, _, _, _ in chunks] == [7] * len(chunks)
+    assert chunks[0][1] & STROKE_BEGIN and chunks[0][2] == STYLE
+    assert all(style is None for _, _, style, _ in chunks[1:])
+    assert chunks[-1][1] & STROKE_END
+    assert not any(flags & STROKE_END for _, flags, _, _ in chunks[:-1])
+
+
+def jitter(count: int, rng: random.Random) -> list:
+    points = []
+    x, y = 400, 300
+    for _ in range(count):
+        x = max(0, min(800, x + rng.randint(-6, 6)))
+        y = max(0, min(600, y + rng.randint(-6, 6)))
+        points += [x, y]
+    return points
+
+
+def test_never_ending_stroke_stays_under_max_bytes():
+    rng = random.Random(1)
+    log = StrokeLog(max_bytes=64 * 1024, compact_threshold=4 * 1024)
+    for i in range(2000):
+        log.append(encode_chunk(3, STROKE_BEGIN if i == 0 else 0, STYLE if i == 0 else None, jitter(100, rng)))
+        assert log.size <= log.max_bytes
+    assert log.compactions > 1
+
+    snapshot = log.snapshot()
+    assert len(snapshot) == log.size
+    chunks = decode_frame(snapshot)
+    # Useknutý tah začíná znovu úsekem se stylem, pokračování styl nenesou
+    assert chunks[0][1] & STROKE_BEGIN and chunks[0][2] == STYLE
+    assert all(not flags & STROKE_BEGIN for _, flags, _, _ in chunks[1:])
+    assert not any(flags & STROKE_END for _, flags, _, _ in chunks)
+
+
+def test_open_stroke_continues_across_compactions(monkeypatch):
+    monkeypatch.setattr(strokes, "simplify_polylines", lambda polylines, tolerance: [list(p) for p in polylines])
+    log = StrokeLog(compact_threshold=1024)
+    sent = []
+    for i in range(20):
+        points = zigzag(100 * i, 100)
+        sent += points
+        flags = (STROKE_BEGIN if i == 0 else 0) | (STROKE_END if i == 19 else 0)
+        log.append(encode_chunk(9, flags, STYLE if i == 0 else None, points))
+    log.append(encode_chunk(10, STROKE_BEGIN | STROKE_END, STYLE, [1, 2, 3, 4]))
+    assert log.compactions > 1
+
+    chunks = decode_frame(log.snapshot())
+    assert sum((points for stroke_id, _, _, points in chunks if stroke_id == 9), []) == sent
+    assert [flags & STROKE_BEGIN for stroke_id, flags, _, _ in chunks if stroke_id == 9].count(STROKE_BEGIN) == 1
+    assert chunks[-1][0] == 10 and chunks[-1][3] == [1, 2, 3, 4]
+
+
+
+def test_frame_round_trip_keeps_points_flags_and_style():
+    random.seed(2)
+    chunks = []
+    for stroke_id in (1, 2, 70000):
+        points = [random.randint(-2000, 2000) for _ in range(2 * random.randint(1, 300))]
+        chunks.append((stroke_id, STROKE_BEGIN, (255, 0, 128, 6), points))
+        chunks.append((stroke_id, STROKE_END, None, points[::-1]))
+    frame = b"".join(encode_chunk(*chunk) for chunk in chunks)
+
+    assert strokes.scan_stroke_frame(frame) == STROKE_BEGIN | STROKE_END
+    # Id tahu je u16, body absolutní
+    assert decode_frame(frame) == [(stroke_id & 0xFFFF, flags, style, points)
+                                   for stroke_id, flags, style, points in chunks]
+
+
+def test_encode_chunk_rounds_and_clamps():
+    chunk = encode_chunk(3, STROKE_BEGIN, (1, 2, 3, 999), [10.4, 10.6, 11.5, 9.49])
+    assert decode_frame(chunk) == [(3, STROKE_BEGIN, (1, 2, 3, 255), [10, 11, 12, 9])]
+    # Bez stylu se příznak začátku tahu nezakóduje
+    assert decode_frame(encode_chunk(3, STROKE_BEGIN, None, [1, 1]))[0][1] == 0
+    assert strokes.parse_color("#f80") == (255, 136, 0)
+    assert strokes.parse_color("nesmysl") == (0, 0, 0)
+
+
+def test_scan_rejects_truncated_or_foreign_frames():
+    frame = encode_chunk(1, STROKE_BEGIN, STYLE, [1, 2, 3, 4, 5, 6])
+    assert strokes.scan_stroke_frame(frame[:-1]) is None
+    assert strokes.scan_stroke_frame(frame + frame[:3]) is None
+    assert strokes.scan_stroke_frame(b"\x01" + frame[1:]) is None
+    assert strokes.scan_stroke_frame(b"") is None
@@ -0,0 +1,103 @@
+import json
+import os
+import random
+
+from main import PhraseMatcher
+from words import Deck, RoomDecks, WordStore, normalize_word, parse_packages
+
+
+# --- normalizace a PhraseMatcher ---
+
+def test_normalize_word_strips_diacritics_case_and_spaces():
+    assert normalize_word("  Žluťoučký ") == "zlutoucky"
+    assert normalize_word("ČÁP") == normalize_word("cap") == "cap"
+    # Mimo předpočítanou tabulku (řečtina) jde obecná cesta přes NFD
+    assert normalize_word("Άλφα") == "αλφα"
+    for word in ("Příliš", "ŘEŘICHA", "Ångström", "naïve"):
+        assert normalize_word(word) == normalize_word.__wrapped__(word)
+
+
+def test_phrase_matcher_reveals_each_slot_once():
+    matcher = PhraseMatcher(["Rychlý", "Kůň", "skáče přes kůň"])
+    assert matcher.slots == ["Rychlý", "Kůň", "skáče", "přes", "kůň"]
+    assert matcher.masked_phrase == "______ ___ _____ ____ ___"
+
+    # Dvakrát stejné slovo odhalí postupně oba výskyty
+    assert matcher.guess("kun") == "Kůň"
+    assert matcher.guess("kun") == "kůň"
+    assert matcher.guess("kun") is None
+    assert matcher.guess("neni") is None
+    assert matcher.masked_phrase == "______ Kůň _____ ____ kůň"
+    for word in ("rychly", "skace", "pres"):
+        assert matcher.guess(word)
+    assert matcher.all_revealed
+
+
+def test_phrase_matcher_uses_precomputed_forms_and_restored_state():
+    # Tvar z WordStore má přednost před normalize_word
+    matcher = PhraseMatcher(["A", "B", "c d"], normalized={"A": "alfa"}, revealed=[False, True, False, False])
+    assert matcher.guess("alfa") == "A"
+    assert matcher.guess("b") is None  # odhaleno už před restartem
+    assert matcher.masked_phrase == "A B _ _"
+    assert matcher.remaining == 2
+
+
+# --- balíčky a karty ---
+
+def package_data(subjects) -> dict:
+    return {"Klasika": {"Vlastnost": ["Rychlý", "Líný"], "Subjekt": subjects, "Činnost": ["skáče přes plot"]}}
+
+
+def test_deck_deals_every_word_once_per_pass():
+    random.seed(5)
+    deck = Deck(tuple(range(1000)))
+    first = [deck.draw() for _ in range(1000)]
+    assert sorted(first) == list(range(1000))
+    assert first != list(range(1000))  # zamíchané
+    second = [deck.draw() for _ in range(1000)]
+    assert sorted(second) == list(range(1000)) and second != first
+
+
+def test_draw_many_never_repeats_within_one_offer():
+    random.seed(6)
+    deck = Deck(("a", "b", "c", "d"))
+    for _ in range(50):
+        offer = deck.draw_many(3)
+        assert len(set(offer)) == 3
+    assert sorted(Deck(("a", "b")).draw_many(5)) == ["a", "b"]
+
+
+def test_invalid_packages_are_skipped_and_duplicates_removed():
+    data = package_data(["Kůň", " Kůň ", "", 7, "Pes"])
+    data["Rozbitý"] = {"Vlastnost": ["x"], "Subjekt": []}
+    data["Nesmysl"] = ["x"]
+    packages = parse_packages(data)
+    assert list(packages) == ["Klasika"]
+    package = packages["Klasika"]
+    assert package.categories["Subjekt"] == ("Kůň", "Pes")
+    # Víceslovná Činnost má normalizovaný tvar celá i po slovech
+    assert package.normalized["skáče přes plot"] == "skace pres plot"
+    assert package.normalized["přes"] == "pres"
+
+
+def test_store_hot_reloads_and_keeps_last_good_packages(tmp_path):
+    path = tmp_path / "word_packages.json"
+    path.write_text(json.dumps(package_data(["Kůň"])), encoding="utf-8")
+    store = WordStore(path)
+    store.load()
+    old = store.get("Klasika")
+    decks = RoomDecks(old)
+    assert not store.reload_if_changed()
+
+    path.write_text(json.dumps(package_data(["Pes", "Kočka"])), encoding="utf-8")
+    os.utime(path, ns=(0, 1))  # jiná mtime i na hrubých souborových systémech
+    assert store.reload_if_changed()
+    assert store.get("Klasika").categories["Subjekt"] == ("Pes", "Kočka")
+    # Rozehraná místnost dál táhne ze svého balíčku, dokud si nevezme nový
+    assert decks.package is old
+    assert store.get("neexistuje") is store.get("Klasika")
+
+    path.write_text("{rozbité", encoding="utf-8")
+    os.utime(path, ns=(0, 2))
+    assert not store.reload_if_changed()
+    assert store.get("Klasika").categories["Subjekt"] == ("Pes", "Kočka")
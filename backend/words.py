@@ -0,0 +1,224 @@
+"""
+Balíčky slov: načtení, normalizace a rozdávání slov místnostem.
+
+WordStore načte balíčky (jeden JSON soubor, nebo adresář *.json) do neměnných
+n-tic a k nim předpočítá normalizované tvary slov. Při změně souborů je načte
+znovu a nové balíčky vymění jedním přiřazením - rozehrané místnosti tak nikdy
+neuvidí napůl načtený stav a chybný soubor nechá platit předchozí verzi.
+
+Každá místnost má pro každou kategorii vlastní balíček karet (Deck): slova se
+z něj táhnou bez opakování, dokud se neprojdou všechna. Míchá se líně
+(řídký Fisher-Yates), takže založení i tah jsou O(1) i pro desítky tisíc slov.
+"""
+import json
+import random
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+CATEGORIES = ("Vlastnost", "Subjekt", "Činnost")
+
+
+def _build_diacritics_table() -> Dict[int, Optional[str]]:
+    # Pro latinku (včetně rozšířené) předpočítáme výsledek NFD + odstranění diakritiky znak po znaku
+    table: Dict[int, Optional[str]] = {}
+    for code in list(range(0x00C0, 0x0250)) + list(range(0x1E00, 0x1F00)):
+        ch = chr(code)
+        stripped = "".join(c for c in unicodedata.normalize('NFD', ch) if not unicodedata.combining(c))
+        if stripped != ch:
+            table[code] = stripped
+    for code in range(0x0300, 0x0370):  # samostatné kombinující znaky
+        if unicodedata.combining(chr(code)):
+            table[code] = None
+    return table
+
+
+_DIACRITICS_TABLE = _build_diacritics_table()
+
+
+@lru_cache(maxsize=8192)
+def normalize_word(word: str) -> str:
+    """
+    Normalize word for comparison - lowercase, strip, remove extra spaces and diacritics.
+    """
+    translated = word.translate(_DIACRITICS_TABLE)
+    if not translated.isascii():
+        # Mimo předpočítanou tabulku - obecná (pomalejší) cesta
+        nfkd_form = unicodedata.normalize('NFD', translated)
+        translated = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
+    return translated.strip().lower()
+
+
+class WordPackage:
+    """One package: immutable word tuples per category plus their normalized forms."""
+
+    __slots__ = ("name", "categories", "normalized")
+
+    def __init__(self, name: str, categories: Dict[str, Tuple[str, ...]]):
+        self.name = name
+        self.categories = categories
+        # Slovo i každé jeho slovo zvlášť (Činnost je víceslovná) -> normalizovaný tvar
+        normalized: Dict[str, str] = {}
+        for words in categories.values():
+            for word in words:
+                normalized[word] = _normalize_uncached(word)
+                for token in word.split():
+                    if token not in normalized:
+                        normalized[token] = _normalize_uncached(token)
+        self.normalized: Mapping[str, str] = normalized
+
+
+def _normalize_uncached(word: str) -> str:
+    # Při načítání desítek tisíc slov by lru_cache jen vytlačoval slova z běžících her
+    return normalize_word.__wrapped__(word)
+
+
+def parse_packages(data: dict) -> Dict[str, WordPackage]:
+    """Validate raw JSON and build packages; invalid packages are skipped with a warning."""
+    packages: Dict[str, WordPackage] = {}
+    if not isinstance(data, dict):
+        raise ValueError("balíčky slov musí být JSON objekt")
+    for name, raw in data.items():
+        if not isinstance(raw, dict):
+            print(f"Warning: word package {name!r} skipped - not an object")
+            continue
+        categories = {}
+        for category in CATEGORIES:
+            words = raw.get(category)
+            if not isinstance(words, list):
+                break
+            # Duplicitní slova by v balíčku karet padala častěji
+            unique = tuple(dict.fromkeys(w.strip() for w in words if isinstance(w, str) and w.strip()))
+            if not unique:
+                break
+            categories[category] = unique
+        else:
+            packages[name] = WordPackage(name, categories)
+            continue
+        print(f"Warning: word package {name!r} skipped - category {category!r} missing or empty")
+    return packages
+
+
+class WordStore:
+    """Loaded word packages with atomic hot reload."""
+
+    def __init__(self, path: Path, fallback: Optional[dict] = None):
+        self.path = path
+        self.fallback = fallback or {}
+        # (balíčky, jména) - jedna dvojice, aby ji vlákno s reloadem vyměnilo jedním přiřazením
+        self._state: Tuple[Dict[str, WordPackage], Tuple[str, ...]] = ({}, ())
+        self._signature = None
+        self.version = 0
+
+    def _files(self) -> List[Path]:
+        if self.path.is_dir():
+            return sorted(self.path.glob("*.json"))
+        return [self.path] if self.path.exists() else []
+
+    def _current_signature(self):
+        signature = []
+        for file in self._files():
+            stat = file.stat()
+            signature.append((str(file), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def load(self):
+        """(Re)load all package files. On any error the previous packages stay active."""
+        files = self._files()
+        signature = self._current_signature()
+        if files:
+            data: dict = {}
+            for file in files:
+                with open(file, "r", encoding="utf-8") as f:
+                    data.update(json.load(f))
+        else:
+            print(f"Error: {self.path} not found! Using fallback words.")
+            data = self.fallback
+        packages = parse_packages(data)
+        if not packages:
+            raise ValueError(f"{self.path}: žádný platný balíček slov")
+        # Jediné přiřazení - čtenáři vidí buď starou, nebo celou novou sadu
+        self._state = (packages, tuple(packages))
+        self._signature = signature
+        self.version += 1
+
+    def reload_if_changed(self) -> bool:
+        signature = self._signature
+        try:
+            signature = self._current_signature()
+            if not signature or signature == self._signature:
+                # Smazaný soubor neznamená prázdnou hru - platí dál poslední načtená verze
+                return False
+            self.load()
+        except (OSError, ValueError) as e:  # json.JSONDecodeError je ValueError
+            print(f"Warning: word packages not reloaded: {e}")
+            # Stejný chybný soubor nezkoušíme znovu, dokud se nezmění
+            self._signature = signature
+            return False
+        print(f"Word packages reloaded (version {self.version}): {', '.join(self.names)}")
+        return True
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return self._state[1]
+
+    @property
+    def default_name(self) -> str:
+        return self._state[1][0]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._state[0]
+
+    def get(self, name: str) -> WordPackage:
+        packages, names = self._state
+        package = packages.get(name)
+        return package if package is not None else packages[names[0]]
+
+
+class Deck:
+    """Draws words of one category without repeats until all were drawn (lazy Fisher-Yates)."""
+
+    __slots__ = ("words", "remaining", "_swaps")
+
+    def __init__(self, words: Tuple[str, ...]):
+        self.words = words
+        self.remaining = len(words)
+        # Jen pozice, které už se prohodily - zbytek pole je implicitně identita
+        self._swaps: Dict[int, int] = {}
+
+    def draw(self) -> str:
+        if self.remaining == 0:
+            self.reshuffle()
+        last = self.remaining - 1
+        j = random.randrange(self.remaining)
+        picked = self._swaps.get(j, j)
+        moved = self._swaps.pop(last, last)
+        if j != last:
+            self._swaps[j] = moved
+        self.remaining = last
+        return self.words[picked]
+
+    def draw_many(self, count: int) -> List[str]:
+        count = min(count, len(self.words))
+        if self.remaining < count:
+            # Začneme nový průchod, aby se v jedné nabídce slovo neopakovalo
+            self.reshuffle()
+        return [self.draw() for _ in range(count)]
+
+    def reshuffle(self):
+        self.remaining = len(self.words)
+        self._swaps.clear()
+
+
+class RoomDecks:
+    """A room's decks, one per category, bound to the package they were dealt from."""
+
+    __slots__ = ("package", "decks")
+
+    def __init__(self, package: WordPackage):
+        self.package = package
+        self.decks = {category: Deck(words) for category, words in package.categories.items()}
+
+    def options(self, per_category: int = 3) -> Dict[str, List[str]]:
+        return {category: deck.draw_many(per_category) for category, deck in self.decks.items()}
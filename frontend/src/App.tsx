@@ -1,31 +1,43 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import Lobby from './components/Lobby';
 import Game from './components/Game';
 import Leaderboards from './components/Leaderboards';
 import { config } from './config';
+import { installFrameInflater } from './components/frameCompression';
 import './App.css';
 
+// Po restartu serveru (kód 1012) se hra obnoví ze snímku - připojíme se znovu se stejným jménem.
+// Než nový server naběhne, pokusy končí 1006, proto jich je víc a s rostoucím odstupem.
+const RECONNECT_DELAYS = [1000, 2000, 4000, 8000, 8000];
+
 function App() {
   const [socket, setSocket] = useState<WebSocket | null>(null);
   const [username, setUsername] = useState('');
   const [gameCode, setGameCode] = useState('');
   const [inGame, setInGame] = useState(false);
+  const [spectator, setSpectator] = useState(false);
   const [connectionError, setConnectionError] = useState<string | null>(null);
   const [isConnecting, setIsConnecting] = useState(false);
+  const [reconnectKey, setReconnectKey] = useState(0);
+  const reconnectAttempts = useRef(0);
 
-  const handleJoinGame = (username: string, gameCode: string) => {
+  const handleJoinGame = (username: string, gameCode: string, watch = false) => {
     setUsername(username);
+    setSpectator(watch);
     setGameCode(gameCode.toUpperCase().trim());
     setInGame(true);
     setConnectionError(null);
+    reconnectAttempts.current = 0;
   };
 
   const handleCreateGame = (username: string) => {
     const newGameCode = Math.random().toString(36).substring(2, 8).toUpperCase();
     setUsername(username);
+    setSpectator(false);
     setGameCode(newGameCode);
     setInGame(true);
     setConnectionError(null);
+    reconnectAttempts.current = 0;
   };
 
   useEffect(() => {
@@ -33,11 +45,12 @@ function App() {
       setIsConnecting(true);
       setConnectionError(null);
       
-      const backendWsUrl = config.websocket.getGameUrl(gameCode, username);
+      const backendWsUrl = config.websocket.getGameUrl(gameCode, username, spectator);
 
       let ws: WebSocket;
       try {
         ws = new WebSocket(backendWsUrl);
+        installFrameInflater(ws);
       } catch (err) {
         console.error('WebSocket construction failed:', err);
         setIsConnecting(false);
@@ -47,6 +60,7 @@ function App() {
 
       ws.onopen = () => {
         console.log('WebSocket connected');
+        reconnectAttempts.current = 0;
         setIsConnecting(false);
         setConnectionError(null);
       };
@@ -60,6 +74,14 @@ function App() {
       ws.onclose = (event) => {
         console.log('WebSocket disconnected', event.code, event.reason);
         setIsConnecting(false);
+
+        const attempt = reconnectAttempts.current;
+        if (attempt < RECONNECT_DELAYS.length && (event.code === 1012 || (attempt > 0 && event.code === 1006))) {
+          reconnectAttempts.current = attempt + 1;
+          // Náhodný rozptyl, ať se celý server nepřipojuje ve stejné milisekundě
+          setTimeout(() => setReconnectKey((key) => key + 1), RECONNECT_DELAYS[attempt] + Math.random() * 1000);
+          return;
+        }
         
         // Only show error if it wasn't a normal closure
         if (event.code !== 1000 && event.code !== 1001) {
@@ -89,7 +111,7 @@ function App() {
         }
       };
     }
-  }, [inGame, username, gameCode]);
+  }, [inGame, username, gameCode, spectator, reconnectKey]);
 
   return (
     <div className="App bg-gray-800 text-white min-h-screen flex items-center justify-center p-4">
@@ -98,6 +120,7 @@ function App() {
           <Lobby
             onJoinGame={handleJoinGame}
             onCreateGame={handleCreateGame}
+            onWatchGame={(username, gameCode) => handleJoinGame(username, gameCode, true)}
             connectionError={connectionError}
             isConnecting={isConnecting}
             onDismissError={() => setConnectionError(null)}
@@ -107,7 +130,7 @@ function App() {
           </div>
         </div>
       ) : (
-        <Game socket={socket} username={username} gameCode={gameCode} />
+        <Game socket={socket} username={username} gameCode={gameCode} spectator={spectator} />
       )}
     </div>
   );
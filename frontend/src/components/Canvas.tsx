@@ -1,27 +1,22 @@
 import React, { useEffect, forwardRef, useRef } from 'react';
-
-interface Segment {
-  x0: number;
-  y0: number;
-  x1: number;
-  y1: number;
-  color: string;
-  lineWidth: number;
-}
+import { encodeStrokeChunk, STROKE_BEGIN, STROKE_END } from './strokeProtocol';
 
 interface CanvasProps {
   isArtist: boolean;
-  sendMessage: (message: object) => void;
+  sendBinary: (data: ArrayBuffer) => void;
   color: string;
   brushSize: number;
 }
 
 const Canvas = forwardRef<HTMLCanvasElement, CanvasProps>(
-  ({ isArtist, sendMessage, color, brushSize }, ref) => {
+  ({ isArtist, sendBinary, color, brushSize }, ref) => {
     const drawing = useRef(false);
     const lastPoint = useRef<{ x: number; y: number } | null>(null);
     const pointerIdRef = useRef<number | null>(null);
-    const sendBuffer = useRef<Segment[]>([]);
+    // Body aktuálního tahu čekající na odeslání (absolutní souřadnice x, y, x, y, ...)
+    const sendBuffer = useRef<number[]>([]);
+    const strokeId = useRef(0);
+    const strokeStarted = useRef(false);
     const lastSendTime = useRef<number>(0);
     const throttleMs = 33; // ~30fps throttling
 
@@ -78,28 +73,38 @@ const Canvas = forwardRef<HTMLCanvasElement, CanvasProps>(
       ctx.closePath();
     };
 
-    // Throttled sender: send latest segment from buffer every throttleMs
+    // Send all buffered points of the current stroke as one binary chunk.
+    // Style goes only with the first chunk of a stroke (STROKE_BEGIN).
+    const flushStroke = (end: boolean) => {
+      const points = sendBuffer.current;
+      if (points.length === 0 && !end) return;
+      if (points.length === 0 && lastPoint.current) {
+        points.push(lastPoint.current.x, lastPoint.current.y);
+      }
+      if (points.length === 0) return;
+      const flags = (strokeStarted.current ? 0 : STROKE_BEGIN) | (end ? STROKE_END : 0);
+      try {
+        sendBinary(encodeStrokeChunk(strokeId.current, flags, { color, lineWidth: brushSize }, points));
+      } catch (e) {
+        // sendBinary should handle socket errors; swallow here
+      }
+      strokeStarted.current = true;
+      sendBuffer.current = [];
+      lastSendTime.current = performance.now();
+    };
+
+    // Throttled sender: batch all points collected in the last throttleMs into one frame
     const scheduleSend = () => {
       const now = performance.now();
       if (now - lastSendTime.current >= throttleMs) {
-        const buf = sendBuffer.current;
-        if (buf.length > 0) {
-          const seg = buf[buf.length - 1]; // send most recent segment (delta compression)
-          try {
-            sendMessage({ type: 'drawing_data', data: seg });
-          } catch (e) {
-            // sendMessage should handle socket errors; swallow here
-          }
-          sendBuffer.current = [];
-          lastSendTime.current = now;
-        }
+        flushStroke(false);
       } else {
         // schedule a timeout to attempt later if not already scheduled
         if ((scheduleSend as any)._timer) return;
         const wait = throttleMs - (now - lastSendTime.current);
         (scheduleSend as any)._timer = window.setTimeout(() => {
           (scheduleSend as any)._timer = null;
-          scheduleSend();
+          if (drawing.current) flushStroke(false);
         }, wait);
       }
     };
@@ -124,6 +129,10 @@ const Canvas = forwardRef<HTMLCanvasElement, CanvasProps>(
         canvas.setPointerCapture(e.pointerId);
         const pos = getPos(e);
         lastPoint.current = pos;
+        strokeId.current = (strokeId.current + 1) & 0xffff;
+        strokeStarted.current = false;
+        sendBuffer.current = [pos.x, pos.y];
+        scheduleSend();
         if (ctx) {
           ctx.strokeStyle = color;
           ctx.lineWidth = brushSize;
@@ -148,8 +157,8 @@ const Canvas = forwardRef<HTMLCanvasElement, CanvasProps>(
         ctx.lineWidth = brushSize;
         drawSmooth(ctx, lp, pos);
 
-        // enqueue segment for sending (raw delta)
-        sendBuffer.current.push({ x0: lp.x, y0: lp.y, x1: pos.x, y1: pos.y, color, lineWidth: brushSize });
+        // enqueue point for the next batched chunk
+        sendBuffer.current.push(pos.x, pos.y);
         lastPoint.current = pos;
 
         scheduleSend();
@@ -165,15 +174,9 @@ const Canvas = forwardRef<HTMLCanvasElement, CanvasProps>(
           } catch {}
         }
         pointerIdRef.current = null;
+        // flush remaining points immediately and close the stroke
+        flushStroke(true);
         lastPoint.current = null;
-        // flush remaining segments immediately
-        const buf = sendBuffer.current;
-        if (buf.length > 0) {
-          const seg = buf[buf.length - 1];
-          try { sendMessage({ type: 'drawing_data', data: seg }); } catch {}
-          sendBuffer.current = [];
-          lastSendTime.current = performance.now();
-        }
         if (ctx) ctx.closePath();
       };
 
@@ -188,7 +191,7 @@ const Canvas = forwardRef<HTMLCanvasElement, CanvasProps>(
         window.removeEventListener('pointerup', endDrawing);
         window.removeEventListener('pointercancel', endDrawing);
       };
-    }, [ref, isArtist, color, brushSize, sendMessage]);
+    }, [ref, isArtist, color, brushSize, sendBinary]);
 
     // Render canvas
     return (
@@ -14,9 +14,10 @@ interface ChatBoxProps {
   messages: ChatMessage[];
   onSendMessage: (message: string) => void;
   isArtist: boolean;
+  spectator?: boolean;
 }
 
-const ChatBox: React.FC<ChatBoxProps> = ({ messages, onSendMessage, isArtist }) => {
+const ChatBox: React.FC<ChatBoxProps> = ({ messages, onSendMessage, isArtist, spectator = false }) => {
   const [guess, setGuess] = useState('');
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
@@ -30,7 +31,7 @@ const ChatBox: React.FC<ChatBoxProps> = ({ messages, onSendMessage, isArtist })
 
   const handleGuessSubmit = (e: React.FormEvent) => {
     e.preventDefault();
-    if (guess.trim() && !isArtist) {
+    if (guess.trim() && !isArtist && !spectator) {
       onSendMessage(guess);
       setGuess('');
     }
@@ -87,9 +88,9 @@ const ChatBox: React.FC<ChatBoxProps> = ({ messages, onSendMessage, isArtist })
           value={guess}
           onChange={(e) => setGuess(e.target.value)}
           className="w-full bg-gray-800 border border-gray-500 rounded-md px-3 py-2 text-white placeholder-gray-400 focus:outline-none focus:ring-2 focus:ring-blue-500 transition-all"
-          placeholder={isArtist ? 'Jsi umělec, nemůžeš hádat.' : 'Napiš svůj tip...'}
-          disabled={isArtist}
-          autoFocus={!isArtist}
+          placeholder={spectator ? 'Sleduješ hru, nemůžeš hádat.' : isArtist ? 'Jsi umělec, nemůžeš hádat.' : 'Napiš svůj tip...'}
+          disabled={isArtist || spectator}
+          autoFocus={!isArtist && !spectator}
         />
       </form>
     </div>
@@ -9,6 +9,7 @@ import Timer from './Timer';
 import GameLobby from './GameLobby';
 import Toolbar from './Toolbar';
 import { useWebSocket } from './useWebSocket';
+import { StrokeRenderer } from './strokeProtocol';
 
 export interface Player {
   username: string;
@@ -32,10 +33,11 @@ interface GameProps {
   socket: WebSocket;
   username: string;
   gameCode: string;
+  spectator?: boolean;
 }
 
-const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
-  const { lastMessage, sendMessage } = useWebSocket(socket);
+const Game: React.FC<GameProps> = ({ socket, username, gameCode, spectator = false }) => {
+  const { lastMessage, sendMessage, sendBinary } = useWebSocket(socket);
 
   const [gameState, setGameState] = useState<GameState>({
     players: [],
@@ -53,6 +55,7 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
   const [chatMessages, setChatMessages] = useState<ChatMessage[]>([]);
   const [wordOptions, setWordOptions] = useState<Record<string, string[]> | null>(null);
   const canvasRef = useRef<HTMLCanvasElement>(null);
+  const strokeRenderer = useRef(new StrokeRenderer());
   const [availablePackages, setAvailablePackages] = useState<string[]>([]);
   const [selectedPackage, setSelectedPackage] = useState<string>('');
   const [pointsAnimation, setPointsAnimation] = useState<{ username: string; points: number; bonus: number } | null>(null);
@@ -84,98 +87,137 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
     return null;
   };
 
+  // Binární rámce s tahy kreslíme hned, mimo React stav, aby se žádný neztratil
   useEffect(() => {
-    if (lastMessage) {
-      switch (lastMessage.type) {
+    const handleBinary = (event: MessageEvent) => {
+      if (!(event.data instanceof ArrayBuffer)) return;
+      const context = canvasRef.current?.getContext('2d');
+      if (context) strokeRenderer.current.drawFrame(context, event.data);
+    };
+    socket.addEventListener('message', handleBinary);
+    return () => socket.removeEventListener('message', handleBinary);
+  }, [socket]);
+
+  useEffect(() => {
+    if (!lastMessage) return;
+
+    const handleMessage = (message: any) => {
+      switch (message.type) {
         case 'player_joined':
         case 'player_left':
           setGameState((prevState) => ({
             ...prevState,
-            players: lastMessage.players ?? prevState.players,
-            host: lastMessage.host ?? prevState.host,
+            players: message.players ?? prevState.players,
+            host: message.host ?? prevState.host,
+          }));
+          break;
+        case 'lobby_state':
+          // Divák se připojil do lobby
+          setGameState((prevState) => ({
+            ...prevState,
+            players: message.players ?? prevState.players,
+            host: message.host ?? prevState.host,
+            selected_package: message.selected_package ?? prevState.selected_package,
           }));
           break;
         case 'new_host':
-          setGameState((prevState) => ({ ...prevState, host: lastMessage.host }));
+          setGameState((prevState) => ({ ...prevState, host: message.host }));
           break;
         case 'package_selected':
-          setGameState((prevState) => ({ ...prevState, selected_package: lastMessage.package }));
+          setGameState((prevState) => ({ ...prevState, selected_package: message.package }));
           break;
         case 'round_start':
           setGameState((prevState) => ({
             ...prevState,
-            current_round: lastMessage.round,
-            total_rounds: lastMessage.total_rounds,
-            current_artist: lastMessage.artist,
+            current_round: message.round,
+            total_rounds: message.total_rounds,
+            current_artist: message.artist,
             game_started: true,
             masked_phrase: '',
             full_phrase: '',
           }));
           setWordOptions(null);
           setChatMessages([]);
-          setRoundDuration(lastMessage.duration ?? 90);
+          setRoundDuration(message.duration ?? 90);
           setGuessedPlayers(new Set());
           break;
+        case 'game_state_sync':
+          // Návrat do rozehrané hry; plátno dorazí hned potom jako binární snímek
+          setGameState((prevState) => ({
+            ...prevState,
+            players: message.players ?? prevState.players,
+            host: message.host ?? prevState.host,
+            scores: message.scores ?? prevState.scores,
+            current_round: message.round,
+            total_rounds: message.total_rounds,
+            current_artist: message.artist,
+            masked_phrase: message.masked_phrase ?? '',
+            full_phrase: message.full_phrase ?? '',
+            game_started: true,
+          }));
+          setRoundDuration(message.time_left ?? 0);
+          break;
         case 'phrase_selected':
           setGameState((prevState) => ({
             ...prevState,
-            masked_phrase: lastMessage.masked_phrase ?? prevState.masked_phrase,
-            full_phrase: lastMessage.full_phrase ?? prevState.full_phrase,
+            masked_phrase: message.masked_phrase ?? prevState.masked_phrase,
+            full_phrase: message.full_phrase ?? prevState.full_phrase,
           }));
           break;
         case 'word_guessed':
-          setGuessedPlayers(prev => new Set(prev).add(lastMessage.guesser));
+          setGuessedPlayers(prev => new Set(prev).add(message.guesser));
 
-          const speedBonus = lastMessage.speed_bonus || 0;
+          const speedBonus = message.speed_bonus || 0;
           const bonusInfo = getBonusTierInfo(speedBonus);
           const chatMessageText = bonusInfo
-            ? `Uhodl slovo "${lastMessage.word}"! (${bonusInfo.icon} ${bonusInfo.name} +${speedBonus} bodů)`
-            : `Uhodl slovo "${lastMessage.word}"! (+${lastMessage.points_earned} bodů)`;
+            ? `Uhodl slovo "${message.word}"! (${bonusInfo.icon} ${bonusInfo.name} +${speedBonus} bodů)`
+            : `Uhodl slovo "${message.word}"! (+${message.points_earned} bodů)`;
 
           setChatMessages((prevMessages) => [
             ...prevMessages,
             {
-              username: lastMessage.guesser,
+              username: message.guesser,
               message: chatMessageText,
               type: 'correct',
             },
           ]);
-          if (lastMessage.points_earned) {
+          if (message.points_earned) {
             setPointsAnimation({
-              username: lastMessage.guesser,
-              points: lastMessage.points_earned,
+              username: message.guesser,
+              points: message.points_earned,
               bonus: speedBonus,
             });
             setTimeout(() => setPointsAnimation(null), 2000);
           }
           setGameState((prevState) => ({
             ...prevState,
-            masked_phrase: lastMessage.revealed_phrase,
-            scores: lastMessage.scores ?? prevState.scores,
+            masked_phrase: message.revealed_phrase,
+            scores: message.scores ?? prevState.scores,
           }));
           break;
         case 'round_end':
           setGameState((prevState) => ({
             ...prevState,
-            masked_phrase: lastMessage.full_phrase ?? prevState.masked_phrase,
-            scores: lastMessage.scores ?? prevState.scores,
+            masked_phrase: message.full_phrase ?? prevState.masked_phrase,
+            scores: message.scores ?? prevState.scores,
           }));
           setRoundDuration(0);
           break;
         case 'game_end':
           setGameState((prevState) => ({
             ...prevState,
-            scores: lastMessage.final_scores ?? prevState.scores,
+            scores: message.final_scores ?? prevState.scores,
             game_over: true,
           }));
           setRoundDuration(0);
           break;
         case 'drawing_update':
+          // Starý formát - jeden segment v JSON zprávě
           const canvas = canvasRef.current;
           if (canvas) {
             const context = canvas.getContext('2d');
             if (context) {
-              const { x0, y0, x1, y1, color, lineWidth } = lastMessage.data;
+              const { x0, y0, x1, y1, color, lineWidth } = message.data;
               context.beginPath();
               context.moveTo(x0, y0);
               context.lineTo(x1, y1);
@@ -187,13 +229,13 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
           }
           break;
         case 'available_packages':
-          const currentPackage = lastMessage.selected_package ?? '';
-          setAvailablePackages(lastMessage.packages ?? []);
+          const currentPackage = message.selected_package ?? '';
+          setAvailablePackages(message.packages ?? []);
           setGameState((prevState) => ({ ...prevState, selected_package: currentPackage }));
           setSelectedPackage(currentPackage);
           break;
         case 'select_phrase_options':
-          setWordOptions(lastMessage.words);
+          setWordOptions(message.words);
           break;
         case 'canvas_cleared':
           const canvasElem = canvasRef.current;
@@ -201,11 +243,27 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
             const context = canvasElem.getContext('2d');
             context?.clearRect(0, 0, canvasElem.width, canvasElem.height);
           }
+          strokeRenderer.current.reset();
           break;
         case 'chat_message':
-          setChatMessages((prevMessages) => [...prevMessages, { username: lastMessage.username, message: lastMessage.message, type: 'guess' }]);
+          setChatMessages((prevMessages) => [...prevMessages, { username: message.username, message: message.message, type: 'guess' }]);
           break;
       }
+    };
+
+    // Chat, tipy a změny skóre posílá server po ticích jako jednu dávku; skóre v ní jsou rozdíly
+    if (lastMessage.type === 'room_batch') {
+      lastMessage.events.forEach(handleMessage);
+      const deltas: Record<string, number> = lastMessage.scores_delta ?? {};
+      if (Object.keys(deltas).length > 0) {
+        setGameState((prevState) => {
+          const scores = { ...prevState.scores };
+          for (const [name, delta] of Object.entries(deltas)) scores[name] = (scores[name] ?? 0) + delta;
+          return { ...prevState, scores };
+        });
+      }
+    } else {
+      handleMessage(lastMessage);
     }
   }, [lastMessage]);
   const handleSendMessage = useCallback((message: string) => {
@@ -238,6 +296,10 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
     setBrushSize(newSize);
   }, []);
 
+  // Divák může mít stejné jméno jako hráč - kreslit ani řídit hru ale nesmí
+  const isArtist = !spectator && username === gameState.current_artist;
+  const isHost = !spectator && username === gameState.host;
+
   if (!gameState.players.length && !gameState.game_started) {
     return <div>Načítání...</div>;
   }
@@ -255,8 +317,8 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
             <div className={`${canvasFullscreen ? 'w-full h-full' : 'w-full h-[60vh] md:h-full'}`}>
               <Canvas
                 ref={canvasRef}
-                isArtist={username === gameState.current_artist}
-                sendMessage={sendMessage}
+                isArtist={isArtist}
+                sendBinary={sendBinary}
                 color={color}
                 brushSize={brushSize}
               />
@@ -271,10 +333,10 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
           <div className="absolute bottom-4 left-4 flex gap-2 md:hidden z-60">
             <button onClick={() => { setMobileShowChat(true); setMobileShowScores(false); setMobileShowLobby(false); }} className="bg-blue-600 text-white px-3 py-2 rounded-md shadow">Chat</button>
             <button onClick={() => { setMobileShowScores(true); setMobileShowChat(false); setMobileShowLobby(false); }} className="bg-green-600 text-white px-3 py-2 rounded-md shadow">Skóre</button>
-            {username === gameState.current_artist && (
+            {isArtist && (
               <button onClick={() => { setMobileShowToolbar((s) => !s); setMobileShowChat(false); setMobileShowScores(false); setMobileShowLobby(false); }} className="bg-yellow-600 text-white px-3 py-2 rounded-md shadow">Nástroje</button>
             )}
-            {!gameState.game_started && username === gameState.host && (
+            {!gameState.game_started && isHost && (
               <button onClick={() => { setMobileShowLobby(true); setMobileShowChat(false); setMobileShowScores(false); }} className="bg-indigo-600 text-white px-3 py-2 rounded-md shadow">Lobby</button>
             )}
             <button onClick={() => { setCanvasFullscreen(true); setMobileShowChat(false); setMobileShowScores(false); setMobileShowToolbar(false); setMobileShowLobby(false); }} className="bg-gray-800 text-white px-3 py-2 rounded-md shadow">Plátno</button>
@@ -284,7 +346,7 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
         </div>
 
         {/* Mobile floating toolbar (visible for artist) */}
-        {username === gameState.current_artist && mobileShowToolbar && (
+        {isArtist && mobileShowToolbar && (
           <div className="fixed left-0 right-0 bottom-0 z-70 md:hidden">
             <div className="mx-4 mb-4 bg-gray-800 p-3 rounded-xl shadow-xl flex justify-between items-center" style={{ height: MOBILE_TOOLBAR_HEIGHT }}>
               <Toolbar
@@ -300,7 +362,7 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
         )}
 
         {/* Desktop toolbar under canvas */}
-        {username === gameState.current_artist && (
+        {isArtist && (
           <div className="hidden md:block flex-shrink-0 bg-gray-600 p-3 rounded-xl shadow-md">
             <Toolbar
               onClearCanvas={handleClearCanvas}
@@ -318,7 +380,7 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
         {!gameState.game_started ? (
           <GameLobby
             gameCode={gameCode}
-            isHost={username === gameState.host}
+            isHost={isHost}
             playerCount={gameState.players.length}
             availablePackages={availablePackages}
             selectedPackage={selectedPackage || gameState.selected_package}
@@ -331,11 +393,11 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
               Kolo: {gameState.current_round}/{gameState.total_rounds}
             </h2>
             <div className="flex justify-between items-center mt-1">
-              <p className="text-sm">Kreslí: {gameState.current_artist}</p>
+              <p className="text-sm">Kreslí: {gameState.current_artist}{spectator && ' · sleduješ jako divák'}</p>
               <Timer initialTime={roundDuration} />
             </div>
             <div className="mt-4 text-2xl font-bold tracking-widest break-words">
-              {username === gameState.current_artist && gameState.full_phrase
+              {isArtist && gameState.full_phrase
                 ? gameState.full_phrase
                 : gameState.masked_phrase}
             </div>
@@ -368,7 +430,8 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
           <ChatBox
             messages={chatMessages}
             onSendMessage={handleSendMessage}
-            isArtist={username === gameState.current_artist}
+            isArtist={isArtist}
+            spectator={spectator}
           />
         </div>
       </aside>
@@ -381,7 +444,7 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
               <h3 className="font-bold">Chat</h3>
               <div className="flex gap-2">
                 <button onClick={() => setMobileShowChat(false)} className="text-gray-300">Zavřít</button>
-                {username === gameState.current_artist && (
+                {isArtist && (
                   <button onClick={() => { setMobileShowToolbar(true); }} className="text-yellow-200">Nástroje</button>
                 )}
               </div>
@@ -389,7 +452,8 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
             <ChatBox
               messages={chatMessages}
               onSendMessage={(m) => { handleSendMessage(m); setMobileShowChat(false); }}
-              isArtist={username === gameState.current_artist}
+              isArtist={isArtist}
+              spectator={spectator}
             />
           </div>
         </div>
@@ -424,7 +488,7 @@ const Game: React.FC<GameProps> = ({ socket, username, gameCode }) => {
             </div>
             <GameLobby
               gameCode={gameCode}
-              isHost={username === gameState.host}
+              isHost={isHost}
               playerCount={gameState.players.length}
               availablePackages={availablePackages}
               selectedPackage={selectedPackage || gameState.selected_package}
@@ -29,6 +29,14 @@ interface RecentGame {
   played_at?: string; // alias
 }
 
+interface GameDrawing {
+  round: number;
+  artist: string;
+  phrase: string;
+  width: number;
+  height: number;
+}
+
 const Leaderboards: React.FC = () => {
   const [agg, setAgg] = useState<AggEntry[]>([]);
   const [rank, setRank] = useState<RankEntry[]>([]);
@@ -38,9 +46,11 @@ const Leaderboards: React.FC = () => {
   const [loadingRecent, setLoadingRecent] = useState(true);
   const [showAll, setShowAll] = useState(false);
   const [selectedGame, setSelectedGame] = useState<RecentGame | null>(null);
+  const [drawings, setDrawings] = useState<GameDrawing[]>([]);
 
   // pagination for all results (client-side)
   const [page, setPage] = useState(1);
+  const [hasMore, setHasMore] = useState(false);
   const pageSize = 20;
 
   useEffect(() => {
@@ -64,6 +74,24 @@ const Leaderboards: React.FC = () => {
     fetchData();
   }, []);
 
+  // Kresby z kol vybrané hry (galerie); obrázky si prohlížeč cachuje natrvalo
+  useEffect(() => {
+    setDrawings([]);
+    if (!selectedGame) return;
+    let cancelled = false;
+    const fetchDrawings = async () => {
+      try {
+        const backendBase = config.api.baseUrl;
+        const res = await fetch(`${backendBase}${config.api.endpoints.gameDrawings(selectedGame.id)}?limit=50`);
+        if (res.ok && !cancelled) setDrawings((await res.json()).drawings ?? []);
+      } catch (e) {
+        console.error('Failed to load drawings', e);
+      }
+    };
+    fetchDrawings();
+    return () => { cancelled = true; };
+  }, [selectedGame]);
+
   useEffect(() => {
     const fetchRecent = async () => {
       setLoadingRecent(true);
@@ -85,23 +113,46 @@ const Leaderboards: React.FC = () => {
     fetchRecent();
   }, []);
 
+  // Stránkuje se kurzorem: další stránka = hry se starším id než poslední načtená
+  const fetchGamesPage = async (before?: number | string): Promise<RecentGame[]> => {
+    const backendBase = config.api.baseUrl;
+    const cursor = before !== undefined ? `&before=${before}` : '';
+    const res = await fetch(`${backendBase}${config.api.endpoints.games}?limit=${pageSize}${cursor}`);
+    if (!res.ok) return [];
+    const data = await res.json();
+    setHasMore(data.length === pageSize);
+    return data.map((g: any) => ({ ...g, played_at: g.timestamp }));
+  };
+
   const openAllResults = async () => {
     setShowAll(true);
     setPage(1);
+    setAllResults([]);
     try {
-      const backendBase = config.api.baseUrl;
-
-      const res = await fetch(`${backendBase}${config.api.endpoints.games}?limit=1000`);
-      if (res.ok) {
-        const data = await res.json();
-        setAllResults(data.map((g: any) => ({ ...g, played_at: g.timestamp })));
-      }
+      setAllResults(await fetchGamesPage());
     } catch (e) {
       console.error('Failed to load all results', e);
     }
   };
 
-  const totalPages = useMemo(() => Math.max(1, Math.ceil(allResults.length / pageSize)), [allResults.length]);
+  const loadedPages = useMemo(() => Math.max(1, Math.ceil(allResults.length / pageSize)), [allResults.length]);
+
+  const nextPage = async () => {
+    if (page < loadedPages) {
+      setPage(page + 1);
+      return;
+    }
+    if (!hasMore || allResults.length === 0) return;
+    try {
+      const more = await fetchGamesPage(allResults[allResults.length - 1].id);
+      if (more.length > 0) {
+        setAllResults(prev => [...prev, ...more]);
+        setPage(page + 1);
+      }
+    } catch (e) {
+      console.error('Failed to load more results', e);
+    }
+  };
   const currentPageResults = useMemo(() => {
     const start = (page - 1) * pageSize;
     return allResults.slice(start, start + pageSize);
@@ -238,12 +289,11 @@ const Leaderboards: React.FC = () => {
             </div>
 
             <div className="mt-4 flex items-center justify-between">
-              <div className="text-sm text-gray-300">Strana {page} / {totalPages}</div>
+              <div className="text-sm text-gray-300">Strana {page}{!hasMore && ` / ${loadedPages}`}</div>
               <div className="flex gap-2">
                 <button onClick={() => setPage(1)} disabled={page === 1} className="px-3 py-1 bg-gray-700 rounded disabled:opacity-50">Prvn�</button>
                 <button onClick={() => setPage(p => Math.max(1, p - 1))} disabled={page === 1} className="px-3 py-1 bg-gray-700 rounded disabled:opacity-50">P�edchoz�</button>
-                <button onClick={() => setPage(p => Math.min(totalPages, p + 1))} disabled={page === totalPages} className="px-3 py-1 bg-gray-700 rounded disabled:opacity-50">Dal��</button>
-                <button onClick={() => setPage(totalPages)} disabled={page === totalPages} className="px-3 py-1 bg-gray-700 rounded disabled:opacity-50">Posledn�</button>
+                <button onClick={nextPage} disabled={page === loadedPages && !hasMore} className="px-3 py-1 bg-gray-700 rounded disabled:opacity-50">Dal��</button>
               </div>
             </div>
           </div>
@@ -280,6 +330,29 @@ const Leaderboards: React.FC = () => {
               )}
             </div>
 
+            {drawings.length > 0 && (
+              <div className="mt-4">
+                <h4 className="font-semibold mb-2">Kresby</h4>
+                <div className="flex gap-3 overflow-x-auto pb-2">
+                  {drawings.map((drawing) => (
+                    <figure key={drawing.round} className="flex-shrink-0 bg-gray-700 rounded p-2">
+                      <img
+                        src={`${config.api.baseUrl}${config.api.endpoints.gameDrawing(selectedGame.id, drawing.round)}`}
+                        width={drawing.width}
+                        height={drawing.height}
+                        loading="lazy"
+                        alt={drawing.phrase}
+                        className="rounded bg-white max-h-40 w-auto"
+                      />
+                      <figcaption className="text-xs text-gray-300 mt-1">
+                        {drawing.round}. kolo · {drawing.artist}: {drawing.phrase}
+                      </figcaption>
+                    </figure>
+                  ))}
+                </div>
+              </div>
+            )}
+
             <div className="mt-6 flex justify-end gap-3">
               <button onClick={() => setSelectedGame(null)} className="px-4 py-2 bg-gray-700 rounded hover:bg-gray-600">Zav��t</button>
               <button onClick={() => { setShowAll(true); setSelectedGame(null); }} className="px-4 py-2 bg-blue-600 rounded hover:bg-blue-700">Zobrazit v p�ehledu</button>
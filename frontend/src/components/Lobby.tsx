@@ -3,6 +3,7 @@ import React, { useState } from 'react';
 interface LobbyProps {
   onJoinGame: (username: string, gameCode: string) => void;
   onCreateGame: (username: string) => void;
+  onWatchGame: (username: string, gameCode: string) => void;
   connectionError?: string | null;
   isConnecting?: boolean;
   onDismissError?: () => void;
@@ -11,6 +12,7 @@ interface LobbyProps {
 const Lobby: React.FC<LobbyProps> = ({
   onJoinGame,
   onCreateGame,
+  onWatchGame,
   connectionError,
   isConnecting = false,
   onDismissError,
@@ -24,6 +26,12 @@ const Lobby: React.FC<LobbyProps> = ({
     }
   };
 
+  const handleWatch = () => {
+    if (username.trim() && gameCode.trim()) {
+      onWatchGame(username, gameCode);
+    }
+  };
+
   const handleCreate = () => {
     if (username.trim()) {
       onCreateGame(username);
@@ -87,6 +95,13 @@ const Lobby: React.FC<LobbyProps> = ({
               Připojit
             </button>
           </div>
+          <button
+            onClick={handleWatch}
+            disabled={!username.trim() || !gameCode.trim() || isConnecting}
+            className="w-full px-4 py-2 text-gray-200 bg-gray-600 rounded-lg hover:bg-gray-500 disabled:bg-gray-500 disabled:cursor-not-allowed text-sm transition-colors"
+          >
+            Jen sledovat hru
+          </button>
           <div className="relative flex items-center">
             <div className="flex-grow border-t border-gray-600"></div>
             <span className="flex-shrink mx-4 text-gray-400 text-sm">NEBO</span>
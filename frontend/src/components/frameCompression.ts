@@ -0,0 +1,56 @@
+// Komprimované rámce od serveru (viz backend/compression.py).
+//
+// Server komprimuje jen velké rámce a jen klientům, kteří si o to řekli parametrem
+// ?compress=deflate. Komprimovaný rámec je binární:
+//   u8  COMPRESSED_FRAME (0x5a)
+//   u8  druh původního rámce (0 = JSON text, 1 = rámec tahů)
+//   ... zlib stream původního rámce
+//
+// Dekomprese v prohlížeči (DecompressionStream) je asynchronní, proto se rámce, které
+// přijdou, než je ta předchozí hotová, podrží a předají se dál ve stejném pořadí.
+
+export const COMPRESSED_FRAME = 0x5a;
+const KIND_TEXT = 0;
+
+export const compressionSupported = typeof DecompressionStream !== 'undefined';
+
+export const isCompressedFrame = (buffer: ArrayBuffer): boolean =>
+  buffer.byteLength > 2 && new Uint8Array(buffer, 0, 1)[0] === COMPRESSED_FRAME;
+
+export const inflateFrame = async (buffer: ArrayBuffer): Promise<string | ArrayBuffer> => {
+  const kind = new Uint8Array(buffer, 1, 1)[0];
+  const stream = new Blob([buffer.slice(2)]).stream().pipeThrough(new DecompressionStream('deflate'));
+  const payload = await new Response(stream).arrayBuffer();
+  return kind === KIND_TEXT ? new TextDecoder().decode(payload) : payload;
+};
+
+/**
+ * Rozbalí komprimované rámce dřív, než je uvidí ostatní posluchači socketu.
+ * Musí se zaregistrovat jako první posluchač 'message' (hned po vytvoření socketu).
+ */
+export const installFrameInflater = (socket: WebSocket) => {
+  socket.binaryType = 'arraybuffer';
+  const replayed = new WeakSet<Event>();
+  let chain: Promise<void> = Promise.resolve();
+  let inFlight = 0;
+
+  const replay = (data: string | ArrayBuffer) => {
+    const event = new MessageEvent('message', { data });
+    replayed.add(event);
+    socket.dispatchEvent(event);
+  };
+
+  socket.addEventListener('message', (event: MessageEvent) => {
+    if (replayed.has(event)) return;
+    const compressed = event.data instanceof ArrayBuffer && isCompressedFrame(event.data);
+    // Běžný rámec, před kterým nic nečeká, jde dál rovnou
+    if (!compressed && inFlight === 0) return;
+    event.stopImmediatePropagation();
+    inFlight += 1;
+    const ready = compressed ? inflateFrame(event.data) : Promise.resolve(event.data);
+    chain = chain
+      .then(() => ready)
+      .then(replay, (err) => console.error('Failed to inflate frame', err))
+      .finally(() => { inFlight -= 1; });
+  });
+};
@@ -0,0 +1,172 @@
+// Binární protokol tahů (verze 2).
+//
+// Jeden rámec obsahuje jeden nebo více úseků tahu (chunků) za sebou. Little-endian:
+//   u8  verze (2)
+//   u8  příznaky (STROKE_BEGIN = nový tah a nese styl, STROKE_END = konec tahu,
+//       STROKE_RESET = snímek plátna od serveru, před vykreslením se plátno vyčistí)
+//   u16 id tahu
+//   [jen s STROKE_BEGIN] u8 r, u8 g, u8 b, u8 tloušťka čáry
+//   u16 počet bodů N
+//   i16 x 2N souřadnic - první bod absolutně (celé pixely), další jako delta od předchozího
+//
+// Barva a tloušťka se tak posílají jednou za tah a body jsou kvantizované na celé pixely.
+
+export const STROKE_PROTOCOL_VERSION = 2;
+export const STROKE_BEGIN = 0x01;
+export const STROKE_END = 0x02;
+export const STROKE_RESET = 0x04;
+
+export interface StrokeStyle {
+  color: string;
+  lineWidth: number;
+}
+
+export interface StrokeChunk {
+  strokeId: number;
+  flags: number;
+  style: StrokeStyle | null;
+  points: Int16Array; // absolutní souřadnice x0, y0, x1, y1, ...
+}
+
+const clampI16 = (v: number) => Math.max(-32768, Math.min(32767, v));
+
+const parseColor = (color: string): [number, number, number] => {
+  const hex = color.startsWith('#') ? color.slice(1) : color;
+  const full = hex.length === 3 ? hex.split('').map((c) => c + c).join('') : hex;
+  const value = parseInt(full, 16);
+  if (Number.isNaN(value)) return [0, 0, 0];
+  return [(value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff];
+};
+
+const formatColor = (r: number, g: number, b: number) =>
+  '#' + [r, g, b].map((c) => c.toString(16).padStart(2, '0')).join('');
+
+/** Zakóduje jeden úsek tahu; `points` jsou absolutní souřadnice [x0, y0, x1, y1, ...]. */
+export const encodeStrokeChunk = (
+  strokeId: number,
+  flags: number,
+  style: StrokeStyle | null,
+  points: number[],
+): ArrayBuffer => {
+  const count = points.length >> 1;
+  const hasStyle = (flags & STROKE_BEGIN) !== 0 && style !== null;
+  const size = 4 + (hasStyle ? 4 : 0) + 2 + count * 4;
+  const buffer = new ArrayBuffer(size);
+  const view = new DataView(buffer);
+  view.setUint8(0, STROKE_PROTOCOL_VERSION);
+  view.setUint8(1, hasStyle ? flags : flags & ~STROKE_BEGIN);
+  view.setUint16(2, strokeId & 0xffff, true);
+  let offset = 4;
+  if (hasStyle) {
+    const [r, g, b] = parseColor(style!.color);
+    view.setUint8(offset, r);
+    view.setUint8(offset + 1, g);
+    view.setUint8(offset + 2, b);
+    view.setUint8(offset + 3, Math.max(1, Math.min(255, Math.round(style!.lineWidth))));
+    offset += 4;
+  }
+  view.setUint16(offset, count, true);
+  offset += 2;
+  let px = 0;
+  let py = 0;
+  for (let i = 0; i < count; i++) {
+    const x = Math.round(points[2 * i]);
+    const y = Math.round(points[2 * i + 1]);
+    view.setInt16(offset, clampI16(i === 0 ? x : x - px), true);
+    view.setInt16(offset + 2, clampI16(i === 0 ? y : y - py), true);
+    px = x;
+    py = y;
+    offset += 4;
+  }
+  return buffer;
+};
+
+/** Rozloží rámec na úseky tahů. Poškozený konec rámce se tiše zahodí. */
+export const decodeStrokeFrame = (buffer: ArrayBuffer): StrokeChunk[] => {
+  const view = new DataView(buffer);
+  const chunks: StrokeChunk[] = [];
+  let offset = 0;
+  while (offset + 6 <= view.byteLength) {
+    if (view.getUint8(offset) !== STROKE_PROTOCOL_VERSION) break;
+    const flags = view.getUint8(offset + 1);
+    const strokeId = view.getUint16(offset + 2, true);
+    offset += 4;
+    let style: StrokeStyle | null = null;
+    if (flags & STROKE_BEGIN) {
+      if (offset + 6 > view.byteLength) break;
+      style = {
+        color: formatColor(view.getUint8(offset), view.getUint8(offset + 1), view.getUint8(offset + 2)),
+        lineWidth: view.getUint8(offset + 3),
+      };
+      offset += 4;
+    }
+    const count = view.getUint16(offset, true);
+    offset += 2;
+    if (offset + count * 4 > view.byteLength) break;
+    const points = new Int16Array(count * 2);
+    let x = 0;
+    let y = 0;
+    for (let i = 0; i < count; i++) {
+      const dx = view.getInt16(offset, true);
+      const dy = view.getInt16(offset + 2, true);
+      x = i === 0 ? dx : x + dx;
+      y = i === 0 ? dy : y + dy;
+      points[2 * i] = x;
+      points[2 * i + 1] = y;
+      offset += 4;
+    }
+    chunks.push({ strokeId, flags, style, points });
+  }
+  return chunks;
+};
+
+/**
+ * Vykresluje přijaté úseky tahů. Pamatuje si styl a poslední bod každého tahu,
+ * aby navazující úsek pokračoval tam, kde předchozí skončil.
+ */
+export class StrokeRenderer {
+  private strokes = new Map<number, { style: StrokeStyle; x: number; y: number }>();
+
+  reset() {
+    this.strokes.clear();
+  }
+
+  drawFrame(ctx: CanvasRenderingContext2D, buffer: ArrayBuffer) {
+    const chunks = decodeStrokeFrame(buffer);
+    if (chunks.length > 0 && chunks[0].flags & STROKE_RESET) {
+      ctx.clearRect(0, 0, ctx.canvas.width, ctx.canvas.height);
+      this.reset();
+    }
+    for (const chunk of chunks) {
+      this.drawChunk(ctx, chunk);
+    }
+  }
+
+  drawChunk(ctx: CanvasRenderingContext2D, chunk: StrokeChunk) {
+    const { strokeId, flags, points } = chunk;
+    if (points.length < 2) return;
+    let state = this.strokes.get(strokeId);
+    if (chunk.style) {
+      state = { style: chunk.style, x: points[0], y: points[1] };
+      this.strokes.set(strokeId, state);
+    }
+    if (!state) return; // začátek tahu nedorazil, nemáme styl
+
+    ctx.save();
+    ctx.strokeStyle = state.style.color;
+    ctx.lineWidth = state.style.lineWidth;
+    ctx.lineJoin = 'round';
+    ctx.lineCap = 'round';
+    ctx.beginPath();
+    ctx.moveTo(state.x, state.y);
+    for (let i = 0; i < points.length; i += 2) {
+      ctx.lineTo(points[i], points[i + 1]);
+    }
+    ctx.stroke();
+    ctx.restore();
+
+    state.x = points[points.length - 2];
+    state.y = points[points.length - 1];
+    if (flags & STROKE_END) this.strokes.delete(strokeId);
+  }
+}
@@ -6,12 +6,16 @@ export const useWebSocket = (socket: WebSocket | null) => {
 
   useEffect(() => {
     if (!socket) return;
+    // Tahy chodí jako binární rámce, chceme je rovnou jako ArrayBuffer
+    socket.binaryType = 'arraybuffer';
 
     const handleOpen = () => setConnectionStatus('connected');
     const handleClose = () => setConnectionStatus('disconnected');
     const handleError = () => setConnectionStatus('disconnected');
 
     const handleMessage = (event: MessageEvent) => {
+      // Binární rámce (tahy) zpracovává přímo Game přes vlastní listener
+      if (typeof event.data !== 'string') return;
       const message = JSON.parse(event.data);
       setLastMessage(message);
     };
@@ -37,5 +41,13 @@ export const useWebSocket = (socket: WebSocket | null) => {
     }
   };
 
-  return { lastMessage, sendMessage, connectionStatus };
+  const sendBinary = (data: ArrayBuffer) => {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(data);
+    } else {
+      console.error('WebSocket is not connected.');
+    }
+  };
+
+  return { lastMessage, sendMessage, sendBinary, connectionStatus };
 };
\ No newline at end of file
@@ -1,3 +1,5 @@
+import { compressionSupported } from './components/frameCompression';
+
 const VITE_BACKEND_URL = import.meta.env.VITE_BACKEND_URL as string | undefined;
 const VITE_BACKEND_WS = import.meta.env.VITE_BACKEND_WS as string | undefined;
 
@@ -30,11 +32,19 @@ export const config = {
       leaderboardAggregate: '/leaderboard/aggregate',
       leaderboardRanking: '/leaderboard/ranking',
       playerStats: (username: string) => `/leaderboard/player/${username}`,
+      gameDrawings: (gameId: number | string) => `/games/${gameId}/drawings`,
+      gameDrawing: (gameId: number | string, round: number) => `/games/${gameId}/drawings/${round}`,
     },
   },
   websocket: {
     // Funkce pro získání celé URL pro konkrétní hru
-    getGameUrl: (gameCode: string, username: string) =>
-      `${websocketUrlBase}/${gameCode}/${username}`,
+    // Velké rámce server komprimuje, jen když prohlížeč umí DecompressionStream
+    getGameUrl: (gameCode: string, username: string, spectator = false) => {
+      const params = new URLSearchParams();
+      if (compressionSupported) params.set('compress', 'deflate');
+      if (spectator) params.set('role', 'spectator');
+      const query = params.toString();
+      return `${websocketUrlBase}/${gameCode}/${username}${query ? `?${query}` : ''}`;
+    },
   },
 };